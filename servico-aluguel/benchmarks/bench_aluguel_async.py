@@ -0,0 +1,193 @@
+"""
+p50/p99 do POST /aluguel: fluxo sequencial síncrono (como era antes) contra
+o handler assíncrono com chamadas concorrentes.
+
+As dependências externas são o servidor local de benchmarks/servidor_stub.py,
+com ``--atraso-resposta`` segundos por chamada; o banco é um TinyDB em
+memória. Cada versão roda num uvicorn em processo próprio e recebe
+``--concorrencia`` clientes simultâneos, disparados de outra thread pool.
+
+Uso (a partir de servico-aluguel):
+    python benchmarks/bench_aluguel_async.py --requisicoes 400 --concorrencia 50 --atraso-resposta 0.02
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from tinydb.storages import MemoryStorage
+
+from benchmarks import servidor_stub
+from database.indices import TinyDBIndexado
+from models.aluguel_model import NovoAluguel, Aluguel
+from repositories.ciclista_repository import CiclistaRepository
+from repositories.aluguel_repository import AluguelRepository
+from routers import aluguel as router_aluguel
+from services.equipamento_service import EquipamentoService
+from services.pagamento_service import PagamentoService
+from services.email_service import EmailService
+from services import http_clientes
+
+
+def popular(ciclistas: int) -> TinyDBIndexado:
+    db = TinyDBIndexado(storage=MemoryStorage)
+    db.table('ciclistas').insert_multiple([
+        {
+            "id": i, "nome": f"Ciclista {i}", "nascimento": "1990-01-01", "cpf": f"{i:011d}",
+            "passaporte": None, "nacionalidade": "BRASILEIRO", "email": f"c{i}@exemplo.com",
+            "senha": "ABC123", "urlFotoDocumento": "https://exemplo.com/foto.jpg",
+            "status": "ATIVO", "dataConfirmacao": datetime.now().isoformat()
+        }
+        for i in range(1, ciclistas + 1)
+    ])
+    return db
+
+
+def app_sequencial(db, url) -> FastAPI:
+    """O fluxo UC03 original: handler síncrono, uma chamada bloqueante por vez"""
+    equipamento = EquipamentoService(base_url=url)
+    pagamento = PagamentoService(base_url=url)
+    email = EmailService(base_url=url)
+    app = FastAPI()
+
+    @app.post("/aluguel", response_model=Aluguel)
+    def alugar(dados: NovoAluguel):
+        ciclista_repo = CiclistaRepository(db)
+        aluguel_repo = AluguelRepository(db)
+        if not ciclista_repo.pode_alugar(dados.ciclista):
+            raise HTTPException(status_code=422, detail="Ciclista não pode alugar")
+        if aluguel_repo.buscar_aluguel_ativo(dados.ciclista):
+            raise HTTPException(status_code=422, detail="Ciclista já possui um aluguel ativo")
+        _, bicicleta = equipamento.obter_bicicleta_tranca(dados.trancaInicio)
+        _, resultado = pagamento.cobrar(10.00, dados.ciclista, "Aluguel SCB")
+        if resultado.get("status") != "PAGA":
+            raise HTTPException(status_code=422, detail="Pagamento não autorizado")
+        cobranca = aluguel_repo.criar_cobranca(10.00, dados.ciclista, "ALUGUEL_INICIAL")
+        equipamento.destrancar(dados.trancaInicio, bicicleta['id'])
+        aluguel = aluguel_repo.criar_aluguel(dados.ciclista, dados.trancaInicio, bicicleta['id'], cobranca.id)
+        ciclista = ciclista_repo.buscar_por_id(dados.ciclista)
+        email.enviar_recibo_aluguel(ciclista.email, ciclista.nome, bicicleta['id'], dados.trancaInicio, 10.00, aluguel.horaInicio)
+        return aluguel
+
+    return app
+
+
+def app_assincrono(db, url) -> FastAPI:
+    """
+    O handler assíncrono do router (alugar_bicicleta_async, o mesmo que
+    ALUGUEL_ASYNC=1 publica), com banco e serviços apontando para o stub.
+    O recibo vai para a outbox (sem entregador rodando), fora do tempo medido.
+    """
+    servicos = dict(
+        equipamento_service=EquipamentoService(base_url=url),
+        pagamento_service=PagamentoService(base_url=url),
+    )
+    patch.object(router_aluguel, "get_db", return_value=db).start()
+    patch.multiple(router_aluguel, **servicos).start()
+    app = FastAPI()
+    app.add_api_route(
+        "/aluguel", router_aluguel.alugar_bicicleta_async, methods=["POST"], response_model=Aluguel
+    )
+    return app
+
+
+def _servir(modo, url, ciclistas, max_conexoes, portas):
+    # O pool não deve ser o gargalo de nenhum dos dois fluxos
+    http_clientes.HTTP_MAX_CONEXOES = http_clientes.HTTP_MAX_KEEPALIVE = max_conexoes
+    fabrica = app_sequencial if modo == "sequencial" else app_assincrono
+    app = fabrica(popular(ciclistas), url)
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        porta = sock.getsockname()[1]
+    portas.put(porta)
+    uvicorn.run(app, host="127.0.0.1", port=porta, log_level="warning", backlog=1024)
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def disparar(url, requisicoes, concorrencia):
+    tempos = []
+    limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+
+    with httpx.Client(base_url=url, limits=limites, timeout=60) as cliente:
+        def alugar(id_ciclista):
+            inicio = time.perf_counter()
+            resposta = cliente.post("/aluguel", json={"ciclista": id_ciclista, "trancaInicio": 1})
+            tempos.append((time.perf_counter() - inicio) * 1000)
+            assert resposta.status_code == 200, resposta.text
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            list(executor.map(alugar, range(1, requisicoes + 1)))
+        duracao = time.perf_counter() - inicio
+
+    return {
+        "p50_ms": round(statistics.median(tempos), 2),
+        "p99_ms": round(percentil(tempos, 99), 2),
+        "req_por_s": round(requisicoes / duracao, 1),
+    }
+
+
+def medir(modo, url_stub, args):
+    """Sobe a versão pedida num uvicorn à parte e mede o POST /aluguel"""
+    portas = multiprocessing.Queue()
+    processo = multiprocessing.Process(
+        target=_servir,
+        args=(modo, url_stub, args.requisicoes, args.concorrencia * 2, portas),
+        daemon=True
+    )
+    processo.start()
+    try:
+        url = f"http://127.0.0.1:{portas.get(timeout=30)}"
+        for _ in range(100):
+            try:
+                httpx.get(url + "/docs")
+                break
+            except httpx.TransportError:
+                time.sleep(0.05)
+        return disparar(url, args.requisicoes, args.concorrencia)
+    finally:
+        processo.terminate()
+        processo.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requisicoes", type=int, default=400)
+    parser.add_argument("--concorrencia", type=int, default=50)
+    parser.add_argument("--atraso-resposta", type=float, default=0.02)
+    args = parser.parse_args()
+
+    servidor, url = servidor_stub.iniciar(atraso_resposta=args.atraso_resposta)
+    try:
+        resultados = {modo: medir(modo, url, args) for modo in ("sequencial", "assincrono")}
+    finally:
+        servidor.shutdown()
+
+    print(json.dumps({
+        "requisicoes": args.requisicoes,
+        "concorrencia": args.concorrencia,
+        "atraso_resposta_s": args.atraso_resposta,
+        "resultados": resultados
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
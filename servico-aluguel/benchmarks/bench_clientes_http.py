@@ -0,0 +1,97 @@
+"""
+Latencia das chamadas externas dos fluxos de aluguel (UC03) e devolucao
+(UC04), com e sem o pool de conexoes compartilhado.
+
+- sem_pool: fecha os clientes apos cada chamada, como o httpx.Client aberto
+  num ``with`` a cada requisicao (uma conexao nova por chamada)
+- pool: clientes compartilhados com keep-alive (services/http_clientes.py)
+
+Os servicos de destino sao o servidor local de benchmarks/servidor_stub.py.
+``--atraso-conexao`` simula o custo do handshake TCP/TLS de cada conexao nova.
+
+Uso (a partir de servico-aluguel):
+    python benchmarks/bench_clientes_http.py --iteracoes 200 --atraso-conexao 0.02
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks import servidor_stub
+from services.http_clientes import fechar_clientes
+from services.equipamento_service import EquipamentoService
+from services.pagamento_service import PagamentoService
+from services.email_service import EmailService
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def fluxos(url):
+    equipamento = EquipamentoService(base_url=url)
+    pagamento = PagamentoService(base_url=url)
+    email = EmailService(base_url=url)
+    return {
+        "aluguel": [
+            lambda: equipamento.obter_bicicleta_tranca(1),
+            lambda: pagamento.cobrar(10.0, 1, "Aluguel SCB"),
+            lambda: equipamento.destrancar(1, 1),
+            lambda: email.enviar_recibo_aluguel("a@b.com", "Ana", 1, 1, 10.0, "10:00"),
+        ],
+        "devolucao": [
+            lambda: equipamento.trancar(1, 1),
+            lambda: email.enviar_recibo_devolucao("a@b.com", "Ana", 1, 1, 30, 10.0, 0.0),
+        ],
+    }
+
+
+def medir(chamadas, iteracoes, com_pool):
+    tempos = []
+    for _ in range(iteracoes):
+        inicio = time.perf_counter()
+        for chamada in chamadas:
+            sucesso, _ = chamada()
+            assert sucesso
+            if not com_pool:
+                fechar_clientes()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    fechar_clientes()
+    return {
+        "p50_ms": round(statistics.median(tempos), 2),
+        "p99_ms": round(percentil(tempos, 99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iteracoes", type=int, default=200)
+    parser.add_argument("--atraso-conexao", type=float, default=0.0)
+    args = parser.parse_args()
+
+    servidor, url = servidor_stub.iniciar(atraso_conexao=args.atraso_conexao)
+    resultados = {}
+    try:
+        for nome, chamadas in fluxos(url).items():
+            resultados[nome] = {
+                "sem_pool": medir(chamadas, args.iteracoes, com_pool=False),
+                "pool": medir(chamadas, args.iteracoes, com_pool=True),
+            }
+    finally:
+        servidor.shutdown()
+
+    print(json.dumps({
+        "iteracoes": args.iteracoes,
+        "atraso_conexao_s": args.atraso_conexao,
+        "resultados": resultados
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Micro-benchmark dos repositórios do servico-aluguel com o banco em escala.
+
+Para cada tamanho em ``--linhas``, cada grupo de tabelas (ciclistas,
+alugueis, outbox, funcionarios) recebe um banco novo num diretório
+temporário, com o storage real do serviço (WALStorage + TinyDBIndexado e a
+mesma configuração de fsync/compactação das variáveis DB_*). O snapshot é
+semeado com dados sintéticos direto no arquivo, fora do tempo medido.
+
+Cada método de repositório é chamado ``--repeticoes`` vezes com IDs
+sorteados (``--semente``); o relatório traz mediana, p90 e máximo em ms.
+Nos métodos que gravam também sai a amplificação de escrita: bytes que o
+processo passou a write() (``wchar`` de /proc/self/io, só no Linux) por
+chamada e, nas inserções, a razão entre isso e o tamanho do documento em
+JSON. A compactação do log é medida à parte (um snapshot completo) e
+rateada pelas criações (primeiro método do grupo) que cabem em
+DB_LIMITE_COMPACTACAO.
+
+Resultado em JSON (stdout ou ``--saida``), para comparar execuções.
+
+Uso (a partir de servico-aluguel):
+    python benchmarks/bench_repositorios.py --linhas 10000 100000 1000000 --saida repositorios.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from database.database import DB_FSYNC, DB_FSYNC_INTERVALO, DB_LIMITE_COMPACTACAO
+from database.indices import TinyDBIndexado
+from database.wal_storage import WALStorage
+from models.cartao_model import NovoCartaoDeCredito
+from models.ciclista_model import NovoCiclista
+from models.funcionario_model import NovoFuncionario
+from repositories.aluguel_repository import AluguelRepository
+from repositories.cartao_repository import CartaoRepository
+from repositories.ciclista_repository import CiclistaRepository
+from repositories.funcionario_repository import FuncionarioRepository
+from repositories.outbox_repository import PENDENTE, ENVIADO, TABELA_OUTBOX, OutboxRepository
+
+AGORA = "2025-01-01T12:00:00"
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def bytes_escritos() -> Optional[int]:
+    """Total de bytes que o processo já passou a write() (None fora do Linux)"""
+    try:
+        with open("/proc/self/io") as f:
+            for linha in f:
+                if linha.startswith("wchar:"):
+                    return int(linha.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def medir(funcao: Callable[[int], object], repeticoes: int, escrita: bool = False) -> dict:
+    """Chama ``funcao(i)`` para i em 0..repeticoes-1 e resume os tempos"""
+    tempos = []
+    antes = bytes_escritos()
+    retorno = None
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        retorno = funcao(i)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    depois = bytes_escritos()
+
+    resultado = {
+        "mediana_ms": round(statistics.median(tempos), 3),
+        "p90_ms": round(percentil(tempos, 90), 3),
+        "max_ms": round(max(tempos), 3),
+    }
+    if escrita and antes is not None:
+        por_chamada = (depois - antes) / repeticoes
+        resultado["bytes_escritos_por_chamada"] = round(por_chamada)
+        if hasattr(retorno, "model_dump_json"):
+            logico = len(retorno.model_dump_json())
+            resultado["bytes_documento"] = logico
+            resultado["amplificacao"] = round(por_chamada / logico, 1)
+    return resultado
+
+
+# ----------------------------------------------------------------------
+# Dados sintéticos
+# ----------------------------------------------------------------------
+
+def ciclista(i: int) -> dict:
+    return {
+        "id": i, "nome": f"Ciclista {i}", "nascimento": "1990-01-01", "cpf": f"{i:011d}",
+        "passaporte": None, "nacionalidade": "BRASILEIRO", "email": f"ciclista{i}@exemplo.com",
+        "senha": "ABC123", "urlFotoDocumento": None, "status": "ATIVO", "dataConfirmacao": AGORA,
+    }
+
+
+def cartao(i: int) -> dict:
+    return {
+        "id": i, "idCiclista": i, "nomeTitular": f"CICLISTA {i}", "numero": "**** **** **** 1111",
+        "numeroCompleto": "4111111111111111", "validade": "12/35", "cvv": "123",
+    }
+
+
+def aluguel(i: int) -> dict:
+    # 1% dos aluguéis em andamento, como num histórico longo
+    em_andamento = i % 100 == 0
+    return {
+        "id": i, "ciclista": i, "trancaInicio": i % 500 + 1, "idBicicleta": i, "horaInicio": AGORA,
+        "trancaFim": None if em_andamento else i % 500 + 2, "horaFim": None if em_andamento else AGORA,
+        "cobranca": i, "cobrancaExtra": None, "status": "EM_ANDAMENTO" if em_andamento else "FINALIZADO",
+    }
+
+
+def cobranca(i: int) -> dict:
+    return {
+        "id": i, "valor": 10.0, "ciclista": i, "status": "PAGA",
+        "horaSolicitacao": AGORA, "horaFinalizacao": AGORA, "tipo": "ALUGUEL",
+    }
+
+
+def email(i: int) -> dict:
+    # 1% ainda pendentes, o resto já enviado
+    pendente = i % 100 == 0
+    return {
+        "id": i, "tipo": "ALUGUEL", "destinatario": f"ciclista{i}@exemplo.com", "assunto": "Recibo",
+        "mensagem": f"Aluguel {i} registrado", "status": PENDENTE if pendente else ENVIADO,
+        "tentativas": 0 if pendente else 1, "criadoEm": AGORA, "proximaTentativa": AGORA,
+        "enviadoEm": None if pendente else AGORA, "ultimoErro": None,
+    }
+
+
+def funcionario(i: int) -> dict:
+    return {
+        "id": i, "matricula": str(i), "nome": f"Funcionario {i}", "idade": 30, "funcao": "REPARADOR",
+        "cpf": f"{i:011d}", "email": f"funcionario{i}@exemplo.com", "senha": "123456",
+    }
+
+
+def escrever_snapshot(path: Path, tabelas: Dict[str, Callable[[int], dict]], linhas: int):
+    """Grava o snapshot documento a documento, sem montar o banco inteiro em memória"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for n, (nome, gerar) in enumerate(tabelas.items()):
+            f.write(("," if n else "") + json.dumps(nome) + ": {")
+            f.write(",".join(f'"{i}": {json.dumps(gerar(i))}' for i in range(1, linhas + 1)))
+            f.write("}")
+        f.write("}")
+
+
+# ----------------------------------------------------------------------
+# Grupos de tabelas
+# ----------------------------------------------------------------------
+
+def medir_ciclistas(db, linhas: int, ids: list, repeticoes: int) -> dict:
+    ciclistas = CiclistaRepository(db)
+    cartoes = CartaoRepository(db)
+
+    def criar(i):
+        n = linhas + i + 1
+        novo = ciclistas.criar(NovoCiclista(
+            nome=f"Ciclista {n}", nascimento="1990-01-01", cpf=f"{n:011d}",
+            email=f"ciclista{n}@exemplo.com", nacionalidade="BRASILEIRO"
+        ), "ABC123")
+        cartoes.criar(novo.id, NovoCartaoDeCredito(
+            nomeTitular=f"CICLISTA {n}", numero="4111111111111111", validade="12/35", cvv="123"
+        ))
+        return novo
+
+    return {
+        "ciclista.criar+cartao.criar": medir(criar, repeticoes, escrita=True),
+        "ciclista.buscar_por_id": medir(lambda i: ciclistas.buscar_por_id(ids[i]), repeticoes),
+        "ciclista.buscar_por_email": medir(lambda i: ciclistas.buscar_por_email(f"ciclista{ids[i]}@exemplo.com"), repeticoes),
+        "ciclista.pode_alugar": medir(lambda i: ciclistas.pode_alugar(ids[i]), repeticoes),
+        "ciclista.ativar": medir(lambda i: ciclistas.ativar(ids[i]), repeticoes, escrita=True),
+        "ciclista.listar": medir(lambda i: ciclistas.listar(), max(1, repeticoes // 10)),
+        "cartao.buscar_por_ciclista": medir(lambda i: cartoes.buscar_por_ciclista(ids[i]), repeticoes),
+        "cartao.listar_pagina(100)": medir(lambda i: cartoes.listar_pagina(100), repeticoes),
+    }
+
+
+def medir_alugueis(db, linhas: int, ids: list, repeticoes: int) -> dict:
+    alugueis = AluguelRepository(db)
+    # IDs múltiplos de 100 têm aluguel em andamento
+    ativos = [max(100, i - i % 100) for i in ids]
+    novos = []
+
+    def criar(i):
+        n = linhas + i + 1
+        novo = alugueis.criar_aluguel(n, 1, n, alugueis.criar_cobranca(10.0, n, "ALUGUEL").id)
+        novos.append(novo.id)
+        return novo
+
+    return {
+        "aluguel.criar_cobranca+criar_aluguel": medir(criar, repeticoes, escrita=True),
+        "aluguel.buscar_aluguel_ativo": medir(lambda i: alugueis.buscar_aluguel_ativo(ativos[i]), repeticoes),
+        "aluguel.buscar_aluguel_ativo_por_bicicleta": medir(
+            lambda i: alugueis.buscar_aluguel_ativo_por_bicicleta(ativos[i]), repeticoes
+        ),
+        "aluguel.finalizar_aluguel": medir(lambda i: alugueis.finalizar_aluguel(novos[i], 2, None), repeticoes, escrita=True),
+    }
+
+
+def medir_outbox(db, linhas: int, ids: list, repeticoes: int) -> dict:
+    outbox = OutboxRepository(db)
+    return {
+        "outbox.enfileirar": medir(
+            lambda i: outbox.enfileirar("ALUGUEL", "c@exemplo.com", "Recibo", f"Mensagem {i}"), repeticoes, escrita=True
+        ),
+        "outbox.pendentes(50)": medir(lambda i: outbox.pendentes(50), repeticoes),
+        "outbox.contar(PENDENTE)": medir(lambda i: outbox.contar(PENDENTE), repeticoes),
+    }
+
+
+def medir_funcionarios(db, linhas: int, ids: list, repeticoes: int) -> dict:
+    funcionarios = FuncionarioRepository(db)
+
+    def criar(i):
+        return funcionarios.criar(NovoFuncionario(
+            nome="Funcionario Novo", idade=30, funcao="REPARADOR", cpf="12345678901",
+            email=f"novo{i}@exemplo.com", senha="123456", confirmacaoSenha="123456"
+        ))
+
+    return {
+        "funcionario.criar": medir(criar, repeticoes, escrita=True),
+        "funcionario.buscar_por_matricula": medir(lambda i: funcionarios.buscar_por_matricula(str(ids[i])), repeticoes),
+        "funcionario.listar_pagina(100)": medir(lambda i: funcionarios.listar_pagina(100), repeticoes),
+    }
+
+
+GRUPOS = {
+    "ciclistas": ({"ciclistas": ciclista, "cartoes": cartao}, medir_ciclistas),
+    "alugueis": ({"alugueis": aluguel, "cobrancas": cobranca}, medir_alugueis),
+    "outbox": ({TABELA_OUTBOX: email}, medir_outbox),
+    "funcionarios": ({"funcionarios": funcionario}, medir_funcionarios),
+}
+
+
+def medir_compactacao(storage: WALStorage, bytes_por_criacao: Optional[int]) -> Optional[dict]:
+    """Custo de um snapshot completo e seu rateio pelas criações entre compactações"""
+    antes = bytes_escritos()
+    if antes is None or not bytes_por_criacao:
+        return None
+    inicio = time.perf_counter()
+    storage.compactar(aguardar=True)
+    duracao = time.perf_counter() - inicio
+    snapshot = bytes_escritos() - antes
+    criacoes = max(1, DB_LIMITE_COMPACTACAO // bytes_por_criacao)
+    return {
+        "bytes_snapshot": snapshot,
+        "duracao_ms": round(duracao * 1000, 1),
+        "criacoes_por_compactacao": criacoes,
+        "bytes_por_criacao_amortizado": round(bytes_por_criacao + snapshot / criacoes),
+    }
+
+
+def medir_grupo(nome: str, linhas: int, repeticoes: int, semente: int) -> dict:
+    tabelas, medir_metodos = GRUPOS[nome]
+    rng = random.Random(semente)
+    ids = [rng.randint(1, linhas) for _ in range(repeticoes)]
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        path = Path(diretorio) / "db.json"
+        inicio = time.perf_counter()
+        escrever_snapshot(path, tabelas, linhas)
+        db = TinyDBIndexado(
+            path, storage=WALStorage, fsync=DB_FSYNC, fsync_intervalo=DB_FSYNC_INTERVALO,
+            limite_compactacao=DB_LIMITE_COMPACTACAO, indent=4, ensure_ascii=False
+        )
+        db.reconstruir_indices()
+        carga = time.perf_counter() - inicio
+
+        try:
+            metodos = medir_metodos(db, linhas, ids, repeticoes)
+            criacao = next(iter(metodos.values())).get("bytes_escritos_por_chamada")
+            return {
+                "snapshot_bytes": path.stat().st_size,
+                "carga_s": round(carga, 2),
+                "metodos": metodos,
+                "compactacao": medir_compactacao(db.storage, criacao),
+            }
+        finally:
+            db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--grupos", nargs="+", choices=list(GRUPOS), default=list(GRUPOS))
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="Arquivo JSON de saída (padrão: stdout)")
+    args = parser.parse_args()
+
+    resultado = {
+        "servico": "aluguel",
+        "storage": {"tipo": "wal", "fsync": DB_FSYNC, "limite_compactacao": DB_LIMITE_COMPACTACAO},
+        "repeticoes": args.repeticoes,
+        "escalas": {},
+    }
+    for linhas in args.linhas:
+        resultado["escalas"][str(linhas)] = {
+            grupo: medir_grupo(grupo, linhas, args.repeticoes, args.semente) for grupo in args.grupos
+        }
+        print(f"{linhas} linhas: ok", file=sys.stderr)
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        Path(args.saida).write_text(texto, encoding="utf-8")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
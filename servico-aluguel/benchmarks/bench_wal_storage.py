@@ -0,0 +1,131 @@
+"""
+Micro-benchmark das escritas no WALStorage em função do tamanho da tabela.
+
+Para cada tamanho em ``--linhas``, uma tabela de cobranças com ``linhas``
+documentos é semeada direto no snapshot (fora do tempo medido) e aberta com
+o storage real do serviço (WALStorage + TinyDBIndexado, fsync desligado para
+medir só o custo em CPU). Depois são medidos insert, update por doc_id e
+remove por doc_id, ``--repeticoes`` vezes cada, com IDs sorteados
+(``--semente``).
+
+Para cada operação o relatório traz mediana, p90 e máximo em ms da chamada
+inteira e a mediana do tempo gasto dentro de ``WALStorage.write`` (montagem
+das entradas do log e append). Como as tabelas são alteradas no lugar e a
+escrita registra só os doc_ids tocados, os tempos não devem crescer com
+``linhas``.
+
+Resultado em JSON (stdout ou ``--saida``), para comparar execuções.
+
+Uso (a partir de servico-aluguel):
+    python benchmarks/bench_wal_storage.py --linhas 10000 100000 --saida wal.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from database.indices import TinyDBIndexado
+from database.wal_storage import WALStorage
+
+TABELA = "cobrancas"
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def cobranca(i: int) -> dict:
+    return {"id": i, "ciclista": i % 1000 + 1, "valor": 10.0, "status": "PAGA"}
+
+
+def medir(db: TinyDBIndexado, funcao: Callable[[int], object], repeticoes: int) -> dict:
+    """Chama ``funcao(i)`` para i em 0..repeticoes-1 e resume os tempos"""
+    storage = db.storage
+    write = storage.write
+    tempos_write: List[float] = []
+
+    def write_medido(data):
+        inicio = time.perf_counter()
+        write(data)
+        tempos_write.append((time.perf_counter() - inicio) * 1000)
+
+    tempos = []
+    storage.write = write_medido
+    try:
+        for i in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao(i)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    finally:
+        del storage.write
+
+    return {
+        "mediana_ms": round(statistics.median(tempos), 4),
+        "p90_ms": round(percentil(tempos, 90), 4),
+        "max_ms": round(max(tempos), 4),
+        "write_mediana_ms": round(statistics.median(tempos_write), 4) if tempos_write else None,
+    }
+
+
+def medir_escala(linhas: int, repeticoes: int, semente: int) -> dict:
+    rng = random.Random(semente)
+    # IDs distintos: cada remove apaga um documento que ainda existe
+    ids = rng.sample(range(1, linhas + 1), repeticoes * 2)
+    atualizar, remover = ids[:repeticoes], ids[repeticoes:]
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        path = Path(diretorio) / "db.json"
+        path.write_text(
+            json.dumps({TABELA: {str(i): cobranca(i) for i in range(1, linhas + 1)}}), encoding="utf-8"
+        )
+        db = TinyDBIndexado(path, storage=WALStorage, fsync="off")
+        db.reconstruir_indices()
+        tabela = db.table(TABELA)
+
+        try:
+            return {
+                "insert": medir(db, lambda i: tabela.insert(cobranca(linhas + 1 + i)), repeticoes),
+                "update": medir(db, lambda i: tabela.update({"status": "PENDENTE"}, doc_ids=[atualizar[i]]), repeticoes),
+                "remove": medir(db, lambda i: tabela.remove(doc_ids=[remover[i]]), repeticoes),
+            }
+        finally:
+            db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeticoes", type=int, default=200)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="Arquivo JSON de saída (padrão: stdout)")
+    args = parser.parse_args()
+
+    resultado = {
+        "servico": "aluguel",
+        "storage": {"tipo": "wal", "fsync": "off"},
+        "repeticoes": args.repeticoes,
+        "escalas": {},
+    }
+    for linhas in args.linhas:
+        resultado["escalas"][str(linhas)] = medir_escala(linhas, args.repeticoes, args.semente)
+        print(f"{linhas} linhas: ok", file=sys.stderr)
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        Path(args.saida).write_text(texto, encoding="utf-8")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+"""
+Teste de carga do fluxo completo de aluguel (UC01, UC02, UC03 e UC04) com os
+três microsserviços rodando localmente.
+
+Cada serviço é copiado para um diretório temporário (sem testes nem bancos
+gravados) e sobe num uvicorn próprio via benchmarks/servir_instrumentado.py;
+o servico-externo roda em modo de simulação de SMTP (sem credenciais). Os
+serviços são ligados entre si pelas variáveis de URL de cada um.
+
+Preparação (fora do tempo medido): um totem com ``--trancas`` trancas, das
+quais ``--bicicletas`` recebem uma bicicleta, integradas em lote pelo
+funcionário inicial do servico-aluguel; e um ciclista ativo por cliente,
+gravado direto no servico-aluguel.
+
+Carga: ``--concorrencia`` clientes simultâneos durante ``--duracao``
+segundos. Cada cliente repete o ciclo alugar (numa tranca com bicicleta) ->
+listagens -> devolver (numa tranca livre). A cada ciclo, com probabilidade
+``--fracao-cadastro``, o cliente antes cadastra e ativa um ciclista novo
+(UC01/UC02) e passa a usá-lo; se o cadastro falhar, segue com o atual. As
+listagens (``--listagens-por-ciclo``) se alternam entre as trancas e
+bicicletas do totem e o aluguel em andamento do ciclista.
+
+Relatório (JSON): por rota, vazão e percentis de latência medidos no cliente
+e dentro de cada serviço; e as chamadas entre serviços (destino, método e
+caminho) feitas durante a carga, com os mesmos percentis.
+
+Uso (a partir de servico-aluguel):
+    python benchmarks/carga_fluxo_aluguel.py --concorrencia 16 --duracao 30
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from queue import Empty, Queue
+
+import httpx
+
+RAIZ = Path(__file__).resolve().parents[2]
+LANCADOR = Path(__file__).resolve().parent / "servir_instrumentado.py"
+
+SERVICOS = ("aluguel", "equipamento", "externo")
+
+# Nada de testes, relatórios ou bancos gravados na cópia dos serviços
+IGNORAR = shutil.ignore_patterns(
+    "tests", "__pycache__", ".pytest_cache", "coverage.xml", "db.json", "*.wal", "*.wal.old",
+    "equipamentos.json", "externos.json", "*.sqlite3*"
+)
+
+# O servico-aluguel busca o funcionário pela matrícula (a do funcionário inicial)
+ID_FUNCIONARIO = 12345
+
+CARTAO = {"nomeTitular": "CICLISTA CARGA", "numero": "4111111111111111", "validade": "12/35", "cvv": "123"}
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def resumir(tempos, duracao=None):
+    resumo = {
+        "requisicoes": len(tempos),
+        "p50_ms": round(statistics.median(tempos), 2),
+        "p90_ms": round(percentil(tempos, 90), 2),
+        "p99_ms": round(percentil(tempos, 99), 2),
+        "max_ms": round(max(tempos), 2),
+    }
+    if duracao:
+        resumo["req_por_s"] = round(len(tempos) / duracao, 1)
+    return resumo
+
+
+def porta_livre() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Servicos:
+    """Os três serviços em processos próprios, a partir de cópias temporárias"""
+
+    def __init__(self, diretorio: Path):
+        self.diretorio = diretorio
+        self.portas = {nome: porta_livre() for nome in SERVICOS}
+        self.urls = {nome: f"http://127.0.0.1:{porta}" for nome, porta in self.portas.items()}
+        self.processos = {}
+
+    def iniciar(self):
+        ambiente = dict(
+            os.environ,
+            # servico-aluguel
+            SERVICO_EQUIPAMENTO_URL=self.urls["equipamento"],
+            SERVICO_EXTERNO_URL=self.urls["externo"],
+            BASE_URL=self.urls["aluguel"],
+            # servico-equipamento
+            BASE_URL_ALUGUEL=self.urls["aluguel"],
+            BASE_URL_EXTERNO=self.urls["externo"],
+            # servico-externo em modo de simulação de SMTP
+            SMTP_USERNAME="",
+            SMTP_PASSWORD="",
+            CARGA_DESTINOS=json.dumps({f"127.0.0.1:{porta}": nome for nome, porta in self.portas.items()}),
+            PYTHONUNBUFFERED="1",
+        )
+        for nome in SERVICOS:
+            copia = self.diretorio / f"servico-{nome}"
+            shutil.copytree(RAIZ / f"servico-{nome}", copia, ignore=IGNORAR)
+            log = open(self.diretorio / f"{nome}.log", "w")
+            self.processos[nome] = subprocess.Popen(
+                [sys.executable, str(LANCADOR), "--diretorio", str(copia), "--porta", str(self.portas[nome])],
+                env=ambiente, stdout=log, stderr=subprocess.STDOUT,
+            )
+
+        for nome, url in self.urls.items():
+            self._aguardar(nome, url)
+
+    def _aguardar(self, nome, url, timeout=60):
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
+            if self.processos[nome].poll() is not None:
+                raise RuntimeError(f"servico-{nome} terminou ao iniciar; veja {self.diretorio / (nome + '.log')}")
+            try:
+                if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            time.sleep(0.1)
+        raise RuntimeError(f"servico-{nome} não respondeu em {timeout}s")
+
+    def zerar_tempos(self):
+        for url in self.urls.values():
+            httpx.post(f"{url}/_carga/zerar", timeout=10).raise_for_status()
+
+    def tempos(self):
+        return {nome: httpx.get(f"{url}/_carga/tempos", timeout=30).json() for nome, url in self.urls.items()}
+
+    def parar(self):
+        for processo in self.processos.values():
+            processo.terminate()
+        for processo in self.processos.values():
+            try:
+                processo.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                processo.kill()
+
+
+def preparar_equipamentos(equipamento: httpx.Client, trancas: int, bicicletas: int):
+    """Cria o totem, as trancas e as bicicletas e integra tudo de uma vez"""
+    totem = equipamento.post("/totem", json={"localizacao": "Carga", "descricao": "Totem do teste de carga"})
+    totem.raise_for_status()
+    id_totem = totem.json()["id"]
+
+    novas_trancas = equipamento.post("/tranca/lote", json=[
+        {"numero": 100000 + i, "localizacao": "Carga", "anoDeFabricacao": "2024", "modelo": "Carga", "status": "NOVA"}
+        for i in range(trancas)
+    ]).json()
+    novas_bicicletas = equipamento.post("/bicicleta/lote", json=[
+        {"marca": "Carga", "modelo": "Carga", "ano": "2024", "numero": 100000 + i, "status": "NOVA"}
+        for i in range(bicicletas)
+    ]).json()
+    ids_trancas = [r["item"]["id"] for r in novas_trancas]
+    ids_bicicletas = [r["item"]["id"] for r in novas_bicicletas]
+
+    itens = [
+        {"idTranca": id_tranca, "idBicicleta": ids_bicicletas[i] if i < len(ids_bicicletas) else None}
+        for i, id_tranca in enumerate(ids_trancas)
+    ]
+    resposta = equipamento.post(f"/totem/{id_totem}/integrarNaRede", json={
+        "idFuncionario": ID_FUNCIONARIO,
+        "itens": [{k: v for k, v in item.items() if v is not None} for item in itens]
+    })
+    if resposta.status_code != 200 or resposta.json()["integrados"] != len(itens):
+        raise RuntimeError(f"Integração incompleta: {resposta.text}")
+
+    ocupadas = Queue()
+    livres = Queue()
+    for item in itens:
+        if item["idBicicleta"] is None:
+            livres.put(item["idTranca"])
+        else:
+            ocupadas.put((item["idTranca"], item["idBicicleta"]))
+    return id_totem, ocupadas, livres
+
+
+def preparar_ciclistas(url_aluguel: str, quantidade: int) -> Queue:
+    """Um ciclista ativo (com cartão) para cada cliente"""
+    resposta = httpx.post(f"{url_aluguel}/_carga/ciclistas", params={"quantidade": quantidade}, timeout=60)
+    resposta.raise_for_status()
+    ciclistas = Queue()
+    for id_ciclista in resposta.json():
+        ciclistas.put(id_ciclista)
+    return ciclistas
+
+
+class Carga:
+    """Clientes simultâneos repetindo o ciclo cadastro -> aluguel -> devolução"""
+
+    def __init__(self, urls, id_totem, ocupadas, livres, ciclistas, args):
+        limites = httpx.Limits(max_connections=args.concorrencia, max_keepalive_connections=args.concorrencia)
+        self.clientes = {
+            nome: httpx.Client(base_url=url, limits=limites, timeout=60) for nome, url in urls.items()
+        }
+        self.id_totem = id_totem
+        self.ocupadas = ocupadas
+        self.livres = livres
+        self.ciclistas = ciclistas
+        self.args = args
+        self._lock = threading.Lock()
+        self._sequencia = 0
+        self.tempos = defaultdict(list)
+        self.falhas = defaultdict(int)
+
+    def fechar(self):
+        for cliente in self.clientes.values():
+            cliente.close()
+
+    def _chamar(self, servico, metodo, rota, caminho, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            resposta = self.clientes[servico].request(metodo, caminho, **kwargs)
+        except httpx.HTTPError:
+            resposta = None
+        ms = (time.perf_counter() - inicio) * 1000
+        chave = (servico, metodo, rota)
+        with self._lock:
+            self.tempos[chave].append(ms)
+            if resposta is None or resposta.status_code >= 400:
+                self.falhas[chave] += 1
+        return resposta if resposta is not None and resposta.status_code < 400 else None
+
+    def cadastrar(self):
+        with self._lock:
+            self._sequencia += 1
+            n = self._sequencia
+        ciclista = self._chamar("aluguel", "POST", "/ciclista", "/ciclista", json={
+            "dados": {
+                "ciclista": {
+                    "nome": f"Ciclista Carga {n}", "nascimento": "1990-01-01", "cpf": f"{90000000000 + n:011d}",
+                    "email": f"carga{n}@exemplo.com", "nacionalidade": "BRASILEIRO",
+                    "urlFotoDocumento": "https://exemplo.com/foto.jpg"
+                },
+                "senha": "senha123",
+                "confirmacaoSenha": "senha123"
+            },
+            "meio_pagamento": CARTAO
+        })
+        if ciclista is None:
+            return None
+        id_ciclista = ciclista.json()["id"]
+        ativado = self._chamar(
+            "aluguel", "POST", "/ciclista/{idCiclista}/ativar", f"/ciclista/{id_ciclista}/ativar"
+        )
+        return id_ciclista if ativado is not None else None
+
+    def listar(self, id_ciclista):
+        escolha = random.randrange(3)
+        if escolha == 0:
+            self._chamar("equipamento", "GET", "/totem/{id_totem}/trancas", f"/totem/{self.id_totem}/trancas")
+        elif escolha == 1:
+            self._chamar("equipamento", "GET", "/totem/{id_totem}/bicicletas", f"/totem/{self.id_totem}/bicicletas")
+        else:
+            self._chamar(
+                "aluguel", "GET", "/ciclista/{idCiclista}/bicicletaAlugada", f"/ciclista/{id_ciclista}/bicicletaAlugada"
+            )
+
+    def ciclo(self, id_ciclista):
+        """Um aluguel completo; devolve as trancas às filas mesmo se algo falhar"""
+        try:
+            id_tranca, id_bicicleta = self.ocupadas.get(timeout=5)
+        except Empty:
+            return
+        aluguel = self._chamar("aluguel", "POST", "/aluguel", "/aluguel", json={
+            "ciclista": id_ciclista, "trancaInicio": id_tranca
+        })
+        if aluguel is None:
+            self.ocupadas.put((id_tranca, id_bicicleta))
+            return
+        self.livres.put(id_tranca)
+
+        for _ in range(self.args.listagens_por_ciclo):
+            self.listar(id_ciclista)
+
+        id_tranca_fim = self.livres.get()
+        devolucao = self._chamar("aluguel", "POST", "/devolucao", "/devolucao", json={
+            "idTranca": id_tranca_fim, "idBicicleta": id_bicicleta
+        })
+        if devolucao is None:
+            self.livres.put(id_tranca_fim)
+        else:
+            self.ocupadas.put((id_tranca_fim, id_bicicleta))
+
+    def cliente(self, fim):
+        id_ciclista = self.ciclistas.get()
+        while time.monotonic() < fim:
+            if random.random() < self.args.fracao_cadastro:
+                id_ciclista = self.cadastrar() or id_ciclista
+            self.ciclo(id_ciclista)
+
+    def executar(self):
+        inicio = time.perf_counter()
+        fim = time.monotonic() + self.args.duracao
+        with ThreadPoolExecutor(max_workers=self.args.concorrencia) as executor:
+            for futuro in [executor.submit(self.cliente, fim) for _ in range(self.args.concorrencia)]:
+                futuro.result()
+        return time.perf_counter() - inicio
+
+
+def agrupar_amostras(amostras):
+    """Junta as amostras dos serviços, descartando o status do fim da chave"""
+    grupos = defaultdict(list)
+    status = defaultdict(lambda: defaultdict(int))
+    for amostra in amostras:
+        *chave, codigo = amostra["chave"]
+        grupos[tuple(chave)].extend(amostra["ms"])
+        status[tuple(chave)][codigo] += len(amostra["ms"])
+    return grupos, status
+
+
+def relatorio(carga: Carga, tempos_servicos, duracao, args):
+    cliente = {}
+    for (servico, metodo, rota), tempos in sorted(carga.tempos.items()):
+        cliente[f"{servico} {metodo} {rota}"] = dict(resumir(tempos, duracao), falhas=carga.falhas[(servico, metodo, rota)])
+
+    servidor = {}
+    chamadas = {}
+    for nome, tempos in tempos_servicos.items():
+        grupos, status = agrupar_amostras(tempos["requisicoes"])
+        for (metodo, rota), ms in sorted(grupos.items()):
+            servidor[f"{nome} {metodo} {rota}"] = dict(resumir(ms, duracao), status=dict(status[(metodo, rota)]))
+
+        grupos, status = agrupar_amostras(tempos["chamadas"])
+        for (destino, metodo, caminho), ms in sorted(grupos.items()):
+            chamadas[f"{nome} -> {destino} {metodo} {caminho}"] = dict(
+                resumir(ms, duracao), status=dict(status[(destino, metodo, caminho)])
+            )
+
+    return {
+        "concorrencia": args.concorrencia,
+        "duracao_s": round(duracao, 2),
+        "trancas": args.trancas,
+        "bicicletas": args.bicicletas,
+        "listagens_por_ciclo": args.listagens_por_ciclo,
+        "fracao_cadastro": args.fracao_cadastro,
+        "cliente": cliente,
+        "servidor": servidor,
+        "chamadas_entre_servicos": chamadas,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concorrencia", type=int, default=16)
+    parser.add_argument("--duracao", type=float, default=30, help="Segundos de carga")
+    parser.add_argument("--trancas", type=int, default=None, help="Padrão: 4x a concorrência")
+    parser.add_argument("--bicicletas", type=int, default=None, help="Padrão: 2x a concorrência")
+    parser.add_argument("--listagens-por-ciclo", type=int, default=3)
+    parser.add_argument("--fracao-cadastro", type=float, default=0.1)
+    parser.add_argument("--semente", type=int, default=None)
+    parser.add_argument("--saida", help="Também grava o relatório neste arquivo")
+    args = parser.parse_args()
+    args.bicicletas = args.bicicletas or 2 * args.concorrencia
+    args.trancas = args.trancas or 4 * args.concorrencia
+    if args.trancas <= args.bicicletas:
+        parser.error("--trancas precisa ser maior que --bicicletas (as devoluções precisam de trancas livres)")
+    random.seed(args.semente)
+
+    with tempfile.TemporaryDirectory(prefix="carga-scb-") as diretorio:
+        servicos = Servicos(Path(diretorio))
+        try:
+            servicos.iniciar()
+            with httpx.Client(base_url=servicos.urls["equipamento"], timeout=60) as equipamento:
+                id_totem, ocupadas, livres = preparar_equipamentos(equipamento, args.trancas, args.bicicletas)
+            ciclistas = preparar_ciclistas(servicos.urls["aluguel"], args.concorrencia)
+            servicos.zerar_tempos()
+
+            carga = Carga(servicos.urls, id_totem, ocupadas, livres, ciclistas, args)
+            try:
+                duracao = carga.executar()
+            finally:
+                carga.fechar()
+            resultado = relatorio(carga, servicos.tempos(), duracao, args)
+        finally:
+            servicos.parar()
+
+    saida = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        Path(args.saida).write_text(saida + "\n", encoding="utf-8")
+    print(saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Servidor HTTP local que imita as rotas do servico-equipamento e do
+servico-externo usadas pelo fluxo de aluguel/devolucao.
+
+Roda em outro processo, sobre asyncio (HTTP/1.1 com keep-alive), para que
+ele proprio nao seja o gargalo quando muitas requisicoes chegam juntas.
+
+Opcoes para aproximar o custo de producao:
+- atraso_conexao: segundos gastos ao aceitar cada conexao nova (simula o
+  handshake TCP/TLS ate o Render)
+- atraso_resposta: segundos gastos em cada requisicao
+"""
+
+import asyncio
+import json
+import multiprocessing
+from typing import Tuple
+
+RESPOSTAS = {
+    ("GET", "/bicicleta"): {"id": 1, "status": "DISPONIVEL", "numero": 1},
+    ("POST", "/cobranca"): {"id": 1, "status": "PAGA", "valor": 10.0},
+    ("POST", "/destrancar"): {"id": 1, "status": "LIVRE"},
+    ("POST", "/trancar"): {"id": 1, "status": "OCUPADA"},
+    ("POST", "/email/enviar"): {"id": 1, "status": "ENVIADO"},
+}
+
+
+def _resposta(metodo: str, caminho: str) -> bytes:
+    corpo = next(
+        (r for (m, sufixo), r in RESPOSTAS.items() if m == metodo and caminho.endswith(sufixo)),
+        {}
+    )
+    dados = json.dumps(corpo).encode()
+    cabecalho = (
+        "HTTP/1.1 200 OK\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(dados)}\r\n"
+        "\r\n"
+    ).encode()
+    return cabecalho + dados
+
+
+async def _atender(reader, writer, atraso_conexao: float, atraso_resposta: float):
+    await asyncio.sleep(atraso_conexao)
+    try:
+        while True:
+            linha = await reader.readline()
+            if not linha:
+                break
+            metodo, caminho, _ = linha.decode().split(" ", 2)
+            tamanho = 0
+            while True:
+                cabecalho = await reader.readline()
+                if cabecalho in (b"\r\n", b""):
+                    break
+                nome, _, valor = cabecalho.decode().partition(":")
+                if nome.lower() == "content-length":
+                    tamanho = int(valor)
+            if tamanho:
+                await reader.readexactly(tamanho)
+            await asyncio.sleep(atraso_resposta)
+            writer.write(_resposta(metodo, caminho))
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+def _servir(atraso_conexao: float, atraso_resposta: float, portas):
+    async def principal():
+        servidor = await asyncio.start_server(
+            lambda r, w: _atender(r, w, atraso_conexao, atraso_resposta),
+            "127.0.0.1", 0, backlog=1024
+        )
+        portas.put(servidor.sockets[0].getsockname()[1])
+        await servidor.serve_forever()
+
+    asyncio.run(principal())
+
+
+class ServidorStub:
+    """Servidor stub rodando em outro processo (nao disputa o GIL com o benchmark)"""
+
+    def __init__(self, atraso_conexao: float, atraso_resposta: float):
+        portas = multiprocessing.Queue()
+        self._processo = multiprocessing.Process(
+            target=_servir, args=(atraso_conexao, atraso_resposta, portas), daemon=True
+        )
+        self._processo.start()
+        self.url = f"http://127.0.0.1:{portas.get(timeout=10)}"
+
+    def shutdown(self):
+        self._processo.terminate()
+        self._processo.join()
+
+
+def iniciar(atraso_conexao: float = 0.0, atraso_resposta: float = 0.0) -> Tuple[ServidorStub, str]:
+    """Sobe o servidor numa porta livre em segundo plano e retorna (servidor, url)"""
+    servidor = ServidorStub(atraso_conexao, atraso_resposta)
+    return servidor, servidor.url
@@ -0,0 +1,193 @@
+"""
+Sobe um dos microsserviços num uvicorn medindo o tempo de cada requisição.
+
+Usado por benchmarks/carga_fluxo_aluguel.py, que roda este arquivo como
+processo próprio para cada serviço (a partir de uma cópia do diretório do
+serviço, para não tocar no banco versionado). Além de servir o ``main.app``
+do serviço, o processo:
+
+- mede cada requisição recebida, agrupada por método, rota (o template, ex.
+  ``/tranca/{id_tranca}/bicicleta``) e status;
+- mede cada chamada feita a outro serviço pelo httpx (síncrono e assíncrono),
+  agrupada por serviço de destino, método e caminho com os IDs trocados por
+  ``{id}``;
+- expõe ``GET /_carga/tempos`` com as amostras (em ms) e
+  ``POST /_carga/zerar`` para descartá-las depois da preparação dos dados;
+- no servico-aluguel, expõe ``POST /_carga/ciclistas?quantidade=N``, que
+  grava ciclistas já ativos (com cartão) direto pelos repositórios, sem passar
+  pela validação de cartão no servico-externo.
+
+Uso (normalmente feito pelo carga_fluxo_aluguel.py):
+    python benchmarks/servir_instrumentado.py --diretorio /tmp/copia/servico-equipamento --porta 8000
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+# Destinos conhecidos: "host:porta" -> nome do serviço
+DESTINOS: Dict[str, str] = json.loads(os.getenv("CARGA_DESTINOS", "{}"))
+
+_SEGMENTO_ID = re.compile(r"/\d+(?=/|$)")
+
+
+class Amostras:
+    """Tempos em ms agrupados por chave, compartilhados entre threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tempos: Dict[Tuple[str, ...], List[float]] = defaultdict(list)
+
+    def registrar(self, chave: Tuple[str, ...], ms: float):
+        with self._lock:
+            self._tempos[chave].append(ms)
+
+    def exportar(self) -> List[dict]:
+        with self._lock:
+            return [{"chave": list(chave), "ms": list(tempos)} for chave, tempos in self._tempos.items()]
+
+    def zerar(self):
+        with self._lock:
+            self._tempos.clear()
+
+
+requisicoes = Amostras()
+chamadas = Amostras()
+
+
+def _chave_chamada(request: httpx.Request, resposta) -> Tuple[str, ...]:
+    url = urlsplit(str(request.url))
+    destino = DESTINOS.get(url.netloc, url.netloc)
+    status = str(resposta.status_code) if resposta is not None else "erro"
+    return destino, request.method, _SEGMENTO_ID.sub("/{id}", url.path), status
+
+
+def instrumentar_httpx():
+    """Mede toda chamada de saída feita pelos clientes httpx do processo"""
+    send_sincrono = httpx.Client.send
+    send_assincrono = httpx.AsyncClient.send
+
+    def send(self, request, *args, **kwargs):
+        inicio = time.perf_counter()
+        resposta = None
+        try:
+            resposta = send_sincrono(self, request, *args, **kwargs)
+            return resposta
+        finally:
+            chamadas.registrar(_chave_chamada(request, resposta), (time.perf_counter() - inicio) * 1000)
+
+    async def send_async(self, request, *args, **kwargs):
+        inicio = time.perf_counter()
+        resposta = None
+        try:
+            resposta = await send_assincrono(self, request, *args, **kwargs)
+            return resposta
+        finally:
+            chamadas.registrar(_chave_chamada(request, resposta), (time.perf_counter() - inicio) * 1000)
+
+    httpx.Client.send = send
+    httpx.AsyncClient.send = send_async
+
+
+class MedidorRequisicoes:
+    """Middleware ASGI que mede o tempo de cada requisição HTTP recebida"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/_carga/"):
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        status = ["erro"]
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                status[0] = str(mensagem["status"])
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            # O FastAPI grava a rota encontrada no scope durante o roteamento
+            rota = getattr(scope.get("route"), "path", None) or "(sem rota)"
+            requisicoes.registrar((scope["method"], rota, status[0]), (time.perf_counter() - inicio) * 1000)
+
+
+def carregar_app(diretorio: str):
+    os.chdir(diretorio)
+    sys.path.insert(0, diretorio)
+    instrumentar_httpx()
+
+    from main import app
+
+    @app.get("/_carga/tempos", include_in_schema=False)
+    def tempos():
+        return {"requisicoes": requisicoes.exportar(), "chamadas": chamadas.exportar()}
+
+    @app.post("/_carga/zerar", include_in_schema=False)
+    def zerar():
+        requisicoes.zerar()
+        chamadas.zerar()
+        return {"ok": True}
+
+    if os.path.exists(os.path.join(diretorio, "repositories", "ciclista_repository.py")):
+        _rota_ciclistas(app)
+
+    app.add_middleware(MedidorRequisicoes)
+    return app
+
+
+def _rota_ciclistas(app):
+    from database.database import get_db, transacao
+    from models.cartao_model import NovoCartaoDeCredito
+    from models.ciclista_model import NovoCiclista
+    from repositories.cartao_repository import CartaoRepository
+    from repositories.ciclista_repository import CiclistaRepository
+
+    @app.post("/_carga/ciclistas", include_in_schema=False)
+    def criar_ciclistas(quantidade: int):
+        db = get_db()
+        ciclista_repo = CiclistaRepository(db)
+        cartao_repo = CartaoRepository(db)
+        ids = []
+        with transacao(db):
+            for _ in range(quantidade):
+                n = len(ids) + 1
+                ciclista = ciclista_repo.criar(NovoCiclista(
+                    nome=f"Ciclista Preparado {n}", nascimento="1990-01-01", cpf=f"{80000000000 + n:011d}",
+                    email=f"preparado{n}@exemplo.com", nacionalidade="BRASILEIRO"
+                ), "senha123")
+                cartao_repo.criar(ciclista.id, NovoCartaoDeCredito(
+                    nomeTitular="CICLISTA PREPARADO", numero="4111111111111111", validade="12/35", cvv="123"
+                ))
+                ciclista_repo.ativar(ciclista.id)
+                ids.append(ciclista.id)
+        return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--diretorio", required=True, help="Diretório do serviço (com o main.py)")
+    parser.add_argument("--porta", type=int, required=True)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    app = carregar_app(os.path.abspath(args.diretorio))
+    uvicorn.run(app, host="127.0.0.1", port=args.porta, log_level="warning", backlog=2048)
+
+
+if __name__ == "__main__":
+    main()
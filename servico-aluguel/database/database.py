@@ -1,10 +1,21 @@
 """Configuração do banco de dados TinyDB"""
 
+import os
+from contextlib import nullcontext
 from tinydb import TinyDB
 from pathlib import Path
 
+from database.wal_storage import WALStorage
+from database.indices import TinyDBIndexado
+
 DB_PATH = Path(__file__).parent.parent / "db.json"
 
+# Política de fsync do log de escrita: always | interval | off
+DB_FSYNC = os.getenv("DB_FSYNC", "interval")
+DB_FSYNC_INTERVALO = float(os.getenv("DB_FSYNC_INTERVALO", "1.0"))
+# Tamanho do log (bytes) a partir do qual ele é compactado no snapshot
+DB_LIMITE_COMPACTACAO = int(os.getenv("DB_LIMITE_COMPACTACAO", str(4 * 1024 * 1024)))
+
 _db_instance = None
 
 def get_db() -> TinyDB:
@@ -12,11 +23,32 @@ def get_db() -> TinyDB:
     global _db_instance
 
     if _db_instance is None:
-        _db_instance = TinyDB(DB_PATH, indent=4, ensure_ascii=False)
-        print(f"✓ Banco de dados TinyDB inicializado em: {DB_PATH}")
+        _db_instance = TinyDBIndexado(
+            DB_PATH,
+            storage=WALStorage,
+            fsync=DB_FSYNC,
+            fsync_intervalo=DB_FSYNC_INTERVALO,
+            limite_compactacao=DB_LIMITE_COMPACTACAO,
+            indent=4,
+            ensure_ascii=False
+        )
+        # Índices secundários vivem só em memória: reconstrói a partir do storage
+        _db_instance.reconstruir_indices()
+        print(f"✓ Banco de dados TinyDB inicializado em: {DB_PATH} (fsync={DB_FSYNC})")
 
     return _db_instance
 
+def transacao(db: TinyDB):
+    """
+    Agrupa as escritas de uma operação de negócio (várias tabelas) numa
+    única gravação do log, quando o storage suporta. Se o bloco lançar uma
+    exceção, as escritas feitas nele são desfeitas (tabelas, índices e cache
+    de consultas) e nada vai para o log. Em outros storages (ex.:
+    MemoryStorage nos testes) não altera nada.
+    """
+    agrupar = getattr(db.storage, "agrupar", None)
+    return agrupar() if agrupar else nullcontext()
+
 def close_db():
     """Fecha a conexão com o banco de dados"""
     global _db_instance
@@ -0,0 +1,526 @@
+"""
+Índices hash secundários sobre as tabelas do TinyDB.
+
+O TinyDB responde toda consulta varrendo a tabela. Aqui cada tabela declarada
+em ``INDICES`` mantém, em memória, mapas ``valor -> doc_ids`` para os campos
+mais consultados. Os mapas são atualizados em insert/update/remove/truncate e
+reconstruídos a partir do storage na inicialização.
+
+Os repositórios continuam usando ``table.get(Query().campo == valor)``: quando
+a Query tem igualdades que cobrem um índice, só os documentos indicados por ele
+são avaliados; qualquer outra Query cai na varredura normal do TinyDB.
+Índices únicos rejeitam inserções/atualizações que dupliquem o valor.
+Índices parciais (``onde``) só guardam os documentos que atendem a um filtro
+fixo, como os aluguéis em andamento, e ficam do tamanho desse subconjunto.
+"""
+
+import threading
+from collections.abc import MutableMapping
+from contextlib import ExitStack
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+from tinydb import TinyDB
+from tinydb.table import Document, Table
+
+
+class Indice(NamedTuple):
+    """
+    Definição de um índice: campos que compõem a chave, se ela é única e,
+    opcionalmente, pares (campo, valor) que um documento precisa ter para
+    entrar no índice (índice parcial).
+    """
+    campos: Tuple[str, ...]
+    unico: bool = False
+    onde: Tuple[Tuple[str, object], ...] = ()
+
+
+# Índices declarados por tabela
+INDICES: Dict[str, Tuple[Indice, ...]] = {
+    'ciclistas': (
+        Indice(('id',), unico=True),
+        Indice(('email',), unico=True),
+        Indice(('cpf',), unico=True),
+    ),
+    'cartoes': (
+        Indice(('id',), unico=True),
+        Indice(('idCiclista',)),
+    ),
+    'alugueis': (
+        Indice(('id',), unico=True),
+        # Aluguéis ativos por ciclista e por bicicleta: não crescem com o histórico
+        Indice(('ciclista',), onde=(('status', 'EM_ANDAMENTO'),)),
+        Indice(('idBicicleta',), onde=(('status', 'EM_ANDAMENTO'),)),
+    ),
+    'funcionarios': (
+        Indice(('matricula',), unico=True),
+    ),
+    'cobrancas': (
+        Indice(('id',), unico=True),
+    ),
+    'outbox_emails': (
+        # Só os emails ainda a enviar: o worker não relê o histórico enviado
+        Indice(('status',), onde=(('status', 'PENDENTE'),)),
+    ),
+}
+
+
+class ViolacaoIndiceUnico(ValueError):
+    """Inserção ou atualização duplicaria o valor de um índice único"""
+
+    def __init__(self, tabela: str, campos: Tuple[str, ...], valor: tuple):
+        self.tabela = tabela
+        self.campos = campos
+        self.valor = valor
+        super().__init__(
+            f"Valor duplicado para {', '.join(campos)} em '{tabela}': "
+            f"{', '.join(str(v) for v in valor)}"
+        )
+
+
+def _igualdades(hashval) -> Optional[Dict[str, object]]:
+    """
+    Extrai de um ``Query._hash`` as igualdades simples (campo == valor),
+    inclusive dentro de ``&`` aninhados. Retorna None se não houver nenhuma.
+    """
+    if not isinstance(hashval, tuple) or not hashval:
+        return None
+
+    if hashval[0] == '==' and len(hashval) == 3 and len(hashval[1]) == 1:
+        return {hashval[1][0]: hashval[2]}
+
+    if hashval[0] == 'and':
+        resultado: Dict[str, object] = {}
+        for termo in hashval[1]:
+            resultado.update(_igualdades(termo) or {})
+        return resultado or None
+
+    return None
+
+
+class _IndiceHash:
+    def __init__(self, definicao: Indice):
+        self.definicao = definicao
+        self._mapa: Dict[tuple, Set[int]] = {}
+        self._chaves: Dict[int, tuple] = {}
+
+    def chave(self, doc: Mapping) -> Optional[tuple]:
+        for campo, valor in self.definicao.onde:
+            if doc.get(campo) != valor:
+                return None
+        try:
+            return tuple(doc[campo] for campo in self.definicao.campos)
+        except KeyError:
+            # Documento sem o campo nunca atende a uma igualdade sobre ele
+            return None
+
+    def ids(self, chave: tuple) -> Set[int]:
+        try:
+            return self._mapa.get(chave, set())
+        except TypeError:
+            # Valor não hasheável (lista/dict) nunca está no índice
+            return set()
+
+    def adicionar(self, doc_id: int, doc: Mapping):
+        chave = self.chave(doc)
+        if chave is None:
+            return
+        try:
+            self._mapa.setdefault(chave, set()).add(doc_id)
+        except TypeError:
+            return
+        self._chaves[doc_id] = chave
+
+    def remover(self, doc_id: int):
+        chave = self._chaves.pop(doc_id, None)
+        if chave is None:
+            return
+        ids = self._mapa.get(chave)
+        if ids is not None:
+            ids.discard(doc_id)
+            if not ids:
+                del self._mapa[chave]
+
+    def limpar(self):
+        self._mapa.clear()
+        self._chaves.clear()
+
+
+class IndicesDaTabela:
+    """Conjunto de índices de uma tabela, compartilhado por todas as instâncias dela"""
+
+    def __init__(self, nome: str, definicoes: Iterable[Indice]):
+        self.nome = nome
+        self.lock = threading.RLock()
+        self.indices = [_IndiceHash(d) for d in definicoes]
+        self.construido = False
+
+    def reconstruir(self, tabela: Mapping[str, Mapping]):
+        with self.lock:
+            self.limpar()
+            for doc_id, doc in tabela.items():
+                self.indexar(int(doc_id), doc)
+            self.construido = True
+
+    def limpar(self):
+        with self.lock:
+            for indice in self.indices:
+                indice.limpar()
+
+    def indexar(self, doc_id: int, doc: Mapping):
+        for indice in self.indices:
+            indice.adicionar(doc_id, doc)
+
+    def desindexar(self, doc_id: int):
+        for indice in self.indices:
+            indice.remover(doc_id)
+
+    def verificar_unicidade(self, doc: Mapping, permitidos: Iterable[int] = ()):
+        """Lança ViolacaoIndiceUnico se ``doc`` colidir com algum documento fora de ``permitidos``"""
+        permitidos = set(permitidos)
+        for indice in self.indices:
+            if not indice.definicao.unico:
+                continue
+            chave = indice.chave(doc)
+            if chave is None or None in chave:
+                continue
+            if indice.ids(chave) - permitidos:
+                raise ViolacaoIndiceUnico(self.nome, indice.definicao.campos, chave)
+
+    def candidatos(self, cond) -> Optional[Set[int]]:
+        """
+        doc_ids que podem atender à condição, ou None se nenhum índice se
+        aplica. Usa o índice que cobre o maior número de igualdades da Query
+        (em caso de empate, o parcial, que é menor).
+        """
+        igualdades = _igualdades(getattr(cond, '_hash', None))
+        if not igualdades:
+            return None
+
+        melhor, melhor_peso = None, None
+        for indice in self.indices:
+            definicao = indice.definicao
+            if not all(campo in igualdades for campo in definicao.campos):
+                continue
+            if not all(campo in igualdades and igualdades[campo] == valor for campo, valor in definicao.onde):
+                continue
+            peso = (len(definicao.campos) + len(definicao.onde), len(definicao.onde))
+            if melhor is None or peso > melhor_peso:
+                melhor, melhor_peso = indice, peso
+
+        if melhor is None:
+            return None
+        return set(melhor.ids(tuple(igualdades[campo] for campo in melhor.definicao.campos)))
+
+
+class _TabelaPorDocId(MutableMapping):
+    """
+    A tabela do storage (chaves em string) vista com os doc_ids do TinyDB,
+    como o dict que ``Table._update_table`` entrega ao updater. As alterações
+    vão direto para a tabela do storage, sem copiá-la.
+    """
+
+    __slots__ = ("_tabela", "_classe_id")
+
+    def __init__(self, tabela: dict, classe_id):
+        self._tabela = tabela
+        self._classe_id = classe_id
+
+    def __getitem__(self, doc_id):
+        return self._tabela[str(doc_id)]
+
+    def __setitem__(self, doc_id, doc):
+        self._tabela[str(doc_id)] = doc
+
+    def __delitem__(self, doc_id):
+        del self._tabela[str(doc_id)]
+
+    def __contains__(self, doc_id):
+        return str(doc_id) in self._tabela
+
+    def __iter__(self):
+        return (self._classe_id(doc_id) for doc_id in list(self._tabela))
+
+    def __len__(self):
+        return len(self._tabela)
+
+    def clear(self):
+        self._tabela.clear()
+
+
+class _TabelaLida(Mapping):
+    """
+    Leitura de uma tabela que pode ser alterada no lugar por outra thread.
+
+    Acessos por chave vão direto à tabela; as iterações percorrem uma cópia
+    das chaves/itens tirada de uma vez, então não quebram se uma escrita
+    mudar a tabela no meio.
+    """
+
+    __slots__ = ("_tabela",)
+
+    def __init__(self, tabela: dict):
+        self._tabela = tabela
+
+    def __getitem__(self, doc_id):
+        return self._tabela[doc_id]
+
+    def get(self, doc_id, padrao=None):
+        return self._tabela.get(doc_id, padrao)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._tabela
+
+    def __len__(self):
+        return len(self._tabela)
+
+    def __iter__(self):
+        return iter(list(self._tabela))
+
+    def keys(self):
+        return list(self._tabela.keys())
+
+    def items(self):
+        return list(self._tabela.items())
+
+    def values(self):
+        return list(self._tabela.values())
+
+
+class TabelaIndexada(Table):
+    """Tabela do TinyDB que mantém e consulta os índices declarados"""
+
+    _indices: Optional[IndicesDaTabela] = None
+
+    def _garantir_indices(self) -> Optional[IndicesDaTabela]:
+        indices = self._indices
+        if indices is not None and not indices.construido:
+            indices.reconstruir(self._read_table())
+        return indices
+
+    def _travar_escrita(self, indices: IndicesDaTabela) -> ExitStack:
+        """
+        Lock do storage (quando ele agrupa escritas) e depois o dos índices.
+
+        ``transacao()`` segura o lock do storage enquanto escreve em várias
+        tabelas, pegando os locks dos índices depois dele; uma escrita fora de
+        transação que pegasse o dos índices primeiro poderia travar com ela.
+        """
+        pilha = ExitStack()
+        agrupar = getattr(self._storage, 'agrupar', None)
+        if agrupar is not None:
+            pilha.enter_context(agrupar())
+        pilha.enter_context(indices.lock)
+        return pilha
+
+    def _read_table(self):
+        tabela = super()._read_table()
+        if getattr(self._storage, 'altera_no_lugar', False):
+            return _TabelaLida(tabela)
+        return tabela
+
+    def _update_table(self, updater):
+        """
+        Num storage que permite (``altera_no_lugar``), aplica o updater direto
+        na tabela guardada, sob o lock do storage, em vez de copiá-la inteira
+        duas vezes como o TinyDB faz. O storage registra só o que mudou.
+        """
+        if not getattr(self._storage, 'altera_no_lugar', False):
+            return super()._update_table(updater)
+
+        with self._storage.agrupar():
+            tabelas = self._storage.read() or {}
+            tabela = tabelas.get(self.name)
+            if tabela is None:
+                # Tabela nova: passa a ser rastreada pelo storage nesta escrita
+                return super()._update_table(updater)
+            updater(_TabelaPorDocId(tabela, self.document_id_class))
+            self._storage.write(tabelas)
+        self.clear_cache()
+
+    def _documentos(self, doc_ids: Iterable[int], cond) -> List[Document]:
+        tabela = self._read_table()
+        docs = []
+        for doc_id in sorted(doc_ids):
+            raw = tabela.get(str(doc_id))
+            if raw is not None and cond(raw):
+                docs.append(self.document_class(raw, self.document_id_class(doc_id)))
+        return docs
+
+    def _reindexar(self, doc_ids: Iterable[int]):
+        tabela = self._read_table()
+        for doc_id in doc_ids:
+            self._indices.desindexar(doc_id)
+            raw = tabela.get(str(doc_id))
+            if raw is not None:
+                self._indices.indexar(doc_id, raw)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def search(self, cond) -> List[Document]:
+        indices = self._garantir_indices()
+        if indices is not None:
+            with indices.lock:
+                candidatos = indices.candidatos(cond)
+                if candidatos is not None:
+                    return self._documentos(candidatos, cond)
+        return super().search(cond)
+
+    def get(self, cond=None, doc_id=None, doc_ids=None):
+        indices = self._garantir_indices()
+        if indices is not None and cond is not None and doc_id is None and doc_ids is None:
+            with indices.lock:
+                candidatos = indices.candidatos(cond)
+                if candidatos is not None:
+                    docs = self._documentos(candidatos, cond)
+                    return docs[0] if docs else None
+        return super().get(cond, doc_id, doc_ids)
+
+    # ------------------------------------------------------------------
+    # Escritas
+    # ------------------------------------------------------------------
+
+    def insert(self, document: Mapping) -> int:
+        indices = self._garantir_indices()
+        if indices is None:
+            return super().insert(document)
+
+        with self._travar_escrita(indices):
+            indices.verificar_unicidade(document)
+            doc_id = super().insert(document)
+            indices.indexar(doc_id, document)
+            return doc_id
+
+    def insert_multiple(self, documents: Iterable[Mapping]) -> List[int]:
+        indices = self._garantir_indices()
+        if indices is None:
+            return super().insert_multiple(documents)
+
+        documents = list(documents)
+        with self._travar_escrita(indices):
+            # Verifica contra a tabela e entre os próprios documentos do lote
+            lote = IndicesDaTabela(self.name, [i.definicao for i in indices.indices])
+            for posicao, doc in enumerate(documents):
+                indices.verificar_unicidade(doc)
+                lote.verificar_unicidade(doc)
+                lote.indexar(posicao, doc)
+
+            doc_ids = super().insert_multiple(documents)
+            for doc_id, doc in zip(doc_ids, documents):
+                indices.indexar(doc_id, doc)
+            return doc_ids
+
+    def update(self, fields, cond=None, doc_ids=None) -> List[int]:
+        indices = self._garantir_indices()
+        if indices is None:
+            return super().update(fields, cond, doc_ids)
+
+        with self._travar_escrita(indices):
+            if isinstance(fields, Mapping):
+                self._verificar_update(indices, fields, cond, doc_ids)
+            atualizados = super().update(fields, cond, doc_ids)
+            self._reindexar(atualizados)
+            return atualizados
+
+    def update_multiple(self, updates) -> List[int]:
+        indices = self._garantir_indices()
+        if indices is None:
+            return super().update_multiple(updates)
+
+        with self._travar_escrita(indices):
+            atualizados = super().update_multiple(updates)
+            self._reindexar(atualizados)
+            return atualizados
+
+    def remove(self, cond=None, doc_ids=None) -> List[int]:
+        indices = self._garantir_indices()
+        if indices is None:
+            return super().remove(cond, doc_ids)
+
+        with self._travar_escrita(indices):
+            removidos = super().remove(cond, doc_ids)
+            for doc_id in removidos:
+                indices.desindexar(doc_id)
+            return removidos
+
+    def truncate(self) -> None:
+        # Troca a tabela por uma vazia (uma única entrada "drop" no log) em
+        # vez de remover os documentos um a um
+        super()._update_table(lambda table: table.clear())
+        self._next_id = None
+        if self._indices is not None:
+            self._indices.limpar()
+            self._indices.construido = True
+
+    def _verificar_update(self, indices: IndicesDaTabela, fields: Mapping, cond, doc_ids):
+        """Confere os índices únicos tocados por um update com dicionário de campos"""
+        unicos = [
+            i for i in indices.indices
+            if i.definicao.unico and any(campo in fields for campo in i.definicao.campos)
+        ]
+        if not unicos:
+            return
+
+        if doc_ids is not None:
+            alvos = self._documentos(doc_ids, lambda doc: True)
+        elif cond is not None:
+            alvos = self.search(cond)
+        else:
+            alvos = self.all()
+
+        ids_alvo = {doc.doc_id for doc in alvos}
+        novos = IndicesDaTabela(self.name, [i.definicao for i in unicos])
+        for doc in alvos:
+            novo = {**doc, **fields}
+            indices.verificar_unicidade(novo, permitidos=ids_alvo)
+            novos.verificar_unicidade(novo)
+            novos.indexar(doc.doc_id, novo)
+
+
+class TinyDBIndexado(TinyDB):
+    """
+    TinyDB cujas tabelas mantêm os índices declarados em ``INDICES``.
+
+    Os índices ficam no banco (e não na instância da tabela), então tabelas
+    recriadas pelo TinyDB continuam compartilhando o mesmo estado.
+    """
+
+    table_class = TabelaIndexada
+
+    def __init__(self, *args, indices: Mapping[str, Iterable[Indice]] = None, **kwargs):
+        definicoes = INDICES if indices is None else indices
+        self._indices = {
+            nome: IndicesDaTabela(nome, defs) for nome, defs in definicoes.items()
+        }
+        super().__init__(*args, **kwargs)
+        if hasattr(self.storage, 'ao_desfazer'):
+            self.storage.ao_desfazer = self._escritas_desfeitas
+
+    def table(self, name: str, **kwargs) -> Table:
+        tabela = super().table(name, **kwargs)
+        tabela._indices = self._indices.get(name)
+        return tabela
+
+    def reconstruir_indices(self):
+        """Reconstrói todos os índices a partir do conteúdo do storage"""
+        for nome, indices in self._indices.items():
+            indices.reconstruir(self.table(nome)._read_table())
+
+    def _escritas_desfeitas(self, tabelas: Iterable[str]):
+        """O storage desfez um grupo de escritas: refaz índices e descarta o cache de consultas"""
+        for nome in tabelas:
+            tabela = self.table(nome)
+            if nome in self._indices:
+                self._indices[nome].reconstruir(tabela._read_table())
+            tabela.clear_cache()
+
+    def drop_tables(self) -> None:
+        super().drop_tables()
+        for indices in self._indices.values():
+            indices.construido = False
+
+    def drop_table(self, name: str) -> None:
+        super().drop_table(name)
+        if name in self._indices:
+            self._indices[name].construido = False
@@ -3,12 +3,15 @@
 from datetime import datetime, timedelta
 from tinydb import TinyDB
 
+from database.sequencias import TABELA_SEQUENCIAS
+from repositories.outbox_repository import TABELA_OUTBOX
+
 def init_db(db: TinyDB):
     """Inicializa o banco de dados com dados conforme PDF de testes"""
     print("Inicializando banco de dados conforme especificacao do PDF...")
 
-    # Limpar todas as tabelas
-    for table_name in ['ciclistas', 'cartoes', 'funcionarios', 'alugueis', 'cobrancas', 'fila_cobrancas']:
+    # Limpar todas as tabelas (as sequências de IDs são ressemeadas no próximo uso)
+    for table_name in ['ciclistas', 'cartoes', 'funcionarios', 'alugueis', 'cobrancas', 'fila_cobrancas', TABELA_OUTBOX, TABELA_SEQUENCIAS]:
         db.table(table_name).truncate()
 
     # CICLISTAS - 4 conforme PDF
@@ -0,0 +1,88 @@
+"""
+Paginação por cursor sobre tabelas do TinyDB.
+
+As páginas seguem a ordem dos doc_ids. O cursor é opaco para o cliente
+(base64 do último doc_id entregue) e a próxima página é lida a partir dele
+com uma busca binária nos doc_ids ordenados, sem materializar a tabela.
+
+A lista ordenada de doc_ids fica guardada por tabela e só é refeita quando a
+tabela muda: o TinyDB padrão troca o dict da tabela a cada escrita e as
+tabelas alteradas no lugar pelo WALStorage mudam de ``versao`` quando um
+documento entra ou sai, então identidade e versão do dict lido indicam se a
+lista ainda vale.
+"""
+
+import base64
+import binascii
+import bisect
+import json
+import weakref
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from tinydb.table import Document, Table
+
+
+class CursorInvalido(ValueError):
+    """Cursor de paginação que não foi gerado por esta API"""
+
+
+def codificar_cursor(doc_id: int) -> str:
+    """Gera o cursor opaco que aponta para depois do doc_id informado"""
+    dados = json.dumps({"d": doc_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(dados).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: Optional[str]) -> int:
+    """Converte o cursor no doc_id a partir do qual a listagem continua (0 = início)"""
+    if not cursor:
+        return 0
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        doc_id = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))["d"]
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise CursorInvalido(cursor)
+    if not isinstance(doc_id, int) or doc_id < 0:
+        raise CursorInvalido(cursor)
+    return doc_id
+
+
+# Por tabela: o dict lido da última vez, sua versão e seus doc_ids ordenados
+_ids_ordenados: "weakref.WeakKeyDictionary[Table, Tuple[Dict[str, dict], Optional[int], List[int]]]" = weakref.WeakKeyDictionary()
+
+
+def _ler(table: Table) -> Tuple[Dict[str, dict], List[int]]:
+    """Documentos crus da tabela e a lista ordenada dos seus doc_ids"""
+    dados = (table.storage.read() or {}).get(table.name) or {}
+    versao = getattr(dados, 'versao', None)
+    guardado = _ids_ordenados.get(table)
+    if guardado is None or guardado[0] is not dados or guardado[1] != versao:
+        # list() copia as chaves de uma vez, mesmo com escritas no lugar em curso
+        guardado = (dados, versao, sorted(map(int, list(dados))))
+        _ids_ordenados[table] = guardado
+    return guardado[0], guardado[2]
+
+
+def iterar_documentos(table: Table, apos: int = 0) -> Iterator[Document]:
+    """
+    Percorre os documentos da tabela com doc_id maior que ``apos``, em ordem.
+
+    Os documentos são lidos um a um, então nenhuma lista com a tabela inteira
+    é montada; o início é achado por busca binária, então o custo de uma
+    página não depende de quantos IDs foram removidos antes dela.
+    """
+    dados, ids = _ler(table)
+    for posicao in range(bisect.bisect_right(ids, apos), len(ids)):
+        doc_id = ids[posicao]
+        raw = dados.get(str(doc_id))
+        if raw is not None:
+            yield Document(raw, doc_id)
+
+
+def paginar(table: Table, limite: int, cursor: Optional[str]) -> Tuple[List[Document], Optional[str]]:
+    """Retorna os documentos de uma página e o cursor da próxima (None na última)"""
+    docs: List[Document] = []
+    for doc in iterar_documentos(table, decodificar_cursor(cursor)):
+        if len(docs) == limite:
+            return docs, codificar_cursor(docs[-1].doc_id)
+        docs.append(doc)
+    return docs, None
@@ -0,0 +1,561 @@
+"""
+Storage do TinyDB baseado em log de escrita antecipada (write-ahead log).
+
+O JSONStorage padrão reescreve o arquivo inteiro a cada insert/update, então
+o custo de escrita cresce com o tamanho de todas as tabelas. Aqui cada mutação
+vira uma linha JSON anexada ao arquivo de log (``db.json.wal``). Na
+inicialização o snapshot (``db.json``) é carregado e o log é reaplicado; quando
+o log passa de um limite, ele é compactado em um novo snapshot numa thread em
+segundo plano, sem bloquear as escritas.
+
+Formato de cada linha do log:
+    {"op": "put", "t": "<tabela>", "id": "<doc_id>", "doc": {...}}
+    {"op": "del", "t": "<tabela>", "id": "<doc_id>"}
+    {"op": "drop", "t": "<tabela>"}
+    {"op": "lote", "ops": [<entradas acima>]}
+
+As tabelas e os documentos guardados em memória avisam o storage quando são
+alterados no lugar (``_TabelaRastreada`` e ``_DocumentoRastreado``), então
+``write()`` registra só os doc_ids tocados desde a escrita anterior, sem
+comparar a tabela inteira. ``TabelaIndexada`` altera as tabelas no lugar
+(``altera_no_lugar``); o TinyDB padrão troca o dict da tabela a cada escrita
+e, nesse caso, a tabela nova é comparada com a anterior.
+
+Escritas feitas dentro de ``agrupar()`` (várias tabelas numa mesma operação
+de negócio) viram uma única linha ``lote``: uma linha truncada é descartada
+por inteiro na recuperação, então ou todas as mudanças do grupo voltam ou
+nenhuma volta. Um grupo que produziu uma só entrada (ex.: um insert avulso,
+que passa por ``agrupar()`` para respeitar a ordem dos locks) é gravado como
+essa entrada, sem o envelope ``lote``. Se o bloco lançar uma exceção, as
+escritas feitas nele são desfeitas em memória e nada dele vai para o log.
+
+Todas as operações são idempotentes, então reaplicar um trecho do log que já
+foi incorporado ao snapshot (ex.: queda no meio de uma compactação) é seguro.
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Set
+
+from tinydb.storages import Storage
+
+FSYNC_SEMPRE = "always"
+FSYNC_INTERVALO = "interval"
+FSYNC_NUNCA = "off"
+POLITICAS_FSYNC = (FSYNC_SEMPRE, FSYNC_INTERVALO, FSYNC_NUNCA)
+
+
+_AUSENTE = object()
+
+
+class _Sujos(set):
+    """
+    Chaves ``(tabela, doc_id)`` dos documentos alterados, inseridos ou
+    removidos in-place desde a última escrita. Durante um ``agrupar()``,
+    guarda também o estado de cada documento (e da sua presença na tabela)
+    antes da primeira alteração, para desfazer o grupo.
+    """
+
+    __slots__ = ("pontos", "dono")
+
+    def __init__(self):
+        super().__init__()
+        self.pontos: list = []
+        self.dono: Optional[int] = None
+
+    def antes(self, chave: tuple, doc: dict):
+        # Só as alterações da thread dona do grupo entram no ponto de restauração
+        if not self.pontos or self.dono != threading.get_ident():
+            return
+        original = None
+        for ponto in self.pontos:
+            if chave not in ponto.originais:
+                if original is None:
+                    original = copy.deepcopy(dict(doc))
+                ponto.originais[chave] = (doc, original)
+
+    def antes_da_chave(self, tabela: dict, chave: tuple):
+        # Mesmo critério de antes(), para a entrada do documento na tabela
+        if not self.pontos or self.dono != threading.get_ident():
+            return
+        for ponto in self.pontos:
+            if chave not in ponto.chaves:
+                ponto.chaves[chave] = (tabela, dict.get(tabela, chave[1], _AUSENTE))
+
+
+class _PontoRestauracao:
+    """Estado do storage na entrada de um ``agrupar()``"""
+
+    __slots__ = ("dados", "entradas", "sujos", "originais", "chaves")
+
+    def __init__(self, dados: dict, entradas: int, sujos: set):
+        self.dados = dados
+        self.entradas = entradas
+        self.sujos = sujos
+        self.originais: Dict[tuple, tuple] = {}
+        # (tabela, doc_id) -> (dict da tabela, documento anterior ou _AUSENTE)
+        self.chaves: Dict[tuple, tuple] = {}
+
+
+class _DocumentoRastreado(dict):
+    """
+    Documento que avisa o storage quando é alterado in-place.
+
+    O TinyDB aplica ``update`` diretamente sobre o dict do documento, então
+    sem esse rastreamento o storage não teria como saber quais documentos
+    mudaram sem comparar a tabela inteira.
+    """
+
+    __slots__ = ("_sujos", "_chave")
+
+    def __init__(self, dados, sujos: _Sujos, chave: tuple):
+        super().__init__(dados)
+        self._sujos = sujos
+        self._chave = chave
+
+    def _marcar(self):
+        self._sujos.antes(self._chave, self)
+        self._sujos.add(self._chave)
+
+    def __setitem__(self, key, value):
+        self._marcar()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._marcar()
+        super().__delitem__(key)
+
+    def update(self, *args, **kwargs):
+        self._marcar()
+        super().update(*args, **kwargs)
+
+    def pop(self, *args):
+        self._marcar()
+        return super().pop(*args)
+
+    def popitem(self):
+        self._marcar()
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        self._marcar()
+        return super().setdefault(key, default)
+
+    def clear(self):
+        self._marcar()
+        super().clear()
+
+
+class _TabelaRastreada(dict):
+    """
+    Tabela que avisa o storage quando um documento entra ou sai dela.
+
+    Com ela a escrita de uma tabela alterada no lugar custa o número de
+    documentos tocados, e não o tamanho da tabela. ``versao`` muda a cada
+    entrada ou saída, para quem guarda algo derivado das chaves (ex.: a lista
+    ordenada da paginação) saber quando refazer.
+    """
+
+    __slots__ = ("_sujos", "_nome", "versao")
+
+    def __init__(self, dados, sujos: _Sujos, nome: str):
+        super().__init__(dados)
+        self._sujos = sujos
+        self._nome = nome
+        self.versao = 0
+
+    def _marcar(self, doc_id):
+        chave = (self._nome, doc_id)
+        self._sujos.antes_da_chave(self, chave)
+        self._sujos.add(chave)
+        self.versao += 1
+
+    def __setitem__(self, doc_id, doc):
+        self._marcar(doc_id)
+        super().__setitem__(doc_id, doc)
+
+    def __delitem__(self, doc_id):
+        if doc_id not in self:
+            raise KeyError(doc_id)
+        self._marcar(doc_id)
+        super().__delitem__(doc_id)
+
+    def pop(self, doc_id, *padrao):
+        if doc_id in self:
+            self._marcar(doc_id)
+        return super().pop(doc_id, *padrao)
+
+    def popitem(self):
+        doc_id = next(reversed(self))
+        return doc_id, self.pop(doc_id)
+
+    def setdefault(self, doc_id, padrao=None):
+        if doc_id not in self:
+            self[doc_id] = padrao
+        return super().__getitem__(doc_id)
+
+    def update(self, *args, **kwargs):
+        for doc_id, doc in dict(*args, **kwargs).items():
+            self[doc_id] = doc
+
+    def clear(self):
+        for doc_id in list(self):
+            self._marcar(doc_id)
+        super().clear()
+
+
+class WALStorage(Storage):
+    """
+    Storage append-only com snapshot compactado em segundo plano.
+
+    Args:
+        path: Caminho do snapshot (ex.: ``db.json``). O log fica em ``<path>.wal``.
+        fsync: Política de fsync do log: ``always`` (a cada escrita),
+            ``interval`` (no máximo a cada ``fsync_intervalo`` segundos) ou
+            ``off`` (deixa a cargo do sistema operacional).
+        fsync_intervalo: Intervalo em segundos para a política ``interval``.
+        limite_compactacao: Tamanho do log (bytes) que dispara a compactação.
+        **kwargs: Opções de ``json.dumps`` usadas no snapshot (ex.: ``indent``).
+    """
+
+    # As tabelas lidas podem ser alteradas no lugar, sob agrupar(), em vez de
+    # trocadas por uma cópia; a escrita registra só os doc_ids tocados
+    altera_no_lugar = True
+
+    def __init__(
+        self,
+        path,
+        fsync: str = FSYNC_INTERVALO,
+        fsync_intervalo: float = 1.0,
+        limite_compactacao: int = 4 * 1024 * 1024,
+        **kwargs
+    ):
+        super().__init__()
+
+        if fsync not in POLITICAS_FSYNC:
+            raise ValueError(
+                f"Política de fsync inválida: {fsync}. Use uma de: {', '.join(POLITICAS_FSYNC)}"
+            )
+
+        self.path = Path(path)
+        self.path_log = Path(f"{path}.wal")
+        self.path_log_antigo = Path(f"{path}.wal.old")
+        self.fsync = fsync
+        self.fsync_intervalo = fsync_intervalo
+        self.limite_compactacao = limite_compactacao
+        self.kwargs = kwargs
+
+        self._lock = threading.RLock()
+        self._sujos = _Sujos()
+        self._grupo = 0
+        # Chamado (com o lock do storage) com as tabelas de um grupo desfeito
+        self.ao_desfazer: Optional[Callable[[Set[str]], None]] = None
+        self._entradas_grupo: list = []
+        self._pendente_fsync = False
+        self._fechado = False
+        self._thread_compactacao: Optional[threading.Thread] = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._data: Dict[str, Dict[str, Any]] = {}
+        self._carregar()
+
+        self._log = open(self.path_log, "a", encoding="utf-8")
+        self._tamanho_log = self.path_log.stat().st_size
+
+        self._thread_fsync = None
+        if self.fsync == FSYNC_INTERVALO:
+            self._thread_fsync = threading.Thread(target=self._sincronizar_periodicamente, daemon=True)
+            self._thread_fsync.start()
+
+        # Compacta um log antigo deixado por uma compactação interrompida
+        if self.path_log_antigo.exists():
+            self._iniciar_compactacao(rotacionar=False)
+
+    # ------------------------------------------------------------------
+    # Interface do TinyDB
+    # ------------------------------------------------------------------
+
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        # Cópia rasa do nível de tabelas: o TinyDB padrão substitui a tabela
+        # alterada no dict recebido antes de chamar write(), e precisamos da
+        # versão anterior para calcular a diferença.
+        return dict(self._data)
+
+    def write(self, data: Dict[str, Dict[str, Any]]):
+        with self._lock:
+            entradas = []
+
+            for nome in list(self._data):
+                if nome not in data:
+                    entradas.append({"op": "drop", "t": nome})
+                    self._sujos.difference_update([c for c in self._sujos if c[0] == nome])
+
+            for nome, tabela in list(data.items()):
+                antiga = self._data.get(nome)
+                if tabela is antiga:
+                    # Alterada no lugar: as mudanças estão em self._sujos
+                    continue
+
+                # Tabela trocada por outro dict (TinyDB padrão): compara com a anterior
+                if antiga is None or (antiga and not tabela):
+                    # Tabela nova ou truncada: uma única entrada em vez de um
+                    # "del" por documento
+                    antiga = {}
+                    entradas.append({"op": "drop", "t": nome})
+                    self._sujos.difference_update([c for c in self._sujos if c[0] == nome])
+
+                removidos = antiga.keys() - tabela.keys()
+                inseridos = tabela.keys() - antiga.keys()
+
+                for doc_id in removidos:
+                    entradas.append({"op": "del", "t": nome, "id": doc_id})
+                    self._sujos.discard((nome, doc_id))
+
+                tabela = data[nome] = self._rastrear_tabela(nome, tabela)
+                for doc_id in inseridos:
+                    doc = self._rastrear(nome, doc_id, tabela[doc_id])
+                    dict.__setitem__(tabela, doc_id, doc)
+                    entradas.append({"op": "put", "t": nome, "id": doc_id, "doc": doc})
+                    self._sujos.discard((nome, doc_id))
+
+            for nome, doc_id in self._sujos:
+                tabela = data.get(nome)
+                if tabela is None:
+                    continue
+                doc = dict.get(tabela, doc_id)
+                if doc is None:
+                    entradas.append({"op": "del", "t": nome, "id": doc_id})
+                    continue
+                if not isinstance(doc, _DocumentoRastreado):
+                    doc = self._rastrear(nome, doc_id, doc)
+                    dict.__setitem__(tabela, doc_id, doc)
+                entradas.append({"op": "put", "t": nome, "id": doc_id, "doc": doc})
+            self._sujos.clear()
+
+            self._data = dict(data)
+            self._anexar(entradas)
+
+    def close(self):
+        with self._lock:
+            if self._fechado:
+                return
+            self._fechado = True
+
+        thread = self._thread_compactacao
+        if thread is not None:
+            thread.join()
+
+        with self._lock:
+            self._log.flush()
+            if self.fsync != FSYNC_NUNCA:
+                os.fsync(self._log.fileno())
+            self._log.close()
+
+    @contextmanager
+    def agrupar(self):
+        """
+        Grava todas as escritas feitas dentro do bloco numa única linha do log.
+
+        Segura o lock do storage durante o bloco, então escritas de outras
+        threads esperam e não se intercalam com as do grupo. Pode ser aninhado;
+        cada nível é um ponto de restauração: se o bloco lançar uma exceção,
+        tabelas e documentos voltam ao estado da entrada, as entradas do bloco
+        são descartadas e ``ao_desfazer`` recebe as tabelas afetadas.
+        """
+        with self._lock:
+            ponto = _PontoRestauracao(dict(self._data), len(self._entradas_grupo), set(self._sujos))
+            if not self._sujos.pontos:
+                self._sujos.dono = threading.get_ident()
+            self._sujos.pontos.append(ponto)
+            self._grupo += 1
+            try:
+                yield
+            except BaseException:
+                self._desfazer(ponto)
+                raise
+            finally:
+                self._sujos.pontos.pop()
+                self._grupo -= 1
+                if self._grupo == 0:
+                    self._sujos.dono = None
+                    if self._entradas_grupo:
+                        entradas, self._entradas_grupo = self._entradas_grupo, []
+                        self._anexar(entradas if len(entradas) == 1 else [{"op": "lote", "ops": entradas}])
+
+    def _desfazer(self, ponto: _PontoRestauracao):
+        """Volta ao estado de ``ponto`` (chamado com o lock do storage)"""
+        for (_, doc_id), (tabela, anterior) in ponto.chaves.items():
+            if anterior is _AUSENTE:
+                dict.pop(tabela, doc_id, None)
+            else:
+                dict.__setitem__(tabela, doc_id, anterior)
+            tabela.versao += 1
+
+        for doc, original in ponto.originais.values():
+            dict.clear(doc)
+            dict.update(doc, original)
+
+        tabelas = {
+            nome for nome in self._data.keys() | ponto.dados.keys()
+            if self._data.get(nome) is not ponto.dados.get(nome)
+        }
+        tabelas.update(nome for nome, _ in ponto.originais)
+        tabelas.update(nome for nome, _ in ponto.chaves)
+
+        self._data = ponto.dados
+        del self._entradas_grupo[ponto.entradas:]
+        self._sujos.clear()
+        self._sujos.update(ponto.sujos)
+
+        if tabelas and self.ao_desfazer is not None:
+            self.ao_desfazer(tabelas)
+
+    # ------------------------------------------------------------------
+    # Log
+    # ------------------------------------------------------------------
+
+    def _rastrear(self, nome: str, doc_id: str, doc) -> _DocumentoRastreado:
+        if isinstance(doc, _DocumentoRastreado):
+            return doc
+        return _DocumentoRastreado(doc, self._sujos, (nome, doc_id))
+
+    def _rastrear_tabela(self, nome: str, tabela) -> _TabelaRastreada:
+        if isinstance(tabela, _TabelaRastreada) and tabela._nome == nome:
+            return tabela
+        return _TabelaRastreada(tabela, self._sujos, nome)
+
+    def _anexar(self, entradas):
+        if not entradas:
+            return
+
+        if self._grupo:
+            self._entradas_grupo.extend(entradas)
+            return
+
+        linhas = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entradas)
+        self._log.write(linhas)
+        self._log.flush()
+        self._tamanho_log += len(linhas.encode("utf-8"))
+
+        if self.fsync == FSYNC_SEMPRE:
+            os.fsync(self._log.fileno())
+        else:
+            self._pendente_fsync = True
+
+        if self._tamanho_log >= self.limite_compactacao:
+            self._iniciar_compactacao()
+
+    def _sincronizar_periodicamente(self):
+        while not self._fechado:
+            time.sleep(self.fsync_intervalo)
+            with self._lock:
+                if self._pendente_fsync and not self._fechado:
+                    os.fsync(self._log.fileno())
+                    self._pendente_fsync = False
+
+    # ------------------------------------------------------------------
+    # Replay e compactação
+    # ------------------------------------------------------------------
+
+    def _carregar(self):
+        """Carrega o snapshot e reaplica os logs pendentes (antigo e atual)."""
+        dados = self._ler_snapshot(self.path)
+        for path_log in (self.path_log_antigo, self.path_log):
+            self._reaplicar(dados, path_log)
+
+        self._data = {
+            nome: self._rastrear_tabela(nome, {
+                doc_id: self._rastrear(nome, doc_id, doc)
+                for doc_id, doc in tabela.items()
+            })
+            for nome, tabela in dados.items()
+        }
+
+    @staticmethod
+    def _ler_snapshot(path: Path) -> Dict[str, Dict[str, Any]]:
+        if not path.exists() or path.stat().st_size == 0:
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _reaplicar(dados: Dict[str, Dict[str, Any]], path_log: Path):
+        if not path_log.exists():
+            return
+
+        with open(path_log, "r", encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    entrada = json.loads(linha)
+                except json.JSONDecodeError:
+                    # Última linha truncada por uma queda durante a escrita
+                    break
+
+                for operacao in entrada["ops"] if entrada["op"] == "lote" else (entrada,):
+                    WALStorage._aplicar(dados, operacao)
+
+    @staticmethod
+    def _aplicar(dados: Dict[str, Dict[str, Any]], entrada: Dict[str, Any]):
+        nome = entrada["t"]
+        if entrada["op"] == "drop":
+            dados[nome] = {}
+        elif entrada["op"] == "put":
+            dados.setdefault(nome, {})[entrada["id"]] = entrada["doc"]
+        elif entrada["op"] == "del":
+            dados.get(nome, {}).pop(entrada["id"], None)
+
+    def compactar(self, aguardar: bool = True):
+        """
+        Força a compactação do log atual em um novo snapshot.
+
+        Args:
+            aguardar: Se True, bloqueia até a compactação terminar.
+        """
+        self._iniciar_compactacao()
+        thread = self._thread_compactacao
+        if aguardar and thread is not None:
+            thread.join()
+
+    def _iniciar_compactacao(self, rotacionar: bool = True):
+        with self._lock:
+            if self._thread_compactacao is not None and self._thread_compactacao.is_alive():
+                return
+
+            if rotacionar:
+                if self.path_log_antigo.exists():
+                    # Ainda há um log antigo pendente; compacta ele primeiro
+                    rotacionar = False
+                elif self._tamanho_log == 0:
+                    return
+
+            if rotacionar:
+                # Novas escritas passam a ir para um log vazio, e o log atual
+                # é consolidado no snapshot a partir do disco, sem tocar no
+                # estado em memória.
+                self._log.flush()
+                os.fsync(self._log.fileno())
+                self._log.close()
+                os.replace(self.path_log, self.path_log_antigo)
+                self._log = open(self.path_log, "a", encoding="utf-8")
+                self._tamanho_log = 0
+
+            self._thread_compactacao = threading.Thread(target=self._compactar, daemon=True)
+            self._thread_compactacao.start()
+
+    def _compactar(self):
+        dados = self._ler_snapshot(self.path)
+        self._reaplicar(dados, self.path_log_antigo)
+
+        path_tmp = Path(f"{self.path}.tmp")
+        with open(path_tmp, "w", encoding="utf-8") as f:
+            json.dump(dados, f, **self.kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(path_tmp, self.path)
+        self.path_log_antigo.unlink()
@@ -8,8 +8,12 @@ from routers.cartao import router as cartao_router
 from routers.aluguel import router as aluguel_router
 from routers.admin import router as admin_router
 
-from database.database import get_db
+from database.database import get_db, close_db
+from services.http_clientes import fechar_clientes, fechar_clientes_async
+from services.outbox_service import OUTBOX_ATIVA, iniciar_entregador, parar_entregador
 from database.init_data import init_db
+from utils.resposta_json import classe_resposta_json
+from utils.metricas import instalar_metricas
 
 
 app = FastAPI(
@@ -18,8 +22,13 @@ app = FastAPI(
     description="Aluguel do Sistema de Controle de Bicicletário.",
     docs_url="/docs",
     redoc_url="/redoc",
+    # JSON_RAPIDO=1 serializa as respostas pelo pydantic-core (mesmo formato)
+    default_response_class=classe_resposta_json(),
 )
 
+# GET /metrics no formato do Prometheus (METRICAS=0 desliga)
+instalar_metricas(app)
+
 @app.on_event("startup")
 def startup_event():
     db = get_db()
@@ -33,6 +42,18 @@ def startup_event():
     else:
         print("✓ Banco de dados já contém dados")
 
+    # Envio em segundo plano dos emails gravados na outbox
+    if OUTBOX_ATIVA:
+        iniciar_entregador(db)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Para o envio da outbox, fecha os pools HTTP e grava o log do banco em disco"""
+    parar_entregador()
+    fechar_clientes()
+    await fechar_clientes_async()
+    close_db()
+
 # Registro dos routers
 app.include_router(ciclista_router)
 app.include_router(funcionario_router)
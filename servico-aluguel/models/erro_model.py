@@ -53,6 +53,7 @@ class CodigosErro:
 
     # Erros de Ciclista
     EMAIL_JA_CADASTRADO = "EMAIL_JA_CADASTRADO"
+    CPF_JA_CADASTRADO = "CPF_JA_CADASTRADO"
     EMAIL_INVALIDO = "EMAIL_INVALIDO"
     CICLISTA_NAO_ENCONTRADO = "CICLISTA_NAO_ENCONTRADO"
     CICLISTA_INATIVO = "CICLISTA_INATIVO"
@@ -82,3 +83,4 @@ class CodigosErro:
     ERRO_INTERNO = "ERRO_INTERNO"
     NAO_ENCONTRADO = "NAO_ENCONTRADO"
     REQUISICAO_MAL_FORMADA = "REQUISICAO_MAL_FORMADA"
+    CURSOR_INVALIDO = "CURSOR_INVALIDO"
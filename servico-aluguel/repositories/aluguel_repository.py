@@ -1,5 +1,6 @@
 from typing import Optional
 from tinydb import TinyDB, Query
+from database.sequencias import sequencias_de
 from models.aluguel_model import Aluguel, Cobranca, StatusAluguel, StatusCobranca
 from datetime import datetime
 
@@ -7,13 +8,13 @@ class AluguelRepository:
     def __init__(self, db: TinyDB):
         self.alugueis = db.table('alugueis')
         self.cobrancas = db.table('cobrancas')
+        self.sequencias = sequencias_de(db)
         self.A = Query()
         self.C = Query()
 
     def criar_aluguel(self, ciclista: int, tranca: int, bicicleta: int, id_cobranca: int) -> Aluguel:
         """UC03: Criar novo aluguel"""
-        todos = self.alugueis.all()
-        proximo_id = max([a.get('id', 0) for a in todos], default=0) + 1
+        proximo_id = self.sequencias.proximo('alugueis')
 
         dados = {
             "id": proximo_id,
@@ -39,6 +40,14 @@ class AluguelRepository:
         )
         return Aluguel(**resultado) if resultado else None
 
+    def buscar_aluguel_ativo_por_bicicleta(self, id_bicicleta: int) -> Optional[Aluguel]:
+        """UC04: Busca aluguel em andamento da bicicleta (índice de aluguéis ativos)"""
+        resultado = self.alugueis.get(
+            (self.A.idBicicleta == id_bicicleta) &
+            (self.A.status == StatusAluguel.EM_ANDAMENTO.value)
+        )
+        return Aluguel(**resultado) if resultado else None
+
     def finalizar_aluguel(self, id_aluguel: int, tranca_fim: int, id_cobranca_extra: Optional[int]) -> Aluguel:
         """UC04: Finalizar aluguel (devolução)"""
         self.alugueis.update({
@@ -53,8 +62,7 @@ class AluguelRepository:
 
     def criar_cobranca(self, valor: float, id_ciclista: int, tipo: str) -> Cobranca:
         """Criar registro de cobrança"""
-        todos = self.cobrancas.all()
-        proximo_id = max([c.get('id', 0) for c in todos], default=0) + 1
+        proximo_id = self.sequencias.proximo('cobrancas')
 
         dados = {
             "id": proximo_id,
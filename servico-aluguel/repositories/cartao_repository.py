@@ -1,16 +1,18 @@
-from typing import Optional
+from typing import Iterator, List, Optional, Tuple
 from tinydb import TinyDB, Query
+from database.sequencias import sequencias_de
+from database.paginacao import decodificar_cursor, iterar_documentos, paginar
 from models.cartao_model import NovoCartaoDeCredito, CartaoDeCredito
 
 class CartaoRepository:
     def __init__(self, db: TinyDB):
         self.table = db.table('cartoes')
+        self.sequencias = sequencias_de(db)
         self.C = Query()
 
     def criar(self, id_ciclista: int, cartao: NovoCartaoDeCredito) -> CartaoDeCredito:
         """UC01: Cadastrar cartão do ciclista"""
-        todos = self.table.all()
-        proximo_id = max([c.get('id', 0) for c in todos], default=0) + 1
+        proximo_id = self.sequencias.proximo('cartoes')
 
         # Mascara o número antes de salvar (segurança)
         numero_mascarado = "**** **** **** " + cartao.numero[-4:]
@@ -63,15 +65,28 @@ class CartaoRepository:
 
     def listar(self):
         """Lista todos os cartões"""
-        from typing import List
         cartoes = []
         for c in self.table.all():
-            c_copy = c.copy()
-            c_copy.pop('cvv', None)
-            c_copy.pop('numeroCompleto', None)
-            cartoes.append(CartaoDeCredito(**c_copy))
+            cartoes.append(self._sem_dados_sensiveis(c))
         return cartoes
 
+    def listar_pagina(self, limite: int, cursor: Optional[str] = None) -> Tuple[List[CartaoDeCredito], Optional[str]]:
+        """Página de cartões e cursor da próxima (None na última)"""
+        docs, proximo = paginar(self.table, limite, cursor)
+        return [self._sem_dados_sensiveis(c) for c in docs], proximo
+
+    def iterar(self, cursor: Optional[str] = None) -> Iterator[CartaoDeCredito]:
+        """Gera os cartões um a um, sem montar a lista inteira"""
+        apos = decodificar_cursor(cursor)
+        return (self._sem_dados_sensiveis(c) for c in iterar_documentos(self.table, apos))
+
+    @staticmethod
+    def _sem_dados_sensiveis(cartao: dict) -> CartaoDeCredito:
+        c_copy = cartao.copy()
+        c_copy.pop('cvv', None)
+        c_copy.pop('numeroCompleto', None)
+        return CartaoDeCredito(**c_copy)
+
     def buscar_por_id(self, id: int) -> Optional[CartaoDeCredito]:
         """Busca cartão por ID"""
         resultado = self.table.get(self.C.id == id)
@@ -1,6 +1,7 @@
 from typing import List, Optional
 from tinydb import TinyDB, Query
 from tinydb.table import Document
+from database.sequencias import sequencias_de
 from models.ciclista_model import NovoCiclista, Ciclista, StatusCiclista
 from datetime import datetime
 
@@ -9,6 +10,7 @@ class CiclistaRepository:
 
     def __init__(self, db: TinyDB):
         self.table = db.table('ciclistas')
+        self.sequencias = sequencias_de(db)
         self.Ciclista = Query()
 
     def criar(self, ciclista: NovoCiclista, senha: str) -> Ciclista:
@@ -18,8 +20,7 @@ class CiclistaRepository:
         Gera ID automático e define status inicial.
         """
         # Gera próximo ID
-        todos = self.table.all()
-        proximo_id = max([c.get('id', 0) for c in todos], default=0) + 1
+        proximo_id = self.sequencias.proximo('ciclistas')
 
         # Converte modelo para dict (mode='json' garante serialização correta de datas)
         dados = ciclista.model_dump(mode='json')
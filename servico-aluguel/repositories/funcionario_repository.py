@@ -1,17 +1,18 @@
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 from tinydb import TinyDB, Query
+from database.sequencias import sequencias_de
+from database.paginacao import decodificar_cursor, iterar_documentos, paginar
 from models.funcionario_model import NovoFuncionario, Funcionario
 
 class FuncionarioRepository:
     def __init__(self, db: TinyDB):
         self.table = db.table('funcionarios')
+        self.sequencias = sequencias_de(db)
         self.F = Query()
 
     def criar(self, func: NovoFuncionario) -> Funcionario:
         """UC15: Cadastrar funcionário com matrícula auto-gerada (R2)"""
-        todos = self.table.all()
-        proximo_num = max([int(f.get('matricula', '0')) for f in todos], default=0) + 1
-        matricula = str(proximo_num)
+        matricula = str(self.sequencias.proximo('funcionarios', campo='matricula'))
 
         dados = func.model_dump(exclude={'confirmacaoSenha'})
         dados['matricula'] = matricula
@@ -22,6 +23,16 @@ class FuncionarioRepository:
     def listar(self) -> List[Funcionario]:
         return [Funcionario(**f) for f in self.table.all()]
 
+    def listar_pagina(self, limite: int, cursor: Optional[str] = None) -> Tuple[List[Funcionario], Optional[str]]:
+        """Página de funcionários e cursor da próxima (None na última)"""
+        docs, proximo = paginar(self.table, limite, cursor)
+        return [Funcionario(**f) for f in docs], proximo
+
+    def iterar(self, cursor: Optional[str] = None) -> Iterator[Funcionario]:
+        """Gera os funcionários um a um, sem montar a lista inteira"""
+        apos = decodificar_cursor(cursor)
+        return (Funcionario(**f) for f in iterar_documentos(self.table, apos))
+
     def buscar_por_matricula(self, matricula: str) -> Optional[Funcionario]:
         resultado = self.table.get(self.F.matricula == matricula)
         return Funcionario(**resultado) if resultado else None
@@ -0,0 +1,76 @@
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from tinydb import TinyDB, Query
+from tinydb.table import Document
+from database.sequencias import sequencias_de
+
+TABELA_OUTBOX = 'outbox_emails'
+
+PENDENTE = "PENDENTE"
+ENVIADO = "ENVIADO"
+FALHA = "FALHA"
+
+
+class OutboxRepository:
+    """
+    Fila persistente de emails a enviar (outbox).
+
+    O email é gravado aqui junto com a mudança de negócio que o gerou e
+    enviado depois pelo EntregadorOutbox, fora da requisição.
+    """
+
+    def __init__(self, db: TinyDB):
+        self.table = db.table(TABELA_OUTBOX)
+        self.sequencias = sequencias_de(db)
+        self.O = Query()
+
+    def enfileirar(self, tipo: str, destinatario: str, assunto: str, mensagem: str) -> int:
+        """Registra um email pendente e retorna seu ID"""
+        proximo_id = self.sequencias.proximo(TABELA_OUTBOX)
+        agora = datetime.now().isoformat()
+
+        self.table.insert({
+            "id": proximo_id,
+            # Chave de idempotência do envio; única mesmo se a base for restaurada
+            "chave": uuid.uuid4().hex,
+            "tipo": tipo,
+            "destinatario": destinatario,
+            "assunto": assunto,
+            "mensagem": mensagem,
+            "status": PENDENTE,
+            "tentativas": 0,
+            "criadoEm": agora,
+            "proximaTentativa": agora,
+            "enviadoEm": None,
+            "ultimoErro": None
+        })
+        return proximo_id
+
+    def pendentes(self, limite: int, agora: Optional[datetime] = None) -> List[Dict]:
+        """Emails pendentes cuja próxima tentativa já venceu, mais antigos primeiro"""
+        agora = (agora or datetime.now()).isoformat()
+        vencidos = [
+            doc for doc in self.table.search(self.O.status == PENDENTE)
+            if doc["proximaTentativa"] <= agora
+        ]
+        vencidos.sort(key=lambda doc: doc.doc_id)
+        return vencidos[:limite]
+
+    def registrar_resultados(self, resultados: List[Tuple[Document, Dict]]):
+        """
+        Grava o resultado de um lote de envios numa única escrita.
+
+        Args:
+            resultados: pares (email retornado por pendentes, campos a atualizar)
+        """
+        if not resultados:
+            return
+        campos_por_id = {doc["id"]: campos for doc, campos in resultados}
+        self.table.update(
+            lambda doc: doc.update(campos_por_id[doc["id"]]),
+            doc_ids=[doc.doc_id for doc, _ in resultados]
+        )
+
+    def contar(self, status: str) -> int:
+        return self.table.count(self.O.status == status)
@@ -1,30 +1,65 @@
 """ROUTER: Aluguel e Devolução - UC03, UC04"""
 
+import asyncio
+import os
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from models.aluguel_model import NovoAluguel, Aluguel, NovaDevolucao, Devolucao
 from repositories.ciclista_repository import CiclistaRepository
 from repositories.aluguel_repository import AluguelRepository
+from repositories.outbox_repository import OutboxRepository
 from services.equipamento_service import equipamento_service
-from services.email_service import email_service
+from services.email_service import EmailService
+from services.outbox_service import notificar_entregador
 from services.pagamento_service import pagamento_service
-from database.database import get_db
+from database.database import get_db, transacao
 from datetime import datetime
 
 router = APIRouter(prefix="", tags=["Aluguel"])
 
-@router.post("/aluguel", response_model=Aluguel)
+# POST /aluguel assíncrono; desligado por padrão (ver alugar_bicicleta_async)
+ALUGUEL_ASYNC = os.getenv("ALUGUEL_ASYNC", "0").lower() in ("1", "true", "sim")
+
+
+def _erro_elegibilidade(ciclista_repo, aluguel_repo, id_ciclista):
+    """UC03 - R1: motivo pelo qual o ciclista não pode alugar (None se puder)"""
+    if not ciclista_repo.pode_alugar(id_ciclista):
+        return "Ciclista não pode alugar"
+    if aluguel_repo.buscar_aluguel_ativo(id_ciclista):
+        return "Ciclista já possui um aluguel ativo"
+    return None
+
+
+def _registrar_aluguel(db, ciclista_repo, aluguel_repo, dados, bicicleta, cobranca):
+    """UC03 - Passo 8: Registrar aluguel, com o recibo (Passo 11) na outbox na mesma escrita"""
+    with transacao(db):
+        aluguel = aluguel_repo.criar_aluguel(
+            dados.ciclista,
+            dados.trancaInicio,
+            bicicleta['id'],
+            cobranca.id
+        )
+        ciclista = ciclista_repo.buscar_por_id(dados.ciclista)
+        assunto, mensagem = EmailService.email_recibo_aluguel(
+            ciclista.nome,
+            bicicleta['id'],
+            dados.trancaInicio,
+            10.00,
+            aluguel.horaInicio
+        )
+        OutboxRepository(db).enfileirar("RECIBO_ALUGUEL", ciclista.email, assunto, mensagem)
+    return aluguel
+
+
 def alugar_bicicleta(dados: NovoAluguel):
     """UC03: Alugar Bicicleta"""
     db = get_db()
     ciclista_repo = CiclistaRepository(db)
     aluguel_repo = AluguelRepository(db)
 
-    # UC03 - R1: Verificar se ciclista pode alugar
-    if not ciclista_repo.pode_alugar(dados.ciclista):
-        raise HTTPException(status_code=422, detail="Ciclista não pode alugar")
-
-    if aluguel_repo.buscar_aluguel_ativo(dados.ciclista):
-        raise HTTPException(status_code=422, detail="Ciclista já possui um aluguel ativo")
+    erro_elegibilidade = _erro_elegibilidade(ciclista_repo, aluguel_repo, dados.ciclista)
+    if erro_elegibilidade:
+        raise HTTPException(status_code=422, detail=erro_elegibilidade)
 
     # UC03 - Passo 4: Ler bicicleta na tranca
     sucesso_bicicleta, bicicleta = equipamento_service.obter_bicicleta_tranca(dados.trancaInicio)
@@ -45,29 +80,67 @@ def alugar_bicicleta(dados: NovoAluguel):
     if not sucesso_destrancar:
         raise HTTPException(status_code=500, detail="Erro ao destrancar tranca")
 
-    # UC03 - Passo 8: Registrar aluguel
-    aluguel = aluguel_repo.criar_aluguel(
-        dados.ciclista,
-        dados.trancaInicio,
-        bicicleta['id'],
-        cobranca.id
+    aluguel = _registrar_aluguel(db, ciclista_repo, aluguel_repo, dados, bicicleta, cobranca)
+    notificar_entregador()
+
+    return aluguel
+
+
+async def alugar_bicicleta_async(dados: NovoAluguel):
+    """
+    UC03: Alugar Bicicleta (variante assíncrona, ativada por ALUGUEL_ASYNC)
+
+    As chamadas aos outros serviços não ocupam uma thread do pool enquanto
+    aguardam resposta, e passos independentes rodam juntos. O acesso ao banco
+    local continua síncrono e vai para o threadpool. Medida num único núcleo,
+    teve latência pior que a síncrona sob concorrência (p50 145 x 107 ms com
+    10 clientes, 3095 x 850 ms com 50), por isso não é o padrão.
+    """
+    db = get_db()
+    ciclista_repo = CiclistaRepository(db)
+    aluguel_repo = AluguelRepository(db)
+
+    # UC03 - R1 e Passo 4: verificações locais junto com a leitura da bicicleta na tranca
+    erro_elegibilidade, (sucesso_bicicleta, bicicleta) = await asyncio.gather(
+        run_in_threadpool(_erro_elegibilidade, ciclista_repo, aluguel_repo, dados.ciclista),
+        equipamento_service.obter_bicicleta_tranca_async(dados.trancaInicio)
+    )
+
+    if erro_elegibilidade:
+        raise HTTPException(status_code=422, detail=erro_elegibilidade)
+
+    if not sucesso_bicicleta or not bicicleta:
+        raise HTTPException(status_code=422, detail="Não há bicicleta na tranca informada")
+
+    # UC03 - Passo 6: Cobrar R$ 10,00
+    sucesso_cobranca, cobranca_resultado = await pagamento_service.cobrar_async(10.00, dados.ciclista, "Aluguel SCB")
+
+    if not sucesso_cobranca or cobranca_resultado.get("status") != "PAGA":
+        raise HTTPException(status_code=422, detail="Pagamento não autorizado")
+
+    # Registro da cobrança e UC03 - Passo 10 (destrancar) são independentes
+    cobranca, (sucesso_destrancar, _) = await asyncio.gather(
+        run_in_threadpool(aluguel_repo.criar_cobranca, 10.00, dados.ciclista, "ALUGUEL_INICIAL"),
+        equipamento_service.destrancar_async(dados.trancaInicio, bicicleta['id'])
     )
+    if not sucesso_destrancar:
+        raise HTTPException(status_code=500, detail="Erro ao destrancar tranca")
 
-    # UC03 - Passo 11: Enviar email
-    ciclista = ciclista_repo.buscar_por_id(dados.ciclista)
-    sucesso_email, _ = email_service.enviar_recibo_aluguel(
-        ciclista.email,
-        ciclista.nome,
-        bicicleta['id'],
-        dados.trancaInicio,
-        10.00,
-        aluguel.horaInicio
+    aluguel = await run_in_threadpool(
+        _registrar_aluguel, db, ciclista_repo, aluguel_repo, dados, bicicleta, cobranca
     )
-    if not sucesso_email:
-        print(f"Aviso: Falha ao enviar email de confirmacao de aluguel para {ciclista.email}")
+    notificar_entregador()
 
     return aluguel
 
+
+router.add_api_route(
+    "/aluguel",
+    alugar_bicicleta_async if ALUGUEL_ASYNC else alugar_bicicleta,
+    methods=["POST"],
+    response_model=Aluguel,
+)
+
 @router.post("/devolucao", response_model=Devolucao)
 def devolver_bicicleta(dados: NovaDevolucao):
     """UC04: Devolver Bicicleta"""
@@ -76,19 +149,13 @@ def devolver_bicicleta(dados: NovaDevolucao):
     aluguel_repo = AluguelRepository(db)
 
     # Buscar aluguel ativo da bicicleta
-    todos_alugueis = db.table('alugueis').all()
-    aluguel_dict = None
-
-    for a in todos_alugueis:
-        if a['idBicicleta'] == dados.idBicicleta and a['status'] == 'EM_ANDAMENTO':
-            aluguel_dict = a
-            break
+    aluguel_ativo = aluguel_repo.buscar_aluguel_ativo_por_bicicleta(dados.idBicicleta)
 
-    if not aluguel_dict:
+    if not aluguel_ativo:
         raise HTTPException(status_code=422, detail="Não há aluguel ativo para esta bicicleta")
 
     # UC04 - Passo 3: Calcular tempo
-    hora_inicio = datetime.fromisoformat(aluguel_dict['horaInicio'])
+    hora_inicio = aluguel_ativo.horaInicio
     hora_fim = datetime.now()
     tempo_minutos = int((hora_fim - hora_inicio).total_seconds() / 60)
 
@@ -104,7 +171,7 @@ def devolver_bicicleta(dados: NovaDevolucao):
     if taxa_extra > 0:
         cobranca_extra = aluguel_repo.criar_cobranca(
             taxa_extra,
-            aluguel_dict['ciclista'],
+            aluguel_ativo.ciclista,
             "TAXA_EXTRA"
         )
         id_cobranca_extra = cobranca_extra.id
@@ -114,26 +181,27 @@ def devolver_bicicleta(dados: NovaDevolucao):
     if not sucesso_trancar:
         raise HTTPException(status_code=500, detail="Erro ao trancar tranca")
 
-    # UC04 - Passo 4: Finalizar aluguel
-    aluguel = aluguel_repo.finalizar_aluguel(
-        aluguel_dict['id'],
-        dados.idTranca,
-        id_cobranca_extra
-    )
+    with transacao(db):
+        # UC04 - Passo 4: Finalizar aluguel
+        aluguel = aluguel_repo.finalizar_aluguel(
+            aluguel_ativo.id,
+            dados.idTranca,
+            id_cobranca_extra
+        )
 
-    # UC04 - Passo 7: Enviar email
-    ciclista = ciclista_repo.buscar_por_id(aluguel.ciclista)
-    sucesso_email, _ = email_service.enviar_recibo_devolucao(
-        ciclista.email,
-        ciclista.nome,
-        dados.idBicicleta,
-        dados.idTranca,
-        tempo_minutos,
-        10.00 + taxa_extra,
-        taxa_extra
-    )
-    if not sucesso_email:
-        print(f"Aviso: Falha ao enviar email de confirmacao de devolucao para {ciclista.email}")
+        # UC04 - Passo 7: Recibo vai para a outbox (enviado em segundo plano)
+        ciclista = ciclista_repo.buscar_por_id(aluguel.ciclista)
+        assunto, mensagem = EmailService.email_recibo_devolucao(
+            ciclista.nome,
+            dados.idBicicleta,
+            dados.idTranca,
+            tempo_minutos,
+            10.00 + taxa_extra,
+            taxa_extra
+        )
+        OutboxRepository(db).enfileirar("RECIBO_DEVOLUCAO", ciclista.email, assunto, mensagem)
+
+    notificar_entregador()
 
     return Devolucao(
         aluguel=aluguel,
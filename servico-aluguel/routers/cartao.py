@@ -1,20 +1,30 @@
 """ROUTER: Cartão de Crédito - UC07"""
 
-from fastapi import APIRouter, HTTPException, Query as QueryParam
-from typing import List
+from fastapi import APIRouter, HTTPException, Request, Query as QueryParam
+from typing import List, Optional, Union
 from models.cartao_model import CartaoDeCredito, NovoCartaoDeCredito
 from repositories.cartao_repository import CartaoRepository
 from services.pagamento_service import pagamento_service
 from database.database import get_db
+from utils.paginacao import Pagina, LIMITE_MAXIMO, listar
 
 router = APIRouter(prefix="/cartao", tags=["Cartão de Crédito"])
 
-@router.get("", response_model=List[CartaoDeCredito])
-def listar_cartoes():
-    """Lista todos os cartões"""
+@router.get("", response_model=Union[List[CartaoDeCredito], Pagina[CartaoDeCredito]])
+def listar_cartoes(
+    request: Request,
+    limit: Optional[int] = QueryParam(None, ge=1, le=LIMITE_MAXIMO, description="Tamanho da página"),
+    cursor: Optional[str] = QueryParam(None, description="Cursor retornado na página anterior")
+):
+    """
+    Lista todos os cartões.
+
+    Sem parâmetros retorna a lista completa; com limit/cursor retorna uma
+    página; com Accept: application/x-ndjson retorna um cartão por linha.
+    """
     db = get_db()
     repo = CartaoRepository(db)
-    return repo.listar()
+    return listar(request, limit, cursor, repo.listar, repo.listar_pagina, repo.iterar)
 
 @router.get("/{id}", response_model=CartaoDeCredito)
 def obter_cartao_por_id(id: int):
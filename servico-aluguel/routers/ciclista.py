@@ -7,12 +7,42 @@ from models.erro_model import Erro, CodigosErro
 from repositories.ciclista_repository import CiclistaRepository
 from repositories.cartao_repository import CartaoRepository
 from repositories.aluguel_repository import AluguelRepository
-from services.email_service import email_service
+from repositories.outbox_repository import OutboxRepository
+from services.email_service import EmailService
+from services.outbox_service import notificar_entregador
 from services.pagamento_service import pagamento_service
-from database.database import get_db
+from database.database import get_db, transacao
+from database.indices import ViolacaoIndiceUnico
 
 router = APIRouter(prefix="", tags=["Ciclista"])
 
+
+def _erro_duplicidade(erro: ViolacaoIndiceUnico) -> HTTPException:
+    """
+    Converte a violação de índice único em erro HTTP: email/CPF duplicados
+    são erro do usuário (422); qualquer outro índice (ex.: id) é falha
+    interna (500), não dado informado por ele.
+    """
+    if erro.campos == ('cpf',):
+        codigo, mensagem = CodigosErro.CPF_JA_CADASTRADO, f"O CPF {erro.valor[0]} já está cadastrado"
+    elif erro.campos == ('email',):
+        codigo, mensagem = CodigosErro.EMAIL_JA_CADASTRADO, f"O email {erro.valor[0]} já está cadastrado"
+    else:
+        return HTTPException(
+            status_code=500,
+            detail=Erro(
+                codigo=CodigosErro.ERRO_INTERNO,
+                mensagem="Erro interno ao gravar o ciclista",
+                detalhes=str(erro)
+            ).model_dump()
+        )
+
+    return HTTPException(
+        status_code=422,
+        detail=Erro(codigo=codigo, mensagem=mensagem).model_dump()
+    )
+
+
 @router.post("/ciclista", response_model=Ciclista, status_code=status.HTTP_201_CREATED)
 def cadastrar_ciclista(dados: CiclistaCadastro, meio_pagamento: NovoCartaoDeCredito):
     """
@@ -52,21 +82,21 @@ def cadastrar_ciclista(dados: CiclistaCadastro, meio_pagamento: NovoCartaoDeCred
             ).model_dump()
         )
 
-    # UC01 - Passo 8: Registrar ciclista
-    ciclista = ciclista_repo.criar(dados.ciclista, dados.senha)
+    with transacao(db):
+        # UC01 - Passo 8: Registrar ciclista (CPF duplicado é barrado pelo índice único)
+        try:
+            ciclista = ciclista_repo.criar(dados.ciclista, dados.senha)
+        except ViolacaoIndiceUnico as erro:
+            raise _erro_duplicidade(erro)
 
-    # Registrar cartão
-    cartao_repo.criar(ciclista.id, meio_pagamento)
+        # Registrar cartão
+        cartao_repo.criar(ciclista.id, meio_pagamento)
 
-    # UC01 - Passo 9: Enviar email confirmação
-    sucesso_email, _ = email_service.enviar_confirmacao_cadastro(
-        ciclista.email,
-        ciclista.nome,
-        ciclista.id
-    )
-    if not sucesso_email:
-        print(f"Aviso: Falha ao enviar email de confirmacao para {ciclista.email}")
+        # UC01 - Passo 9: Email de confirmação vai para a outbox (enviado em segundo plano)
+        assunto, mensagem = EmailService.email_confirmacao_cadastro(ciclista.nome, ciclista.id)
+        OutboxRepository(db).enfileirar("CONFIRMACAO_CADASTRO", ciclista.email, assunto, mensagem)
 
+    notificar_entregador()
     return ciclista
 
 @router.post("/ciclista/{idCiclista}/ativar", response_model=Ciclista)
@@ -105,7 +135,10 @@ def alterar_ciclista(idCiclista: int, dados: NovoCiclista):
         raise HTTPException(status_code=404, detail="Ciclista não encontrado")
 
     dados_update = dados.model_dump(exclude_none=True)
-    return ciclista_repo.atualizar(idCiclista, dados_update)
+    try:
+        return ciclista_repo.atualizar(idCiclista, dados_update)
+    except ViolacaoIndiceUnico as erro:
+        raise _erro_duplicidade(erro)
 
 @router.get("/ciclista/{idCiclista}/permiteAluguel", response_model=bool)
 def permite_aluguel(idCiclista: int):
@@ -1,18 +1,28 @@
 """ROUTER: Funcionário - UC15"""
-from fastapi import APIRouter, HTTPException, status
-from typing import List
+from fastapi import APIRouter, HTTPException, Request, status, Query as QueryParam
+from typing import List, Optional, Union
 from models.funcionario_model import Funcionario, NovoFuncionario
 from repositories.funcionario_repository import FuncionarioRepository
 from database.database import get_db
+from utils.paginacao import Pagina, LIMITE_MAXIMO, listar
 
 router = APIRouter(prefix="/funcionario", tags=["Funcionário"])
 
-@router.get("", response_model=List[Funcionario])
-def listar_funcionarios():
-    """UC15: Recupera funcionários cadastrados"""
+@router.get("", response_model=Union[List[Funcionario], Pagina[Funcionario]])
+def listar_funcionarios(
+    request: Request,
+    limit: Optional[int] = QueryParam(None, ge=1, le=LIMITE_MAXIMO, description="Tamanho da página"),
+    cursor: Optional[str] = QueryParam(None, description="Cursor retornado na página anterior")
+):
+    """
+    UC15: Recupera funcionários cadastrados
+
+    Sem parâmetros retorna a lista completa; com limit/cursor retorna uma
+    página; com Accept: application/x-ndjson retorna um funcionário por linha.
+    """
     db = get_db()
     repo = FuncionarioRepository(db)
-    return repo.listar()
+    return listar(request, limit, cursor, repo.listar, repo.listar_pagina, repo.iterar)
 
 @router.post("", response_model=Funcionario, status_code=status.HTTP_201_CREATED)
 def cadastrar_funcionario(funcionario: NovoFuncionario):
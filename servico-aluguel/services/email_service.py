@@ -2,14 +2,20 @@
 
 import os
 import logging
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 import httpx
 
+from services.http_clientes import obter_cliente
+
 logger = logging.getLogger(__name__)
 
 BASE_URL_EXTERNO = os.getenv("SERVICO_EXTERNO_URL", "http://localhost:8002")
 BASE_URL = os.getenv("BASE_URL", "http://localhost:8001")
 
+# Segundos a mais de timeout por email num /enviarEmails: o servico externo
+# envia os emails do lote um a um por SMTP antes de responder
+EMAIL_TIMEOUT_POR_ITEM = float(os.getenv("EMAIL_TIMEOUT_POR_ITEM", "2.0"))
+
 
 class EmailService:
     """Servico para comunicacao com o microsservico externo (envio de emails)"""
@@ -25,6 +31,10 @@ class EmailService:
         self.base_url = base_url or BASE_URL_EXTERNO
         self.timeout = timeout
 
+    def _cliente(self) -> httpx.Client:
+        """Cliente HTTP compartilhado (pool com keep-alive) para o servico de destino"""
+        return obter_cliente(self.base_url, self.timeout)
+
     def enviar_email(
         self,
         email: str,
@@ -51,19 +61,12 @@ class EmailService:
                 "corpo": mensagem
             }
 
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.post(
-                    f"{self.base_url}/email/enviar",
-                    json=payload
-                )
-
-                if response.status_code == 200:
-                    resultado = response.json()
-                    logger.info(f"Email enviado com sucesso para {email}")
-                    return True, resultado
-                else:
-                    logger.warning(f"Erro ao enviar email para {email}: status {response.status_code}")
-                    return False, {"error": response.text, "status_code": response.status_code}
+            client = self._cliente()
+            response = client.post(
+                f"{self.base_url}/email/enviar",
+                json=payload
+            )
+            return self._resultado_envio(email, response)
 
         except httpx.TimeoutException:
             logger.error(f"Timeout ao enviar email para {email}")
@@ -75,6 +78,90 @@ class EmailService:
             logger.error(f"Erro inesperado ao enviar email: {str(e)}")
             return False, {"error": str(e)}
 
+    def enviar_emails(
+        self,
+        emails: List[Tuple[str, str, str]],
+        chaves: Optional[List[Optional[str]]] = None
+    ) -> List[Tuple[bool, Dict[str, Any]]]:
+        """
+        Envia varios emails numa unica chamada ao /enviarEmails do servico externo
+
+        O timeout da chamada cresce com o lote (EMAIL_TIMEOUT_POR_ITEM por email).
+        Com ``chaves``, cada email leva uma chave de idempotencia: repetir o lote
+        apos um timeout nao reenvia os emails que o servico externo ja enviou.
+
+        Args:
+            emails: Tuplas (destinatario, assunto, mensagem)
+            chaves: Chave de idempotencia de cada email (opcional)
+
+        Returns:
+            Uma tupla (sucesso, resposta/erro) por email, na ordem recebida.
+            Se a chamada inteira falhar, ou a resposta nao trouxer um resultado
+            por email, todos recebem o mesmo erro.
+        """
+        if not emails:
+            return []
+
+        try:
+            logger.info(f"Enviando lote de {len(emails)} emails")
+
+            payload = [
+                {"email": email, "assunto": assunto, "mensagem": mensagem}
+                for email, assunto, mensagem in emails
+            ]
+            for item, chave in zip(payload, chaves or ()):
+                if chave:
+                    item["chave"] = chave
+
+            client = self._cliente()
+            response = client.post(
+                f"{self.base_url}/enviarEmails",
+                json=payload,
+                timeout=self.timeout + EMAIL_TIMEOUT_POR_ITEM * len(emails)
+            )
+
+            if response.status_code != 200:
+                logger.warning(f"Erro ao enviar lote de emails: status {response.status_code}")
+                erro = {"error": response.text, "status_code": response.status_code}
+                return [(False, erro)] * len(emails)
+
+            itens = response.json()
+            if not isinstance(itens, list) or len(itens) != len(emails):
+                recebidos = len(itens) if isinstance(itens, list) else 0
+                logger.error(f"Resposta do lote de emails com {recebidos} resultados para {len(emails)} emails")
+                erro = {"error": f"Resposta com {recebidos} resultados para {len(emails)} emails"}
+                return [(False, erro)] * len(emails)
+
+            resultados = []
+            for item in itens:
+                email = item.get("email") or {}
+                if item.get("erro") is None and email.get("enviado"):
+                    resultados.append((True, email))
+                else:
+                    erro = item.get("erro") or {}
+                    resultados.append((False, {"error": erro.get("mensagem", "Email nao enviado")}))
+            return resultados
+
+        except httpx.TimeoutException:
+            logger.error(f"Timeout ao enviar lote de emails")
+            return [(False, {"error": "Timeout ao conectar com servico externo"})] * len(emails)
+        except httpx.ConnectError:
+            logger.error(f"Erro de conexao com servico externo")
+            return [(False, {"error": "Erro de conexao com servico externo"})] * len(emails)
+        except Exception as e:
+            logger.error(f"Erro inesperado ao enviar lote de emails: {str(e)}")
+            return [(False, {"error": str(e)})] * len(emails)
+
+    @staticmethod
+    def _resultado_envio(email: str, response: httpx.Response) -> Tuple[bool, Dict[str, Any]]:
+        if response.status_code == 200:
+            resultado = response.json()
+            logger.info(f"Email enviado com sucesso para {email}")
+            return True, resultado
+        else:
+            logger.warning(f"Erro ao enviar email para {email}: status {response.status_code}")
+            return False, {"error": response.text, "status_code": response.status_code}
+
     def enviar_confirmacao_cadastro(
         self,
         email: str,
@@ -92,22 +179,8 @@ class EmailService:
         Returns:
             Tupla (sucesso, resposta/erro)
         """
-        link_confirmacao = f"{BASE_URL}/ciclista/{id_ciclista}/ativar"
-
-        mensagem = f"""
-        Ola {nome}!
-
-        Para ativar sua conta, clique no link abaixo:
-        {link_confirmacao}
-
-        Se voce nao se cadastrou, ignore este email.
-        """
-
-        return self.enviar_email(
-            email=email,
-            assunto="Confirme seu cadastro no SCB",
-            mensagem=mensagem
-        )
+        assunto, mensagem = self.email_confirmacao_cadastro(nome, id_ciclista)
+        return self.enviar_email(email=email, assunto=assunto, mensagem=mensagem)
 
     def enviar_recibo_aluguel(
         self,
@@ -132,27 +205,8 @@ class EmailService:
         Returns:
             Tupla (sucesso, resposta/erro)
         """
-        mensagem = f"""
-        Ola {nome}!
-
-        Seu aluguel foi realizado com sucesso!
-
-        Detalhes do Aluguel:
-        - Bicicleta: #{bicicleta_id}
-        - Tranca de retirada: #{tranca_id}
-        - Horario: {hora}
-        - Valor cobrado: R$ {valor:.2f}
-
-        Aproveite seu passeio!
-
-        Lembre-se: apos 2 horas, sera cobrado R$ 5,00 a cada meia hora.
-        """
-
-        return self.enviar_email(
-            email=email,
-            assunto="Aluguel realizado",
-            mensagem=mensagem
-        )
+        assunto, mensagem = self.email_recibo_aluguel(nome, bicicleta_id, tranca_id, valor, hora)
+        return self.enviar_email(email=email, assunto=assunto, mensagem=mensagem)
 
     def enviar_recibo_devolucao(
         self,
@@ -179,6 +233,60 @@ class EmailService:
         Returns:
             Tupla (sucesso, resposta/erro)
         """
+        assunto, mensagem = self.email_recibo_devolucao(
+            nome, bicicleta_id, tranca_id, tempo_minutos, valor_total, taxa_extra
+        )
+        return self.enviar_email(email=email, assunto=assunto, mensagem=mensagem)
+
+    # Conteudo dos emails (usado tambem ao gravar na outbox)
+
+    @staticmethod
+    def email_confirmacao_cadastro(nome: str, id_ciclista: int) -> Tuple[str, str]:
+        """UC01 - Passo 9: (assunto, mensagem) do email de confirmacao de cadastro"""
+        link_confirmacao = f"{BASE_URL}/ciclista/{id_ciclista}/ativar"
+
+        mensagem = f"""
+        Ola {nome}!
+
+        Para ativar sua conta, clique no link abaixo:
+        {link_confirmacao}
+
+        Se voce nao se cadastrou, ignore este email.
+        """
+
+        return "Confirme seu cadastro no SCB", mensagem
+
+    @staticmethod
+    def email_recibo_aluguel(nome: str, bicicleta_id: int, tranca_id: int, valor: float, hora) -> Tuple[str, str]:
+        """UC03 - R4: (assunto, mensagem) do recibo de aluguel"""
+        mensagem = f"""
+        Ola {nome}!
+
+        Seu aluguel foi realizado com sucesso!
+
+        Detalhes do Aluguel:
+        - Bicicleta: #{bicicleta_id}
+        - Tranca de retirada: #{tranca_id}
+        - Horario: {hora}
+        - Valor cobrado: R$ {valor:.2f}
+
+        Aproveite seu passeio!
+
+        Lembre-se: apos 2 horas, sera cobrado R$ 5,00 a cada meia hora.
+        """
+
+        return "Aluguel realizado", mensagem
+
+    @staticmethod
+    def email_recibo_devolucao(
+        nome: str,
+        bicicleta_id: int,
+        tranca_id: int,
+        tempo_minutos: int,
+        valor_total: float,
+        taxa_extra: float
+    ) -> Tuple[str, str]:
+        """UC04 - R3: (assunto, mensagem) do recibo de devolucao"""
         horas = tempo_minutos // 60
         minutos = tempo_minutos % 60
 
@@ -205,11 +313,7 @@ class EmailService:
 
         """
 
-        return self.enviar_email(
-            email=email,
-            assunto="Devolucao realizada",
-            mensagem=mensagem
-        )
+        return "Devolucao realizada", mensagem
 
 
 email_service = EmailService()
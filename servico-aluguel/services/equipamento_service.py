@@ -5,6 +5,8 @@ import logging
 from typing import Dict, Any, Optional, Tuple
 import httpx
 
+from services.http_clientes import obter_cliente, obter_cliente_async
+
 logger = logging.getLogger(__name__)
 
 BASE_URL_EQUIPAMENTO = os.getenv("SERVICO_EQUIPAMENTO_URL", "http://localhost:8000")
@@ -24,6 +26,14 @@ class EquipamentoService:
         self.base_url = base_url or BASE_URL_EQUIPAMENTO
         self.timeout = timeout
 
+    def _cliente(self) -> httpx.Client:
+        """Cliente HTTP compartilhado (pool com keep-alive) para o servico de destino"""
+        return obter_cliente(self.base_url, self.timeout)
+
+    def _cliente_async(self) -> httpx.AsyncClient:
+        """Cliente HTTP assincrono compartilhado para o servico de destino"""
+        return obter_cliente_async(self.base_url, self.timeout)
+
     def obter_bicicleta_tranca(self, id_tranca: int) -> Tuple[bool, Optional[Dict[str, Any]]]:
         """
         UC03 - Passo 4: Le o numero da bicicleta presa na tranca
@@ -37,19 +47,36 @@ class EquipamentoService:
         try:
             logger.info(f"Verificando tranca {id_tranca} no servico-equipamento")
 
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.get(f"{self.base_url}/tranca/{id_tranca}/bicicleta")
+            client = self._cliente()
+            response = client.get(f"{self.base_url}/tranca/{id_tranca}/bicicleta")
+            return self._resultado_bicicleta_tranca(id_tranca, response)
 
-                if response.status_code == 200:
-                    bicicleta = response.json()
-                    logger.info(f"Bicicleta encontrada na tranca {id_tranca}: ID {bicicleta.get('id')}")
-                    return True, bicicleta
-                elif response.status_code == 404:
-                    logger.info(f"Tranca {id_tranca} esta vazia (sem bicicleta)")
-                    return True, None
-                else:
-                    logger.warning(f"Erro ao buscar bicicleta na tranca {id_tranca}: status {response.status_code}")
-                    return False, {"error": response.text, "status_code": response.status_code}
+        except httpx.TimeoutException:
+            logger.error(f"Timeout ao buscar bicicleta na tranca {id_tranca}")
+            return False, {"error": "Timeout ao conectar com servico de equipamento"}
+        except httpx.ConnectError:
+            logger.error(f"Erro de conexao com servico de equipamento")
+            return False, {"error": "Erro de conexao com servico de equipamento"}
+        except Exception as e:
+            logger.error(f"Erro inesperado ao buscar bicicleta na tranca {id_tranca}: {str(e)}")
+            return False, {"error": str(e)}
+
+    async def obter_bicicleta_tranca_async(self, id_tranca: int) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        UC03 - Passo 4: Variante assincrona de obter_bicicleta_tranca
+
+        Args:
+            id_tranca: ID da tranca
+
+        Returns:
+            Tupla (sucesso, dados_bicicleta/erro)
+        """
+        try:
+            logger.info(f"Verificando tranca {id_tranca} no servico-equipamento")
+
+            client = self._cliente_async()
+            response = await client.get(f"{self.base_url}/tranca/{id_tranca}/bicicleta")
+            return self._resultado_bicicleta_tranca(id_tranca, response)
 
         except httpx.TimeoutException:
             logger.error(f"Timeout ao buscar bicicleta na tranca {id_tranca}")
@@ -61,6 +88,18 @@ class EquipamentoService:
             logger.error(f"Erro inesperado ao buscar bicicleta na tranca {id_tranca}: {str(e)}")
             return False, {"error": str(e)}
 
+    def _resultado_bicicleta_tranca(self, id_tranca: int, response: httpx.Response) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        if response.status_code == 200:
+            bicicleta = response.json()
+            logger.info(f"Bicicleta encontrada na tranca {id_tranca}: ID {bicicleta.get('id')}")
+            return True, bicicleta
+        elif response.status_code == 404:
+            logger.info(f"Tranca {id_tranca} esta vazia (sem bicicleta)")
+            return True, None
+        else:
+            logger.warning(f"Erro ao buscar bicicleta na tranca {id_tranca}: status {response.status_code}")
+            return False, {"error": response.text, "status_code": response.status_code}
+
     def destrancar(self, id_tranca: int, id_bicicleta: int) -> Tuple[bool, Dict[str, Any]]:
         """
         UC03 - Passo 10: Solicita a abertura da tranca
@@ -77,19 +116,45 @@ class EquipamentoService:
 
             payload = {"bicicleta": id_bicicleta}
 
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.post(
-                    f"{self.base_url}/tranca/{id_tranca}/destrancar",
-                    json=payload
-                )
+            client = self._cliente()
+            response = client.post(
+                f"{self.base_url}/tranca/{id_tranca}/destrancar",
+                json=payload
+            )
+            return self._resultado_destrancar(id_tranca, response)
 
-                if response.status_code == 200:
-                    resultado = response.json()
-                    logger.info(f"Tranca {id_tranca} destrancada com sucesso")
-                    return True, resultado
-                else:
-                    logger.warning(f"Erro ao destrancar tranca {id_tranca}: status {response.status_code}")
-                    return False, {"error": response.text, "status_code": response.status_code}
+        except httpx.TimeoutException:
+            logger.error(f"Timeout ao destrancar tranca {id_tranca}")
+            return False, {"error": "Timeout ao conectar com servico de equipamento"}
+        except httpx.ConnectError:
+            logger.error(f"Erro de conexao com servico de equipamento")
+            return False, {"error": "Erro de conexao com servico de equipamento"}
+        except Exception as e:
+            logger.error(f"Erro inesperado ao destrancar tranca {id_tranca}: {str(e)}")
+            return False, {"error": str(e)}
+
+    async def destrancar_async(self, id_tranca: int, id_bicicleta: int) -> Tuple[bool, Dict[str, Any]]:
+        """
+        UC03 - Passo 10: Variante assincrona de destrancar
+
+        Args:
+            id_tranca: ID da tranca
+            id_bicicleta: ID da bicicleta
+
+        Returns:
+            Tupla (sucesso, resposta/erro)
+        """
+        try:
+            logger.info(f"Destrancando tranca {id_tranca} (bicicleta {id_bicicleta})")
+
+            payload = {"bicicleta": id_bicicleta}
+
+            client = self._cliente_async()
+            response = await client.post(
+                f"{self.base_url}/tranca/{id_tranca}/destrancar",
+                json=payload
+            )
+            return self._resultado_destrancar(id_tranca, response)
 
         except httpx.TimeoutException:
             logger.error(f"Timeout ao destrancar tranca {id_tranca}")
@@ -101,6 +166,15 @@ class EquipamentoService:
             logger.error(f"Erro inesperado ao destrancar tranca {id_tranca}: {str(e)}")
             return False, {"error": str(e)}
 
+    def _resultado_destrancar(self, id_tranca: int, response: httpx.Response) -> Tuple[bool, Dict[str, Any]]:
+        if response.status_code == 200:
+            resultado = response.json()
+            logger.info(f"Tranca {id_tranca} destrancada com sucesso")
+            return True, resultado
+        else:
+            logger.warning(f"Erro ao destrancar tranca {id_tranca}: status {response.status_code}")
+            return False, {"error": response.text, "status_code": response.status_code}
+
     def trancar(self, id_tranca: int, id_bicicleta: int) -> Tuple[bool, Dict[str, Any]]:
         """
         UC04 - Passo 6: Solicita o fechamento da tranca
@@ -117,19 +191,19 @@ class EquipamentoService:
 
             payload = {"bicicleta": id_bicicleta}
 
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.post(
-                    f"{self.base_url}/tranca/{id_tranca}/trancar",
-                    json=payload
-                )
+            client = self._cliente()
+            response = client.post(
+                f"{self.base_url}/tranca/{id_tranca}/trancar",
+                json=payload
+            )
 
-                if response.status_code == 200:
-                    resultado = response.json()
-                    logger.info(f"Tranca {id_tranca} trancada com sucesso")
-                    return True, resultado
-                else:
-                    logger.warning(f"Erro ao trancar tranca {id_tranca}: status {response.status_code}")
-                    return False, {"error": response.text, "status_code": response.status_code}
+            if response.status_code == 200:
+                resultado = response.json()
+                logger.info(f"Tranca {id_tranca} trancada com sucesso")
+                return True, resultado
+            else:
+                logger.warning(f"Erro ao trancar tranca {id_tranca}: status {response.status_code}")
+                return False, {"error": response.text, "status_code": response.status_code}
 
         except httpx.TimeoutException:
             logger.error(f"Timeout ao trancar tranca {id_tranca}")
@@ -154,19 +228,19 @@ class EquipamentoService:
         try:
             logger.info(f"Verificando status da bicicleta {id_bicicleta}")
 
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.get(f"{self.base_url}/bicicleta/{id_bicicleta}")
-
-                if response.status_code == 200:
-                    bicicleta = response.json()
-                    logger.info(f"Bicicleta {id_bicicleta} encontrada: status {bicicleta.get('status')}")
-                    return True, bicicleta
-                elif response.status_code == 404:
-                    logger.warning(f"Bicicleta {id_bicicleta} nao encontrada")
-                    return False, {"error": "Bicicleta nao encontrada", "status_code": 404}
-                else:
-                    logger.warning(f"Erro ao buscar bicicleta {id_bicicleta}: status {response.status_code}")
-                    return False, {"error": response.text, "status_code": response.status_code}
+            client = self._cliente()
+            response = client.get(f"{self.base_url}/bicicleta/{id_bicicleta}")
+
+            if response.status_code == 200:
+                bicicleta = response.json()
+                logger.info(f"Bicicleta {id_bicicleta} encontrada: status {bicicleta.get('status')}")
+                return True, bicicleta
+            elif response.status_code == 404:
+                logger.warning(f"Bicicleta {id_bicicleta} nao encontrada")
+                return False, {"error": "Bicicleta nao encontrada", "status_code": 404}
+            else:
+                logger.warning(f"Erro ao buscar bicicleta {id_bicicleta}: status {response.status_code}")
+                return False, {"error": response.text, "status_code": response.status_code}
 
         except httpx.TimeoutException:
             logger.error(f"Timeout ao buscar bicicleta {id_bicicleta}")
@@ -0,0 +1,105 @@
+"""Clientes HTTP compartilhados pelas integracoes com os outros microsservicos
+
+Cada combinacao (URL base, timeout) tem um unico httpx.Client, criado no
+primeiro uso e reaproveitado por todas as chamadas. Assim as conexoes TCP/TLS
+ficam abertas (keep-alive) entre requisicoes em vez de serem refeitas a cada
+chamada. Os pools sao fechados no shutdown da aplicacao.
+
+As variantes assincronas (httpx.AsyncClient) ficam presas ao event loop em
+que foram criadas, entao ha um conjunto de clientes por loop.
+"""
+
+import os
+import asyncio
+import threading
+import weakref
+import logging
+from typing import Dict, Tuple
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Maximo de conexoes simultaneas por servico de destino
+HTTP_MAX_CONEXOES = int(os.getenv("HTTP_MAX_CONEXOES", "20"))
+
+# Conexoes ociosas mantidas abertas por servico de destino
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+
+# Segundos que uma conexao ociosa fica aberta antes de ser descartada
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+_clientes: Dict[Tuple[str, float], httpx.Client] = {}
+_clientes_async: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, float], httpx.AsyncClient]]" = \
+    weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def limites_pool() -> httpx.Limits:
+    """Limites de conexao configurados por variavel de ambiente"""
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONEXOES,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+    )
+
+
+def obter_cliente(base_url: str, timeout: float) -> httpx.Client:
+    """
+    Retorna o cliente compartilhado para o servico de destino.
+
+    Args:
+        base_url: URL base do servico
+        timeout: Timeout das requisicoes em segundos
+
+    Returns:
+        Cliente httpx com pool de conexoes
+    """
+    chave = (base_url, timeout)
+    with _lock:
+        cliente = _clientes.get(chave)
+        if cliente is None or cliente.is_closed:
+            cliente = httpx.Client(timeout=timeout, limits=limites_pool())
+            _clientes[chave] = cliente
+            logger.info(f"Pool de conexoes criado para {base_url}")
+        return cliente
+
+
+def fechar_clientes():
+    """Fecha todos os pools de conexao (chamado no shutdown da aplicacao)"""
+    with _lock:
+        clientes = list(_clientes.values())
+        _clientes.clear()
+    for cliente in clientes:
+        cliente.close()
+
+
+def obter_cliente_async(base_url: str, timeout: float) -> httpx.AsyncClient:
+    """
+    Retorna o cliente assincrono compartilhado para o servico de destino
+    no event loop atual.
+
+    Args:
+        base_url: URL base do servico
+        timeout: Timeout das requisicoes em segundos
+
+    Returns:
+        Cliente httpx assincrono com pool de conexoes
+    """
+    loop = asyncio.get_running_loop()
+    chave = (base_url, timeout)
+    with _lock:
+        clientes = _clientes_async.setdefault(loop, {})
+        cliente = clientes.get(chave)
+        if cliente is None or cliente.is_closed:
+            cliente = httpx.AsyncClient(timeout=timeout, limits=limites_pool())
+            clientes[chave] = cliente
+            logger.info(f"Pool de conexoes assincrono criado para {base_url}")
+        return cliente
+
+
+async def fechar_clientes_async():
+    """Fecha os pools assincronos do event loop atual (shutdown da aplicacao)"""
+    with _lock:
+        clientes = _clientes_async.pop(asyncio.get_running_loop(), {})
+    for cliente in clientes.values():
+        await cliente.aclose()
@@ -0,0 +1,175 @@
+"""Entrega dos emails da outbox - envio fora do caminho das requisicoes
+
+Os handlers gravam o email na tabela outbox_emails na mesma escrita da mudanca
+de negocio (aluguel, devolucao, cadastro) e seguem sem esperar o servico
+externo. Uma thread em segundo plano le os pendentes em lotes, envia cada
+lote numa unica chamada ao /enviarEmails do servico externo e grava o
+resultado do lote inteiro de uma vez. Falhas sao reenviadas com
+espera exponencial ate OUTBOX_MAX_TENTATIVAS; depois disso o email fica com
+status FALHA para inspecao.
+
+Cada email leva a chave de idempotencia gravada na outbox: se a chamada der
+timeout depois de o servico externo ja ter enviado parte do lote, a nova
+tentativa nao envia esses emails de novo.
+
+Como a outbox e persistida, emails pendentes numa parada do servico sao
+enviados quando ele volta.
+"""
+
+import os
+import threading
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from tinydb import TinyDB
+
+from repositories.outbox_repository import OutboxRepository, ENVIADO, FALHA
+from services.email_service import EmailService, email_service
+
+logger = logging.getLogger(__name__)
+
+# Liga/desliga a thread de envio (desligada, os emails ficam pendentes)
+OUTBOX_ATIVA = os.getenv("OUTBOX_ATIVA", "1").lower() in ("1", "true", "sim")
+
+# Segundos entre varreduras quando nao ha aviso de email novo
+OUTBOX_INTERVALO = float(os.getenv("OUTBOX_INTERVALO", "1.0"))
+
+# Emails enviados por lote (uma chamada ao servico externo e uma escrita por lote)
+OUTBOX_LOTE = int(os.getenv("OUTBOX_LOTE", "50"))
+
+# Tentativas antes de marcar o email como FALHA
+OUTBOX_MAX_TENTATIVAS = int(os.getenv("OUTBOX_MAX_TENTATIVAS", "5"))
+
+# Espera antes da 2a tentativa, em segundos; dobra a cada falha
+OUTBOX_ESPERA_BASE = float(os.getenv("OUTBOX_ESPERA_BASE", "2.0"))
+
+
+class EntregadorOutbox:
+    """Thread que drena a outbox de emails de um banco"""
+
+    def __init__(
+        self,
+        db: TinyDB,
+        servico: EmailService = None,
+        lote: int = None,
+        intervalo: float = None,
+        max_tentativas: int = None,
+        espera_base: float = None
+    ):
+        self.repo = OutboxRepository(db)
+        self.servico = servico or email_service
+        self.lote = lote or OUTBOX_LOTE
+        self.intervalo = OUTBOX_INTERVALO if intervalo is None else intervalo
+        self.max_tentativas = max_tentativas or OUTBOX_MAX_TENTATIVAS
+        self.espera_base = OUTBOX_ESPERA_BASE if espera_base is None else espera_base
+
+        self._lock = threading.Lock()
+        self._aviso = threading.Event()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def processar_lote(self) -> int:
+        """
+        Envia um lote de emails pendentes vencidos e grava os resultados.
+
+        Returns:
+            Quantidade de emails processados (enviados ou nao)
+        """
+        with self._lock:
+            pendentes = self.repo.pendentes(self.lote)
+            if not pendentes:
+                return 0
+
+            envios = self.servico.enviar_emails(
+                [(email["destinatario"], email["assunto"], email["mensagem"]) for email in pendentes],
+                chaves=[email.get("chave") for email in pendentes]
+            )
+            resultados = [
+                (email, self._resultado(email, sucesso, resposta))
+                for email, (sucesso, resposta) in zip(pendentes, envios)
+            ]
+
+            self.repo.registrar_resultados(resultados)
+            return len(pendentes)
+
+    def drenar(self) -> int:
+        """Processa lotes ate nao haver pendente vencido; retorna o total processado"""
+        total = 0
+        while True:
+            processados = self.processar_lote()
+            total += processados
+            if processados < self.lote:
+                return total
+
+    def notificar(self):
+        """Acorda a thread (ha email novo na outbox)"""
+        self._aviso.set()
+
+    def iniciar(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name="outbox-emails", daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        """Encerra a thread; o que ficou pendente continua gravado na outbox"""
+        self._parar.set()
+        self._aviso.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _executar(self):
+        while not self._parar.is_set():
+            self._aviso.wait(self.intervalo)
+            self._aviso.clear()
+            if self._parar.is_set():
+                break
+            try:
+                self.drenar()
+            except Exception as e:
+                logger.error(f"Erro ao processar outbox de emails: {str(e)}")
+
+    def _resultado(self, email, sucesso: bool, resposta) -> dict:
+        tentativas = email["tentativas"] + 1
+        agora = datetime.now()
+
+        if sucesso:
+            return {"status": ENVIADO, "tentativas": tentativas, "enviadoEm": agora.isoformat(), "ultimoErro": None}
+
+        erro = str(resposta.get("error", resposta)) if isinstance(resposta, dict) else str(resposta)
+        if tentativas >= self.max_tentativas:
+            logger.error(f"Email {email['id']} para {email['destinatario']} descartado apos {tentativas} tentativas")
+            return {"status": FALHA, "tentativas": tentativas, "ultimoErro": erro}
+
+        espera = timedelta(seconds=self.espera_base * 2 ** (tentativas - 1))
+        logger.warning(f"Falha ao enviar email {email['id']} (tentativa {tentativas}): {erro}")
+        return {"tentativas": tentativas, "proximaTentativa": (agora + espera).isoformat(), "ultimoErro": erro}
+
+
+_entregador: Optional[EntregadorOutbox] = None
+
+
+def iniciar_entregador(db: TinyDB) -> EntregadorOutbox:
+    """Sobe a thread de envio da outbox (chamado no startup da aplicacao)"""
+    global _entregador
+    parar_entregador()
+    _entregador = EntregadorOutbox(db)
+    _entregador.iniciar()
+    return _entregador
+
+
+def parar_entregador():
+    """Encerra a thread de envio (chamado no shutdown da aplicacao)"""
+    global _entregador
+    if _entregador is not None:
+        _entregador.parar()
+        _entregador = None
+
+
+def notificar_entregador():
+    """Avisa a thread de envio que ha email novo; sem thread ativa, nao faz nada"""
+    if _entregador is not None:
+        _entregador.notificar()
@@ -6,6 +6,8 @@ from typing import Dict, Any, Tuple
 from datetime import datetime
 import httpx
 
+from services.http_clientes import obter_cliente, obter_cliente_async
+
 logger = logging.getLogger(__name__)
 
 BASE_URL_EXTERNO = os.getenv("SERVICO_EXTERNO_URL", "http://localhost:8002")
@@ -25,6 +27,14 @@ class PagamentoService:
         self.base_url = base_url or BASE_URL_EXTERNO
         self.timeout = timeout
 
+    def _cliente(self) -> httpx.Client:
+        """Cliente HTTP compartilhado (pool com keep-alive) para o servico de destino"""
+        return obter_cliente(self.base_url, self.timeout)
+
+    def _cliente_async(self) -> httpx.AsyncClient:
+        """Cliente HTTP assincrono compartilhado para o servico de destino"""
+        return obter_cliente_async(self.base_url, self.timeout)
+
     def validar_cartao(
         self,
         numero: str,
@@ -54,19 +64,19 @@ class PagamentoService:
                 "cvv": cvv
             }
 
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.post(
-                    f"{self.base_url}/cartao/validar",
-                    json=payload
-                )
+            client = self._cliente()
+            response = client.post(
+                f"{self.base_url}/cartao/validar",
+                json=payload
+            )
 
-                if response.status_code == 200:
-                    resultado = response.json()
-                    logger.info(f"Cartao validado com sucesso: {resultado.get('valido', False)}")
-                    return True, resultado
-                else:
-                    logger.warning(f"Erro ao validar cartao: status {response.status_code}")
-                    return False, {"error": response.text, "status_code": response.status_code}
+            if response.status_code == 200:
+                resultado = response.json()
+                logger.info(f"Cartao validado com sucesso: {resultado.get('valido', False)}")
+                return True, resultado
+            else:
+                logger.warning(f"Erro ao validar cartao: status {response.status_code}")
+                return False, {"error": response.text, "status_code": response.status_code}
 
         except httpx.TimeoutException:
             logger.error(f"Timeout ao validar cartao")
@@ -98,27 +108,49 @@ class PagamentoService:
         try:
             logger.info(f"Cobrando R$ {valor:.2f} do ciclista {id_ciclista}")
 
-            payload = {
-                "valor": valor,
-                "ciclista": id_ciclista,
-                "status": "PAGA",
-                "horaSolicitacao": datetime.now().isoformat(),
-                "horaFinalizacao": datetime.now().isoformat()
-            }
+            client = self._cliente()
+            response = client.post(
+                f"{self.base_url}/cobranca",
+                json=self._payload_cobranca(valor, id_ciclista)
+            )
+            return self._resultado_cobranca(response)
 
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.post(
-                    f"{self.base_url}/cobranca",
-                    json=payload
-                )
+        except httpx.TimeoutException:
+            logger.error(f"Timeout ao realizar cobranca")
+            return False, {"error": "Timeout ao conectar com servico externo"}
+        except httpx.ConnectError:
+            logger.error(f"Erro de conexao com servico externo")
+            return False, {"error": "Erro de conexao com servico externo"}
+        except Exception as e:
+            logger.error(f"Erro inesperado ao realizar cobranca: {str(e)}")
+            return False, {"error": str(e)}
 
-                if response.status_code == 200:
-                    resultado = response.json()
-                    logger.info(f"Cobranca realizada com sucesso: ID {resultado.get('id')}")
-                    return True, resultado
-                else:
-                    logger.warning(f"Erro ao realizar cobranca: status {response.status_code}")
-                    return False, {"error": response.text, "status_code": response.status_code}
+    async def cobrar_async(
+        self,
+        valor: float,
+        id_ciclista: int,
+        descricao: str = "Aluguel SCB"
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """
+        UC03: Variante assincrona de cobrar
+
+        Args:
+            valor: Valor a ser cobrado
+            id_ciclista: ID do ciclista
+            descricao: Descricao da cobranca
+
+        Returns:
+            Tupla (sucesso, dados_cobranca/erro)
+        """
+        try:
+            logger.info(f"Cobrando R$ {valor:.2f} do ciclista {id_ciclista}")
+
+            client = self._cliente_async()
+            response = await client.post(
+                f"{self.base_url}/cobranca",
+                json=self._payload_cobranca(valor, id_ciclista)
+            )
+            return self._resultado_cobranca(response)
 
         except httpx.TimeoutException:
             logger.error(f"Timeout ao realizar cobranca")
@@ -130,6 +162,26 @@ class PagamentoService:
             logger.error(f"Erro inesperado ao realizar cobranca: {str(e)}")
             return False, {"error": str(e)}
 
+    @staticmethod
+    def _payload_cobranca(valor: float, id_ciclista: int) -> Dict[str, Any]:
+        return {
+            "valor": valor,
+            "ciclista": id_ciclista,
+            "status": "PAGA",
+            "horaSolicitacao": datetime.now().isoformat(),
+            "horaFinalizacao": datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def _resultado_cobranca(response: httpx.Response) -> Tuple[bool, Dict[str, Any]]:
+        if response.status_code == 200:
+            resultado = response.json()
+            logger.info(f"Cobranca realizada com sucesso: ID {resultado.get('id')}")
+            return True, resultado
+        else:
+            logger.warning(f"Erro ao realizar cobranca: status {response.status_code}")
+            return False, {"error": response.text, "status_code": response.status_code}
+
     def adicionar_fila_cobranca(
         self,
         valor: float,
@@ -155,19 +207,19 @@ class PagamentoService:
                 "horaSolicitacao": datetime.now().isoformat()
             }
 
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.post(
-                    f"{self.base_url}/cobranca",
-                    json=payload
-                )
-
-                if response.status_code == 200:
-                    resultado = response.json()
-                    logger.info(f"Cobranca adicionada a fila: ID {resultado.get('id')}")
-                    return True, resultado
-                else:
-                    logger.warning(f"Erro ao adicionar cobranca na fila: status {response.status_code}")
-                    return False, {"error": response.text, "status_code": response.status_code}
+            client = self._cliente()
+            response = client.post(
+                f"{self.base_url}/cobranca",
+                json=payload
+            )
+
+            if response.status_code == 200:
+                resultado = response.json()
+                logger.info(f"Cobranca adicionada a fila: ID {resultado.get('id')}")
+                return True, resultado
+            else:
+                logger.warning(f"Erro ao adicionar cobranca na fila: status {response.status_code}")
+                return False, {"error": response.text, "status_code": response.status_code}
 
         except httpx.TimeoutException:
             logger.error(f"Timeout ao adicionar cobranca na fila")
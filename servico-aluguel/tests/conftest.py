@@ -3,6 +3,8 @@ import sys
 import pytest
 from unittest.mock import MagicMock
 from datetime import date, datetime
+from tinydb import TinyDB
+from tinydb.storages import MemoryStorage
 
 CURRENT_DIR = os.path.dirname(__file__)
 SERVICE_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
@@ -21,6 +23,14 @@ def mock_db():
     return MagicMock()
 
 
+@pytest.fixture
+def memory_db():
+    """TinyDB em memória (para testes que dependem das sequências de IDs)"""
+    db = TinyDB(storage=MemoryStorage)
+    yield db
+    db.close()
+
+
 
 @pytest.fixture
 def ciclista_exemplo():
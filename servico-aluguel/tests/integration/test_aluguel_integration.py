@@ -5,7 +5,7 @@ Integrações testadas:
 - equipamento_service.obter_bicicleta_tranca()
 - pagamento_service.cobrar()
 - equipamento_service.destrancar()
-- email_service.enviar_recibo_aluguel()
+- recibo por email via outbox (EntregadorOutbox)
 """
 import pytest
 import respx
@@ -13,6 +13,8 @@ from httpx import Response
 from fastapi.testclient import TestClient
 
 from main import app
+from repositories.outbox_repository import OutboxRepository, ENVIADO
+from services.outbox_service import EntregadorOutbox
 from tests.integration.conftest import EQUIPAMENTO_URL, EXTERNO_URL
 
 
@@ -67,6 +69,45 @@ def test_aluguel_sucesso_fluxo_completo(
     assert data["horaInicio"] is not None
 
 
+@respx.mock
+def test_aluguel_recibo_enviado_pela_outbox(
+    db,
+    dados_aluguel_valido,
+    mock_bicicleta_disponivel,
+    mock_cobranca_aprovada,
+    mock_tranca_destrancada,
+    mock_email_enviado
+):
+    """
+    UC03 - R4: O recibo é gravado na outbox junto com o aluguel e enviado
+    depois, fora da requisição.
+    """
+    respx.get(f"{EQUIPAMENTO_URL}/tranca/1/bicicleta").mock(
+        return_value=Response(200, json=mock_bicicleta_disponivel)
+    )
+    respx.post(f"{EXTERNO_URL}/cobranca").mock(
+        return_value=Response(200, json=mock_cobranca_aprovada)
+    )
+    respx.post(f"{EQUIPAMENTO_URL}/tranca/1/destrancar").mock(
+        return_value=Response(200, json=mock_tranca_destrancada)
+    )
+    rota_email = respx.post(f"{EXTERNO_URL}/enviarEmails").mock(
+        return_value=Response(200, json=[{"email": {**mock_email_enviado, "enviado": True}, "erro": None}])
+    )
+
+    response = client.post("/aluguel", json=dados_aluguel_valido)
+
+    assert response.status_code == 200
+    assert not rota_email.called
+    pendentes = OutboxRepository(db).pendentes(10)
+    assert [e["tipo"] for e in pendentes] == ["RECIBO_ALUGUEL"]
+
+    EntregadorOutbox(db).drenar()
+
+    assert rota_email.call_count == 1
+    assert OutboxRepository(db).contar(ENVIADO) == 1
+
+
 # ============================================================
 # TESTES DE FALHA - INTEGRAÇÃO COM EQUIPAMENTO
 # ============================================================
@@ -336,3 +377,54 @@ def test_aluguel_registra_no_banco(
 
     assert aluguel_salvo is not None
     assert aluguel_salvo["idBicicleta"] == mock_bicicleta_disponivel["id"]
+
+
+def _cliente_async():
+    """App só com o POST /aluguel assíncrono (publicado quando ALUGUEL_ASYNC=1)"""
+    from fastapi import FastAPI
+    from models.aluguel_model import Aluguel
+    from routers.aluguel import alugar_bicicleta_async
+
+    app_async = FastAPI()
+    app_async.add_api_route("/aluguel", alugar_bicicleta_async, methods=["POST"], response_model=Aluguel)
+    return TestClient(app_async)
+
+
+@respx.mock
+def test_aluguel_async_fluxo_completo(
+    db,
+    dados_aluguel_valido,
+    mock_bicicleta_disponivel,
+    mock_cobranca_aprovada,
+    mock_tranca_destrancada
+):
+    """UC03 - A variante assíncrona grava o mesmo aluguel e o recibo na outbox"""
+    respx.get(f"{EQUIPAMENTO_URL}/tranca/1/bicicleta").mock(
+        return_value=Response(200, json=mock_bicicleta_disponivel)
+    )
+    respx.post(f"{EXTERNO_URL}/cobranca").mock(
+        return_value=Response(200, json=mock_cobranca_aprovada)
+    )
+    respx.post(f"{EQUIPAMENTO_URL}/tranca/1/destrancar").mock(
+        return_value=Response(200, json=mock_tranca_destrancada)
+    )
+
+    response = _cliente_async().post("/aluguel", json=dados_aluguel_valido)
+
+    assert response.status_code == 200
+    assert response.json()["idBicicleta"] == mock_bicicleta_disponivel["id"]
+    assert response.json()["status"] == "EM_ANDAMENTO"
+    assert [item["tipo"] for item in OutboxRepository(db).pendentes(10)] == ["RECIBO_ALUGUEL"]
+
+
+@respx.mock
+def test_aluguel_async_ciclista_inativo(ciclista_inativo, mock_bicicleta_disponivel):
+    """UC03 - R1: a variante assíncrona mantém a precedência dos erros"""
+    respx.get(f"{EQUIPAMENTO_URL}/tranca/1/bicicleta").mock(
+        return_value=Response(200, json=mock_bicicleta_disponivel)
+    )
+
+    response = _cliente_async().post("/aluguel", json={"ciclista": ciclista_inativo, "trancaInicio": 1})
+
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Ciclista não pode alugar"
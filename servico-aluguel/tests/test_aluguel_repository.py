@@ -2,28 +2,31 @@
 from unittest.mock import MagicMock
 from repositories.aluguel_repository import AluguelRepository
 
-def test_criar_cobranca_gera_id_automatico():
+def test_criar_cobranca_gera_id_automatico(memory_db):
     """Testa que criar_cobranca gera ID sequencial"""
-    mock_db = MagicMock()
-    mock_table = MagicMock()
-    mock_db.table.return_value = mock_table
-    mock_table.all.return_value = []
-
-    repo = AluguelRepository(mock_db)
+    repo = AluguelRepository(memory_db)
     cobranca = repo.criar_cobranca(10.0, 1, "ALUGUEL_INICIAL")
 
     assert cobranca.id == 1
     assert cobranca.valor == 10.0
     assert cobranca.status == "PAGA"
 
-def test_criar_cobranca_id_sequencial():
+def test_criar_cobranca_id_sequencial(memory_db):
     """Testa IDs sequenciais (1, 2, 3...)"""
-    mock_db = MagicMock()
-    mock_table = MagicMock()
-    mock_db.table.return_value = mock_table
-    mock_table.all.return_value = [{'id': 1}, {'id': 2}]
+    memory_db.table('cobrancas').insert_multiple([{'id': 1}, {'id': 2}])
 
-    repo = AluguelRepository(mock_db)
+    repo = AluguelRepository(memory_db)
     cobranca = repo.criar_cobranca(5.0, 2, "TAXA_EXTRA")
 
     assert cobranca.id == 3
+
+def test_buscar_aluguel_ativo_por_bicicleta(memory_db):
+    """UC04 - Encontra o aluguel em andamento da bicicleta e deixa de achar após finalizar"""
+    repo = AluguelRepository(memory_db)
+    repo.criar_aluguel(1, 1, 7, 1)
+
+    aluguel = repo.buscar_aluguel_ativo_por_bicicleta(7)
+    assert aluguel.ciclista == 1
+
+    repo.finalizar_aluguel(aluguel.id, 2, None)
+    assert repo.buscar_aluguel_ativo_por_bicicleta(7) is None
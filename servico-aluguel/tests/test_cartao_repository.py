@@ -10,15 +10,9 @@ from models.cartao_model import NovoCartaoDeCredito, CartaoDeCredito
 
 #   TESTES DE CRIAR (UC07)
 
-def test_criar_cartao_gera_id_automatico():
+def test_criar_cartao_gera_id_automatico(memory_db):
     """UC07 - Testa que criar() gera ID automático"""
-    mock_db = MagicMock()
-    mock_table = MagicMock()
-    mock_db.table.return_value = mock_table
-    mock_table.all.return_value = []  # Banco vazio
-    mock_table.insert = Mock()
-
-    repo = CartaoRepository(mock_db)
+    repo = CartaoRepository(memory_db)
 
     cartao_dados = NovoCartaoDeCredito(
         nomeTitular="João Silva",
@@ -32,20 +26,15 @@ def test_criar_cartao_gera_id_automatico():
     assert resultado.id == 1
     assert resultado.idCiclista == 1
     assert resultado.nomeTitular == "João Silva"
-    mock_table.insert.assert_called_once()
+    assert len(memory_db.table('cartoes')) == 1
 
 
-def test_criar_cartao_id_sequencial():
+def test_criar_cartao_id_sequencial(memory_db):
     """UC07 - Testa que criar() gera IDs sequenciais"""
-    mock_db = MagicMock()
-    mock_table = MagicMock()
-    mock_db.table.return_value = mock_table
-
     # Simula 1 cartão já existente
-    mock_table.all.return_value = [{'id': 1}]
-    mock_table.insert = Mock()
+    memory_db.table('cartoes').insert({'id': 1})
 
-    repo = CartaoRepository(mock_db)
+    repo = CartaoRepository(memory_db)
 
     cartao_dados = NovoCartaoDeCredito(
         nomeTitular="Maria Santos",
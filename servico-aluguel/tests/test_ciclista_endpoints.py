@@ -102,6 +102,54 @@ def test_cadastrar_ciclista_cartao_invalido(dados_cadastro_valido, dados_cartao_
         assert response.status_code == 422
 
 
+def test_cadastrar_ciclista_cpf_duplicado(dados_cadastro_valido, dados_cartao_valido):
+    """UC01 - CPF já cadastrado é barrado pelo índice único e vira 422"""
+    from database.indices import ViolacaoIndiceUnico
+
+    with patch('routers.ciclista.get_db'), \
+         patch('routers.ciclista.CiclistaRepository') as mock_repo, \
+         patch('routers.ciclista.CartaoRepository'), \
+         patch('routers.ciclista.pagamento_service') as mock_pag:
+
+        mock_instance = Mock()
+        mock_repo.return_value = mock_instance
+        mock_instance.buscar_por_email.return_value = None
+        mock_instance.criar.side_effect = ViolacaoIndiceUnico('ciclistas', ('cpf',), ('11122233344',))
+        mock_pag.validar_cartao.return_value = (True, {"valido": True})
+
+        response = client.post(
+            "/ciclista",
+            json={"dados": dados_cadastro_valido, "meio_pagamento": dados_cartao_valido}
+        )
+
+        assert response.status_code == 422
+        assert response.json()["detail"]["codigo"] == "CPF_JA_CADASTRADO"
+
+
+def test_cadastrar_ciclista_id_duplicado_nao_vira_erro_de_email(dados_cadastro_valido, dados_cartao_valido):
+    """Violação de um índice que não é email/CPF (ex.: id) é erro interno, não 'email já cadastrado'"""
+    from database.indices import ViolacaoIndiceUnico
+
+    with patch('routers.ciclista.get_db'), \
+         patch('routers.ciclista.CiclistaRepository') as mock_repo, \
+         patch('routers.ciclista.CartaoRepository'), \
+         patch('routers.ciclista.pagamento_service') as mock_pag:
+
+        mock_instance = Mock()
+        mock_repo.return_value = mock_instance
+        mock_instance.buscar_por_email.return_value = None
+        mock_instance.criar.side_effect = ViolacaoIndiceUnico('ciclistas', ('id',), (7,))
+        mock_pag.validar_cartao.return_value = (True, {"valido": True})
+
+        response = client.post(
+            "/ciclista",
+            json={"dados": dados_cadastro_valido, "meio_pagamento": dados_cartao_valido}
+        )
+
+        assert response.status_code == 500
+        assert response.json()["detail"]["codigo"] == "ERRO_INTERNO"
+
+
 def test_cadastrar_ciclista_senhas_diferentes():
     """UC01 - R2: Testa erro quando senhas não conferem"""
     dados_invalidos = {
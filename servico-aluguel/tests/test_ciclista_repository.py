@@ -11,15 +11,9 @@ from models.ciclista_model import NovoCiclista, Ciclista, StatusCiclista, Nacion
 
 #   TESTES DE CRIAR
 
-def test_criar_ciclista_gera_id_automatico_primeiro():
+def test_criar_ciclista_gera_id_automatico_primeiro(memory_db):
     """UC01 - Testa que criar() gera ID 1 quando banco está vazio"""
-    mock_db = MagicMock()
-    mock_table = MagicMock()
-    mock_db.table.return_value = mock_table
-    mock_table.all.return_value = []  # Banco vazio
-    mock_table.insert = Mock()
-
-    repo = CiclistaRepository(mock_db)
+    repo = CiclistaRepository(memory_db)
 
     ciclista_dados = NovoCiclista(
         nome="João Silva",
@@ -36,23 +30,18 @@ def test_criar_ciclista_gera_id_automatico_primeiro():
     assert resultado.status == StatusCiclista.AGUARDANDO_CONFIRMACAO
     assert resultado.senha == "senha123"
     assert resultado.dataConfirmacao is None
-    mock_table.insert.assert_called_once()
+    assert len(memory_db.table('ciclistas')) == 1
 
 
-def test_criar_ciclista_gera_id_sequencial():
+def test_criar_ciclista_gera_id_sequencial(memory_db):
     """UC01 - Testa que criar() gera IDs sequenciais (1, 2, 3...)"""
-    mock_db = MagicMock()
-    mock_table = MagicMock()
-    mock_db.table.return_value = mock_table
-
     # Simula 2 ciclistas já existentes
-    mock_table.all.return_value = [
+    memory_db.table('ciclistas').insert_multiple([
         {'id': 1, 'nome': 'Ciclista 1'},
         {'id': 2, 'nome': 'Ciclista 2'}
-    ]
-    mock_table.insert = Mock()
+    ])
 
-    repo = CiclistaRepository(mock_db)
+    repo = CiclistaRepository(memory_db)
 
     ciclista_dados = NovoCiclista(
         nome="Terceiro Ciclista",
@@ -0,0 +1,95 @@
+"""
+Testes dos clientes HTTP compartilhados (pool com keep-alive).
+"""
+import asyncio
+import pytest
+import respx
+from httpx import Response
+
+from services import http_clientes
+from services.http_clientes import obter_cliente, fechar_clientes, obter_cliente_async, fechar_clientes_async
+from services.equipamento_service import EquipamentoService
+from services.email_service import EmailService
+from services.pagamento_service import PagamentoService
+
+
+@pytest.fixture(autouse=True)
+def pools_limpos():
+    fechar_clientes()
+    yield
+    fechar_clientes()
+
+
+def test_mesmo_destino_reaproveita_o_cliente():
+    assert obter_cliente("http://equipamento", 10.0) is obter_cliente("http://equipamento", 10.0)
+    assert obter_cliente("http://equipamento", 10.0) is not obter_cliente("http://externo", 10.0)
+
+
+def test_servicos_do_externo_compartilham_o_pool():
+    pagamento = PagamentoService(base_url="http://externo")
+    email = EmailService(base_url="http://externo")
+
+    assert pagamento._cliente() is email._cliente()
+
+
+@respx.mock
+def test_chamadas_sucessivas_usam_o_mesmo_cliente():
+    respx.get("http://equipamento/tranca/1/bicicleta").mock(return_value=Response(200, json={"id": 5}))
+    respx.post("http://equipamento/tranca/1/destrancar").mock(return_value=Response(200, json={}))
+    service = EquipamentoService(base_url="http://equipamento")
+
+    assert service.obter_bicicleta_tranca(1) == (True, {"id": 5})
+    cliente = service._cliente()
+    assert service.destrancar(1, 5)[0] is True
+
+    assert service._cliente() is cliente
+    assert not cliente.is_closed
+
+
+def test_fechar_clientes_encerra_e_permite_reabrir():
+    cliente = obter_cliente("http://equipamento", 10.0)
+
+    fechar_clientes()
+
+    assert cliente.is_closed
+    assert obter_cliente("http://equipamento", 10.0) is not cliente
+
+
+def test_limites_configuraveis(monkeypatch):
+    monkeypatch.setattr(http_clientes, "HTTP_MAX_CONEXOES", 3)
+    monkeypatch.setattr(http_clientes, "HTTP_MAX_KEEPALIVE", 2)
+
+    limites = http_clientes.limites_pool()
+
+    assert limites.max_connections == 3
+    assert limites.max_keepalive_connections == 2
+
+
+def test_cliente_assincrono_por_event_loop():
+    async def usar():
+        cliente = obter_cliente_async("http://equipamento", 10.0)
+        assert obter_cliente_async("http://equipamento", 10.0) is cliente
+        await fechar_clientes_async()
+        return cliente
+
+    primeiro = asyncio.run(usar())
+    segundo = asyncio.run(usar())
+
+    assert primeiro.is_closed and segundo.is_closed
+    assert primeiro is not segundo
+
+
+@respx.mock
+def test_chamadas_assincronas_mantem_o_resultado_das_sincronas():
+    respx.get("http://equipamento/tranca/1/bicicleta").mock(return_value=Response(200, json={"id": 5}))
+    respx.post("http://equipamento/tranca/1/destrancar").mock(return_value=Response(404, json={}))
+    service = EquipamentoService(base_url="http://equipamento")
+
+    async def chamar():
+        resultado = await asyncio.gather(service.obter_bicicleta_tranca_async(1), service.destrancar_async(1, 5))
+        await fechar_clientes_async()
+        return resultado
+
+    assincrono = asyncio.run(chamar())
+
+    assert assincrono == [service.obter_bicicleta_tranca(1), service.destrancar(1, 5)]
@@ -0,0 +1,232 @@
+"""
+Testes dos índices hash secundários (TinyDBIndexado).
+Cobre consultas por índice, manutenção em escritas, unicidade e reconstrução.
+"""
+import pytest
+from tinydb import Query
+from tinydb.queries import QueryInstance
+from tinydb.storages import MemoryStorage
+
+from database.indices import Indice, TinyDBIndexado, ViolacaoIndiceUnico
+
+
+@pytest.fixture
+def db():
+    banco = TinyDBIndexado(storage=MemoryStorage)
+    yield banco
+    banco.close()
+
+
+def consulta_contada(campo, valor, avaliados):
+    """Query equivalente a Query()[campo] == valor que conta os documentos avaliados"""
+    def teste(doc):
+        avaliados.append(doc)
+        return doc.get(campo) == valor
+    return QueryInstance(teste, ('==', (campo,), valor))
+
+
+def test_get_por_campo_indexado_avalia_so_candidatos(db):
+    tabela = db.table('ciclistas')
+    tabela.insert_multiple([{"id": i, "email": f"c{i}@x.com", "cpf": str(i)} for i in range(1, 501)])
+
+    avaliados = []
+    doc = tabela.get(consulta_contada('email', 'c250@x.com', avaliados))
+
+    assert doc["id"] == 250
+    assert len(avaliados) == 1
+
+
+def test_indice_composto():
+    """Chave com mais de um campo só é usada quando a Query cobre todos eles"""
+    A = Query()
+    banco = TinyDBIndexado(storage=MemoryStorage, indices={'alugueis': (Indice(('ciclista', 'status')),)})
+    alugueis = banco.table('alugueis')
+    alugueis.insert_multiple([
+        {"id": 1, "ciclista": 1, "status": "FINALIZADO"},
+        {"id": 2, "ciclista": 1, "status": "EM_ANDAMENTO"},
+        {"id": 3, "ciclista": 2, "status": "EM_ANDAMENTO"},
+    ])
+
+    indices = banco._indices['alugueis']
+    cond = (A.ciclista == 1) & (A.status == "EM_ANDAMENTO")
+    assert indices.candidatos(cond) == {2}
+    assert indices.candidatos(A.ciclista == 1) is None
+    assert alugueis.get(cond)["id"] == 2
+
+
+def test_indice_parcial_de_alugueis_ativos(db):
+    """buscar_aluguel_ativo: só aluguéis em andamento entram no índice"""
+    A = Query()
+    alugueis = db.table('alugueis')
+    alugueis.insert_multiple(
+        [{"id": i, "ciclista": 1, "idBicicleta": 9, "status": "FINALIZADO"} for i in range(1, 101)]
+    )
+    alugueis.insert({"id": 101, "ciclista": 1, "idBicicleta": 9, "status": "EM_ANDAMENTO"})
+
+    indices = db._indices['alugueis']
+    por_bicicleta = (A.idBicicleta == 9) & (A.status == "EM_ANDAMENTO")
+    assert indices.candidatos(por_bicicleta) == {101}
+    assert indices.candidatos((A.ciclista == 1) & (A.status == "EM_ANDAMENTO")) == {101}
+    # Fora do filtro do índice parcial: varredura normal
+    assert indices.candidatos((A.ciclista == 1) & (A.status == "FINALIZADO")) is None
+
+    alugueis.update({"status": "FINALIZADO"}, A.id == 101)
+    assert alugueis.get(por_bicicleta) is None
+    assert indices.candidatos(por_bicicleta) == set()
+
+
+def test_update_mantem_indice(db):
+    A = Query()
+    alugueis = db.table('alugueis')
+    alugueis.insert({"id": 1, "ciclista": 1, "status": "EM_ANDAMENTO"})
+
+    alugueis.update({"status": "FINALIZADO"}, A.id == 1)
+
+    assert alugueis.get((A.ciclista == 1) & (A.status == "EM_ANDAMENTO")) is None
+    assert alugueis.get((A.ciclista == 1) & (A.status == "FINALIZADO"))["id"] == 1
+
+
+def test_remove_e_truncate_mantem_indice(db):
+    F = Query()
+    funcionarios = db.table('funcionarios')
+    funcionarios.insert_multiple([{"matricula": "1"}, {"matricula": "2"}])
+
+    funcionarios.remove(F.matricula == "1")
+    assert funcionarios.get(F.matricula == "1") is None
+    assert funcionarios.get(F.matricula == "2") is not None
+
+    funcionarios.truncate()
+    assert funcionarios.search(F.matricula == "2") == []
+    funcionarios.insert({"matricula": "2"})
+    assert len(funcionarios.search(F.matricula == "2")) == 1
+
+
+def test_consulta_sem_indice_faz_varredura(db):
+    C = Query()
+    tabela = db.table('ciclistas')
+    tabela.insert_multiple([{"id": 1, "nome": "Ana"}, {"id": 2, "nome": "Bia"}])
+
+    assert [d["id"] for d in tabela.search(C.nome == "Bia")] == [2]
+    assert db._indices['ciclistas'].candidatos(C.nome == "Bia") is None
+
+
+def test_indice_unico_rejeita_email_duplicado(db):
+    tabela = db.table('ciclistas')
+    tabela.insert({"id": 1, "email": "a@x.com", "cpf": "1"})
+
+    with pytest.raises(ViolacaoIndiceUnico) as erro:
+        tabela.insert({"id": 2, "email": "a@x.com", "cpf": "2"})
+
+    assert erro.value.campos == ('email',)
+    assert len(tabela) == 1
+
+
+def test_indice_unico_ignora_cpf_nulo(db):
+    """Estrangeiros sem CPF não colidem entre si"""
+    tabela = db.table('ciclistas')
+    tabela.insert({"id": 1, "email": "a@x.com", "cpf": None})
+    tabela.insert({"id": 2, "email": "b@x.com", "cpf": None})
+
+    assert len(tabela) == 2
+
+
+def test_indice_unico_no_update(db):
+    C = Query()
+    tabela = db.table('ciclistas')
+    tabela.insert_multiple([
+        {"id": 1, "email": "a@x.com", "cpf": "1"},
+        {"id": 2, "email": "b@x.com", "cpf": "2"},
+    ])
+
+    # Regravar o próprio email é permitido
+    tabela.update({"email": "a@x.com"}, C.id == 1)
+
+    with pytest.raises(ViolacaoIndiceUnico):
+        tabela.update({"cpf": "1"}, C.id == 2)
+    assert tabela.get(C.id == 2)["cpf"] == "2"
+
+
+def test_indice_unico_no_lote(db):
+    tabela = db.table('ciclistas')
+
+    with pytest.raises(ViolacaoIndiceUnico):
+        tabela.insert_multiple([{"id": 1, "email": "a@x.com"}, {"id": 2, "email": "a@x.com"}])
+    assert len(tabela) == 0
+
+
+def test_reconstrucao_a_partir_do_storage(tmp_path):
+    path = tmp_path / "db.json"
+    banco = TinyDBIndexado(path)
+    banco.table('cartoes').insert_multiple([{"id": 1, "idCiclista": 7}, {"id": 2, "idCiclista": 8}])
+    banco.close()
+
+    banco = TinyDBIndexado(path)
+    banco.reconstruir_indices()
+
+    assert banco._indices['cartoes'].candidatos(Query().idCiclista == 8) == {2}
+    assert banco.table('cartoes').get(Query().idCiclista == 8)["id"] == 2
+    banco.close()
+
+
+def test_tabela_recriada_compartilha_indice(db):
+    """Instâncias antigas da tabela continuam consistentes após drop_table"""
+    antiga = db.table('cartoes')
+    antiga.insert({"id": 1, "idCiclista": 1})
+
+    db.drop_table('cartoes')
+    db.table('cartoes').insert({"id": 5, "idCiclista": 1})
+
+    assert [d["id"] for d in antiga.search(Query().idCiclista == 1)] == [5]
+
+
+def test_escrita_avulsa_nao_trava_com_transacao(tmp_path):
+    """Uma transação e uma escrita fora dela na mesma tabela indexada terminam as duas"""
+    import threading
+    import time
+    from database.wal_storage import WALStorage
+
+    banco = TinyDBIndexado(tmp_path / "db.json", storage=WALStorage, fsync="off")
+    dentro, continuar = threading.Event(), threading.Event()
+
+    def transacao():
+        with banco.storage.agrupar():
+            dentro.set()
+            continuar.wait(5)
+            banco.table('cartoes').insert({"id": 1, "idCiclista": 1})
+
+    a = threading.Thread(target=transacao, daemon=True)
+    b = threading.Thread(target=lambda: banco.table('cartoes').insert({"id": 2, "idCiclista": 2}), daemon=True)
+    a.start()
+    dentro.wait(5)
+    b.start()
+    time.sleep(0.2)  # a escrita avulsa chega ao ponto em que espera a transação
+    continuar.set()
+    a.join(5)
+    b.join(5)
+
+    assert not a.is_alive() and not b.is_alive()
+    assert sorted(c["id"] for c in banco.table('cartoes').all()) == [1, 2]
+    banco.close()
+
+
+def test_transacao_desfeita_refaz_os_indices(tmp_path):
+    """Depois de uma transação desfeita, índices e consultas refletem o estado restaurado"""
+    from database.database import transacao
+    from database.wal_storage import WALStorage
+
+    banco = TinyDBIndexado(tmp_path / "db.json", storage=WALStorage, fsync="off")
+    ciclistas = banco.table('ciclistas')
+    ciclistas.insert({"id": 1, "email": "a@email.com", "cpf": "1"})
+    assert ciclistas.search(Query().email == "a@email.com")
+
+    with pytest.raises(RuntimeError):
+        with transacao(banco):
+            ciclistas.update({"email": "b@email.com"}, doc_ids=[1])
+            ciclistas.insert({"id": 2, "email": "c@email.com", "cpf": "2"})
+            raise RuntimeError()
+
+    assert [c["id"] for c in ciclistas.search(Query().email == "a@email.com")] == [1]
+    assert ciclistas.search(Query().email == "b@email.com") == []
+    # O email e o id da inserção desfeita voltam a estar livres
+    ciclistas.insert({"id": 2, "email": "c@email.com", "cpf": "2"})
+    banco.close()
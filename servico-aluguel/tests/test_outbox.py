@@ -0,0 +1,204 @@
+"""
+Testes da outbox de emails (fila persistente + entregador em segundo plano).
+"""
+import json
+import time
+import pytest
+import respx
+from datetime import datetime, timedelta
+from httpx import Response
+from unittest.mock import MagicMock
+
+from repositories.outbox_repository import OutboxRepository, PENDENTE, ENVIADO, FALHA
+from services.email_service import EMAIL_TIMEOUT_POR_ITEM, EmailService
+from services.http_clientes import fechar_clientes
+from services.outbox_service import EntregadorOutbox
+
+
+def responder(*resultados):
+    """side_effect de enviar_emails: repete os resultados dados para cada email do lote"""
+    return lambda emails, chaves=None: [resultados[i % len(resultados)] for i in range(len(emails))]
+
+
+@pytest.fixture
+def servico():
+    servico = MagicMock()
+    servico.enviar_emails.side_effect = responder((True, {"id": 1}))
+    return servico
+
+
+def enfileirar(db, quantidade=1):
+    repo = OutboxRepository(db)
+    return [
+        repo.enfileirar("RECIBO_ALUGUEL", f"c{i}@email.com", "Aluguel realizado", f"Mensagem {i}")
+        for i in range(1, quantidade + 1)
+    ]
+
+
+def test_pendentes_em_ordem_e_so_vencidos(memory_db):
+    repo = OutboxRepository(memory_db)
+    enfileirar(memory_db, 3)
+    repo.table.update({"proximaTentativa": (datetime.now() + timedelta(minutes=5)).isoformat()}, doc_ids=[2])
+
+    assert [e["destinatario"] for e in repo.pendentes(10)] == ["c1@email.com", "c3@email.com"]
+    assert [e["destinatario"] for e in repo.pendentes(1)] == ["c1@email.com"]
+
+
+def test_envio_com_sucesso_marca_enviado(memory_db, servico):
+    enfileirar(memory_db, 2)
+
+    processados = EntregadorOutbox(memory_db, servico=servico).processar_lote()
+
+    assert processados == 2
+    emails = OutboxRepository(memory_db).table.all()
+    servico.enviar_emails.assert_called_once_with([
+        ("c1@email.com", "Aluguel realizado", "Mensagem 1"),
+        ("c2@email.com", "Aluguel realizado", "Mensagem 2"),
+    ], chaves=[email["chave"] for email in emails])
+    repo = OutboxRepository(memory_db)
+    assert repo.contar(ENVIADO) == 2
+    assert repo.pendentes(10) == []
+
+
+def test_falha_reagenda_com_espera_exponencial(memory_db, servico):
+    enfileirar(memory_db)
+    servico.enviar_emails.side_effect = responder((False, {"error": "Timeout"}))
+    entregador = EntregadorOutbox(memory_db, servico=servico, espera_base=60)
+
+    entregador.processar_lote()
+    email = OutboxRepository(memory_db).table.all()[0]
+    assert email["status"] == PENDENTE
+    assert email["tentativas"] == 1
+    assert email["ultimoErro"] == "Timeout"
+    espera = datetime.fromisoformat(email["proximaTentativa"]) - datetime.now()
+    assert timedelta(seconds=50) < espera <= timedelta(seconds=60)
+
+    # Ainda não venceu: o próximo lote não reenvia
+    assert entregador.processar_lote() == 0
+
+
+def test_esgotar_tentativas_marca_falha(memory_db, servico):
+    enfileirar(memory_db)
+    servico.enviar_emails.side_effect = responder((False, {"error": "500"}))
+    entregador = EntregadorOutbox(memory_db, servico=servico, max_tentativas=3, espera_base=0)
+
+    for _ in range(5):
+        entregador.processar_lote()
+
+    email = OutboxRepository(memory_db).table.all()[0]
+    assert email["status"] == FALHA
+    assert email["tentativas"] == 3
+    assert servico.enviar_emails.call_count == 3
+
+
+def test_lote_grava_resultados_numa_escrita(memory_db, servico):
+    enfileirar(memory_db, 5)
+    escritas = []
+    write = memory_db.storage.write
+    memory_db.storage.write = lambda dados: escritas.append(1) or write(dados)
+
+    EntregadorOutbox(memory_db, servico=servico, lote=5).processar_lote()
+
+    assert len(escritas) == 1
+
+
+def test_lote_com_resultados_mistos(memory_db, servico):
+    """Uma chamada por lote; cada email do lote recebe o próprio resultado"""
+    enfileirar(memory_db, 4)
+    servico.enviar_emails.side_effect = responder((True, {"id": 1}), (False, {"error": "caixa cheia"}))
+
+    EntregadorOutbox(memory_db, servico=servico, lote=4, espera_base=60).processar_lote()
+
+    assert servico.enviar_emails.call_count == 1
+    emails = {e["destinatario"]: e for e in OutboxRepository(memory_db).table.all()}
+    assert emails["c1@email.com"]["status"] == ENVIADO
+    assert emails["c2@email.com"]["status"] == PENDENTE
+    assert emails["c2@email.com"]["ultimoErro"] == "caixa cheia"
+    assert emails["c3@email.com"]["status"] == ENVIADO
+
+
+@respx.mock
+def test_enviar_emails_usa_o_endpoint_em_lote():
+    fechar_clientes()
+    rota = respx.post("http://externo/enviarEmails").mock(return_value=Response(200, json=[
+        {"email": {"id": 1, "enviado": True}, "erro": None},
+        {"email": {"id": 2, "enviado": False}, "erro": {"codigo": "ERRO_ENVIO_EMAIL", "mensagem": "SMTP recusou"}},
+        {"email": None, "erro": {"codigo": "DADOS_INVALIDOS", "mensagem": "email inválido"}},
+    ]))
+
+    resultados = EmailService(base_url="http://externo").enviar_emails([
+        ("a@email.com", "A", "1"), ("b@email.com", "B", "2"), ("x", "C", "3")
+    ])
+
+    assert rota.call_count == 1
+    assert [sucesso for sucesso, _ in resultados] == [True, False, False]
+    assert resultados[1][1] == {"error": "SMTP recusou"}
+    fechar_clientes()
+
+
+@respx.mock
+def test_enviar_emails_com_falha_na_chamada_falha_o_lote_todo():
+    fechar_clientes()
+    respx.post("http://externo/enviarEmails").mock(return_value=Response(503, text="fora do ar"))
+
+    resultados = EmailService(base_url="http://externo").enviar_emails([("a@email.com", "A", "1")] * 3)
+
+    assert resultados == [(False, {"error": "fora do ar", "status_code": 503})] * 3
+    fechar_clientes()
+
+
+@respx.mock
+def test_enviar_emails_manda_chaves_e_timeout_proporcional_ao_lote():
+    fechar_clientes()
+    rota = respx.post("http://externo/enviarEmails").mock(return_value=Response(200, json=[
+        {"email": {"id": 1, "enviado": True}, "erro": None},
+        {"email": {"id": 2, "enviado": True}, "erro": None},
+    ]))
+
+    EmailService(base_url="http://externo", timeout=10).enviar_emails(
+        [("a@email.com", "A", "1"), ("b@email.com", "B", "2")], chaves=["k1", None]
+    )
+
+    requisicao = rota.calls.last.request
+    assert [item.get("chave") for item in json.loads(requisicao.content)] == ["k1", None]
+    assert requisicao.extensions["timeout"]["read"] == 10 + 2 * EMAIL_TIMEOUT_POR_ITEM
+    fechar_clientes()
+
+
+@respx.mock
+def test_enviar_emails_resposta_com_tamanho_diferente_falha_o_lote():
+    fechar_clientes()
+    respx.post("http://externo/enviarEmails").mock(return_value=Response(200, json=[
+        {"email": {"id": 1, "enviado": True}, "erro": None},
+    ]))
+
+    resultados = EmailService(base_url="http://externo").enviar_emails([("a@email.com", "A", "1")] * 2)
+
+    assert [sucesso for sucesso, _ in resultados] == [False, False]
+    assert "1 resultados para 2 emails" in resultados[0][1]["error"]
+    fechar_clientes()
+
+
+def test_drenar_percorre_varios_lotes(memory_db, servico):
+    enfileirar(memory_db, 5)
+
+    total = EntregadorOutbox(memory_db, servico=servico, lote=2).drenar()
+
+    assert total == 5
+    assert OutboxRepository(memory_db).contar(ENVIADO) == 5
+
+
+def test_thread_envia_ao_ser_notificada(memory_db, servico):
+    entregador = EntregadorOutbox(memory_db, servico=servico, intervalo=60)
+    entregador.iniciar()
+    try:
+        enfileirar(memory_db)
+        entregador.notificar()
+
+        limite = time.monotonic() + 2
+        while OutboxRepository(memory_db).contar(ENVIADO) == 0 and time.monotonic() < limite:
+            time.sleep(0.01)
+    finally:
+        entregador.parar()
+
+    assert OutboxRepository(memory_db).contar(ENVIADO) == 1
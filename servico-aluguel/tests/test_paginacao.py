@@ -0,0 +1,67 @@
+"""
+Testes da paginação por cursor e do streaming NDJSON das listagens de cartões e funcionários.
+"""
+import json
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from main import app
+from database.paginacao import codificar_cursor
+
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def db_cartoes(memory_db):
+    memory_db.table('cartoes').insert_multiple([
+        {"id": i, "idCiclista": i, "nomeTitular": "MARIA SILVA", "numero": "**** **** **** 1111",
+         "numeroCompleto": "4111111111111111", "validade": "2028-12-31", "cvv": "123"}
+        for i in range(1, 6)
+    ])
+    with patch('routers.cartao.get_db', return_value=memory_db):
+        yield memory_db
+
+
+def test_listagem_sem_parametros_mantem_formato(db_cartoes):
+    response = client.get("/cartao")
+
+    assert response.status_code == 200
+    assert [c["id"] for c in response.json()] == [1, 2, 3, 4, 5]
+
+
+def test_listagem_paginada_nao_expoe_dados_sensiveis(db_cartoes):
+    primeira = client.get("/cartao", params={"limit": 3}).json()
+    segunda = client.get("/cartao", params={"limit": 3, "cursor": primeira["proximoCursor"]}).json()
+
+    assert [c["id"] for c in primeira["itens"]] == [1, 2, 3]
+    assert [c["id"] for c in segunda["itens"]] == [4, 5]
+    assert segunda["proximoCursor"] is None
+    assert "cvv" not in primeira["itens"][0]
+    assert "numeroCompleto" not in primeira["itens"][0]
+
+
+def test_listagem_cursor_invalido(db_cartoes):
+    response = client.get("/cartao", params={"limit": 3, "cursor": "invalido"})
+
+    assert response.status_code == 422
+    assert response.json()["detail"]["codigo"] == "CURSOR_INVALIDO"
+
+
+def test_listagem_ndjson_de_funcionarios(memory_db):
+    memory_db.table('funcionarios').insert_multiple([
+        {"matricula": str(i), "nome": f"Func {i}", "idade": 30, "funcao": "REPARADOR",
+         "cpf": f"{i:011d}", "email": f"f{i}@x.com", "senha": "123456"}
+        for i in range(1, 4)
+    ])
+
+    with patch('routers.funcionario.get_db', return_value=memory_db):
+        response = client.get(
+            "/funcionario",
+            params={"cursor": codificar_cursor(1)},
+            headers={"Accept": "application/x-ndjson"}
+        )
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(l)["matricula"] for l in response.text.splitlines()] == ["2", "3"]
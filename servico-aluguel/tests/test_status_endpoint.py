@@ -21,3 +21,14 @@ def test_status_retorna_mensagem():
 
     # O endpoint deve retornar pelo menos um desses campos
     assert "mensagem" in data or "status" in data
+
+
+def test_metrics_no_formato_do_prometheus():
+    """Testa que /metrics conta as requisições pelo template da rota"""
+    client.get("/status")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{method="GET",route="/status",status="200"}' in response.text
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
@@ -0,0 +1,327 @@
+"""
+Testes do WALStorage (log de escrita antecipada do TinyDB).
+Cobre replay do log, compactação e política de fsync.
+"""
+import json
+import pytest
+from tinydb import TinyDB, Query
+
+from database.wal_storage import WALStorage
+
+
+def abrir(path, **kwargs):
+    kwargs.setdefault("fsync", "off")
+    return TinyDB(path, storage=WALStorage, **kwargs)
+
+
+def test_insert_anexa_no_log_sem_reescrever_snapshot(tmp_path):
+    """Cada insert vira uma linha no log; o snapshot não é tocado"""
+    path = tmp_path / "db.json"
+    db = abrir(path)
+
+    db.table('ciclistas').insert({"id": 1, "nome": "A"})
+    db.table('ciclistas').insert({"id": 2, "nome": "B"})
+
+    linhas = (tmp_path / "db.json.wal").read_text(encoding="utf-8").splitlines()
+    puts = [json.loads(l) for l in linhas if json.loads(l)["op"] == "put"]
+    assert len(puts) == 2
+    assert not path.exists()
+    db.close()
+
+
+def test_update_registra_apenas_documento_alterado(tmp_path):
+    """Update in-place registra só o documento modificado"""
+    path = tmp_path / "db.json"
+    db = abrir(path)
+    tabela = db.table('ciclistas')
+    tabela.insert_multiple([{"id": i, "status": "NOVO"} for i in range(1, 51)])
+
+    log = tmp_path / "db.json.wal"
+    tamanho_antes = log.stat().st_size
+    tabela.update({"status": "ATIVO"}, Query().id == 10)
+
+    novas = log.read_text(encoding="utf-8")[tamanho_antes:].splitlines()
+    assert len(novas) == 1
+    entrada = json.loads(novas[0])
+    assert entrada["op"] == "put"
+    assert entrada["doc"]["status"] == "ATIVO"
+    db.close()
+
+
+def test_replay_restaura_estado(tmp_path):
+    """Ao reabrir, o snapshot + log reconstroem o estado"""
+    path = tmp_path / "db.json"
+    db = abrir(path)
+    tabela = db.table('alugueis')
+    tabela.insert({"id": 1, "status": "EM_ANDAMENTO"})
+    tabela.insert({"id": 2, "status": "EM_ANDAMENTO"})
+    tabela.update({"status": "FINALIZADO"}, Query().id == 1)
+    tabela.remove(Query().id == 2)
+    db.close()
+
+    db = abrir(path)
+    docs = db.table('alugueis').all()
+    assert docs == [{"id": 1, "status": "FINALIZADO"}]
+    db.close()
+
+
+def test_replay_ignora_linha_truncada(tmp_path):
+    """Uma última linha incompleta (queda durante escrita) é descartada"""
+    path = tmp_path / "db.json"
+    db = abrir(path)
+    db.table('cartoes').insert({"id": 1})
+    db.close()
+
+    with open(tmp_path / "db.json.wal", "a", encoding="utf-8") as f:
+        f.write('{"op": "put", "t": "cartoes", "id": "2", "doc": {"id"')
+
+    db = abrir(path)
+    assert db.table('cartoes').all() == [{"id": 1}]
+    db.close()
+
+
+def test_agrupar_grava_uma_linha_para_varias_tabelas(tmp_path):
+    """Escritas de um grupo viram uma única linha "lote" e voltam no replay"""
+    path = tmp_path / "db.json"
+    db = abrir(path)
+
+    log = tmp_path / "db.json.wal"
+    with db.storage.agrupar():
+        db.table('alugueis').insert({"id": 1})
+        db.table('outbox_emails').insert({"id": 1, "status": "PENDENTE"})
+        assert not log.exists() or log.read_text(encoding="utf-8") == ""
+
+    linhas = [json.loads(l) for l in log.read_text(encoding="utf-8").splitlines()]
+    assert [l["op"] for l in linhas] == ["lote"]
+    assert {op["t"] for op in linhas[0]["ops"]} == {"alugueis", "outbox_emails"}
+    db.close()
+
+    db = abrir(path)
+    assert db.table('alugueis').all() == [{"id": 1}]
+    assert db.table('outbox_emails').all() == [{"id": 1, "status": "PENDENTE"}]
+    db.close()
+
+
+def test_lote_truncado_e_descartado_por_inteiro(tmp_path):
+    """Queda no meio da linha do grupo: nenhuma das mudanças é reaplicada"""
+    path = tmp_path / "db.json"
+    db = abrir(path)
+    db.table('alugueis').insert({"id": 1})
+    db.close()
+
+    with open(tmp_path / "db.json.wal", "a", encoding="utf-8") as f:
+        f.write('{"op": "lote", "ops": [{"op": "put", "t": "alugueis", "id": "2", "doc": {"id": 2}}, {"op": "put"')
+
+    db = abrir(path)
+    assert db.table('alugueis').all() == [{"id": 1}]
+    assert db.table('outbox_emails').all() == []
+    db.close()
+
+
+def test_excecao_no_grupo_desfaz_as_escritas(tmp_path):
+    """Um grupo que lança exceção volta tabelas e documentos ao estado anterior e não grava nada"""
+    path = tmp_path / "db.json"
+    db = abrir(path)
+    db.table('alugueis').insert({"id": 1, "status": "EM_ANDAMENTO"})
+    log = tmp_path / "db.json.wal"
+    tamanho_antes = log.stat().st_size
+
+    with pytest.raises(RuntimeError):
+        with db.storage.agrupar():
+            db.table('alugueis').update({"status": "FINALIZADO"}, doc_ids=[1])
+            db.table('alugueis').insert({"id": 2, "status": "EM_ANDAMENTO"})
+            db.table('outbox_emails').insert({"id": 1})
+            raise RuntimeError("falha no meio da operação")
+
+    assert db.table('alugueis').all() == [{"id": 1, "status": "EM_ANDAMENTO"}]
+    assert db.table('outbox_emails').all() == []
+    assert log.stat().st_size == tamanho_antes
+
+    # O documento restaurado continua rastreado
+    db.table('alugueis').update({"status": "FINALIZADO"}, doc_ids=[1])
+    db.close()
+    db = abrir(path)
+    assert db.table('alugueis').all() == [{"id": 1, "status": "FINALIZADO"}]
+    db.close()
+
+
+def test_grupo_interno_desfeito_preserva_o_externo(tmp_path):
+    """Cada nível do agrupar() é um ponto de restauração próprio"""
+    db = abrir(tmp_path / "db.json")
+
+    with db.storage.agrupar():
+        db.table('alugueis').insert({"id": 1})
+        with pytest.raises(ValueError):
+            with db.storage.agrupar():
+                db.table('alugueis').insert({"id": 2})
+                raise ValueError()
+        db.table('alugueis').insert({"id": 3})
+    db.close()
+
+    db = abrir(tmp_path / "db.json")
+    assert [d["id"] for d in db.table('alugueis').all()] == [1, 3]
+    db.close()
+
+
+def test_truncate_registra_drop_unico(tmp_path):
+    """Truncar uma tabela gera uma única entrada no log"""
+    path = tmp_path / "db.json"
+    db = abrir(path)
+    tabela = db.table('cobrancas')
+    tabela.insert_multiple([{"id": i} for i in range(20)])
+
+    log = tmp_path / "db.json.wal"
+    tamanho_antes = log.stat().st_size
+    tabela.truncate()
+
+    novas = log.read_text(encoding="utf-8")[tamanho_antes:].splitlines()
+    assert [json.loads(l)["op"] for l in novas] == ["drop"]
+    db.close()
+
+    db = abrir(path)
+    assert db.table('cobrancas').all() == []
+    db.close()
+
+
+def test_compactacao_gera_snapshot_e_esvazia_log(tmp_path):
+    """A compactação consolida o log no snapshot JSON"""
+    path = tmp_path / "db.json"
+    db = abrir(path, indent=4)
+    db.table('funcionarios').insert({"matricula": "1", "nome": "Ana"})
+    db.storage.compactar()
+
+    assert json.loads(path.read_text(encoding="utf-8")) == {
+        "funcionarios": {"1": {"matricula": "1", "nome": "Ana"}}
+    }
+    assert (tmp_path / "db.json.wal").stat().st_size == 0
+    assert not (tmp_path / "db.json.wal.old").exists()
+
+    db.table('funcionarios').insert({"matricula": "2", "nome": "Bia"})
+    db.close()
+
+    db = abrir(path)
+    assert len(db.table('funcionarios')) == 2
+    db.close()
+
+
+def test_compactacao_automatica_por_limite(tmp_path):
+    """Passar do limite de tamanho do log dispara a compactação"""
+    path = tmp_path / "db.json"
+    db = abrir(path, limite_compactacao=512)
+    tabela = db.table('ciclistas')
+    for i in range(30):
+        tabela.insert({"id": i, "nome": "Ciclista com nome comprido"})
+    db.close()
+
+    assert path.exists()
+    db = abrir(path)
+    assert len(db.table('ciclistas')) == 30
+    db.close()
+
+
+def test_log_antigo_pendente_e_reaplicado(tmp_path):
+    """Um log de compactação interrompida é reaplicado na inicialização"""
+    path = tmp_path / "db.json"
+    (tmp_path / "db.json.wal.old").write_text(
+        json.dumps({"op": "put", "t": "ciclistas", "id": "1", "doc": {"id": 1}}) + "\n",
+        encoding="utf-8"
+    )
+
+    db = abrir(path)
+    assert db.table('ciclistas').all() == [{"id": 1}]
+    db.close()
+
+    assert not (tmp_path / "db.json.wal.old").exists()
+
+
+@pytest.mark.parametrize("politica", ["always", "interval", "off"])
+def test_politicas_fsync_validas(tmp_path, politica):
+    """Todas as políticas suportadas persistem os dados"""
+    path = tmp_path / "db.json"
+    db = abrir(path, fsync=politica, fsync_intervalo=0.01)
+    db.table('ciclistas').insert({"id": 1})
+    db.close()
+
+    db = abrir(path)
+    assert len(db.table('ciclistas')) == 1
+    db.close()
+
+
+def test_politica_fsync_invalida(tmp_path):
+    """Política desconhecida é rejeitada"""
+    with pytest.raises(ValueError):
+        abrir(tmp_path / "db.json", fsync="talvez")
+
+
+def test_grupo_com_uma_entrada_nao_vira_lote(tmp_path):
+    """Um insert avulso (que também passa por agrupar()) continua sendo um "put" simples"""
+    db = abrir(tmp_path / "db.json")
+    db.table('ciclistas').insert({"id": 1})
+    log = tmp_path / "db.json.wal"
+    tamanho_antes = log.stat().st_size
+
+    with db.storage.agrupar():
+        db.table('ciclistas').insert({"id": 2})
+
+    with open(log, encoding="utf-8") as f:
+        f.seek(tamanho_antes)
+        linhas = [json.loads(l) for l in f.read().splitlines()]
+    assert linhas == [{"op": "put", "t": "ciclistas", "id": "2", "doc": {"id": 2}}]
+    db.close()
+
+
+def abrir_indexado(path):
+    from database.indices import TinyDBIndexado
+    return TinyDBIndexado(path, storage=WALStorage, fsync="off")
+
+
+def test_tabela_indexada_altera_no_lugar_e_registra_so_o_tocado(tmp_path):
+    """Com TabelaIndexada a tabela não é copiada e cada escrita loga só os doc_ids tocados"""
+    path = tmp_path / "db.json"
+    db = abrir_indexado(path)
+    tabela = db.table('cobrancas')
+    tabela.insert_multiple([{"id": i} for i in range(1, 101)])
+    guardada = db.storage.read()['cobrancas']
+
+    log = tmp_path / "db.json.wal"
+    tamanho_antes = log.stat().st_size
+    tabela.insert({"id": 101})
+    tabela.remove(doc_ids=[5])
+    tabela.update({"valor": 10}, doc_ids=[7])
+
+    novas = [json.loads(l) for l in log.read_text(encoding="utf-8")[tamanho_antes:].splitlines()]
+    assert [(e["op"], e["id"]) for e in novas] == [("put", "101"), ("del", "5"), ("put", "7")]
+    assert db.storage.read()['cobrancas'] is guardada
+    db.close()
+
+    db = abrir_indexado(path)
+    assert len(db.table('cobrancas')) == 100
+    assert db.table('cobrancas').get(doc_id=7) == {"id": 7, "valor": 10}
+    assert db.table('cobrancas').get(doc_id=5) is None
+    db.close()
+
+
+def test_tabela_indexada_grupo_desfeito_restaura_entradas_e_saidas(tmp_path):
+    """Inserções e remoções feitas no lugar dentro de um grupo desfeito voltam atrás"""
+    from database.paginacao import paginar
+
+    path = tmp_path / "db.json"
+    db = abrir_indexado(path)
+    tabela = db.table('cobrancas')
+    tabela.insert_multiple([{"id": 1}, {"id": 2}])
+    assert [d["id"] for d in paginar(tabela, 10, None)[0]] == [1, 2]
+
+    with pytest.raises(RuntimeError):
+        with db.storage.agrupar():
+            tabela.remove(doc_ids=[1])
+            tabela.insert({"id": 3})
+            assert [d["id"] for d in paginar(tabela, 10, None)[0]] == [2, 3]
+            raise RuntimeError("falha no meio da operação")
+
+    assert [d["id"] for d in paginar(tabela, 10, None)[0]] == [1, 2]
+    assert tabela.search(Query().id == 3) == []
+    db.close()
+
+    db = abrir_indexado(path)
+    assert [d["id"] for d in db.table('cobrancas').all()] == [1, 2]
+    db.close()
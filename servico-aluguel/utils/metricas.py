@@ -0,0 +1,231 @@
+"""
+Métricas no formato texto do Prometheus (``GET /metrics``).
+
+Um middleware ASGI mede cada requisição e a agrupa por método, rota e status.
+A rota é o template (ex. ``/ciclista/{idCiclista}``), lido de ``scope["route"]``
+que o FastAPI preenche no roteamento, então IDs não multiplicam as séries;
+requisições que não casam com nenhuma rota ficam em ``route="sem_rota"``.
+
+Exportado:
+- ``http_requests_total`` e ``http_request_duration_seconds`` (histograma)
+  por método, rota e status;
+- ``http_requests_in_progress``: requisições em andamento;
+- ``threadpool_*``: ocupação do pool de threads onde o FastAPI roda os
+  endpoints síncronos (quando ``tasks_waiting`` passa de zero, requisições
+  estão esperando thread livre);
+- ``process_*``: memória residente e virtual, CPU e início do processo.
+
+O custo por requisição é duas leituras de relógio, uma busca binária no
+bucket e um incremento sob lock; o texto só é montado quando ``/metrics`` é
+lido. ``METRICAS=0`` desliga o middleware e a rota. Com vários workers, cada
+processo tem os próprios contadores.
+"""
+
+import bisect
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from anyio import to_thread
+from fastapi import FastAPI
+from fastapi.responses import Response
+
+METRICAS = os.getenv("METRICAS", "1").lower() in ("1", "true", "sim")
+
+# Limites superiores (segundos) dos buckets do histograma de latência
+BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+TIPO_CONTEUDO = "text/plain; version=0.0.4; charset=utf-8"
+SEM_ROTA = "sem_rota"
+
+_INICIO_PROCESSO = time.time()
+_TAMANHO_PAGINA = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+Chave = Tuple[str, str, str]
+
+
+class _Serie:
+    """Contagens (não acumuladas) por bucket, soma e total de uma série"""
+
+    __slots__ = ("buckets", "soma", "total")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+
+class Metricas:
+    """Contadores das requisições HTTP de uma aplicação"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[Chave, _Serie] = {}
+        self.em_andamento = 0
+
+    def iniciar(self):
+        with self._lock:
+            self.em_andamento += 1
+
+    def registrar(self, metodo: str, rota: str, status: str, segundos: float):
+        """Conta uma requisição terminada"""
+        chave = (metodo, rota, status)
+        with self._lock:
+            self.em_andamento -= 1
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = _Serie()
+            serie.buckets[bisect.bisect_left(BUCKETS, segundos)] += 1
+            serie.soma += segundos
+            serie.total += 1
+
+    def exportar(self) -> str:
+        """Texto no formato de exposição do Prometheus"""
+        with self._lock:
+            em_andamento = self.em_andamento
+            series = [
+                (chave, list(serie.buckets), serie.soma, serie.total)
+                for chave, serie in sorted(self._series.items())
+            ]
+
+        linhas = [
+            "# HELP http_requests_total Requisições HTTP atendidas.",
+            "# TYPE http_requests_total counter",
+        ]
+        for chave, _, _, total in series:
+            linhas.append(f"http_requests_total{{{_rotulos(chave)}}} {total}")
+
+        linhas += [
+            "# HELP http_request_duration_seconds Duração das requisições HTTP.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for chave, buckets, soma, total in series:
+            rotulos = _rotulos(chave)
+            acumulado = 0
+            for limite, quantidade in zip(BUCKETS, buckets):
+                acumulado += quantidade
+                linhas.append(f'http_request_duration_seconds_bucket{{{rotulos},le="{limite}"}} {acumulado}')
+            linhas.append(f'http_request_duration_seconds_bucket{{{rotulos},le="+Inf"}} {total}')
+            linhas.append(f"http_request_duration_seconds_sum{{{rotulos}}} {soma:.6f}")
+            linhas.append(f"http_request_duration_seconds_count{{{rotulos}}} {total}")
+
+        linhas += [
+            "# HELP http_requests_in_progress Requisições HTTP em andamento.",
+            "# TYPE http_requests_in_progress gauge",
+            f"http_requests_in_progress {em_andamento}",
+        ]
+        linhas += _metricas_threadpool()
+        linhas += _metricas_processo()
+        return "\n".join(linhas) + "\n"
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(chave: Chave) -> str:
+    metodo, rota, status = chave
+    return f'method="{_escapar(metodo)}",route="{_escapar(rota)}",status="{status}"'
+
+
+def _metricas_threadpool() -> List[str]:
+    """Ocupação do limitador de threads do anyio (só dentro do event loop)"""
+    try:
+        estatisticas = to_thread.current_default_thread_limiter().statistics()
+    except RuntimeError:
+        return []
+    return [
+        "# HELP threadpool_workers_busy Threads do pool ocupadas com endpoints síncronos.",
+        "# TYPE threadpool_workers_busy gauge",
+        f"threadpool_workers_busy {estatisticas.borrowed_tokens}",
+        "# HELP threadpool_workers_max Tamanho máximo do pool de threads.",
+        "# TYPE threadpool_workers_max gauge",
+        f"threadpool_workers_max {estatisticas.total_tokens}",
+        "# HELP threadpool_tasks_waiting Tarefas esperando uma thread livre.",
+        "# TYPE threadpool_tasks_waiting gauge",
+        f"threadpool_tasks_waiting {estatisticas.tasks_waiting}",
+    ]
+
+
+def _metricas_processo() -> List[str]:
+    linhas = []
+    try:
+        with open("/proc/self/statm") as f:
+            virtual, residente = (int(v) * _TAMANHO_PAGINA for v in f.read().split()[:2])
+        linhas += [
+            "# HELP process_resident_memory_bytes Memória residente do processo.",
+            "# TYPE process_resident_memory_bytes gauge",
+            f"process_resident_memory_bytes {residente}",
+            "# HELP process_virtual_memory_bytes Memória virtual do processo.",
+            "# TYPE process_virtual_memory_bytes gauge",
+            f"process_virtual_memory_bytes {virtual}",
+        ]
+    except OSError:
+        # Fora do Linux: só o pico, que o getrusage dá em KiB (bytes no macOS)
+        try:
+            import resource
+        except ImportError:
+            resource = None
+        if resource is not None:
+            pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            linhas += [
+                "# HELP process_max_resident_memory_bytes Pico de memória residente do processo.",
+                "# TYPE process_max_resident_memory_bytes gauge",
+                f"process_max_resident_memory_bytes {pico if sys.platform == 'darwin' else pico * 1024}",
+            ]
+    linhas += [
+        "# HELP process_cpu_seconds_total Tempo de CPU (usuário + sistema) do processo.",
+        "# TYPE process_cpu_seconds_total counter",
+        f"process_cpu_seconds_total {time.process_time():.3f}",
+        "# HELP process_start_time_seconds Início do processo (epoch).",
+        "# TYPE process_start_time_seconds gauge",
+        f"process_start_time_seconds {_INICIO_PROCESSO:.3f}",
+    ]
+    return linhas
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI que registra método, rota, status e duração de cada requisição"""
+
+    def __init__(self, app, metricas: Metricas):
+        self.app = app
+        self.metricas = metricas
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = ["500"]
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                status[0] = str(mensagem["status"])
+            await send(mensagem)
+
+        self.metricas.iniciar()
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            rota = getattr(scope.get("route"), "path", None) or SEM_ROTA
+            self.metricas.registrar(scope["method"], rota, status[0], time.perf_counter() - inicio)
+
+
+def instalar_metricas(app: FastAPI, ativo: bool = METRICAS) -> Metricas:
+    """Adiciona o middleware e a rota ``GET /metrics`` à aplicação"""
+    metricas = Metricas()
+    app.state.metricas = metricas
+    if not ativo:
+        return metricas
+
+    # Assíncrona de propósito: roda no event loop (onde o limitador de threads
+    # pode ser lido) e não ocupa uma thread do pool que ela mesma mede
+    @app.get("/metrics", include_in_schema=False)
+    async def exportar_metricas():
+        return Response(metricas.exportar(), media_type=TIPO_CONTEUDO)
+
+    app.add_middleware(MiddlewareMetricas, metricas=metricas)
+    return metricas
@@ -0,0 +1,326 @@
+"""
+Micro-benchmark dos repositórios do servico-equipamento com o banco em escala.
+
+Para cada tamanho em ``--linhas``, cada grupo de tabelas recebe um banco novo
+num diretório temporário, com o storage configurado do serviço
+(DB_MODO_STORAGE, ou ``--storage``), semeado com dados sintéticos direto no
+arquivo JSON, fora do tempo medido:
+- trancas: ``linhas`` trancas em totens de 10 (metade com bicicleta), a
+  tabela tranca_totem correspondente e ``linhas`` bicicletas;
+- auditorias: ``linhas`` registros de auditoria espalhados por 100
+  funcionários e pelos equipamentos.
+Os índices em memória (relação tranca-totem, disponibilidade e auditoria)
+são montados antes das medições; o tempo disso entra em ``carga_s``.
+
+Cada método de repositório é chamado ``--repeticoes`` vezes com IDs
+sorteados (``--semente``); o relatório traz mediana, p90 e máximo em ms.
+Nos métodos que gravam também sai a amplificação de escrita: bytes que o
+processo passou a write() (``wchar`` de /proc/self/io, só no Linux) por
+chamada, contando o flush pendente do modo memória, e, nas criações, a razão
+entre isso e o tamanho do documento em JSON.
+
+Resultado em JSON (stdout ou ``--saida``), para comparar execuções.
+
+Uso (a partir de servico-equipamento):
+    python benchmarks/bench_repositorios.py --linhas 10000 100000 1000000 --saida repositorios.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tinydb import TinyDB
+
+from database.database import DB_MODO_STORAGE, STORAGES
+from database.disponibilidade_totens import disponibilidade_de
+from database.indices_auditoria import indices_auditoria_de
+from database.relacao_tranca_totem import relacao_tranca_totem_de
+from models.auditoria_model import RegistroAuditoria, TipoAcao, TipoEquipamento
+from models.bicicleta_model import NovaBicicleta, StatusBicicleta
+from models.totem_model import NovoTotem
+from models.tranca_model import NovaTranca, StatusTranca
+from repositories.auditoria_repository import AuditoriaRepository
+from repositories.bicicleta_repository import BicicletaRepository
+from repositories.totem_repository import TotemRepository
+from repositories.tranca_repository import TrancaRepository
+
+AGORA = "2025-01-01T12:00:00"
+TRANCAS_POR_TOTEM = 10
+FUNCIONARIOS = 100
+
+
+class BancoTemporario:
+    """Banco num arquivo próprio com a mesma interface da classe Database"""
+
+    def __init__(self, path: Path, storage):
+        self.db = TinyDB(path, indent=4, ensure_ascii=False, storage=storage)
+
+    def get_table(self, name: str):
+        return self.db.table(name)
+
+    def flush(self):
+        if hasattr(self.db.storage, 'flush'):
+            self.db.storage.flush()
+
+    def close(self):
+        self.db.close()
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def bytes_escritos() -> Optional[int]:
+    """Total de bytes que o processo já passou a write() (None fora do Linux)"""
+    try:
+        with open("/proc/self/io") as f:
+            for linha in f:
+                if linha.startswith("wchar:"):
+                    return int(linha.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def medir(funcao: Callable[[int], object], repeticoes: int, banco: Optional[BancoTemporario] = None) -> dict:
+    """
+    Chama ``funcao(i)`` para i em 0..repeticoes-1 e resume os tempos.
+
+    Com ``banco`` (métodos que gravam), grava o que ficou pendente ao final e
+    mede os bytes escritos por chamada.
+    """
+    tempos = []
+    antes = bytes_escritos()
+    retorno = None
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        retorno = funcao(i)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+
+    resultado = {
+        "mediana_ms": round(statistics.median(tempos), 3),
+        "p90_ms": round(percentil(tempos, 90), 3),
+        "max_ms": round(max(tempos), 3),
+    }
+    if banco is not None and antes is not None:
+        banco.flush()
+        por_chamada = (bytes_escritos() - antes) / repeticoes
+        resultado["bytes_escritos_por_chamada"] = round(por_chamada)
+        if hasattr(retorno, "model_dump_json"):
+            logico = len(retorno.model_dump_json())
+            resultado["bytes_documento"] = logico
+            resultado["amplificacao"] = round(por_chamada / logico, 1)
+    return resultado
+
+
+# ----------------------------------------------------------------------
+# Dados sintéticos
+# ----------------------------------------------------------------------
+
+def totem_da_tranca(i: int) -> int:
+    return (i - 1) // TRANCAS_POR_TOTEM + 1
+
+
+def tranca(i: int) -> dict:
+    # Trancas ímpares ocupadas pela bicicleta de mesmo ID
+    ocupada = i % 2 == 1
+    return {
+        "id": i, "numero": i, "localizacao": "-22.9068,-43.1729", "anoDeFabricacao": "2023",
+        "modelo": "Tranca Modelo X", "status": "OCUPADA" if ocupada else "LIVRE",
+        "bicicleta": i if ocupada else None, "totem": totem_da_tranca(i),
+    }
+
+
+def bicicleta(i: int) -> dict:
+    return {
+        "id": i, "marca": "Caloi", "modelo": "Elite Carbon", "ano": "2023", "numero": i,
+        "status": "DISPONIVEL" if i % 2 == 1 else "EM_USO",
+    }
+
+
+def auditoria(i: int) -> dict:
+    acao = list(TipoAcao)[i % len(TipoAcao)]
+    equipamento = TipoEquipamento.BICICLETA if "BICICLETA" in acao.value else TipoEquipamento.TRANCA
+    retirada = acao.value.startswith("RETIRAR")
+    segundos = i % 86400
+    return {
+        "tipo_acao": acao.value, "tipo_equipamento": equipamento.value, "id_equipamento": i // 4 + 1,
+        "numero_equipamento": i // 4 + 1, "id_funcionario": i % FUNCIONARIOS + 1,
+        "id_tranca": i // 4 + 1 if equipamento == TipoEquipamento.BICICLETA else None,
+        "id_totem": None if equipamento == TipoEquipamento.BICICLETA else i // 40 + 1,
+        "status_destino": "EM_REPARO" if retirada else "DISPONIVEL", "detalhes": {},
+        "data_hora": f"2025-{i // 2678400 % 12 + 1:02d}-{i // 86400 % 28 + 1:02d}T"
+                     f"{segundos // 3600:02d}:{segundos // 60 % 60:02d}:{segundos % 60:02d}",
+    }
+
+
+def escrever_banco(path: Path, tabelas: Dict[str, tuple]):
+    """Grava o JSON do TinyDB documento a documento, sem montar o banco inteiro em memória"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for n, (nome, (gerar, quantidade)) in enumerate(tabelas.items()):
+            f.write(("," if n else "") + json.dumps(nome) + ": {")
+            f.write(",".join(f'"{i}": {json.dumps(gerar(i))}' for i in range(1, quantidade + 1)))
+            f.write("}")
+        f.write("}")
+
+
+# ----------------------------------------------------------------------
+# Grupos de tabelas
+# ----------------------------------------------------------------------
+
+def tabelas_trancas(linhas: int) -> Dict[str, tuple]:
+    return {
+        "totems": (lambda t: {"id": t, "localizacao": f"Totem {t}", "descricao": None},
+                   totem_da_tranca(linhas)),
+        "trancas": (tranca, linhas),
+        "tranca_totem": (lambda i: {"idTranca": i, "idTotem": totem_da_tranca(i)}, linhas),
+        "bicicletas": (bicicleta, linhas),
+    }
+
+
+def medir_trancas(banco: BancoTemporario, linhas: int, rng: random.Random, repeticoes: int) -> dict:
+    relacao_tranca_totem_de(banco).trancas_de(1)
+    disponibilidade_de(banco).por_totem()
+
+    trancas = TrancaRepository(banco)
+    bicicletas = BicicletaRepository(banco)
+    totens = TotemRepository(banco)
+    ids = [rng.randint(1, linhas) for _ in range(repeticoes)]
+    lote = [[rng.randint(1, linhas) for _ in range(10)] for _ in range(repeticoes)]
+    ids_totens = [rng.randint(1, totem_da_tranca(linhas)) for _ in range(repeticoes)]
+    varreduras = max(1, repeticoes // 10)
+
+    def nova_tranca(i):
+        return NovaTranca(numero=linhas + i + 1, localizacao="-22.9", anoDeFabricacao="2024", modelo="Tranca Modelo Y")
+
+    def nova_bicicleta(i):
+        return NovaBicicleta(marca="Caloi", modelo="Elite", ano="2024", numero=linhas + i + 1)
+
+    return {
+        "tranca.create": medir(lambda i: trancas.create(nova_tranca(i)), repeticoes, banco),
+        "tranca.get_by_id": medir(lambda i: trancas.get_by_id(ids[i]), repeticoes),
+        "tranca.get_many(10)": medir(lambda i: trancas.get_many(lote[i]), repeticoes),
+        "tranca.get_by_totem": medir(lambda i: trancas.get_by_totem(ids_totens[i]), repeticoes),
+        "tranca.get_totem_id": medir(lambda i: trancas.get_totem_id(ids[i]), repeticoes),
+        "tranca.update_status": medir(lambda i: trancas.update_status(ids[i], StatusTranca.LIVRE), repeticoes, banco),
+        "tranca.associar_bicicleta": medir(lambda i: trancas.associar_bicicleta(ids[i], ids[i]), repeticoes, banco),
+        "tranca.get_page(100)": medir(lambda i: trancas.get_page(100), repeticoes),
+        "tranca.get_all": medir(lambda i: trancas.get_all(), varreduras),
+        "bicicleta.create": medir(lambda i: bicicletas.create(nova_bicicleta(i)), repeticoes, banco),
+        "bicicleta.get_by_id": medir(lambda i: bicicletas.get_by_id(ids[i]), repeticoes),
+        "bicicleta.update_status": medir(
+            lambda i: bicicletas.update_status(ids[i], StatusBicicleta.DISPONIVEL), repeticoes, banco
+        ),
+        "bicicleta.get_all": medir(lambda i: bicicletas.get_all(), varreduras),
+        "totem.create": medir(lambda i: totens.create(NovoTotem(localizacao=f"Novo {i}")), repeticoes, banco),
+        "totem.get_trancas_ids": medir(lambda i: totens.get_trancas_ids(ids_totens[i]), repeticoes),
+        "totem.get_all": medir(lambda i: totens.get_all(), varreduras),
+    }
+
+
+def tabelas_auditorias(linhas: int) -> Dict[str, tuple]:
+    return {"auditorias": (auditoria, linhas)}
+
+
+def medir_auditorias(banco: BancoTemporario, linhas: int, rng: random.Random, repeticoes: int) -> dict:
+    indices_auditoria_de(banco).ultima_acao(TipoEquipamento.TRANCA, 1)
+
+    auditorias = AuditoriaRepository(banco)
+    ids = [rng.randint(1, linhas) for _ in range(repeticoes)]
+    equipamentos = [rng.randint(1, linhas // 4 + 1) for _ in range(repeticoes)]
+    funcionarios = [rng.randint(1, FUNCIONARIOS) for _ in range(repeticoes)]
+    acoes = [rng.choice(list(TipoAcao)) for _ in range(repeticoes)]
+    tipos = [rng.choice(list(TipoEquipamento)) for _ in range(repeticoes)]
+    varreduras = max(1, repeticoes // 10)
+
+    def criar(i):
+        return auditorias.create(RegistroAuditoria(
+            tipo_acao=TipoAcao.RETIRAR_TRANCA, tipo_equipamento=TipoEquipamento.TRANCA,
+            id_equipamento=equipamentos[i], numero_equipamento=equipamentos[i], id_funcionario=funcionarios[i],
+            id_totem=1, status_destino="EM_REPARO"
+        ))
+
+    return {
+        "auditoria.create": medir(criar, repeticoes, banco),
+        "auditoria.get_by_id": medir(lambda i: auditorias.get_by_id(ids[i]), repeticoes),
+        "auditoria.get_by_funcionario": medir(lambda i: auditorias.get_by_funcionario(funcionarios[i]), varreduras),
+        "auditoria.get_by_equipamento": medir(
+            lambda i: auditorias.get_by_equipamento(tipos[i], equipamentos[i]), repeticoes
+        ),
+        "auditoria.get_by_tipo_acao": medir(lambda i: auditorias.get_by_tipo_acao(acoes[i]), varreduras),
+        "auditoria.consultar(funcionario+acao, 100)": medir(
+            lambda i: auditorias.consultar(id_funcionario=funcionarios[i], tipo_acao=acoes[i]), repeticoes
+        ),
+        "auditoria.consultar(100)": medir(lambda i: auditorias.consultar(), repeticoes),
+        "auditoria.get_ultimas_acoes_equipamento": medir(
+            lambda i: auditorias.get_ultimas_acoes_equipamento(tipos[i], equipamentos[i]), repeticoes
+        ),
+        "auditoria.get_retiradas_em_reparo_por_funcionario": medir(
+            lambda i: auditorias.get_retiradas_em_reparo_por_funcionario(funcionarios[i], tipos[i]), varreduras
+        ),
+        "auditoria.verificar_reparador_original": medir(
+            lambda i: auditorias.verificar_reparador_original(tipos[i], equipamentos[i], funcionarios[i]), repeticoes
+        ),
+        "auditoria.get_all": medir(lambda i: auditorias.get_all(), varreduras),
+    }
+
+
+GRUPOS = {
+    "trancas": (tabelas_trancas, medir_trancas),
+    "auditorias": (tabelas_auditorias, medir_auditorias),
+}
+
+
+def medir_grupo(nome: str, linhas: int, storage: str, repeticoes: int, semente: int) -> dict:
+    tabelas, medir_metodos = GRUPOS[nome]
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        path = Path(diretorio) / "equipamentos.json"
+        inicio = time.perf_counter()
+        escrever_banco(path, tabelas(linhas))
+        tamanho = path.stat().st_size
+        banco = BancoTemporario(path, STORAGES[storage])
+        try:
+            metodos = medir_metodos(banco, linhas, random.Random(semente), repeticoes)
+            return {"banco_bytes": tamanho, "carga_s": round(time.perf_counter() - inicio, 2), "metodos": metodos}
+        finally:
+            banco.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--grupos", nargs="+", choices=list(GRUPOS), default=list(GRUPOS))
+    parser.add_argument("--storage", choices=list(STORAGES), default=DB_MODO_STORAGE if DB_MODO_STORAGE in STORAGES else "memoria")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="Arquivo JSON de saída (padrão: stdout)")
+    args = parser.parse_args()
+
+    resultado = {"servico": "equipamento", "storage": args.storage, "repeticoes": args.repeticoes, "escalas": {}}
+    for linhas in args.linhas:
+        resultado["escalas"][str(linhas)] = {
+            grupo: medir_grupo(grupo, linhas, args.storage, args.repeticoes, args.semente) for grupo in args.grupos
+        }
+        print(f"{linhas} linhas: ok", file=sys.stderr)
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        Path(args.saida).write_text(texto, encoding="utf-8")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
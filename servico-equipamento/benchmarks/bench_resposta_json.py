@@ -0,0 +1,105 @@
+"""
+Benchmark da serialização das listagens grandes (GET /tranca e GET /bicicleta).
+
+Compara, com o banco em memória:
+- json.dumps: JSONResponse explícito (jsonable/dump em Python + json.dumps,
+  o caminho do FastAPI fixado no pyproject)
+- padrao: a classe padrão do FastAPI instalado
+- rapido: RespostaJSONRapida (JSON_RAPIDO=1)
+
+Também confere que os três devolvem exatamente os mesmos bytes.
+
+Uso (a partir de servico-equipamento):
+    python benchmarks/bench_resposta_json.py --linhas 20000 --repeticoes 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from tinydb import TinyDB
+from tinydb.storages import MemoryStorage
+
+from routers.bicicleta import router as bicicleta_router
+from routers.tranca import router as tranca_router
+from utils.resposta_json import RespostaJSONRapida, classe_resposta_json
+
+
+class MemoryDatabase:
+    """Database em memória com a mesma interface get_table da classe Database"""
+    def __init__(self):
+        self._db = TinyDB(storage=MemoryStorage)
+
+    def get_table(self, name: str):
+        return self._db.table(name)
+
+
+def popular(linhas: int) -> MemoryDatabase:
+    banco = MemoryDatabase()
+    banco.get_table('trancas').insert_multiple([
+        {"id": i, "numero": i, "localizacao": "Rio de Janeiro", "anoDeFabricacao": "2023",
+         "modelo": "Tranca Modelo X", "status": "OCUPADA", "bicicleta": i, "totem": None}
+        for i in range(1, linhas + 1)
+    ])
+    banco.get_table('bicicletas').insert_multiple([
+        {"id": i, "marca": "Caloi", "modelo": "Elite Carbon", "ano": "2023", "numero": i, "status": "DISPONIVEL"}
+        for i in range(1, linhas + 1)
+    ])
+    return banco
+
+
+def criar_app(classe) -> TestClient:
+    app = FastAPI(default_response_class=classe)
+    app.include_router(bicicleta_router)
+    app.include_router(tranca_router)
+    return TestClient(app)
+
+
+def medir(cliente: TestClient, rota: str, repeticoes: int):
+    cliente.get(rota)  # aquecimento
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resposta = cliente.get(rota)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos), resposta.content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--linhas", type=int, default=20000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    banco = popular(args.linhas)
+    modos = {
+        "json.dumps": JSONResponse,
+        "padrao": classe_resposta_json(rapido=False),
+        "rapido": RespostaJSONRapida,
+    }
+    resultados = {}
+
+    with patch('routers.tranca.get_db', return_value=banco), \
+         patch('routers.bicicleta.get_db', return_value=banco):
+        for rota in ("/tranca", "/bicicleta"):
+            corpos = {}
+            for modo, classe in modos.items():
+                mediana, corpos[modo] = medir(criar_app(classe), rota, args.repeticoes)
+                resultados.setdefault(rota, {})[modo] = round(mediana * 1000, 1)
+            if len(set(corpos.values())) != 1:
+                raise SystemExit(f"{rota}: corpos diferentes entre os modos")
+
+    print(json.dumps({"linhas": args.linhas, "mediana_ms": resultados}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,13 @@ Este módulo centraliza a conexão e inicialização do banco de dados.
 
 from tinydb import TinyDB, Query
 from tinydb.storages import JSONStorage
+from tinydb.table import Table
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
+from typing import Callable, List, Optional
 import os
 import json
+import threading
 
 
 # Define o caminho do banco de dados
@@ -15,6 +19,14 @@ DB_DIR = Path(__file__).parent
 DB_FILE = DB_DIR / "equipamentos.json"
 
 
+# Modo do storage: "memoria" mantém o JSON parseado em memória como fonte da
+# verdade; "arquivo" relê o arquivo a cada operação (comportamento original)
+DB_MODO_STORAGE = os.getenv("DB_MODO_STORAGE", "memoria")
+
+# Janela (em segundos) em que escritas consecutivas são agrupadas num único flush
+DB_INTERVALO_FLUSH = float(os.getenv("DB_INTERVALO_FLUSH", "0.2"))
+
+
 class UTF8JSONStorage(JSONStorage):
     """Storage personalizado que força UTF-8 encoding"""
     
@@ -22,11 +34,165 @@ class UTF8JSONStorage(JSONStorage):
         super().__init__(path, create_dirs=create_dirs, encoding=encoding, access_mode=access_mode, **kwargs)
 
 
+class MemoriaJSONStorage(UTF8JSONStorage):
+    """
+    Storage UTF-8 que mantém o documento parseado em memória.
+
+    O arquivo é lido uma única vez na abertura. Leituras são servidas direto da
+    memória e escritas marcam o estado como sujo e agendam um flush; várias
+    escritas dentro de ``intervalo_flush`` segundos viram uma única gravação
+    em disco. ``close()`` grava o que estiver pendente antes de fechar.
+
+    Dentro de ``agrupar()`` nenhum flush acontece no meio: as escritas do bloco
+    chegam ao disco juntas, numa única gravação ao final. Cada nível de
+    ``agrupar()`` é também um ponto de restauração: se o bloco levantar uma
+    exceção, o estado em memória volta ao que era na entrada (nada do bloco
+    chega ao disco) e as funções em ``ao_desfazer`` são chamadas para os caches
+    derivados serem refeitos.
+
+    ``read()`` devolve o próprio estado em memória, que o TinyDB altera no lugar
+    antes de chamar ``write()``. Para o flush agendado nunca gravar uma
+    alteração pela metade, o banco deve ser aberto com ``TinyDBTravado``, que
+    faz cada leitura-alteração-escrita segurando ``travar()`` e, dentro de
+    ``agrupar()``, altera cópias dos documentos em vez dos originais (o ponto
+    de restauração guarda só as referências às tabelas).
+    """
+
+    def __init__(self, path, intervalo_flush: float = DB_INTERVALO_FLUSH, **kwargs):
+        super().__init__(path, **kwargs)
+        self.intervalo_flush = intervalo_flush
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._sujo = False
+        self._agrupando = 0
+        self._cache = super().read()
+        # Chamadas (sem argumentos) depois que um agrupar() é desfeito
+        self.ao_desfazer: List[Callable[[], None]] = []
+
+    @property
+    def em_grupo(self) -> bool:
+        """Se há um agrupar() aberto (as escritas precisam preservar o ponto de restauração)"""
+        return self._agrupando > 0
+
+    def read(self):
+        return self._cache
+
+    def travar(self):
+        """Lock que o flush também segura; enquanto ele está com alguém nada é gravado"""
+        return self._lock
+
+    def write(self, data):
+        with self._lock:
+            self._cache = data
+            self._sujo = True
+            if self._timer is None and not self._agrupando:
+                self._timer = threading.Timer(self.intervalo_flush, self._flush_agendado)
+                self._timer.daemon = True
+                self._timer.start()
+
+    @contextmanager
+    def agrupar(self):
+        """Segura os flushes até o fim do bloco e grava tudo de uma vez; desfaz o bloco se ele falhar"""
+        with self._lock:
+            ponto = (dict(self._cache or {}), self._sujo)
+            self._agrupando += 1
+            try:
+                yield
+            except BaseException:
+                self._cache, self._sujo = ponto
+                for desfeito in self.ao_desfazer:
+                    desfeito()
+                raise
+            finally:
+                self._agrupando -= 1
+                if not self._agrupando:
+                    self.flush()
+
+    def flush(self):
+        """Grava imediatamente o estado em memória, se houver alterações pendentes"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._sujo:
+                super().write(self._cache)
+                self._sujo = False
+
+    def _flush_agendado(self):
+        with self._lock:
+            self._timer = None
+            if not self._sujo:
+                return
+            try:
+                super().write(self._cache)
+                self._sujo = False
+            except RuntimeError:
+                # O estado mudou durante a serialização; tenta de novo na próxima janela
+                self._timer = threading.Timer(self.intervalo_flush, self._flush_agendado)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def close(self):
+        self.flush()
+        super().close()
+
+
+def _travar(storage):
+    return storage.travar() if hasattr(storage, 'travar') else nullcontext()
+
+
+class TabelaTravada(Table):
+    """Tabela que faz a leitura-alteração-escrita de cada gravação sob o lock do storage"""
+
+    def _update_table(self, updater):
+        with _travar(self._storage):
+            if getattr(self._storage, 'em_grupo', False):
+                alterar = updater
+
+                def updater(table):
+                    # O TinyDB altera os documentos no lugar; copiá-los mantém
+                    # intactos os que o ponto de restauração de agrupar() guarda
+                    for doc_id, doc in table.items():
+                        table[doc_id] = dict(doc)
+                    alterar(table)
+
+            super()._update_table(updater)
+
+
+class TinyDBTravado(TinyDB):
+    """TinyDB cujas gravações seguram o lock do storage do início ao fim"""
+
+    table_class = TabelaTravada
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if hasattr(self.storage, 'ao_desfazer'):
+            self.storage.ao_desfazer.append(self._escritas_desfeitas)
+
+    def _escritas_desfeitas(self):
+        # As consultas em cache podem ter visto as escritas desfeitas
+        for tabela in self._tables.values():
+            tabela.clear_cache()
+
+    def drop_table(self, name: str) -> None:
+        with _travar(self.storage):
+            super().drop_table(name)
+
+
+STORAGES = {
+    "memoria": MemoriaJSONStorage,
+    "arquivo": UTF8JSONStorage,
+}
+
+
 class Database:
     """Gerenciador singleton do banco de dados TinyDB"""
     
     _instance = None
     _db = None
+    # Incrementada sempre que o conteúdo pode ter sido trocado (close, reset,
+    # truncate_all); índices em memória comparam com a geração em que foram montados
+    geracao = 0
     
     def __new__(cls):
         if cls._instance is None:
@@ -40,12 +206,15 @@ class Database:
             DB_DIR.mkdir(exist_ok=True)
             
             # Inicializa o banco de dados com storage UTF-8
-            self._db = TinyDB(
+            self._db = TinyDBTravado(
                 DB_FILE,
                 indent=4,
                 ensure_ascii=False,
-                storage=UTF8JSONStorage
+                storage=STORAGES.get(DB_MODO_STORAGE, MemoriaJSONStorage)
             )
+            # Um transacao() desfeito invalida sequências e índices em memória
+            if hasattr(self._db.storage, 'ao_desfazer'):
+                self._db.storage.ao_desfazer.append(self._descartar_caches)
     
     @property
     def db(self) -> TinyDB:
@@ -54,18 +223,28 @@ class Database:
     
     def get_table(self, name: str):
         """Retorna uma tabela específica do banco de dados"""
+        if self._db is None:
+            self.__init__()
         return self._db.table(name)
     
+    def flush(self):
+        """Grava em disco as alterações pendentes (modo memória)"""
+        if self._db is not None and hasattr(self._db.storage, 'flush'):
+            self._db.storage.flush()
+    
     def close(self):
-        """Fecha a conexão com o banco de dados"""
-        if self._db:
+        """Fecha a conexão com o banco de dados, gravando o que estiver pendente"""
+        if self._db is not None:
             self._db.close()
+            self._db = None
+            self._descartar_caches()
     
     def truncate_all(self):
         """Remove todos os dados de todas as tabelas"""
         self._db.truncate()
         for table in ['bicicletas', 'trancas', 'totems', 'tranca_totem', 'auditorias']:
             self._db.table(table).truncate()
+        self._descartar_caches()
     
     def reset(self):
         """Reseta o banco de dados completamente"""
@@ -73,6 +252,26 @@ class Database:
         if DB_FILE.exists():
             os.remove(DB_FILE)
         self.__init__()
+    
+    def _descartar_caches(self):
+        """Faz o estado derivado do banco guardado em memória ser relido do storage"""
+        from database.sequencias import sequencias_de
+        self.geracao += 1
+        sequencias_de(self).descartar()
+
+
+def transacao(db):
+    """
+    Agrupa as escritas do bloco numa única gravação em disco.
+
+    No modo memória o bloco também é atômico: se ele levantar uma exceção, as
+    escritas feitas nele são desfeitas e os índices em memória, refeitos. Nos
+    demais modos (e nos bancos de teste) as escritas seguem como antes.
+    """
+    storage = getattr(getattr(db, 'db', None), 'storage', None)
+    if hasattr(storage, 'agrupar'):
+        return storage.agrupar()
+    return nullcontext()
 
 
 # Singleton global do banco de dados
@@ -0,0 +1,195 @@
+"""
+Contadores de disponibilidade por totem.
+
+Quiosques e o mapa do app precisam, para cada totem, de quantas trancas estão
+livres, quantas bicicletas estão disponíveis e quanto está em reparo. Em vez
+de varrer trancas e bicicletas de cada totem a cada consulta, os contadores
+ficam em memória e são ajustados pelos repositórios a cada gravação de tranca
+ou bicicleta (trancar, destrancar, mudança de status, integração e retirada).
+
+Cada tranca guarda sua contribuição atual; uma gravação desfaz a contribuição
+antiga e aplica a nova. A mudança de status de uma bicicleta ajusta o totem
+da tranca em que ela está.
+
+Os contadores são montados na primeira consulta e reconstruídos quando o banco
+é restaurado ou reaberto (``Database.geracao`` muda em ``truncate_all()``,
+``reset()``, ``close()`` e quando um ``transacao()`` é desfeito). Gravações por fora dos repositórios só são
+percebidas se mudarem a quantidade de trancas ou de bicicletas; quem as fizer
+deve chamar ``descartar()``.
+"""
+
+import threading
+import weakref
+from collections import Counter
+from typing import Dict, Iterable, Mapping, Optional, Set, Tuple
+
+from database.database import Database
+
+TABELA_TRANCAS = 'trancas'
+TABELA_BICICLETAS = 'bicicletas'
+TABELA_TRANCA_TOTEM = 'tranca_totem'
+
+# Campos devolvidos para cada totem
+CAMPOS = ('trancas', 'trancasLivres', 'bicicletasDisponiveis', 'trancasEmReparo', 'bicicletasEmReparo')
+
+STATUS_REPARO = ('EM_REPARO', 'REPARO_SOLICITADO')
+
+# (totem, status da tranca, bicicleta na tranca)
+EstadoTranca = Tuple[Optional[int], Optional[str], Optional[int]]
+
+
+def _valor(valor):
+    return getattr(valor, 'value', valor)
+
+
+class DisponibilidadeTotens:
+    """Contadores de trancas e bicicletas por totem de um banco"""
+
+    def __init__(self, db: Database):
+        self._db = db
+        self._lock = threading.RLock()
+        self._construido = False
+        self._geracao: Optional[int] = None
+        self._trancas: Dict[int, EstadoTranca] = {}
+        self._bicicletas: Dict[int, Optional[str]] = {}
+        # bicicleta -> trancas que apontam para ela
+        self._trancas_da_bicicleta: Dict[int, Set[int]] = {}
+        self._contadores: Dict[int, Counter] = {}
+
+    def por_totem(self) -> Dict[int, Dict[str, int]]:
+        """Contadores de cada totem que tem ao menos uma tranca"""
+        with self._lock:
+            self._validar()
+            return {
+                totem: {campo: contador[campo] for campo in CAMPOS}
+                for totem, contador in self._contadores.items()
+            }
+
+    def trancas_gravadas(self, docs: Iterable[Mapping]):
+        """Aplica o estado atual de trancas inseridas ou alteradas"""
+        with self._lock:
+            if not self._construido:
+                return
+            for doc in docs:
+                self._gravar_tranca(doc['id'], self._estado(doc))
+
+    def tranca_removida(self, tranca_id: int):
+        with self._lock:
+            if not self._construido:
+                return
+            self._gravar_tranca(tranca_id, None)
+
+    def bicicletas_gravadas(self, docs: Iterable[Mapping]):
+        """Aplica o status atual de bicicletas inseridas ou alteradas"""
+        with self._lock:
+            if not self._construido:
+                return
+            for doc in docs:
+                self._gravar_bicicleta(doc['id'], _valor(doc.get('status')))
+
+    def bicicleta_removida(self, bicicleta_id: int):
+        with self._lock:
+            if not self._construido:
+                return
+            self._gravar_bicicleta(bicicleta_id, None, removida=True)
+
+    def descartar(self):
+        """Força a reconstrução na próxima consulta"""
+        with self._lock:
+            self._construido = False
+
+    @staticmethod
+    def _estado(doc: Mapping, totem: Optional[int] = None) -> EstadoTranca:
+        return (doc.get('totem') if doc.get('totem') is not None else totem, _valor(doc.get('status')), doc.get('bicicleta'))
+
+    def _contribuicao(self, estado: Optional[EstadoTranca]) -> Optional[Tuple[int, Counter]]:
+        if estado is None or estado[0] is None:
+            return None
+        totem, status, bicicleta = estado
+        contribuicao = Counter(trancas=1)
+        if status == 'LIVRE':
+            contribuicao['trancasLivres'] = 1
+        elif status in STATUS_REPARO:
+            contribuicao['trancasEmReparo'] = 1
+        if bicicleta is not None:
+            status_bicicleta = self._bicicletas.get(bicicleta)
+            if status == 'OCUPADA' and status_bicicleta == 'DISPONIVEL':
+                contribuicao['bicicletasDisponiveis'] = 1
+            elif status_bicicleta in STATUS_REPARO:
+                contribuicao['bicicletasEmReparo'] = 1
+        return totem, contribuicao
+
+    def _aplicar(self, estado: Optional[EstadoTranca], sinal: int):
+        contribuicao = self._contribuicao(estado)
+        if contribuicao is None:
+            return
+        totem, valores = contribuicao
+        contador = self._contadores.setdefault(totem, Counter())
+        for campo, valor in valores.items():
+            contador[campo] += sinal * valor
+        if contador['trancas'] <= 0:
+            del self._contadores[totem]
+
+    def _gravar_tranca(self, tranca_id: int, estado: Optional[EstadoTranca]):
+        anterior = self._trancas.get(tranca_id)
+        self._aplicar(anterior, -1)
+        if anterior is not None and anterior[2] is not None:
+            self._trancas_da_bicicleta.get(anterior[2], set()).discard(tranca_id)
+
+        if estado is None:
+            self._trancas.pop(tranca_id, None)
+            return
+        self._trancas[tranca_id] = estado
+        if estado[2] is not None:
+            self._trancas_da_bicicleta.setdefault(estado[2], set()).add(tranca_id)
+        self._aplicar(estado, +1)
+
+    def _gravar_bicicleta(self, bicicleta_id: int, status: Optional[str], removida: bool = False):
+        trancas = self._trancas_da_bicicleta.get(bicicleta_id, ())
+        for tranca_id in trancas:
+            self._aplicar(self._trancas[tranca_id], -1)
+        if removida:
+            self._bicicletas.pop(bicicleta_id, None)
+        else:
+            self._bicicletas[bicicleta_id] = status
+        for tranca_id in trancas:
+            self._aplicar(self._trancas[tranca_id], +1)
+
+    def _validar(self):
+        if (
+            not self._construido
+            or self._geracao != getattr(self._db, 'geracao', 0)
+            or len(self._trancas) != len(self._db.get_table(TABELA_TRANCAS))
+            or len(self._bicicletas) != len(self._db.get_table(TABELA_BICICLETAS))
+        ):
+            self._reconstruir()
+
+    def _reconstruir(self):
+        self._geracao = getattr(self._db, 'geracao', 0)
+        self._trancas = {}
+        self._trancas_da_bicicleta = {}
+        self._contadores = {}
+        self._bicicletas = {
+            doc['id']: _valor(doc.get('status')) for doc in self._db.get_table(TABELA_BICICLETAS).all()
+        }
+        # Trancas sem o campo totem podem estar ligadas só pela tabela de relacionamento
+        totem_da_tranca = {
+            rel['idTranca']: rel['idTotem'] for rel in self._db.get_table(TABELA_TRANCA_TOTEM).all()
+        }
+        for doc in self._db.get_table(TABELA_TRANCAS).all():
+            self._gravar_tranca(doc['id'], self._estado(doc, totem_da_tranca.get(doc['id'])))
+        self._construido = True
+
+
+_registro: "weakref.WeakKeyDictionary[Database, DisponibilidadeTotens]" = weakref.WeakKeyDictionary()
+_registro_lock = threading.Lock()
+
+
+def disponibilidade_de(db: Database) -> DisponibilidadeTotens:
+    """Retorna os contadores de disponibilidade do banco (compartilhados entre repositórios)"""
+    with _registro_lock:
+        disponibilidade = _registro.get(db)
+        if disponibilidade is None:
+            disponibilidade = DisponibilidadeTotens(db)
+            _registro[db] = disponibilidade
+        return disponibilidade
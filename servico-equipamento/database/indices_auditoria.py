@@ -0,0 +1,256 @@
+"""
+Índices compostos da tabela de auditorias.
+
+Cada índice agrupa os registros por uma chave (funcionário, equipamento,
+tipo de ação ou funcionário + tipo de ação) e mantém, para cada valor da
+chave, a lista ordenada de posições ``(data_hora, doc_id)``. Uma consulta
+escolhe o índice mais seletivo que os filtros cobrem, localiza o intervalo
+de datas e o cursor por busca binária e só lê do banco os documentos que
+efetivamente entram na página.
+
+A data_hora das posições é normalizada por ``chave_data_hora`` (UTC, sem
+fuso, com microssegundos): os registros novos são gravados em UTC com fuso,
+mas os antigos e os dados iniciais podem ter ``Z`` ou nenhum fuso, e a
+comparação como texto só é correta com um formato único. Datas sem fuso são
+tratadas como UTC.
+
+Além das listas, são mantidos a última ação de cada equipamento e a última
+retirada para reparo (``RETIRAR_*`` com destino ``EM_REPARO``), usadas pela
+regra UC11-R3 sem depender do tamanho do histórico.
+
+Os índices são montados a partir da tabela no primeiro uso e atualizados
+pelo ``AuditoriaRepository.create``. Restaurações e resets passam por
+``Database.truncate_all()``/``reset()``/``close()``, que incrementam
+``Database.geracao`` e fazem os índices serem reconstruídos; um
+``transacao()`` desfeito também incrementa a geração. Gravações diretas
+na tabela, por fora do repositório, só são percebidas se mudarem a contagem de
+documentos; quem as fizer deve chamar ``descartar()``.
+"""
+
+import bisect
+import math
+import threading
+import weakref
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from database.database import Database
+
+TABELA_AUDITORIAS = 'auditorias'
+
+# nome do índice -> campos que formam a chave
+INDICES: Dict[str, Tuple[str, ...]] = {
+    'funcionario': ('id_funcionario',),
+    'equipamento': ('tipo_equipamento', 'id_equipamento'),
+    'acao': ('tipo_acao',),
+    'funcionario_acao': ('id_funcionario', 'tipo_acao'),
+}
+
+Posicao = Tuple[str, int]
+Equipamento = Tuple[str, int]
+
+# Quantas posições são copiadas por vez ao percorrer uma consulta
+TAMANHO_LOTE = 256
+
+
+def chave_data_hora(valor: Union[str, datetime, None]) -> str:
+    """data_hora (texto ISO 8601 ou datetime) no formato ordenável das posições"""
+    if not valor:
+        return ''
+    if isinstance(valor, str):
+        try:
+            valor = datetime.fromisoformat(valor)
+        except ValueError:
+            return valor
+    if valor.tzinfo is not None:
+        valor = valor.astimezone(timezone.utc).replace(tzinfo=None)
+    return valor.strftime('%Y-%m-%dT%H:%M:%S.%f')
+
+
+def _valor(valor):
+    """Enums são gravados pelo valor; normaliza para comparar com o documento"""
+    return getattr(valor, 'value', valor)
+
+
+class IndicesAuditoria:
+    """Índices ordenados por data_hora sobre a tabela de auditorias de um banco"""
+
+    def __init__(self, db: Database):
+        self._db = db
+        self._lock = threading.RLock()
+        self._todos: List[Posicao] = []
+        self._indices: Dict[str, Dict[tuple, List[Posicao]]] = {nome: {} for nome in INDICES}
+        self._ultima_acao: Dict[Equipamento, Posicao] = {}
+        # (tipo_equipamento, id_equipamento, tipo_acao) -> (posição, id_funcionario)
+        self._ultima_retirada_reparo: Dict[Tuple[str, int, str], Tuple[Posicao, object]] = {}
+        self._total: Optional[int] = None
+        self._geracao: Optional[int] = None
+
+    @property
+    def _tabela(self):
+        return self._db.get_table(TABELA_AUDITORIAS)
+
+    def _atual(self, inseridos: int = 0) -> bool:
+        return (
+            self._total is not None
+            and self._geracao == getattr(self._db, 'geracao', 0)
+            and self._total + inseridos == len(self._tabela)
+        )
+
+    def registrar(self, doc_id: int, registro: dict):
+        """Inclui nos índices um registro recém-inserido"""
+        with self._lock:
+            if not self._atual(1):
+                self._reconstruir()
+                return
+            self._adicionar(doc_id, registro)
+            self._total += 1
+
+    def registrar_varios(self, registros: List[Tuple[int, dict]]):
+        """Inclui nos índices vários registros inseridos de uma vez"""
+        with self._lock:
+            if not self._atual(len(registros)):
+                self._reconstruir()
+                return
+            for doc_id, registro in registros:
+                self._adicionar(doc_id, registro)
+            self._total += len(registros)
+
+    def descartar(self):
+        """Força a reconstrução no próximo uso"""
+        with self._lock:
+            self._total = None
+
+    def ultima_acao(self, tipo_equipamento, id_equipamento: int) -> Optional[int]:
+        """doc_id da ação mais recente do equipamento"""
+        with self._lock:
+            self._validar()
+            posicao = self._ultima_acao.get((_valor(tipo_equipamento), id_equipamento))
+            return posicao[1] if posicao else None
+
+    def ultima_retirada_reparo(self, tipo_equipamento, id_equipamento: int, tipo_acao) -> Optional[Tuple[int, object]]:
+        """(doc_id, id_funcionario) da última retirada do equipamento para reparo"""
+        with self._lock:
+            self._validar()
+            chave = (_valor(tipo_equipamento), id_equipamento, _valor(tipo_acao))
+            ultima = self._ultima_retirada_reparo.get(chave)
+            return (ultima[0][1], ultima[1]) if ultima else None
+
+    def consultar(
+        self,
+        filtros: Dict[str, object],
+        inicio: Optional[str] = None,
+        fim: Optional[str] = None,
+        apos: Optional[Posicao] = None,
+        decrescente: bool = False,
+    ) -> Iterator[Tuple[int, dict]]:
+        """
+        Percorre, na ordem de data_hora, os registros que atendem aos filtros.
+
+        Args:
+            filtros: campo -> valor exigido (igualdade)
+            inicio, fim: limites inclusivos de data_hora, já em ``chave_data_hora``
+            apos: última posição já entregue (keyset); a listagem continua depois dela
+            decrescente: do mais recente para o mais antigo
+
+        Yields:
+            Pares (doc_id, documento)
+        """
+        filtros = {campo: _valor(v) for campo, v in filtros.items() if v is not None}
+        tabela = self._tabela
+        while True:
+            # Copia um lote por vez e retoma pela última posição vista (keyset),
+            # então o custo acompanha o que o chamador consome e inserções
+            # concorrentes não deslocam a iteração
+            with self._lock:
+                self._validar()
+                posicoes, cobertos = self._escolher_indice(filtros)
+
+                baixo = bisect.bisect_left(posicoes, (inicio,)) if inicio else 0
+                alto = bisect.bisect_right(posicoes, (fim, math.inf)) if fim else len(posicoes)
+                if apos is not None:
+                    if decrescente:
+                        alto = min(alto, bisect.bisect_left(posicoes, apos))
+                    else:
+                        baixo = max(baixo, bisect.bisect_right(posicoes, apos))
+
+                if decrescente:
+                    lote = posicoes[max(baixo, alto - TAMANHO_LOTE):alto][::-1]
+                else:
+                    lote = posicoes[baixo:min(alto, baixo + TAMANHO_LOTE)]
+
+            if not lote:
+                return
+
+            restantes = {c: v for c, v in filtros.items() if c not in cobertos}
+            for posicao in lote:
+                doc = tabela.get(doc_id=posicao[1])
+                if doc is None:
+                    continue
+                if all(_valor(doc.get(c)) == v for c, v in restantes.items()):
+                    yield posicao[1], doc
+            apos = lote[-1]
+
+    def _escolher_indice(self, filtros: Dict[str, object]) -> Tuple[List[Posicao], Tuple[str, ...]]:
+        """Entre os índices cobertos pelos filtros, usa o de menos posições"""
+        melhor, cobertos = self._todos, ()
+        for nome, campos in INDICES.items():
+            if not all(c in filtros for c in campos):
+                continue
+            posicoes = self._indices[nome].get(tuple(filtros[c] for c in campos), [])
+            if len(posicoes) < len(melhor) or not cobertos:
+                melhor, cobertos = posicoes, campos
+        return melhor, cobertos
+
+    def _validar(self):
+        if not self._atual():
+            self._reconstruir()
+
+    def _reconstruir(self):
+        self._geracao = getattr(self._db, 'geracao', 0)
+        self._todos = []
+        self._indices = {nome: {} for nome in INDICES}
+        self._ultima_acao = {}
+        self._ultima_retirada_reparo = {}
+        total = 0
+        for doc in self._tabela.all():
+            self._adicionar(doc.doc_id, doc, ordenado=False)
+            total += 1
+        self._todos.sort()
+        for chaves in self._indices.values():
+            for posicoes in chaves.values():
+                posicoes.sort()
+        self._total = total
+
+    def _adicionar(self, doc_id: int, registro: dict, ordenado: bool = True):
+        posicao = (chave_data_hora(registro.get('data_hora')), doc_id)
+        inserir = bisect.insort if ordenado else list.append
+        inserir(self._todos, posicao)
+        for nome, campos in INDICES.items():
+            chave = tuple(_valor(registro.get(c)) for c in campos)
+            inserir(self._indices[nome].setdefault(chave, []), posicao)
+
+        equipamento = (_valor(registro.get('tipo_equipamento')), registro.get('id_equipamento'))
+        if posicao > self._ultima_acao.get(equipamento, ('', 0)):
+            self._ultima_acao[equipamento] = posicao
+
+        tipo_acao = _valor(registro.get('tipo_acao')) or ''
+        if tipo_acao.startswith('RETIRAR_') and registro.get('status_destino') == 'EM_REPARO' and posicao[0]:
+            chave = equipamento + (tipo_acao,)
+            atual = self._ultima_retirada_reparo.get(chave)
+            if atual is None or posicao > atual[0]:
+                self._ultima_retirada_reparo[chave] = (posicao, registro.get('id_funcionario'))
+
+
+_registro: "weakref.WeakKeyDictionary[Database, IndicesAuditoria]" = weakref.WeakKeyDictionary()
+_registro_lock = threading.Lock()
+
+
+def indices_auditoria_de(db: Database) -> IndicesAuditoria:
+    """Retorna os índices de auditoria compartilhados por todos os repositórios do banco"""
+    with _registro_lock:
+        indices = _registro.get(db)
+        if indices is None:
+            indices = IndicesAuditoria(db)
+            _registro[db] = indices
+        return indices
@@ -6,6 +6,9 @@ Dados conforme especificação dos testes automatizados do Postman.
 from datetime import datetime
 from models.bicicleta_model import StatusBicicleta
 from models.tranca_model import StatusTranca
+from database.indices_auditoria import indices_auditoria_de
+from database.disponibilidade_totens import disponibilidade_de
+from database.relacao_tranca_totem import relacao_tranca_totem_de
 
 
 # Constante para localização padrão
@@ -151,7 +154,7 @@ AUDITORIAS_INICIAIS = [
         "id_equipamento": 4,
         "numero_equipamento": "12345",
         "id_funcionario": 1,
-        "data_hora": "2024-01-15T10:30:00Z",
+        "data_hora": "2024-01-15T10:30:00+00:00",
         "status_origem": "DISPONIVEL",
         "status_destino": "EM_REPARO",
         "detalhes": {
@@ -166,7 +169,7 @@ AUDITORIAS_INICIAIS = [
         "id_equipamento": 5,
         "numero_equipamento": "12345",
         "id_funcionario": 1,
-        "data_hora": "2024-01-15T11:00:00Z",
+        "data_hora": "2024-01-15T11:00:00+00:00",
         "status_origem": "DISPONIVEL",
         "status_destino": "EM_REPARO",
         "detalhes": {
@@ -183,6 +186,9 @@ def init_db(db_instance):
     """
     # Trunca todas as tabelas
     db_instance.truncate_all()
+    indices_auditoria_de(db_instance).descartar()
+    disponibilidade_de(db_instance).descartar()
+    relacao_tranca_totem_de(db_instance).descartar()
     
     # Insere dados iniciais
     bicicletas_table = db_instance.get_table('bicicletas')
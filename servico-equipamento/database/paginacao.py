@@ -0,0 +1,109 @@
+"""
+Paginação por cursor sobre tabelas do TinyDB.
+
+As páginas seguem a ordem dos doc_ids. O cursor é opaco para o cliente
+(base64 do último doc_id entregue) e a próxima página é lida a partir dele
+com uma busca binária nos doc_ids ordenados, sem materializar a tabela.
+
+A lista ordenada de doc_ids fica guardada por tabela e só é refeita quando a
+tabela muda: o TinyDB troca o dict da tabela a cada escrita, então a
+identidade do dict lido indica se a lista ainda vale.
+"""
+
+import base64
+import binascii
+import bisect
+import json
+import weakref
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from tinydb.table import Document, Table
+
+
+class CursorInvalido(ValueError):
+    """Cursor de paginação que não foi gerado por esta API"""
+
+
+def _codificar(dados: dict) -> str:
+    conteudo = json.dumps(dados, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(conteudo).decode().rstrip("=")
+
+
+def _decodificar(cursor: str) -> dict:
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        dados = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+    except (ValueError, TypeError, binascii.Error):
+        raise CursorInvalido(cursor)
+    if not isinstance(dados, dict):
+        raise CursorInvalido(cursor)
+    return dados
+
+
+def codificar_cursor(doc_id: int) -> str:
+    """Gera o cursor opaco que aponta para depois do doc_id informado"""
+    return _codificar({"d": doc_id})
+
+
+def decodificar_cursor(cursor: Optional[str]) -> int:
+    """Converte o cursor no doc_id a partir do qual a listagem continua (0 = início)"""
+    if not cursor:
+        return 0
+    doc_id = _decodificar(cursor).get("d")
+    if not isinstance(doc_id, int) or doc_id < 0:
+        raise CursorInvalido(cursor)
+    return doc_id
+
+
+def codificar_cursor_chave(chave: str, doc_id: int) -> str:
+    """Cursor para listagens ordenadas por (chave, doc_id), como data_hora das auditorias"""
+    return _codificar({"k": chave, "d": doc_id})
+
+
+def decodificar_cursor_chave(cursor: str) -> Tuple[str, int]:
+    """Converte o cursor de keyset na última posição (chave, doc_id) entregue"""
+    dados = _decodificar(cursor)
+    chave, doc_id = dados.get("k"), dados.get("d")
+    if not isinstance(chave, str) or not isinstance(doc_id, int):
+        raise CursorInvalido(cursor)
+    return chave, doc_id
+
+
+# Por tabela: o dict lido da última vez e seus doc_ids ordenados
+_ids_ordenados: "weakref.WeakKeyDictionary[Table, Tuple[Dict[str, dict], List[int]]]" = weakref.WeakKeyDictionary()
+
+
+def _ler(table: Table) -> Tuple[Dict[str, dict], List[int]]:
+    """Documentos crus da tabela e a lista ordenada dos seus doc_ids"""
+    dados = (table.storage.read() or {}).get(table.name) or {}
+    guardado = _ids_ordenados.get(table)
+    if guardado is None or guardado[0] is not dados:
+        guardado = (dados, sorted(map(int, dados)))
+        _ids_ordenados[table] = guardado
+    return guardado
+
+
+def iterar_documentos(table: Table, apos: int = 0) -> Iterator[Document]:
+    """
+    Percorre os documentos da tabela com doc_id maior que ``apos``, em ordem.
+
+    Os documentos são lidos um a um, então nenhuma lista com a tabela inteira
+    é montada; o início é achado por busca binária, então o custo de uma
+    página não depende de quantos IDs foram removidos antes dela.
+    """
+    dados, ids = _ler(table)
+    for posicao in range(bisect.bisect_right(ids, apos), len(ids)):
+        doc_id = ids[posicao]
+        raw = dados.get(str(doc_id))
+        if raw is not None:
+            yield Document(raw, doc_id)
+
+
+def paginar(table: Table, limite: int, cursor: Optional[str]) -> Tuple[List[Document], Optional[str]]:
+    """Retorna os documentos de uma página e o cursor da próxima (None na última)"""
+    docs: List[Document] = []
+    for doc in iterar_documentos(table, decodificar_cursor(cursor)):
+        if len(docs) == limite:
+            return docs, codificar_cursor(docs[-1].doc_id)
+        docs.append(doc)
+    return docs, None
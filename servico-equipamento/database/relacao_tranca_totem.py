@@ -0,0 +1,172 @@
+"""
+Índice em memória da relação entre trancas e totens.
+
+A associação de uma tranca a um totem fica gravada em dois lugares: no campo
+``totem`` da tranca e na tabela ``tranca_totem`` (mantida por compatibilidade).
+Em vez de consultar as duas fontes e juntar os resultados a cada leitura, o
+índice guarda ``totem -> trancas`` e ``tranca -> totem`` e é atualizado pelos
+repositórios a cada associação, desassociação e remoção.
+
+Na montagem do índice as duas fontes são reconciliadas no próprio banco: o
+campo ``totem`` prevalece, trancas ligadas só pela tabela de relacionamento
+recebem o campo, e a tabela passa a ter exatamente uma linha por tranca
+associada (linhas repetidas, divergentes ou de trancas removidas são
+apagadas). Num banco já reconciliado a montagem só lê as tabelas.
+
+O índice é montado de novo quando o banco é restaurado ou reaberto
+(``Database.geracao`` muda em ``truncate_all()``, ``reset()``, ``close()`` e
+quando um ``transacao()`` é desfeito).
+Gravações por fora dos repositórios só são percebidas se mudarem a quantidade
+de linhas da tabela de relacionamento; quem as fizer deve chamar
+``descartar()``.
+"""
+
+import threading
+import weakref
+from contextlib import ExitStack
+from typing import Dict, Iterable, List, Optional, Set
+
+from database.database import Database, transacao
+
+TABELA_TRANCAS = 'trancas'
+TABELA_TRANCA_TOTEM = 'tranca_totem'
+
+
+class RelacaoTrancaTotem:
+    """Associações tranca -> totem de um banco, nos dois sentidos"""
+
+    def __init__(self, db: Database):
+        self._db = db
+        self._lock = threading.RLock()
+        self._construido = False
+        self._geracao: Optional[int] = None
+        self._totem_da_tranca: Dict[int, int] = {}
+        self._trancas_do_totem: Dict[int, Set[int]] = {}
+
+    def totem_de(self, tranca_id: int) -> Optional[int]:
+        """ID do totem da tranca (None se ela não estiver em nenhum)"""
+        with self._travar():
+            self._validar()
+            return self._totem_da_tranca.get(tranca_id)
+
+    def trancas_de(self, totem_id: int) -> List[int]:
+        """IDs das trancas do totem, em ordem crescente"""
+        with self._travar():
+            self._validar()
+            return sorted(self._trancas_do_totem.get(totem_id, ()))
+
+    def associar(self, tranca_ids: Iterable[int], totem_id: int):
+        """Registra trancas recém-associadas ao totem (saindo do totem anterior)"""
+        with self._lock:
+            if not self._construido:
+                return
+            for tranca_id in tranca_ids:
+                self._desassociar(tranca_id)
+                self._totem_da_tranca[tranca_id] = totem_id
+                self._trancas_do_totem.setdefault(totem_id, set()).add(tranca_id)
+
+    def desassociar(self, tranca_ids: Iterable[int]):
+        """Registra trancas retiradas de seus totens ou removidas"""
+        with self._lock:
+            if not self._construido:
+                return
+            for tranca_id in tranca_ids:
+                self._desassociar(tranca_id)
+
+    def descartar(self):
+        """Força a reconstrução na próxima consulta"""
+        with self._lock:
+            self._construido = False
+
+    def _travar(self) -> ExitStack:
+        """
+        Lock do storage antes do lock do índice: a reconstrução grava dentro de
+        ``transacao()``, e quem está numa transação chama ``associar()``.
+        """
+        pilha = ExitStack()
+        storage = getattr(getattr(self._db, 'db', None), 'storage', None)
+        if hasattr(storage, 'travar'):
+            pilha.enter_context(storage.travar())
+        pilha.enter_context(self._lock)
+        return pilha
+
+    def _desassociar(self, tranca_id: int):
+        totem_id = self._totem_da_tranca.pop(tranca_id, None)
+        if totem_id is None:
+            return
+        trancas = self._trancas_do_totem[totem_id]
+        trancas.discard(tranca_id)
+        if not trancas:
+            del self._trancas_do_totem[totem_id]
+
+    def _validar(self):
+        if (
+            not self._construido
+            or self._geracao != getattr(self._db, 'geracao', 0)
+            or len(self._totem_da_tranca) != len(self._db.get_table(TABELA_TRANCA_TOTEM))
+        ):
+            self._reconstruir()
+
+    def _reconstruir(self):
+        self._geracao = getattr(self._db, 'geracao', 0)
+        trancas = self._db.get_table(TABELA_TRANCAS)
+        relacoes = self._db.get_table(TABELA_TRANCA_TOTEM)
+        linhas = relacoes.all()
+
+        pela_tabela: Dict[int, int] = {}
+        for rel in linhas:
+            pela_tabela.setdefault(rel['idTranca'], rel['idTotem'])
+
+        totem_da_tranca: Dict[int, int] = {}
+        sem_campo: List[int] = []
+        for doc in trancas.all():
+            totem_id = doc.get('totem')
+            if totem_id is None and doc['id'] in pela_tabela:
+                totem_id = pela_tabela[doc['id']]
+                sem_campo.append(doc.doc_id)
+            if totem_id is not None:
+                totem_da_tranca[doc['id']] = totem_id
+
+        # Mantém a primeira linha que bate com a associação de cada tranca
+        faltando = dict(totem_da_tranca)
+        sobrando: List[int] = []
+        for rel in linhas:
+            if faltando.get(rel['idTranca']) == rel['idTotem']:
+                del faltando[rel['idTranca']]
+            else:
+                sobrando.append(rel.doc_id)
+
+        if sem_campo or sobrando or faltando:
+            def preencher(doc):
+                doc['totem'] = pela_tabela[doc['id']]
+
+            with transacao(self._db):
+                if sem_campo:
+                    trancas.update(preencher, doc_ids=sem_campo)
+                if sobrando:
+                    relacoes.remove(doc_ids=sobrando)
+                if faltando:
+                    relacoes.insert_multiple(
+                        {'idTranca': tranca_id, 'idTotem': totem_id} for tranca_id, totem_id in faltando.items()
+                    )
+
+        self._totem_da_tranca = {}
+        self._trancas_do_totem = {}
+        for tranca_id, totem_id in totem_da_tranca.items():
+            self._totem_da_tranca[tranca_id] = totem_id
+            self._trancas_do_totem.setdefault(totem_id, set()).add(tranca_id)
+        self._construido = True
+
+
+_registro: "weakref.WeakKeyDictionary[Database, RelacaoTrancaTotem]" = weakref.WeakKeyDictionary()
+_registro_lock = threading.Lock()
+
+
+def relacao_tranca_totem_de(db: Database) -> RelacaoTrancaTotem:
+    """Retorna o índice tranca-totem do banco (compartilhado entre repositórios)"""
+    with _registro_lock:
+        relacao = _registro.get(db)
+        if relacao is None:
+            relacao = RelacaoTrancaTotem(db)
+            _registro[db] = relacao
+        return relacao
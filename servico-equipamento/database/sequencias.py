@@ -0,0 +1,157 @@
+"""
+Sequências de IDs por tabela.
+
+Em vez de calcular ``max(id) + 1`` varrendo a tabela a cada inserção, cada
+tabela tem um contador guardado na tabela ``_sequencias`` do próprio banco.
+Alocar um ID custa uma leitura e uma escrita de um único documento, feitas
+sob um lock, então duas requisições simultâneas nunca recebem o mesmo valor.
+
+Se o contador de uma tabela não existir (banco antigo, tabela truncada ou
+restaurada), ele é ressemeado a partir do maior valor já gravado na tabela.
+
+Num storage que reescreve o arquivo inteiro a cada escrita (``JSONStorage``
+sem ``agrupar()``), gravar o contador dobraria o custo de cada inserção.
+Nesse caso o contador fica só em memória, semeado uma vez a partir do maior
+valor da tabela: a própria linha gravada com o ID é o que o persiste.
+``descartar()`` faz os contadores serem relidos (ex.: depois de um reset).
+"""
+
+import re
+import threading
+import weakref
+from contextlib import ExitStack
+from typing import Dict
+
+from tinydb.storages import JSONStorage
+
+from database.database import Database
+
+TABELA_SEQUENCIAS = '_sequencias'
+
+
+def _numero(valor) -> int:
+    """Converte um ID gravado (int ou string como "12" / "F012") para inteiro"""
+    if isinstance(valor, int):
+        return valor
+    digitos = re.sub(r'\D', '', str(valor or ''))
+    return int(digitos) if digitos else 0
+
+
+class Sequencias:
+    """Contadores persistentes de IDs das tabelas de um banco"""
+
+    def __init__(self, db: Database):
+        self._db = db
+        self._lock = threading.Lock()
+        # doc_id do contador de cada tabela dentro de _sequencias
+        self._doc_ids: Dict[str, int] = {}
+        # Último ID alocado por tabela, quando o contador fica só em memória
+        self._valores: Dict[str, int] = {}
+
+    @property
+    def _tabela(self):
+        return self._db.get_table(TABELA_SEQUENCIAS)
+
+    def proximo(self, tabela: str, campo: str = 'id', quantidade: int = 1) -> int:
+        """
+        Reserva ``quantidade`` IDs consecutivos para a tabela.
+
+        Returns:
+            O primeiro ID reservado.
+        """
+        with self._travar():
+            if self._em_memoria():
+                atual = self._valores.get(tabela)
+                if atual is None:
+                    atual = self._maior(tabela, campo)
+                self._valores[tabela] = atual + quantidade
+                return atual + 1
+
+            doc = self._contador(tabela)
+            if doc is None:
+                doc = self._ressemear(tabela, campo)
+
+            atual = doc['valor']
+            self._tabela.update({'valor': atual + quantidade}, doc_ids=[doc.doc_id])
+            return atual + 1
+
+    def ressemear(self, tabela: str, campo: str = 'id') -> int:
+        """
+        Recalcula o contador da tabela a partir dos dados existentes.
+
+        Returns:
+            O maior ID encontrado (o próximo alocado será esse valor + 1).
+        """
+        with self._travar():
+            if self._em_memoria():
+                self._valores[tabela] = self._maior(tabela, campo)
+                return self._valores[tabela]
+            return self._ressemear(tabela, campo)['valor']
+
+    def descartar(self):
+        """Esquece os contadores guardados em memória; a próxima alocação os relê"""
+        with self._lock:
+            self._valores.clear()
+            self._doc_ids.clear()
+
+    def _em_memoria(self) -> bool:
+        """Se o storage reescreve o arquivo inteiro a cada escrita"""
+        storage = getattr(getattr(self._db, 'db', self._db), 'storage', None)
+        return isinstance(storage, JSONStorage) and not hasattr(storage, 'agrupar')
+
+    def _travar(self) -> ExitStack:
+        """
+        Lock do storage (quando ele agrupa escritas) antes do lock das
+        sequências, na mesma ordem usada por ``transacao()`` ao desfazer.
+        """
+        pilha = ExitStack()
+        storage = getattr(getattr(self._db, 'db', self._db), 'storage', None)
+        agrupar = getattr(storage, 'agrupar', None)
+        if agrupar is not None:
+            pilha.enter_context(agrupar())
+        pilha.enter_context(self._lock)
+        return pilha
+
+    def _contador(self, tabela: str):
+        doc_id = self._doc_ids.get(tabela)
+        if doc_id is not None:
+            doc = self._tabela.get(doc_id=doc_id)
+            # A tabela de sequências pode ter sido truncada e o doc_id reaproveitado
+            if doc is not None and doc.get('tabela') == tabela:
+                return doc
+
+        for doc in self._tabela.all():
+            if doc.get('tabela') == tabela:
+                self._doc_ids[tabela] = doc.doc_id
+                return doc
+        return None
+
+    def _maior(self, tabela: str, campo: str) -> int:
+        return max((_numero(d.get(campo)) for d in self._db.get_table(tabela).all()), default=0)
+
+    def _ressemear(self, tabela: str, campo: str):
+        maior = self._maior(tabela, campo)
+
+        doc = self._contador(tabela)
+        if doc is None:
+            doc_id = self._tabela.insert({'tabela': tabela, 'valor': maior})
+        else:
+            doc_id = doc.doc_id
+            self._tabela.update({'valor': maior}, doc_ids=[doc_id])
+
+        self._doc_ids[tabela] = doc_id
+        return self._tabela.get(doc_id=doc_id)
+
+
+_registro: "weakref.WeakKeyDictionary[Database, Sequencias]" = weakref.WeakKeyDictionary()
+_registro_lock = threading.Lock()
+
+
+def sequencias_de(db: Database) -> Sequencias:
+    """Retorna as sequências do banco (uma instância por banco, compartilhada entre repositórios)"""
+    with _registro_lock:
+        sequencias = _registro.get(db)
+        if sequencias is None:
+            sequencias = Sequencias(db)
+            _registro[db] = sequencias
+        return sequencias
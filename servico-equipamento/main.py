@@ -4,16 +4,24 @@ from routers.admin import router as admin_router
 from routers.bicicleta import router as bicicleta_router
 from routers.totem import router as totem_router
 from routers.tranca import router as tranca_router
+from routers.auditoria import router as auditoria_router
 from database.database import get_db
 from database.init_data import init_db
+from utils.resposta_json import classe_resposta_json
+from utils.metricas import instalar_metricas
 
 app = FastAPI(
     title="Serviço de Equipamentos",
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    # JSON_RAPIDO=1 serializa as respostas pelo pydantic-core (mesmo formato)
+    default_response_class=classe_resposta_json(),
 )
 
+# GET /metrics no formato do Prometheus (METRICAS=0 desliga)
+instalar_metricas(app)
+
 # Inicializa o banco de dados na primeira execução
 @app.on_event("startup")
 def startup_event():
@@ -25,6 +33,12 @@ def startup_event():
         init_db(db)
         print("✓ Banco de dados inicializado com dados padrão")
 
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Grava em disco as alterações pendentes antes de encerrar"""
+    get_db().close()
+
 # Registra o endpoint de status
 app.include_router(status_router)
 # Registra o endpoint de admin
@@ -35,6 +49,8 @@ app.include_router(bicicleta_router)
 app.include_router(totem_router)
 # Registra os endpoints de trancas
 app.include_router(tranca_router)
+# Registra a consulta de auditoria
+app.include_router(auditoria_router)
 
 # Health-check simples (opcional)
 @app.get("/health")
@@ -2,7 +2,7 @@
 
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 
 
@@ -34,7 +34,9 @@ class RegistroAuditoria(BaseModel):
     id_totem: Optional[int] = Field(None, description="ID do totem relacionado (para trancas)")
     status_destino: Optional[str] = Field(None, description="Status de destino (APOSENTADA, EM_REPARO, DISPONIVEL, etc)")
     detalhes: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Detalhes adicionais da operação")
-    data_hora: datetime = Field(default_factory=datetime.now, description="Data e hora da ação")
+    data_hora: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc), description="Data e hora da ação (UTC)"
+    )
 
 
 class RegistroAuditoriaCompleto(RegistroAuditoria):
@@ -57,6 +59,6 @@ class RegistroAuditoriaCompleto(RegistroAuditoria):
                     "motivo": "Manutenção preventiva",
                     "observacoes": "Freio necessita ajuste"
                 },
-                "data_hora": "2024-01-15T14:30:00"
+                "data_hora": "2024-01-15T14:30:00+00:00"
             }
         }
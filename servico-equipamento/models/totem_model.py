@@ -1,5 +1,10 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
+
+from models.erro_model import Erro
+
+# Máximo de pares (tranca, bicicleta) por chamada ao /totem/{id}/integrarNaRede
+INTEGRACAO_MAXIMO_ITENS = 100
 
 
 class NovoTotem(BaseModel):
@@ -20,3 +25,51 @@ class Totem(NovoTotem):
                 "descricao": "Totem na Praça Central"
             }
         }
+
+
+class ParIntegracao(BaseModel):
+    """Tranca a integrar no totem e, opcionalmente, a bicicleta que fica nela"""
+    id_tranca: int = Field(..., alias='idTranca', description="ID da tranca")
+    id_bicicleta: Optional[int] = Field(None, alias='idBicicleta', description="ID da bicicleta (opcional)")
+
+    class Config:
+        populate_by_name = True
+
+
+class IntegrarTotemRequest(BaseModel):
+    """Integração de várias trancas (e bicicletas) num totem de uma vez"""
+    id_funcionario: int = Field(..., alias='idFuncionario', description="ID do funcionário responsável")
+    itens: List[ParIntegracao] = Field(
+        ..., min_length=1, max_length=INTEGRACAO_MAXIMO_ITENS, description="Pares (tranca, bicicleta) a integrar"
+    )
+
+    class Config:
+        populate_by_name = True
+
+
+class ResultadoIntegracaoPar(BaseModel):
+    """Resultado da integração de um par (tranca, bicicleta)"""
+    idTranca: int = Field(..., description="ID da tranca")
+    idBicicleta: Optional[int] = Field(None, description="ID da bicicleta")
+    integrado: bool = Field(..., description="Se o par foi integrado")
+    erro: Optional[Erro] = Field(None, description="Motivo de o par não ter sido integrado")
+
+
+class ResultadoIntegracaoTotem(BaseModel):
+    """Resumo da integração em lote de um totem"""
+    idTotem: int = Field(..., description="ID do totem")
+    idFuncionario: int = Field(..., description="ID do funcionário responsável")
+    integrados: int = Field(..., description="Quantidade de pares integrados")
+    resultados: List[ResultadoIntegracaoPar] = Field(..., description="Um resultado por par, na ordem recebida")
+    emailEnviado: bool = Field(..., description="Se a notificação de resumo foi enviada")
+
+
+class DisponibilidadeTotem(BaseModel):
+    """Trancas livres, bicicletas disponíveis e equipamentos em reparo de um totem"""
+    idTotem: int = Field(..., description="ID do totem")
+    localizacao: str = Field(..., description="Coordenadas de localização do totem")
+    trancas: int = Field(0, description="Trancas no totem")
+    trancasLivres: int = Field(0, description="Trancas LIVRE")
+    bicicletasDisponiveis: int = Field(0, description="Trancas OCUPADA com bicicleta DISPONIVEL")
+    trancasEmReparo: int = Field(0, description="Trancas em reparo ou com reparo solicitado")
+    bicicletasEmReparo: int = Field(0, description="Bicicletas nas trancas do totem em reparo ou com reparo solicitado")
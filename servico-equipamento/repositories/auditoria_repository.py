@@ -1,10 +1,12 @@
 """Repositório para gerenciar registros de auditoria no banco de dados."""
 
 import logging
-from typing import List, Optional
-from datetime import datetime
-from tinydb import Query
+from typing import List, Optional, Tuple
+from datetime import datetime, timezone
+from itertools import islice
 
+from database.indices_auditoria import chave_data_hora, indices_auditoria_de
+from database.paginacao import codificar_cursor_chave, decodificar_cursor_chave
 from models.auditoria_model import RegistroAuditoria, RegistroAuditoriaCompleto, TipoAcao, TipoEquipamento
 
 logger = logging.getLogger(__name__)
@@ -24,6 +26,7 @@ class AuditoriaRepository:
         """
         self.db = db
         self.table = db.get_table(self.TABLE_NAME)
+        self.indices = indices_auditoria_de(db)
     
     def create(self, registro: RegistroAuditoria) -> RegistroAuditoriaCompleto:
         """
@@ -35,15 +38,12 @@ class AuditoriaRepository:
         Returns:
             Registro de auditoria criado com ID
         """
-        # Converte para dicionário
-        registro_dict = registro.model_dump()
-        
-        # Converte datetime para string ISO format
-        if isinstance(registro_dict.get('data_hora'), datetime):
-            registro_dict['data_hora'] = registro_dict['data_hora'].isoformat()
+        # Converte para dicionário, com data_hora em ISO 8601 UTC
+        registro_dict = self._dict_gravado(registro)
         
         # Insere no banco de dados
         registro_id = self.table.insert(registro_dict)
+        self.indices.registrar(registro_id, registro_dict)
         
         logger.info(
             f"Registro de auditoria criado: ID={registro_id}, "
@@ -55,6 +55,24 @@ class AuditoriaRepository:
         # Retorna o registro completo
         return RegistroAuditoriaCompleto(id=registro_id, **registro_dict)
     
+    def create_many(self, registros: List[RegistroAuditoria]) -> List[RegistroAuditoriaCompleto]:
+        """
+        Cria vários registros de auditoria numa única inserção.
+        
+        Args:
+            registros: Dados dos registros de auditoria
+            
+        Returns:
+            Registros criados com ID, na mesma ordem
+        """
+        dicts = [self._dict_gravado(registro) for registro in registros]
+        
+        registro_ids = self.table.insert_multiple(dicts)
+        self.indices.registrar_varios(list(zip(registro_ids, dicts)))
+        
+        logger.info(f"{len(registro_ids)} registros de auditoria criados em lote")
+        return [RegistroAuditoriaCompleto(id=registro_id, **d) for registro_id, d in zip(registro_ids, dicts)]
+    
     def get_by_id(self, registro_id: int) -> Optional[RegistroAuditoriaCompleto]:
         """
         Busca um registro de auditoria por ID.
@@ -94,15 +112,7 @@ class AuditoriaRepository:
         Returns:
             Lista de registros do funcionário
         """
-        Auditoria = Query()
-        resultados = self.table.search(Auditoria.id_funcionario == id_funcionario)
-        
-        registros = []
-        for doc in resultados:
-            registros.append(
-                RegistroAuditoriaCompleto(id=doc.doc_id, **doc)
-            )
-        return registros
+        return self._buscar({'id_funcionario': id_funcionario})
     
     def get_by_equipamento(
         self, 
@@ -119,18 +129,10 @@ class AuditoriaRepository:
         Returns:
             Lista de registros do equipamento
         """
-        Auditoria = Query()
-        resultados = self.table.search(
-            (Auditoria.tipo_equipamento == tipo_equipamento.value) & 
-            (Auditoria.id_equipamento == id_equipamento)
-        )
-        
-        registros = []
-        for doc in resultados:
-            registros.append(
-                RegistroAuditoriaCompleto(id=doc.doc_id, **doc)
-            )
-        return registros
+        return self._buscar({
+            'tipo_equipamento': tipo_equipamento,
+            'id_equipamento': id_equipamento
+        })
     
     def get_by_tipo_acao(self, tipo_acao: TipoAcao) -> List[RegistroAuditoriaCompleto]:
         """
@@ -142,15 +144,90 @@ class AuditoriaRepository:
         Returns:
             Lista de registros da ação
         """
-        Auditoria = Query()
-        resultados = self.table.search(Auditoria.tipo_acao == tipo_acao.value)
+        return self._buscar({'tipo_acao': tipo_acao})
+    
+    def consultar(
+        self,
+        id_funcionario: Optional[int] = None,
+        tipo_equipamento: Optional[TipoEquipamento] = None,
+        id_equipamento: Optional[int] = None,
+        tipo_acao: Optional[TipoAcao] = None,
+        inicio: Optional[datetime] = None,
+        fim: Optional[datetime] = None,
+        limite: int = 100,
+        cursor: Optional[str] = None,
+        decrescente: bool = True
+    ) -> Tuple[List[RegistroAuditoriaCompleto], Optional[str]]:
+        """
+        Consulta registros combinando filtros, ordenados por data_hora.
         
-        registros = []
-        for doc in resultados:
-            registros.append(
-                RegistroAuditoriaCompleto(id=doc.doc_id, **doc)
-            )
-        return registros
+        A paginação é por keyset: o cursor guarda a posição (data_hora, id)
+        do último registro entregue.
+        
+        Args:
+            id_funcionario, tipo_equipamento, id_equipamento, tipo_acao: filtros opcionais
+            inicio, fim: intervalo de data_hora (inclusivo)
+            limite: Tamanho da página
+            cursor: Cursor retornado pela página anterior
+            decrescente: Do mais recente para o mais antigo
+            
+        Returns:
+            Registros da página e cursor da próxima (None na última)
+            
+        Raises:
+            CursorInvalido: Se o cursor não foi gerado por esta consulta
+        """
+        filtros = {
+            'id_funcionario': id_funcionario,
+            'tipo_equipamento': tipo_equipamento,
+            'id_equipamento': id_equipamento,
+            'tipo_acao': tipo_acao,
+        }
+        resultados = list(islice(
+            self.indices.consultar(
+                filtros,
+                inicio=self._data_iso(inicio),
+                fim=self._data_iso(fim),
+                apos=decodificar_cursor_chave(cursor) if cursor else None,
+                decrescente=decrescente
+            ),
+            limite + 1
+        ))
+        
+        proximo = None
+        if len(resultados) > limite:
+            resultados = resultados[:limite]
+            doc_id, doc = resultados[-1]
+            proximo = codificar_cursor_chave(chave_data_hora(doc.get('data_hora')), doc_id)
+        
+        return [self._completo(doc_id, doc) for doc_id, doc in resultados], proximo
+    
+    def _buscar(self, filtros: dict) -> List[RegistroAuditoriaCompleto]:
+        """Todos os registros que atendem aos filtros, em ordem de data_hora"""
+        return [self._completo(doc_id, doc) for doc_id, doc in self.indices.consultar(filtros)]
+    
+    @staticmethod
+    def _completo(doc_id: int, doc: dict) -> RegistroAuditoriaCompleto:
+        # Registros dos dados iniciais também gravam um campo "id"; vale o doc_id
+        return RegistroAuditoriaCompleto(**{**doc, 'id': doc_id})
+    
+    @staticmethod
+    def _data_iso(data: Optional[datetime]) -> Optional[str]:
+        """Limite de data no formato das posições dos índices"""
+        if data is None:
+            return None
+        return chave_data_hora(data)
+    
+    @staticmethod
+    def _dict_gravado(registro: RegistroAuditoria) -> dict:
+        """Documento a gravar; data_hora sempre em UTC com fuso (sem fuso conta como UTC)"""
+        registro_dict = registro.model_dump()
+        data_hora = registro_dict.get('data_hora')
+        if isinstance(data_hora, datetime):
+            if data_hora.tzinfo is None:
+                data_hora = data_hora.replace(tzinfo=timezone.utc)
+            registro_dict['data_hora'] = data_hora.astimezone(timezone.utc).isoformat()
+        return registro_dict
     
     def get_ultimas_acoes_equipamento(
         self,
@@ -169,17 +246,16 @@ class AuditoriaRepository:
         Returns:
             Lista das últimas ações do equipamento
         """
-        registros = self.get_by_equipamento(tipo_equipamento, id_equipamento)
-        
-        # Ordena por data_hora decrescente
-        registros_ordenados = sorted(
-            registros,
-            key=lambda x: x.data_hora if isinstance(x.data_hora, datetime) 
-                         else datetime.fromisoformat(x.data_hora),
-            reverse=True
-        )
+        if limit == 1:
+            doc_id = self.indices.ultima_acao(tipo_equipamento, id_equipamento)
+            doc = self.table.get(doc_id=doc_id) if doc_id is not None else None
+            return [self._completo(doc_id, doc)] if doc is not None else []
         
-        return registros_ordenados[:limit]
+        filtros = {'tipo_equipamento': tipo_equipamento, 'id_equipamento': id_equipamento}
+        return [
+            self._completo(doc_id, doc)
+            for doc_id, doc in islice(self.indices.consultar(filtros, decrescente=True), limit)
+        ]
     
     def get_retiradas_em_reparo_por_funcionario(
         self,
@@ -197,25 +273,16 @@ class AuditoriaRepository:
         Returns:
             Lista de retiradas em reparo do funcionário
         """
-        Auditoria = Query()
-        
         if tipo_equipamento == TipoEquipamento.BICICLETA:
             tipo_acao = TipoAcao.RETIRAR_BICICLETA
         else:
             tipo_acao = TipoAcao.RETIRAR_TRANCA
         
-        resultados = self.table.search(
-            (Auditoria.id_funcionario == id_funcionario) &
-            (Auditoria.tipo_acao == tipo_acao.value) &
-            (Auditoria.status_destino == "EM_REPARO")
-        )
-        
-        registros = []
-        for doc in resultados:
-            registros.append(
-                RegistroAuditoriaCompleto(id=doc.doc_id, **doc)
-            )
-        return registros
+        return self._buscar({
+            'id_funcionario': id_funcionario,
+            'tipo_acao': tipo_acao,
+            'status_destino': "EM_REPARO"
+        })
     
     def verificar_reparador_original(
         self,
@@ -235,35 +302,15 @@ class AuditoriaRepository:
         Returns:
             True se o funcionário foi quem retirou, False caso contrário
         """
-        Auditoria = Query()
-        
         if tipo_equipamento == TipoEquipamento.BICICLETA:
             tipo_acao = TipoAcao.RETIRAR_BICICLETA
         else:
             tipo_acao = TipoAcao.RETIRAR_TRANCA
         
-        # Busca a última retirada em reparo deste equipamento
-        resultados = self.table.search(
-            (Auditoria.tipo_equipamento == tipo_equipamento.value) &
-            (Auditoria.id_equipamento == id_equipamento) &
-            (Auditoria.tipo_acao == tipo_acao.value) &
-            (Auditoria.status_destino == "EM_REPARO")
-        )
-        
-        if not resultados:
+        # Última retirada em reparo deste equipamento, mantida a cada create
+        ultima = self.indices.ultima_retirada_reparo(tipo_equipamento, id_equipamento, tipo_acao)
+        if ultima is None:
             return True  # Não há registro de retirada, permite a operação
         
-        # Filtra resultados válidos com data_hora
-        resultados_validos = [r for r in resultados if r.get('data_hora')]
-        
-        if not resultados_validos:
-            return True  # Não há registros válidos, permite a operação
-        
-        # Pega o registro mais recente
-        ultimo_registro = sorted(
-            resultados_validos,
-            key=lambda x: x.get('data_hora', ''),
-            reverse=True
-        )[0]
-        
-        return ultimo_registro.get('id_funcionario') == id_funcionario
+        _, id_funcionario_retirada = ultima
+        return id_funcionario_retirada == id_funcionario
@@ -2,9 +2,12 @@
 Repositório para operações CRUD de Bicicletas no banco de dados.
 """
 
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
 from tinydb import Query
 from database.database import Database
+from database.sequencias import sequencias_de
+from database.disponibilidade_totens import disponibilidade_de
+from database.paginacao import decodificar_cursor, iterar_documentos, paginar
 from models.bicicleta_model import Bicicleta, NovaBicicleta, StatusBicicleta
 
 
@@ -14,31 +17,77 @@ class BicicletaRepository:
     def __init__(self, db: Database):
         self.db = db
         self.table = db.get_table('bicicletas')
+        self.sequencias = sequencias_de(db)
+        self.disponibilidade = disponibilidade_de(db)
         self.query = Query()
     
     def create(self, bicicleta: NovaBicicleta) -> Bicicleta:
         """Cria uma nova bicicleta"""
-        # Gera um novo ID
-        all_bicicletas = self.table.all()
-        new_id = max([b['id'] for b in all_bicicletas], default=0) + 1
+        # Reserva o próximo ID da sequência da tabela
+        new_id = self.sequencias.proximo('bicicletas')
         
         bicicleta_data = bicicleta.model_dump()
         bicicleta_data['id'] = new_id
         bicicleta_data['status'] = bicicleta_data['status'].value if hasattr(bicicleta_data['status'], 'value') else bicicleta_data['status']
         
         self.table.insert(bicicleta_data)
+        self.disponibilidade.bicicletas_gravadas([bicicleta_data])
         return Bicicleta(**bicicleta_data)
     
+    def create_many(self, bicicletas: List[NovaBicicleta]) -> List[Bicicleta]:
+        """Cria várias bicicletas reservando os IDs de uma vez e gravando numa única inserção"""
+        if not bicicletas:
+            return []
+        primeiro_id = self.sequencias.proximo('bicicletas', quantidade=len(bicicletas))
+        
+        docs = []
+        for new_id, bicicleta in enumerate(bicicletas, start=primeiro_id):
+            bicicleta_data = bicicleta.model_dump(mode='json')
+            bicicleta_data['id'] = new_id
+            docs.append(bicicleta_data)
+        
+        self.table.insert_multiple(docs)
+        self.disponibilidade.bicicletas_gravadas(docs)
+        return [Bicicleta(**d) for d in docs]
+    
+    def numeros(self) -> Set[int]:
+        """Números já usados pelas bicicletas cadastradas"""
+        return {d.get('numero') for d in self.table.all()}
+    
     def get_by_id(self, bicicleta_id: int) -> Optional[Bicicleta]:
         """Busca uma bicicleta por ID"""
         result = self.table.get(self.query.id == bicicleta_id)
         return Bicicleta(**result) if result else None
     
+    def get_many(self, ids: Iterable[int]) -> List[Bicicleta]:
+        """
+        Busca várias bicicletas numa única passada pela tabela.
+        
+        Returns:
+            As bicicletas encontradas, na ordem dos IDs informados (IDs
+            inexistentes são ignorados e repetidos aparecem uma vez)
+        """
+        ordem = list(dict.fromkeys(ids))
+        if not ordem:
+            return []
+        por_id = {r['id']: r for r in self.table.search(self.query.id.one_of(set(ordem)))}
+        return [Bicicleta(**por_id[i]) for i in ordem if i in por_id]
+    
     def get_all(self) -> List[Bicicleta]:
         """Retorna todas as bicicletas"""
         results = self.table.all()
         return [Bicicleta(**r) for r in results]
     
+    def get_page(self, limite: int, cursor: Optional[str] = None) -> Tuple[List[Bicicleta], Optional[str]]:
+        """Retorna uma página de bicicletas e o cursor da próxima (None na última)"""
+        docs, proximo = paginar(self.table, limite, cursor)
+        return [Bicicleta(**d) for d in docs], proximo
+    
+    def iter_all(self, cursor: Optional[str] = None) -> Iterator[Bicicleta]:
+        """Gera as bicicletas uma a uma, a partir do cursor, sem montar a lista inteira"""
+        apos = decodificar_cursor(cursor)
+        return (Bicicleta(**d) for d in iterar_documentos(self.table, apos))
+    
     def update(self, bicicleta_id: int, bicicleta: NovaBicicleta) -> Optional[Bicicleta]:
         """Atualiza uma bicicleta existente"""
         if not self.table.get(self.query.id == bicicleta_id):
@@ -48,7 +97,7 @@ class BicicletaRepository:
         bicicleta_data['id'] = bicicleta_id
         bicicleta_data['status'] = bicicleta_data['status'].value if hasattr(bicicleta_data['status'], 'value') else bicicleta_data['status']
         
-        self.table.update(bicicleta_data, self.query.id == bicicleta_id)
+        self._gravadas(self.table.update(bicicleta_data, self.query.id == bicicleta_id))
         return Bicicleta(**bicicleta_data)
     
     def delete(self, bicicleta_id: int) -> bool:
@@ -57,6 +106,7 @@ class BicicletaRepository:
             return False
         
         self.table.remove(self.query.id == bicicleta_id)
+        self.disponibilidade.bicicleta_removida(bicicleta_id)
         return True
     
     def update_status(self, bicicleta_id: int, status: StatusBicicleta) -> Optional[Bicicleta]:
@@ -66,7 +116,20 @@ class BicicletaRepository:
             return None
         
         status_value = status.value if hasattr(status, 'value') else status
-        self.table.update({'status': status_value}, self.query.id == bicicleta_id)
+        docs = self._gravadas(self.table.update({'status': status_value}, self.query.id == bicicleta_id))
         
         # Retorna a bicicleta atualizada
-        return self.get_by_id(bicicleta_id)
+        return Bicicleta(**docs[0]) if docs else None
+    
+    def update_status_many(self, bicicleta_ids: List[int], status: StatusBicicleta) -> int:
+        """Atualiza o status de várias bicicletas numa única escrita; retorna quantas foram alteradas"""
+        if not bicicleta_ids:
+            return 0
+        status_value = status.value if hasattr(status, 'value') else status
+        return len(self._gravadas(self.table.update({'status': status_value}, self.query.id.one_of(bicicleta_ids))))
+    
+    def _gravadas(self, doc_ids: List[int]) -> List[dict]:
+        """Relê (por doc_id) as bicicletas recém-gravadas e atualiza os contadores dos totens"""
+        docs = [doc for doc in (self.table.get(doc_id=doc_id) for doc_id in doc_ids) if doc is not None]
+        self.disponibilidade.bicicletas_gravadas(docs)
+        return docs
@@ -2,10 +2,14 @@
 Repositório para operações CRUD de Totems no banco de dados.
 """
 
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 from tinydb import Query
-from database.database import Database
+from database.database import Database, transacao
+from database.sequencias import sequencias_de
+from database.relacao_tranca_totem import relacao_tranca_totem_de
+from database.paginacao import decodificar_cursor, iterar_documentos, paginar
 from models.totem_model import Totem, NovoTotem
+from repositories.tranca_repository import TrancaRepository
 
 
 class TotemRepository:
@@ -14,14 +18,14 @@ class TotemRepository:
     def __init__(self, db: Database):
         self.db = db
         self.table = db.get_table('totems')
-        self.tranca_totem_table = db.get_table('tranca_totem')
+        self.sequencias = sequencias_de(db)
+        self.relacao = relacao_tranca_totem_de(db)
         self.query = Query()
     
     def create(self, totem: NovoTotem) -> Totem:
         """Cria um novo totem"""
-        # Gera um novo ID
-        all_totems = self.table.all()
-        new_id = max([t['id'] for t in all_totems], default=0) + 1
+        # Reserva o próximo ID da sequência da tabela
+        new_id = self.sequencias.proximo('totems')
         
         totem_data = totem.model_dump()
         totem_data['id'] = new_id
@@ -39,6 +43,16 @@ class TotemRepository:
         results = self.table.all()
         return [Totem(**r) for r in results]
     
+    def get_page(self, limite: int, cursor: Optional[str] = None) -> Tuple[List[Totem], Optional[str]]:
+        """Retorna uma página de totems e o cursor da próxima (None na última)"""
+        docs, proximo = paginar(self.table, limite, cursor)
+        return [Totem(**d) for d in docs], proximo
+    
+    def iter_all(self, cursor: Optional[str] = None) -> Iterator[Totem]:
+        """Gera as totems uma a uma, a partir do cursor, sem montar a lista inteira"""
+        apos = decodificar_cursor(cursor)
+        return (Totem(**d) for d in iterar_documentos(self.table, apos))
+    
     def update(self, totem_id: int, totem: NovoTotem) -> Optional[Totem]:
         """Atualiza um totem existente"""
         if not self.table.get(self.query.id == totem_id):
@@ -55,25 +69,12 @@ class TotemRepository:
         if not self.table.get(self.query.id == totem_id):
             return False
         
-        # Remove também os relacionamentos com trancas
-        self.tranca_totem_table.remove(self.query.idTotem == totem_id)
-        
-        self.table.remove(self.query.id == totem_id)
+        # Remove também os relacionamentos com trancas (tabela e campo totem das trancas)
+        with transacao(self.db):
+            TrancaRepository(self.db).desassociar_do_totem(totem_id)
+            self.table.remove(self.query.id == totem_id)
         return True
     
     def get_trancas_ids(self, totem_id: int) -> List[int]:
-        """Retorna os IDs das trancas associadas ao totem"""
-        tranca_ids = set()
-        
-        # Busca via tabela de relacionamento
-        results = self.tranca_totem_table.search(self.query.idTotem == totem_id)
-        for r in results:
-            tranca_ids.add(r['idTranca'])
-        
-        # Também busca via campo direto na tabela de trancas
-        trancas_table = self.db.get_table('trancas')
-        trancas_diretas = trancas_table.search(self.query.totem == totem_id)
-        for t in trancas_diretas:
-            tranca_ids.add(t['id'])
-        
-        return list(tranca_ids)
+        """Retorna os IDs das trancas associadas ao totem, em ordem crescente"""
+        return self.relacao.trancas_de(totem_id)
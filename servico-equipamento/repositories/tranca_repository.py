@@ -2,9 +2,13 @@
 Repositório para operações CRUD de Trancas no banco de dados.
 """
 
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from tinydb import Query
 from database.database import Database
+from database.sequencias import sequencias_de
+from database.disponibilidade_totens import disponibilidade_de
+from database.relacao_tranca_totem import relacao_tranca_totem_de
+from database.paginacao import decodificar_cursor, iterar_documentos, paginar
 from models.tranca_model import Tranca, NovaTranca, StatusTranca
 
 
@@ -14,14 +18,16 @@ class TrancaRepository:
     def __init__(self, db: Database):
         self.db = db
         self.table = db.get_table('trancas')
+        self.sequencias = sequencias_de(db)
         self.tranca_totem_table = db.get_table('tranca_totem')
+        self.disponibilidade = disponibilidade_de(db)
+        self.relacao = relacao_tranca_totem_de(db)
         self.query = Query()
     
     def create(self, tranca: NovaTranca) -> Tranca:
         """Cria uma nova tranca"""
-        # Gera um novo ID
-        all_trancas = self.table.all()
-        new_id = max([t['id'] for t in all_trancas], default=0) + 1
+        # Reserva o próximo ID da sequência da tabela
+        new_id = self.sequencias.proximo('trancas')
         
         tranca_data = tranca.model_dump()
         tranca_data['id'] = new_id
@@ -30,18 +36,65 @@ class TrancaRepository:
         tranca_data['status'] = tranca_data['status'].value if hasattr(tranca_data['status'], 'value') else tranca_data['status']
         
         self.table.insert(tranca_data)
+        self.disponibilidade.trancas_gravadas([tranca_data])
         return Tranca(**tranca_data)
     
+    def create_many(self, trancas: List[NovaTranca]) -> List[Tranca]:
+        """Cria várias trancas reservando os IDs de uma vez e gravando numa única inserção"""
+        if not trancas:
+            return []
+        primeiro_id = self.sequencias.proximo('trancas', quantidade=len(trancas))
+        
+        docs = []
+        for new_id, tranca in enumerate(trancas, start=primeiro_id):
+            tranca_data = tranca.model_dump(mode='json')
+            tranca_data['id'] = new_id
+            tranca_data['bicicleta'] = None
+            tranca_data['totem'] = None
+            docs.append(tranca_data)
+        
+        self.table.insert_multiple(docs)
+        self.disponibilidade.trancas_gravadas(docs)
+        return [Tranca(**d) for d in docs]
+    
+    def numeros(self) -> Set[int]:
+        """Números já usados pelas trancas cadastradas"""
+        return {d.get('numero') for d in self.table.all()}
+    
     def get_by_id(self, tranca_id: int) -> Optional[Tranca]:
         """Busca uma tranca por ID"""
         result = self.table.get(self.query.id == tranca_id)
         return Tranca(**result) if result else None
     
+    def get_many(self, ids: Iterable[int]) -> List[Tranca]:
+        """
+        Busca várias trancas numa única passada pela tabela.
+        
+        Returns:
+            As trancas encontradas, na ordem dos IDs informados (IDs
+            inexistentes são ignorados e repetidos aparecem uma vez)
+        """
+        ordem = list(dict.fromkeys(ids))
+        if not ordem:
+            return []
+        por_id = {r['id']: r for r in self.table.search(self.query.id.one_of(set(ordem)))}
+        return [Tranca(**por_id[i]) for i in ordem if i in por_id]
+    
     def get_all(self) -> List[Tranca]:
         """Retorna todas as trancas"""
         results = self.table.all()
         return [Tranca(**r) for r in results]
     
+    def get_page(self, limite: int, cursor: Optional[str] = None) -> Tuple[List[Tranca], Optional[str]]:
+        """Retorna uma página de trancas e o cursor da próxima (None na última)"""
+        docs, proximo = paginar(self.table, limite, cursor)
+        return [Tranca(**d) for d in docs], proximo
+    
+    def iter_all(self, cursor: Optional[str] = None) -> Iterator[Tranca]:
+        """Gera as trancas uma a uma, a partir do cursor, sem montar a lista inteira"""
+        apos = decodificar_cursor(cursor)
+        return (Tranca(**d) for d in iterar_documentos(self.table, apos))
+    
     def update(self, tranca_id: int, tranca: NovaTranca) -> Optional[Tranca]:
         """Atualiza uma tranca existente"""
         existing = self.table.get(self.query.id == tranca_id)
@@ -54,7 +107,7 @@ class TrancaRepository:
         tranca_data['totem'] = existing.get('totem')  # Mantém o totem associado
         tranca_data['status'] = tranca_data['status'].value if hasattr(tranca_data['status'], 'value') else tranca_data['status']
         
-        self.table.update(tranca_data, self.query.id == tranca_id)
+        self._gravadas(self.table.update(tranca_data, self.query.id == tranca_id))
         return Tranca(**tranca_data)
     
     def delete(self, tranca_id: int) -> bool:
@@ -66,6 +119,8 @@ class TrancaRepository:
         self.tranca_totem_table.remove(self.query.idTranca == tranca_id)
         
         self.table.remove(self.query.id == tranca_id)
+        self.relacao.desassociar([tranca_id])
+        self.disponibilidade.tranca_removida(tranca_id)
         return True
     
     def update_status(self, tranca_id: int, status: StatusTranca) -> Optional[Tranca]:
@@ -75,9 +130,9 @@ class TrancaRepository:
             return None
         
         status_value = status.value if hasattr(status, 'value') else status
-        self.table.update({'status': status_value}, self.query.id == tranca_id)
+        docs = self._gravadas(self.table.update({'status': status_value}, self.query.id == tranca_id))
         
-        return self.get_by_id(tranca_id)
+        return Tranca(**docs[0]) if docs else None
     
     def associar_bicicleta(self, tranca_id: int, bicicleta_id: Optional[int]) -> Optional[Tranca]:
         """Associa ou desassocia uma bicicleta de uma tranca"""
@@ -85,8 +140,8 @@ class TrancaRepository:
         if not tranca:
             return None
         
-        self.table.update({'bicicleta': bicicleta_id}, self.query.id == tranca_id)
-        return self.get_by_id(tranca_id)
+        docs = self._gravadas(self.table.update({'bicicleta': bicicleta_id}, self.query.id == tranca_id))
+        return Tranca(**docs[0]) if docs else None
     
     def get_bicicleta_id(self, tranca_id: int) -> Optional[int]:
         """Retorna o ID da bicicleta associada à tranca"""
@@ -105,44 +160,75 @@ class TrancaRepository:
         })
         
         # Também atualiza o campo totem diretamente na tranca
-        self.table.update({'totem': totem_id}, self.query.id == tranca_id)
+        self._gravadas(self.table.update({'totem': totem_id}, self.query.id == tranca_id))
+        self.relacao.associar([tranca_id], totem_id)
         return True
     
+    def integrar_no_totem(self, totem_id: int, bicicletas: Dict[int, Optional[int]]) -> int:
+        """
+        Integra várias trancas a um totem numa única escrita por tabela.
+        
+        Cada tranca fica associada ao totem e à bicicleta indicada: OCUPADA se
+        recebeu bicicleta, LIVRE se não.
+        
+        Args:
+            totem_id: ID do totem
+            bicicletas: ID da tranca -> ID da bicicleta (ou None)
+            
+        Returns:
+            Quantidade de trancas atualizadas
+        """
+        if not bicicletas:
+            return 0
+        tranca_ids = list(bicicletas)
+        
+        def integrar(doc):
+            bicicleta_id = bicicletas[doc['id']]
+            doc['totem'] = totem_id
+            doc['bicicleta'] = bicicleta_id
+            doc['status'] = (StatusTranca.OCUPADA if bicicleta_id is not None else StatusTranca.LIVRE).value
+        
+        atualizadas = self._gravadas(self.table.update(integrar, self.query.id.one_of(tranca_ids)))
+        
+        self.tranca_totem_table.remove(self.query.idTranca.one_of(tranca_ids))
+        self.tranca_totem_table.insert_multiple(
+            {'idTranca': tranca_id, 'idTotem': totem_id} for tranca_id in tranca_ids
+        )
+        self.relacao.associar(tranca_ids, totem_id)
+        return len(atualizadas)
+    
     def desassociar_totem(self, tranca_id: int) -> bool:
         """Remove a associação de uma tranca com um totem"""
         self.tranca_totem_table.remove(self.query.idTranca == tranca_id)
         # Também atualiza o campo totem diretamente na tranca
-        self.table.update({'totem': None}, self.query.id == tranca_id)
+        self._gravadas(self.table.update({'totem': None}, self.query.id == tranca_id))
+        self.relacao.desassociar([tranca_id])
         return True
     
+    def desassociar_do_totem(self, totem_id: int) -> int:
+        """
+        Retira todas as trancas de um totem (usado na remoção do totem).
+        
+        Returns:
+            Quantidade de trancas desassociadas
+        """
+        tranca_ids = self.relacao.trancas_de(totem_id)
+        self.tranca_totem_table.remove(self.query.idTotem == totem_id)
+        if tranca_ids:
+            self._gravadas(self.table.update({'totem': None}, self.query.id.one_of(tranca_ids)))
+            self.relacao.desassociar(tranca_ids)
+        return len(tranca_ids)
+    
     def get_totem_id(self, tranca_id: int) -> Optional[int]:
         """Retorna o ID do totem associado à tranca"""
-        # Primeiro tenta buscar do campo direto na tranca
-        tranca = self.get_by_id(tranca_id)
-        if tranca and tranca.totem is not None:
-            return tranca.totem
-        # Fallback para tabela de relacionamento
-        result = self.tranca_totem_table.get(self.query.idTranca == tranca_id)
-        return result['idTotem'] if result else None
+        return self.relacao.totem_de(tranca_id)
     
     def get_by_totem(self, totem_id: int) -> List[Tranca]:
-        """Retorna todas as trancas de um totem"""
-        # Busca trancas que têm o totem diretamente ou via tabela de relacionamento
-        trancas = []
-        
-        # Busca via campo direto
-        results = self.table.search(self.query.totem == totem_id)
-        for r in results:
-            trancas.append(Tranca(**r))
-        
-        # Também busca via tabela de relacionamento para compatibilidade
-        relations = self.tranca_totem_table.search(self.query.idTotem == totem_id)
-        for rel in relations:
-            tranca_id = rel['idTranca']
-            # Evita duplicatas
-            if not any(t.id == tranca_id for t in trancas):
-                tranca = self.get_by_id(tranca_id)
-                if tranca:
-                    trancas.append(tranca)
-        
-        return trancas
+        """Retorna todas as trancas de um totem, em ordem de ID"""
+        return self.get_many(self.relacao.trancas_de(totem_id))
+    
+    def _gravadas(self, doc_ids: List[int]) -> List[dict]:
+        """Relê (por doc_id) as trancas recém-gravadas e atualiza os contadores dos totens"""
+        docs = [doc for doc in (self.table.get(doc_id=doc_id) for doc_id in doc_ids) if doc is not None]
+        self.disponibilidade.trancas_gravadas(docs)
+        return docs
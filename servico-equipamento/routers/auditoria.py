@@ -0,0 +1,87 @@
+"""Router para consulta dos registros de auditoria.
+Permite filtrar as ações dos funcionários sobre bicicletas e trancas.
+"""
+
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from fastapi import APIRouter, HTTPException, status, Query as QueryParam
+
+from database.database import get_db
+from database.indices_auditoria import chave_data_hora
+from database.paginacao import CursorInvalido
+from repositories.auditoria_repository import AuditoriaRepository
+from models.auditoria_model import RegistroAuditoriaCompleto, TipoAcao, TipoEquipamento
+from utils.paginacao import Pagina, LIMITE_MAXIMO
+
+
+router = APIRouter(prefix="/auditoria", tags=["Equipamento"])
+
+
+class Ordem(str, Enum):
+    """Ordenação por data_hora"""
+    ASC = "asc"
+    DESC = "desc"
+
+
+@router.get("", summary="Consulta registros de auditoria", response_model=Pagina[RegistroAuditoriaCompleto])
+def consultar_auditoria(
+    idFuncionario: Optional[int] = QueryParam(None, description="Funcionário que realizou a ação"),
+    tipoEquipamento: Optional[TipoEquipamento] = QueryParam(None, description="BICICLETA ou TRANCA"),
+    idEquipamento: Optional[int] = QueryParam(None, description="ID do equipamento"),
+    tipoAcao: Optional[TipoAcao] = QueryParam(None, description="Tipo de ação"),
+    inicio: Optional[datetime] = QueryParam(None, description="data_hora mínima (inclusiva)"),
+    fim: Optional[datetime] = QueryParam(None, description="data_hora máxima (inclusiva)"),
+    ordem: Ordem = QueryParam(Ordem.DESC, description="asc ou desc por data_hora"),
+    limit: int = QueryParam(100, ge=1, le=LIMITE_MAXIMO, description="Tamanho da página"),
+    cursor: Optional[str] = QueryParam(None, description="Cursor retornado na página anterior")
+):
+    """
+    Consulta registros de auditoria combinando filtros.
+    
+    Os registros vêm ordenados por data_hora (mais recentes primeiro, por
+    padrão) e paginados por cursor. As consultas usam índices compostos por
+    funcionário, equipamento e tipo de ação, então o custo acompanha o
+    tamanho da página e não o histórico inteiro.
+    
+    Returns:
+        Página de registros e cursor da próxima
+        
+    Raises:
+        HTTPException 422: Se o intervalo de datas ou o cursor forem inválidos
+    """
+    # Um limite pode vir com fuso e o outro sem; compara os dois em UTC
+    if inicio and fim and chave_data_hora(inicio) > chave_data_hora(fim):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={
+                "codigo": "INTERVALO_INVALIDO",
+                "mensagem": "A data de início deve ser anterior à data de fim"
+            }
+        )
+    
+    db = get_db()
+    auditoria_repo = AuditoriaRepository(db)
+    
+    try:
+        itens, proximo = auditoria_repo.consultar(
+            id_funcionario=idFuncionario,
+            tipo_equipamento=tipoEquipamento,
+            id_equipamento=idEquipamento,
+            tipo_acao=tipoAcao,
+            inicio=inicio,
+            fim=fim,
+            limite=limit,
+            cursor=cursor,
+            decrescente=ordem == Ordem.DESC
+        )
+    except CursorInvalido:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={
+                "codigo": "CURSOR_INVALIDO",
+                "mensagem": "Cursor de paginação inválido"
+            }
+        )
+    
+    return Pagina(itens=itens, proximoCursor=proximo)
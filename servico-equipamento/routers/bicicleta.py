@@ -3,11 +3,11 @@ Implementa os endpoints da API de equipamentos para bicicletas.
 """
 
 import logging
-from typing import List
-from fastapi import APIRouter, HTTPException, status
+from typing import Any, List, Optional, Union
+from fastapi import APIRouter, Body, HTTPException, Request, status, Query as QueryParam
 from pydantic import BaseModel
 
-from database.database import get_db
+from database.database import get_db, transacao
 from repositories.bicicleta_repository import BicicletaRepository
 from repositories.tranca_repository import TrancaRepository
 from repositories.auditoria_repository import AuditoriaRepository
@@ -16,6 +16,8 @@ from models.auditoria_model import RegistroAuditoria, TipoAcao, TipoEquipamento
 from models.tranca_model import StatusTranca
 from models.erro_model import Erro
 from utils.error_handler import handle_api_errors
+from utils.lote import LOTE_MAXIMO_ITENS, ResultadoLote, cadastrar_em_lote
+from utils.paginacao import Pagina, LIMITE_MAXIMO, listar
 from utils.validators import validate_bicicleta_exists, validate_tranca_exists, validate_status
 from services.email_service import email_service
 from services.aluguel_service import aluguel_service
@@ -48,17 +50,25 @@ class RetirarDaRedeRequest(BaseModel):
         populate_by_name = True
 
 
-@router.get("", summary="Recupera bicicletas cadastradas", response_model=List[Bicicleta])
-def listar_bicicletas():
+@router.get("", summary="Recupera bicicletas cadastradas", response_model=Union[List[Bicicleta], Pagina[Bicicleta]])
+def listar_bicicletas(
+    request: Request,
+    limit: Optional[int] = QueryParam(None, ge=1, le=LIMITE_MAXIMO, description="Tamanho da página"),
+    cursor: Optional[str] = QueryParam(None, description="Cursor retornado na página anterior")
+):
     """
     Lista todas as bicicletas cadastradas no sistema.
     
+    Sem parâmetros retorna a lista completa. Com ``limit``/``cursor`` retorna
+    uma página e o cursor da próxima; com ``Accept: application/x-ndjson``
+    retorna um item por linha, em streaming.
+    
     Returns:
         Lista de bicicletas
     """
     db = get_db()
     bicicleta_repo = BicicletaRepository(db)
-    return bicicleta_repo.get_all()
+    return listar(request, limit, cursor, bicicleta_repo.get_all, bicicleta_repo.get_page, bicicleta_repo.iter_all)
 
 
 @router.post("", summary="Cadastrar bicicleta", response_model=Bicicleta, status_code=status.HTTP_200_OK)
@@ -93,6 +103,32 @@ def cadastrar_bicicleta(bicicleta: NovaBicicleta):
     return bicicleta_repo.create(bicicleta)
 
 
+@router.post("/lote", summary="Cadastrar bicicletas em lote", response_model=List[ResultadoLote[Bicicleta]], status_code=status.HTTP_200_OK)
+@handle_api_errors
+def cadastrar_bicicletas_em_lote(payloads: List[Any] = Body(..., max_length=LOTE_MAXIMO_ITENS)):
+    """
+    Cadastra várias bicicletas de uma vez.
+    
+    Cada item é validado como em ``POST /bicicleta``; itens inválidos ou com número
+    repetido são reportados na sua posição e não impedem o cadastro dos demais.
+    Os IDs são reservados de uma vez e as bicicletas válidas gravadas numa única
+    escrita. A checagem de números repetidos e a gravação acontecem na mesma
+    transação, então dois lotes simultâneos não cadastram o mesmo número.
+    
+    Lotes com mais de ``LOTE_MAXIMO_ITENS`` itens são recusados com 422.
+    
+    Args:
+        payloads: Lista de NovaBicicleta
+        
+    Returns:
+        Um resultado por item, na ordem recebida, com a bicicleta cadastrada ou o erro
+    """
+    db = get_db()
+    bicicleta_repo = BicicletaRepository(db)
+    with transacao(db):
+        return cadastrar_em_lote(payloads, NovaBicicleta, bicicleta_repo.numeros(), bicicleta_repo.create_many, "bicicleta")
+
+
 @router.get("/{id_bicicleta}", summary="Obter bicicleta", response_model=Bicicleta)
 def obter_bicicleta(id_bicicleta: int):
     """
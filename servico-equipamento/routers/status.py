@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 from datetime import datetime, timezone
 
+from services.aluguel_service import aluguel_service
+
 router = APIRouter(prefix="/status", tags=["status"])
 
 @router.get("", summary="Status do serviço")
@@ -10,6 +12,8 @@ def get_status():
         "ok": True,
         "status": "Operacional",
         "version": "0.1.0",
-        "timestamp": datetime.now(timezone.utc).isoformat()
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        # Acertos/faltas do cache de validação de funcionários
+        "cacheFuncionarios": aluguel_service.cache_funcionarios.estatisticas()
     }
 
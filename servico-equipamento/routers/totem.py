@@ -3,35 +3,75 @@ Router para operações com totems.
 Implementa os endpoints da API de equipamentos para totems.
 """
 
-from typing import List
-from fastapi import APIRouter, HTTPException, status
+import logging
+from typing import Dict, List, Optional, Union
+from fastapi import APIRouter, HTTPException, Request, status, Query as QueryParam
 
-from database.database import get_db
+from database.database import get_db, transacao
+from database.disponibilidade_totens import disponibilidade_de
 from repositories.totem_repository import TotemRepository
 from repositories.tranca_repository import TrancaRepository
 from repositories.bicicleta_repository import BicicletaRepository
-from models.totem_model import Totem, NovoTotem
-from models.tranca_model import Tranca
-from models.bicicleta_model import Bicicleta
+from repositories.auditoria_repository import AuditoriaRepository
+from models.totem_model import (
+    Totem, NovoTotem, DisponibilidadeTotem, IntegrarTotemRequest, ParIntegracao, ResultadoIntegracaoPar, ResultadoIntegracaoTotem
+)
+from models.tranca_model import Tranca, StatusTranca
+from models.bicicleta_model import Bicicleta, StatusBicicleta
+from models.auditoria_model import RegistroAuditoria, TipoAcao, TipoEquipamento
 from models.erro_model import Erro
 from utils.error_handler import handle_api_errors
+from utils.paginacao import Pagina, LIMITE_MAXIMO, listar
 from utils.validators import validate_totem_exists
+from services.email_service import email_service
+from services.aluguel_service import aluguel_service
+
+logger = logging.getLogger(__name__)
 
 
 router = APIRouter(prefix="/totem", tags=["Equipamento"])
 
 
-@router.get("", summary="Recupera totens cadastrados", response_model=List[Totem])
-def listar_totems():
+@router.get("", summary="Recupera totens cadastrados", response_model=Union[List[Totem], Pagina[Totem]])
+def listar_totems(
+    request: Request,
+    limit: Optional[int] = QueryParam(None, ge=1, le=LIMITE_MAXIMO, description="Tamanho da página"),
+    cursor: Optional[str] = QueryParam(None, description="Cursor retornado na página anterior")
+):
     """
     Lista todos os totems cadastrados no sistema.
     
+    Sem parâmetros retorna a lista completa. Com ``limit``/``cursor`` retorna
+    uma página e o cursor da próxima; com ``Accept: application/x-ndjson``
+    retorna um item por linha, em streaming.
+    
     Returns:
         Lista de totems
     """
     db = get_db()
     totem_repo = TotemRepository(db)
-    return totem_repo.get_all()
+    return listar(request, limit, cursor, totem_repo.get_all, totem_repo.get_page, totem_repo.iter_all)
+
+
+@router.get("/disponibilidade", summary="Disponibilidade de todos os totens", response_model=List[DisponibilidadeTotem])
+def listar_disponibilidade():
+    """
+    Retorna, para cada totem, trancas livres, bicicletas disponíveis e
+    equipamentos em reparo.
+    
+    Os números vêm de contadores mantidos a cada gravação de tranca ou
+    bicicleta; a consulta só percorre a tabela de totens.
+    
+    Returns:
+        Lista com a disponibilidade de cada totem
+    """
+    db = get_db()
+    totem_repo = TotemRepository(db)
+    contadores = disponibilidade_de(db).por_totem()
+    return [
+        DisponibilidadeTotem(idTotem=totem.id, localizacao=totem.localizacao, **contadores.get(totem.id, {}))
+        for totem in totem_repo.get_all()
+    ]
 
 
 @router.post("", summary="Incluir totem", response_model=Totem, status_code=status.HTTP_200_OK)
@@ -163,14 +203,8 @@ def listar_trancas_do_totem(id_totem: int):
     # Busca os IDs das trancas associadas ao totem
     trancas_ids = totem_repo.get_trancas_ids(id_totem)
     
-    # Busca os dados completos de cada tranca
-    trancas = []
-    for tranca_id in trancas_ids:
-        tranca = tranca_repo.get_by_id(tranca_id)
-        if tranca:
-            trancas.append(tranca)
-    
-    return trancas
+    # Busca os dados completos das trancas de uma vez
+    return tranca_repo.get_many(trancas_ids)
 
 
 @router.get("/{id_totem}/bicicletas", summary="Listar bicicletas de um totem", response_model=List[Bicicleta])
@@ -209,18 +243,190 @@ def listar_bicicletas_do_totem(id_totem: int):
     # Busca os IDs das trancas associadas ao totem
     trancas_ids = totem_repo.get_trancas_ids(id_totem)
     
-    # Busca as bicicletas associadas a cada tranca
-    bicicletas = []
-    bicicletas_ids_processados = set()  # Para evitar duplicatas
-    
-    for tranca_id in trancas_ids:
-        tranca = tranca_repo.get_by_id(tranca_id)
-        if tranca and tranca.bicicleta:
-            # Evita adicionar a mesma bicicleta duas vezes
-            if tranca.bicicleta not in bicicletas_ids_processados:
-                bicicleta = bicicleta_repo.get_by_id(tranca.bicicleta)
-                if bicicleta:
-                    bicicletas.append(bicicleta)
-                    bicicletas_ids_processados.add(tranca.bicicleta)
-    
-    return bicicletas
+    # Busca as trancas e depois as bicicletas presas nelas, cada uma numa única consulta
+    trancas = tranca_repo.get_many(trancas_ids)
+    # Evita buscar a mesma bicicleta duas vezes
+    bicicletas_ids = list(dict.fromkeys(tranca.bicicleta for tranca in trancas if tranca.bicicleta))
+    
+    return bicicleta_repo.get_many(bicicletas_ids)
+
+
+def _validar_par(
+    par: ParIntegracao,
+    id_funcionario: int,
+    tranca_repo: TrancaRepository,
+    bicicleta_repo: BicicletaRepository,
+    auditoria_repo: AuditoriaRepository,
+    trancas_usadas: set,
+    bicicletas_usadas: set,
+):
+    """
+    Aplica a um par as mesmas regras de /tranca/integrarNaRede e
+    /bicicleta/integrarNaRede.
+
+    Returns:
+        (tranca, bicicleta ou None, None) se o par é válido; (None, None, Erro) se não
+    """
+    if par.id_tranca in trancas_usadas:
+        return None, None, Erro(codigo="TRANCA_REPETIDA", mensagem=f"Tranca {par.id_tranca} aparece mais de uma vez no lote")
+    if par.id_bicicleta is not None and par.id_bicicleta in bicicletas_usadas:
+        return None, None, Erro(codigo="BICICLETA_REPETIDA", mensagem=f"Bicicleta {par.id_bicicleta} aparece mais de uma vez no lote")
+
+    tranca = tranca_repo.get_by_id(par.id_tranca)
+    if not tranca:
+        return None, None, Erro(codigo="TRANCA_NAO_ENCONTRADA", mensagem=f"Tranca com ID {par.id_tranca} não encontrada")
+    if tranca.status not in [StatusTranca.NOVA, StatusTranca.EM_REPARO]:
+        return None, None, Erro(
+            codigo="STATUS_TRANCA_INVALIDO",
+            mensagem=f"Tranca deve estar com status NOVA ou EM_REPARO. Status atual: {tranca.status.value}"
+        )
+    # UC11-R3: quem devolve a tranca do reparo deve ser quem a retirou
+    if tranca.status == StatusTranca.EM_REPARO and not auditoria_repo.verificar_reparador_original(
+        TipoEquipamento.TRANCA, par.id_tranca, id_funcionario
+    ):
+        return None, None, Erro(
+            codigo="REPARADOR_DIFERENTE",
+            mensagem=f"O funcionário {id_funcionario} não foi quem retirou a tranca {par.id_tranca} para reparo"
+        )
+
+    bicicleta = None
+    if par.id_bicicleta is not None:
+        bicicleta = bicicleta_repo.get_by_id(par.id_bicicleta)
+        if not bicicleta:
+            return None, None, Erro(codigo="BICICLETA_NAO_ENCONTRADA", mensagem=f"Bicicleta com ID {par.id_bicicleta} não encontrada")
+        if bicicleta.status not in [StatusBicicleta.NOVA, StatusBicicleta.EM_REPARO]:
+            return None, None, Erro(
+                codigo="STATUS_BICICLETA_INVALIDO",
+                mensagem=f"Bicicleta deve estar com status NOVA ou EM_REPARO. Status atual: {bicicleta.status.value}"
+            )
+
+    return tranca, bicicleta, None
+
+
+@router.post(
+    "/{id_totem}/integrarNaRede",
+    summary="Integrar trancas e bicicletas num totem em lote",
+    response_model=ResultadoIntegracaoTotem,
+    status_code=status.HTTP_200_OK
+)
+def integrar_totem_na_rede(id_totem: int, request: IntegrarTotemRequest):
+    """
+    Integra de uma vez uma lista de pares (tranca, bicicleta) num totem.
+    
+    O funcionário é validado uma única vez. Cada par segue as regras de
+    ``/tranca/integrarNaRede`` e ``/bicicleta/integrarNaRede``; pares inválidos
+    são reportados na sua posição e não impedem os demais. As mudanças de
+    status, as associações e os registros de auditoria dos pares válidos são
+    gravados juntos, e o funcionário recebe um único email com o resumo.
+    
+    Args:
+        id_totem: ID do totem
+        request: Funcionário responsável e pares (idTranca, idBicicleta opcional)
+        
+    Returns:
+        Resumo com um resultado por par
+        
+    Raises:
+        HTTPException 404: Totem não encontrado
+        HTTPException 422: Funcionário não encontrado
+    """
+    db = get_db()
+    totem_repo = TotemRepository(db)
+    tranca_repo = TrancaRepository(db)
+    bicicleta_repo = BicicletaRepository(db)
+    auditoria_repo = AuditoriaRepository(db)
+    
+    validate_totem_exists(totem_repo.get_by_id(id_totem), id_totem)
+    
+    # Valida funcionário via serviço de aluguel (uma vez para o lote inteiro)
+    funcionario_valido, email_funcionario = aluguel_service.validar_funcionario(request.id_funcionario)
+    if not funcionario_valido:
+        logger.warning(f"Funcionário {request.id_funcionario} não encontrado ou inválido")
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[{
+                "codigo": "FUNCIONARIO_NAO_ENCONTRADO",
+                "mensagem": f"Funcionário {request.id_funcionario} não encontrado"
+            }]
+        )
+    
+    # Os pares são validados e gravados sob o mesmo lock: uma integração
+    # concorrente não consegue usar a mesma tranca entre a checagem e a escrita
+    with transacao(db):
+        resultados: List[ResultadoIntegracaoPar] = []
+        validos = []
+        trancas_usadas, bicicletas_usadas = set(), set()
+        for par in request.itens:
+            tranca, bicicleta, erro = _validar_par(
+                par, request.id_funcionario, tranca_repo, bicicleta_repo, auditoria_repo, trancas_usadas, bicicletas_usadas
+            )
+            resultados.append(ResultadoIntegracaoPar(
+                idTranca=par.id_tranca, idBicicleta=par.id_bicicleta, integrado=erro is None, erro=erro
+            ))
+            if erro is None:
+                trancas_usadas.add(par.id_tranca)
+                if bicicleta is not None:
+                    bicicletas_usadas.add(bicicleta.id)
+                validos.append((tranca, bicicleta))
+        
+        if validos:
+            # UC11-R1 / UC08: um registro por tranca e por bicicleta integrada
+            registros = []
+            for tranca, bicicleta in validos:
+                registros.append(RegistroAuditoria(
+                    tipo_acao=TipoAcao.INTEGRAR_TRANCA,
+                    tipo_equipamento=TipoEquipamento.TRANCA,
+                    id_equipamento=tranca.id,
+                    numero_equipamento=tranca.numero,
+                    id_funcionario=request.id_funcionario,
+                    id_totem=id_totem,
+                    status_destino=(StatusTranca.OCUPADA if bicicleta is not None else StatusTranca.LIVRE).value,
+                    detalhes={
+                        "status_anterior": tranca.status.value,
+                        "modelo": tranca.modelo,
+                        "localizacao": tranca.localizacao
+                    }
+                ))
+                if bicicleta is not None:
+                    registros.append(RegistroAuditoria(
+                        tipo_acao=TipoAcao.INTEGRAR_BICICLETA,
+                        tipo_equipamento=TipoEquipamento.BICICLETA,
+                        id_equipamento=bicicleta.id,
+                        numero_equipamento=bicicleta.numero,
+                        id_funcionario=request.id_funcionario,
+                        id_tranca=tranca.id,
+                        status_destino="DISPONIVEL",
+                        detalhes={
+                            "status_anterior": bicicleta.status.value,
+                            "marca": bicicleta.marca,
+                            "modelo": bicicleta.modelo
+                        }
+                    ))
+            
+            bicicletas_por_tranca: Dict[int, Optional[int]] = {
+                tranca.id: bicicleta.id if bicicleta is not None else None for tranca, bicicleta in validos
+            }
+            tranca_repo.integrar_no_totem(id_totem, bicicletas_por_tranca)
+            bicicleta_repo.update_status_many(
+                [bicicleta.id for _, bicicleta in validos if bicicleta is not None], StatusBicicleta.DISPONIVEL
+            )
+            auditoria_repo.create_many(registros)
+    
+    email_enviado = False
+    if validos:
+        email_enviado, _ = email_service.notificar_integracao_totem(
+            id_totem=id_totem,
+            id_funcionario=request.id_funcionario,
+            pares=[(tranca.id, bicicleta.id if bicicleta is not None else None) for tranca, bicicleta in validos],
+            email_funcionario=email_funcionario
+        )
+        if not email_enviado:
+            logger.warning(f"Falha ao enviar email de resumo da integração do totem {id_totem}")
+    
+    return ResultadoIntegracaoTotem(
+        idTotem=id_totem,
+        idFuncionario=request.id_funcionario,
+        integrados=len(validos),
+        resultados=resultados,
+        emailEnviado=email_enviado
+    )
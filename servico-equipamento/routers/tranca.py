@@ -3,12 +3,12 @@ Implementa os endpoints da API de equipamentos para trancas.
 """
 
 import logging
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, status
+from typing import Any, List, Optional, Union
+from fastapi import APIRouter, Body, HTTPException, Request, status, Query as QueryParam
 from pydantic import BaseModel
 from enum import Enum
 
-from database.database import get_db
+from database.database import get_db, transacao
 from repositories.tranca_repository import TrancaRepository
 from repositories.totem_repository import TotemRepository
 from repositories.bicicleta_repository import BicicletaRepository
@@ -18,6 +18,8 @@ from models.auditoria_model import RegistroAuditoria, TipoAcao, TipoEquipamento
 from models.bicicleta_model import Bicicleta, StatusBicicleta
 from models.erro_model import Erro
 from utils.error_handler import handle_api_errors
+from utils.lote import LOTE_MAXIMO_ITENS, ResultadoLote, cadastrar_em_lote
+from utils.paginacao import Pagina, LIMITE_MAXIMO, listar
 from utils.validators import validate_bicicleta_exists, validate_tranca_exists, validate_totem_exists, validate_status
 from services.email_service import email_service
 from services.aluguel_service import aluguel_service
@@ -65,17 +67,25 @@ class DestrancarRequest(BaseModel):
     bicicleta: Optional[int] = None
 
 
-@router.get("", summary="Recupera trancas cadastradas", response_model=List[Tranca])
-def listar_trancas():
+@router.get("", summary="Recupera trancas cadastradas", response_model=Union[List[Tranca], Pagina[Tranca]])
+def listar_trancas(
+    request: Request,
+    limit: Optional[int] = QueryParam(None, ge=1, le=LIMITE_MAXIMO, description="Tamanho da página"),
+    cursor: Optional[str] = QueryParam(None, description="Cursor retornado na página anterior")
+):
     """
     Lista todas as trancas cadastradas no sistema.
     
+    Sem parâmetros retorna a lista completa. Com ``limit``/``cursor`` retorna
+    uma página e o cursor da próxima; com ``Accept: application/x-ndjson``
+    retorna um item por linha, em streaming.
+    
     Returns:
         Lista de trancas
     """
     db = get_db()
     tranca_repo = TrancaRepository(db)
-    return tranca_repo.get_all()
+    return listar(request, limit, cursor, tranca_repo.get_all, tranca_repo.get_page, tranca_repo.iter_all)
 
 
 @router.post("", summary="Cadastrar tranca", response_model=Tranca, status_code=status.HTTP_200_OK)
@@ -110,6 +120,32 @@ def cadastrar_tranca(tranca: NovaTranca):
     return tranca_repo.create(tranca)
 
 
+@router.post("/lote", summary="Cadastrar trancas em lote", response_model=List[ResultadoLote[Tranca]], status_code=status.HTTP_200_OK)
+@handle_api_errors
+def cadastrar_trancas_em_lote(payloads: List[Any] = Body(..., max_length=LOTE_MAXIMO_ITENS)):
+    """
+    Cadastra várias trancas de uma vez.
+    
+    Cada item é validado como em ``POST /tranca``; itens inválidos ou com número
+    repetido são reportados na sua posição e não impedem o cadastro dos demais.
+    Os IDs são reservados de uma vez e as trancas válidas gravadas numa única
+    escrita. A checagem de números repetidos e a gravação acontecem na mesma
+    transação, então dois lotes simultâneos não cadastram o mesmo número.
+    
+    Lotes com mais de ``LOTE_MAXIMO_ITENS`` itens são recusados com 422.
+    
+    Args:
+        payloads: Lista de NovaTranca
+        
+    Returns:
+        Um resultado por item, na ordem recebida, com a tranca cadastrada ou o erro
+    """
+    db = get_db()
+    tranca_repo = TrancaRepository(db)
+    with transacao(db):
+        return cadastrar_em_lote(payloads, NovaTranca, tranca_repo.numeros(), tranca_repo.create_many, "tranca")
+
+
 @router.get("/{id_tranca}", summary="Obter tranca", response_model=Tranca)
 def obter_tranca(id_tranca: int):
     """
@@ -424,46 +460,49 @@ def integrar_tranca_na_rede(request: IntegrarNaRedeRequest):
             }]
         )
     
-    # Busca e valida tranca
-    tranca = tranca_repo.get_by_id(request.id_tranca)
-    validate_tranca_exists(tranca, request.id_tranca)
-    
-    # Busca e valida totem
-    totem = totem_repo.get_by_id(request.id_totem)
-    validate_totem_exists(totem, request.id_totem)
-    
-    # Valida status da tranca
-    if tranca.status not in [StatusTranca.NOVA, StatusTranca.EM_REPARO]:
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=[{
-                "codigo": "STATUS_TRANCA_INVALIDO",
-                "mensagem": f"Tranca deve estar com status NOVA ou EM_REPARO. Status atual: {tranca.status.value}"
-            }]
-        )
-    
-    # UC11-R3: Verifica se o funcionário que está devolvendo a tranca é o mesmo que retirou para reparo
-    if tranca.status == StatusTranca.EM_REPARO:
-        auditoria_repo = AuditoriaRepository(db)
-        if not auditoria_repo.verificar_reparador_original(
-            TipoEquipamento.TRANCA,
-            request.id_tranca,
-            request.id_funcionario
-        ):
+    # A checagem e a escrita acontecem sob o mesmo lock: uma integração em
+    # lote concorrente não consegue levar a mesma tranca no meio do caminho
+    with transacao(db):
+        # Busca e valida tranca
+        tranca = tranca_repo.get_by_id(request.id_tranca)
+        validate_tranca_exists(tranca, request.id_tranca)
+        
+        # Busca e valida totem
+        totem = totem_repo.get_by_id(request.id_totem)
+        validate_totem_exists(totem, request.id_totem)
+        
+        # Valida status da tranca
+        if tranca.status not in [StatusTranca.NOVA, StatusTranca.EM_REPARO]:
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 detail=[{
-                    "codigo": "REPARADOR_DIFERENTE",
-                    "mensagem": f"O funcionário {request.id_funcionario} não foi quem retirou a tranca {request.id_tranca} para reparo"
+                    "codigo": "STATUS_TRANCA_INVALIDO",
+                    "mensagem": f"Tranca deve estar com status NOVA ou EM_REPARO. Status atual: {tranca.status.value}"
                 }]
             )
-    
-    # Integra na rede
-    # 1. Associa tranca ao totem
-    tranca_repo.associar_totem(request.id_tranca, request.id_totem)
-    
-    # 2. Atualiza status da tranca para LIVRE
-    tranca_repo.update_status(request.id_tranca, StatusTranca.LIVRE)
+        
+        # UC11-R3: Verifica se o funcionário que está devolvendo a tranca é o mesmo que retirou para reparo
+        if tranca.status == StatusTranca.EM_REPARO:
+            auditoria_repo = AuditoriaRepository(db)
+            if not auditoria_repo.verificar_reparador_original(
+                TipoEquipamento.TRANCA,
+                request.id_tranca,
+                request.id_funcionario
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=[{
+                        "codigo": "REPARADOR_DIFERENTE",
+                        "mensagem": f"O funcionário {request.id_funcionario} não foi quem retirou a tranca {request.id_tranca} para reparo"
+                    }]
+                )
+        
+        # Integra na rede
+        # 1. Associa tranca ao totem
+        tranca_repo.associar_totem(request.id_tranca, request.id_totem)
+        
+        # 2. Atualiza status da tranca para LIVRE
+        tranca_repo.update_status(request.id_tranca, StatusTranca.LIVRE)
     
     # 3. Envia notificação por email via serviço externo
     # UC11-R2 – Deve ser enviado um email para o reparador com todos os dados da inclusão da tranca na rede de totens
@@ -4,8 +4,11 @@ Implementa chamadas HTTP para validação de funcionários e outras operações.
 """
 
 import os
+import time
 import logging
-from typing import Dict, Any, Optional, Tuple
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Optional, Tuple
 import httpx
 
 logger = logging.getLogger(__name__)
@@ -13,6 +16,109 @@ logger = logging.getLogger(__name__)
 # URL base do serviço de aluguel (configurável via variável de ambiente)
 BASE_URL_ALUGUEL = os.getenv("BASE_URL_ALUGUEL", "http://localhost:8001")
 
+# Cache da validação de funcionários: máximo de entradas e validade (segundos)
+# de respostas positivas e de "funcionário não encontrado". TTL 0 desliga.
+FUNCIONARIO_CACHE_TAMANHO = int(os.getenv("FUNCIONARIO_CACHE_TAMANHO", "1024"))
+FUNCIONARIO_CACHE_TTL = float(os.getenv("FUNCIONARIO_CACHE_TTL", "60"))
+FUNCIONARIO_CACHE_TTL_NEGATIVO = float(os.getenv("FUNCIONARIO_CACHE_TTL_NEGATIVO", "10"))
+
+
+class _Chamada:
+    """Busca em andamento; as requisições concorrentes pela mesma chave esperam por ela"""
+
+    def __init__(self):
+        self.concluida = threading.Event()
+        self.resultado = None
+        self.erro: Optional[BaseException] = None
+
+
+class CacheTTL:
+    """
+    Cache LRU com validade por entrada e busca única por chave.
+
+    Guarda até ``tamanho`` entradas; a menos usada recentemente sai primeiro.
+    Quando várias threads pedem a mesma chave ausente ao mesmo tempo, só uma
+    executa a busca e as demais recebem o mesmo resultado.
+    """
+
+    def __init__(self, tamanho: int, relogio: Callable[[], float] = time.monotonic):
+        self._tamanho = tamanho
+        self._relogio = relogio
+        self._lock = threading.Lock()
+        # chave -> (valor, expira_em)
+        self._entradas: "OrderedDict[Any, Tuple[Any, float]]" = OrderedDict()
+        self._em_andamento: Dict[Any, _Chamada] = {}
+        self.acertos = 0
+        self.faltas = 0
+        self.coalescidas = 0
+
+    def obter(self, chave, buscar: Callable[[], Tuple[Any, float]]):
+        """
+        Retorna o valor da chave, chamando ``buscar`` se não estiver em cache.
+
+        ``buscar`` retorna (valor, ttl); com ttl <= 0 o valor não é guardado.
+        """
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                if entrada[1] > self._relogio():
+                    self._entradas.move_to_end(chave)
+                    self.acertos += 1
+                    return entrada[0]
+                del self._entradas[chave]
+
+            chamada = self._em_andamento.get(chave)
+            lider = chamada is None
+            if lider:
+                chamada = self._em_andamento[chave] = _Chamada()
+                self.faltas += 1
+            else:
+                self.coalescidas += 1
+
+        if not lider:
+            chamada.concluida.wait()
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            valor, ttl = buscar()
+            chamada.resultado = valor
+        except BaseException as e:
+            chamada.erro = e
+            raise
+        finally:
+            with self._lock:
+                del self._em_andamento[chave]
+                if chamada.erro is None and ttl > 0:
+                    self._entradas[chave] = (valor, self._relogio() + ttl)
+                    self._entradas.move_to_end(chave)
+                    while len(self._entradas) > self._tamanho:
+                        self._entradas.popitem(last=False)
+            chamada.concluida.set()
+
+        return valor
+
+    def invalidar(self, chave=None):
+        """Remove uma chave (ou todas, sem argumento)"""
+        with self._lock:
+            if chave is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(chave, None)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            consultas = self.acertos + self.faltas + self.coalescidas
+            return {
+                "entradas": len(self._entradas),
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "coalescidas": self.coalescidas,
+                # Coalescidas não chamam o serviço de aluguel: contam como acerto
+                "taxaAcerto": round((self.acertos + self.coalescidas) / consultas, 4) if consultas else 0.0,
+            }
+
 
 class AluguelService:
     """Serviço para comunicação com o microsserviço de aluguel"""
@@ -27,6 +133,7 @@ class AluguelService:
         """
         self.base_url = base_url or BASE_URL_ALUGUEL
         self.timeout = timeout
+        self.cache_funcionarios = CacheTTL(FUNCIONARIO_CACHE_TAMANHO)
     
     def obter_funcionario(self, id_funcionario: int) -> Tuple[bool, Optional[Dict[str, Any]]]:
         """
@@ -68,6 +175,11 @@ class AluguelService:
     def validar_funcionario(self, id_funcionario: int) -> Tuple[bool, Optional[str]]:
         """
         Valida se um funcionário existe e está ativo.
+
+        O resultado fica em cache por FUNCIONARIO_CACHE_TTL segundos (ou
+        FUNCIONARIO_CACHE_TTL_NEGATIVO, se o funcionário não existir); falhas
+        de comunicação não são guardadas. Validações simultâneas do mesmo
+        funcionário fazem uma única chamada ao serviço de aluguel.
         
         Args:
             id_funcionario: ID do funcionário a validar
@@ -75,14 +187,22 @@ class AluguelService:
         Returns:
             Tupla (funcionario_valido, email_funcionario ou None)
         """
+        return self.cache_funcionarios.obter(id_funcionario, lambda: self._buscar_validacao(id_funcionario))
+
+    def _buscar_validacao(self, id_funcionario: int) -> Tuple[Tuple[bool, Optional[str]], float]:
+        """Valida no serviço de aluguel; retorna ((valido, email), ttl do cache)"""
         sucesso, dados = self.obter_funcionario(id_funcionario)
         
         if sucesso and dados:
             # Funcionário válido, retorna email para notificações
             email = dados.get("email")
-            return True, email
-        
-        return False, None
+            return (True, email), FUNCIONARIO_CACHE_TTL
+
+        # status_code 422 é o 404 do serviço de aluguel: funcionário inexistente
+        if isinstance(dados, dict) and dados.get("status_code") == 422:
+            return (False, None), FUNCIONARIO_CACHE_TTL_NEGATIVO
+
+        return (False, None), 0
     
     def obter_ciclista(self, id_ciclista: int) -> Tuple[bool, Optional[Dict[str, Any]]]:
         """
@@ -5,7 +5,7 @@ Implementa chamadas HTTP para notificações de operações com equipamentos.
 
 import os
 import logging
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 import httpx
 
 logger = logging.getLogger(__name__)
@@ -221,6 +221,46 @@ Esta é uma notificação automática do Sistema de Controle de Bicicletário.
 """
         return self.enviar_email(destinatario, assunto, mensagem)
 
+    
+    def notificar_integracao_totem(
+        self,
+        id_totem: int,
+        id_funcionario: int,
+        pares: List[Tuple[int, Optional[int]]],
+        email_funcionario: str = None
+    ) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Envia uma única notificação com todas as trancas e bicicletas
+        integradas de uma vez num totem.
+        
+        Args:
+            id_totem: ID do totem
+            id_funcionario: ID do funcionário responsável
+            pares: (ID da tranca, ID da bicicleta ou None) integrados
+            email_funcionario: Email do funcionário (opcional)
+            
+        Returns:
+            Tupla (sucesso, resposta/erro)
+        """
+        destinatario = email_funcionario or "sistema@scb.com"
+        assunto = f"Totem {id_totem}: {len(pares)} trancas integradas na rede - SCB"
+        linhas = "\n".join(
+            f"- Tranca ID: {id_tranca} - " + (f"Bicicleta ID: {id_bicicleta} DISPONÍVEL" if id_bicicleta is not None else "LIVRE")
+            for id_tranca, id_bicicleta in pares
+        )
+        mensagem = f"""
+Operação realizada com sucesso!
+
+Detalhes da Integração no Totem {id_totem}:
+- Funcionário responsável: {id_funcionario}
+- Trancas integradas: {len(pares)}
+- Bicicletas integradas: {sum(1 for _, id_bicicleta in pares if id_bicicleta is not None)}
+
+{linhas}
+
+Esta é uma notificação automática do Sistema de Controle de Bicicletário.
+"""
+        return self.enviar_email(destinatario, assunto, mensagem)
 
 # Instância singleton do serviço
 email_service = EmailService()
@@ -0,0 +1,87 @@
+"""
+Testes do endpoint de consulta de auditoria.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from tinydb import TinyDB
+from tinydb.storages import MemoryStorage
+
+from main import app
+
+
+client = TestClient(app)
+
+
+class MemoryDatabase:
+    """Database em memória com a mesma interface get_table da classe Database"""
+    def __init__(self):
+        self._db = TinyDB(storage=MemoryStorage)
+
+    def get_table(self, name: str):
+        return self._db.table(name)
+
+
+@pytest.fixture
+def db():
+    banco = MemoryDatabase()
+    banco.get_table('auditorias').insert_multiple([
+        {"tipo_acao": "RETIRAR_BICICLETA", "tipo_equipamento": "BICICLETA", "id_equipamento": 4,
+         "numero_equipamento": 4, "id_funcionario": 1, "status_destino": "EM_REPARO",
+         "data_hora": f"2024-01-{dia:02d}T10:00:00"}
+        for dia in range(1, 6)
+    ] + [
+        {"tipo_acao": "INTEGRAR_TRANCA", "tipo_equipamento": "TRANCA", "id_equipamento": 7,
+         "numero_equipamento": 7, "id_funcionario": 2, "status_destino": "DISPONIVEL",
+         "data_hora": "2024-01-03T12:00:00"}
+    ])
+    with patch('routers.auditoria.get_db', return_value=banco):
+        yield banco
+
+
+def test_consulta_por_funcionario_e_acao(db):
+    response = client.get("/auditoria", params={"idFuncionario": 1, "tipoAcao": "RETIRAR_BICICLETA"})
+
+    assert response.status_code == 200
+    corpo = response.json()
+    assert [r["data_hora"][:10] for r in corpo["itens"]] == [
+        "2024-01-05", "2024-01-04", "2024-01-03", "2024-01-02", "2024-01-01"
+    ]
+    assert corpo["proximoCursor"] is None
+
+
+def test_consulta_por_intervalo_paginada(db):
+    params = {"inicio": "2024-01-02T00:00:00", "fim": "2024-01-04T23:59:59", "ordem": "asc", "limit": 2}
+    primeira = client.get("/auditoria", params=params).json()
+    segunda = client.get("/auditoria", params={**params, "cursor": primeira["proximoCursor"]}).json()
+
+    assert [r["id"] for r in primeira["itens"]] == [2, 3]
+    assert [r["id"] for r in segunda["itens"]] == [6, 4]
+    assert segunda["proximoCursor"] is None
+
+
+def test_consulta_intervalo_invalido(db):
+    response = client.get("/auditoria", params={"inicio": "2024-02-01T00:00:00", "fim": "2024-01-01T00:00:00"})
+
+    assert response.status_code == 422
+    assert response.json()["detail"]["codigo"] == "INTERVALO_INVALIDO"
+
+
+def test_consulta_limites_com_e_sem_fuso(db):
+    params = {"inicio": "2024-01-02T00:00:00Z", "fim": "2024-01-02T10:00:00", "ordem": "asc"}
+    response = client.get("/auditoria", params=params)
+
+    assert response.status_code == 200
+    assert [r["id"] for r in response.json()["itens"]] == [2]
+
+    response = client.get("/auditoria", params={"inicio": "2024-01-02T00:00:00Z", "fim": "2024-01-01T23:00:00"})
+    assert response.status_code == 422
+    assert response.json()["detail"]["codigo"] == "INTERVALO_INVALIDO"
+
+
+def test_consulta_cursor_invalido(db):
+    response = client.get("/auditoria", params={"cursor": "invalido"})
+
+    assert response.status_code == 422
+    assert response.json()["detail"]["codigo"] == "CURSOR_INVALIDO"
@@ -1,7 +1,8 @@
 """Testes para o repositório de auditoria."""
 
 import pytest
-from datetime import datetime
+from unittest.mock import patch
+from datetime import datetime, timedelta, timezone
 from tinydb import TinyDB
 from tinydb.storages import MemoryStorage
 
@@ -427,3 +428,156 @@ class TestAuditoriaRepositoryGetRetiradas:
         )
         
         assert len(registros) == 0
+
+
+class TestAuditoriaRepositoryConsultar:
+    """Testes da consulta combinada com paginação por keyset"""
+
+    @staticmethod
+    def _criar(repo, id_funcionario, id_equipamento, tipo_acao, hora):
+        tipo_equipamento = (
+            TipoEquipamento.BICICLETA if tipo_acao.value.endswith("BICICLETA") else TipoEquipamento.TRANCA
+        )
+        return repo.create(RegistroAuditoria(
+            tipo_acao=tipo_acao,
+            tipo_equipamento=tipo_equipamento,
+            id_equipamento=id_equipamento,
+            numero_equipamento=id_equipamento,
+            id_funcionario=id_funcionario,
+            data_hora=datetime(2024, 1, 1, hora)
+        ))
+
+    def test_consultar_filtros_combinados_ordenados(self, auditoria_repo):
+        self._criar(auditoria_repo, 1, 10, TipoAcao.INTEGRAR_BICICLETA, 8)
+        self._criar(auditoria_repo, 2, 10, TipoAcao.RETIRAR_BICICLETA, 9)
+        self._criar(auditoria_repo, 1, 10, TipoAcao.RETIRAR_BICICLETA, 10)
+        self._criar(auditoria_repo, 1, 20, TipoAcao.RETIRAR_TRANCA, 11)
+
+        registros, cursor = auditoria_repo.consultar(
+            id_funcionario=1,
+            tipo_equipamento=TipoEquipamento.BICICLETA,
+            id_equipamento=10
+        )
+
+        assert [r.data_hora.hour for r in registros] == [10, 8]
+        assert cursor is None
+
+    def test_consultar_intervalo_de_datas(self, auditoria_repo):
+        for hora in range(6, 12):
+            self._criar(auditoria_repo, 1, 10, TipoAcao.INTEGRAR_BICICLETA, hora)
+
+        registros, _ = auditoria_repo.consultar(
+            inicio=datetime(2024, 1, 1, 8),
+            fim=datetime(2024, 1, 1, 10),
+            decrescente=False
+        )
+
+        assert [r.data_hora.hour for r in registros] == [8, 9, 10]
+
+    def test_consultar_paginas_por_cursor(self, auditoria_repo):
+        for hora in range(1, 8):
+            self._criar(auditoria_repo, 3, 10, TipoAcao.RETIRAR_BICICLETA, hora)
+        self._criar(auditoria_repo, 4, 10, TipoAcao.RETIRAR_BICICLETA, 5)
+
+        horas, cursor = [], None
+        while True:
+            registros, cursor = auditoria_repo.consultar(
+                id_funcionario=3, tipo_acao=TipoAcao.RETIRAR_BICICLETA, limite=3, cursor=cursor
+            )
+            horas += [r.data_hora.hour for r in registros]
+            if cursor is None:
+                break
+
+        assert horas == [7, 6, 5, 4, 3, 2, 1]
+
+    def test_consultar_ve_registros_inseridos_fora_do_repositorio(self, db, auditoria_repo):
+        """Inserções diretas na tabela (restauração do banco) reconstroem os índices"""
+        self._criar(auditoria_repo, 1, 10, TipoAcao.INTEGRAR_BICICLETA, 8)
+        db.get_table('auditorias').insert({
+            "id": 99, "tipo_acao": "RETIRAR_TRANCA", "tipo_equipamento": "TRANCA",
+            "id_equipamento": 5, "numero_equipamento": "12345", "id_funcionario": 1,
+            "data_hora": "2024-01-15T11:00:00Z", "status_destino": "EM_REPARO"
+        })
+
+        registros = auditoria_repo.get_by_equipamento(TipoEquipamento.TRANCA, 5)
+
+        assert len(registros) == 1
+        assert registros[0].id == 2
+
+
+    def test_consultar_mistura_formatos_de_data_hora(self, db, auditoria_repo):
+        """Registros com "Z", com deslocamento e sem fuso são comparados no mesmo instante UTC"""
+        db.get_table('auditorias').insert({
+            "tipo_acao": "RETIRAR_TRANCA", "tipo_equipamento": "TRANCA", "id_equipamento": 5,
+            "numero_equipamento": 5, "id_funcionario": 1, "data_hora": "2024-01-01T10:00:00Z"
+        })
+        criado = auditoria_repo.create(RegistroAuditoria(
+            tipo_acao=TipoAcao.RETIRAR_TRANCA,
+            tipo_equipamento=TipoEquipamento.TRANCA,
+            id_equipamento=5,
+            numero_equipamento=5,
+            id_funcionario=1,
+            data_hora=datetime(2024, 1, 1, 7, tzinfo=timezone(timedelta(hours=-3)))
+        ))
+        self._criar(auditoria_repo, 1, 5, TipoAcao.RETIRAR_TRANCA, 11)
+
+        assert criado.data_hora == datetime(2024, 1, 1, 10, tzinfo=timezone.utc)
+
+        registros, _ = auditoria_repo.consultar(
+            inicio=datetime(2024, 1, 1, 10, tzinfo=timezone.utc),
+            fim=datetime(2024, 1, 1, 10),
+            decrescente=False
+        )
+        assert [r.id for r in registros] == [1, 2]
+
+    def test_registro_padrao_gravado_em_utc(self, auditoria_repo):
+        criado = auditoria_repo.create(RegistroAuditoria(
+            tipo_acao=TipoAcao.INTEGRAR_TRANCA,
+            tipo_equipamento=TipoEquipamento.TRANCA,
+            id_equipamento=1,
+            numero_equipamento=1,
+            id_funcionario=1
+        ))
+
+        gravado = auditoria_repo.table.get(doc_id=criado.id)["data_hora"]
+        assert gravado.endswith("+00:00")
+
+
+class TestAuditoriaRepositoryUltimaAcao:
+    """A última ação/retirada de cada equipamento é mantida a cada create"""
+
+    def test_reparador_original_considera_retirada_mais_recente(self, auditoria_repo):
+        for id_funcionario, hora in ((5, 9), (6, 11), (7, 10)):
+            auditoria_repo.create(RegistroAuditoria(
+                tipo_acao=TipoAcao.RETIRAR_BICICLETA,
+                tipo_equipamento=TipoEquipamento.BICICLETA,
+                id_equipamento=10,
+                numero_equipamento=100,
+                id_funcionario=id_funcionario,
+                status_destino="EM_REPARO",
+                data_hora=datetime(2024, 1, 1, hora)
+            ))
+
+        assert auditoria_repo.verificar_reparador_original(TipoEquipamento.BICICLETA, 10, 6) is True
+        assert auditoria_repo.verificar_reparador_original(TipoEquipamento.BICICLETA, 10, 7) is False
+        # Mesmo id em outro tipo de equipamento não se mistura
+        assert auditoria_repo.verificar_reparador_original(TipoEquipamento.TRANCA, 10, 5) is True
+
+    def test_ultima_acao_sem_varrer_historico(self, auditoria_repo):
+        for hora in range(1, 6):
+            auditoria_repo.create(RegistroAuditoria(
+                tipo_acao=TipoAcao.INTEGRAR_TRANCA,
+                tipo_equipamento=TipoEquipamento.TRANCA,
+                id_equipamento=20,
+                numero_equipamento=200,
+                id_funcionario=hora,
+                data_hora=datetime(2024, 1, 1, hora)
+            ))
+
+        with patch.object(auditoria_repo.table, 'all', side_effect=AssertionError("varredura")), \
+             patch.object(auditoria_repo.table, 'search', side_effect=AssertionError("varredura")):
+            ultima = auditoria_repo.get_ultimas_acoes_equipamento(TipoEquipamento.TRANCA, 20, limit=1)
+            ultimas = auditoria_repo.get_ultimas_acoes_equipamento(TipoEquipamento.TRANCA, 20, limit=2)
+
+        assert ultima[0].id_funcionario == 5
+        assert [r.id_funcionario for r in ultimas] == [5, 4]
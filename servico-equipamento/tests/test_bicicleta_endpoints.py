@@ -906,3 +906,71 @@ def test_editar_bicicleta_exception_generica(bicicleta_exemplo):
         
         assert response.status_code == 422
         assert "DADOS_INVALIDOS" in str(response.json())
+
+
+#   TESTES POST /bicicleta/lote  
+
+class DatabaseEmMemoria:
+    """Database em memória com a mesma interface get_table da classe Database"""
+    def __init__(self):
+        from tinydb import TinyDB
+        from tinydb.storages import MemoryStorage
+        self._db = TinyDB(storage=MemoryStorage)
+
+    def get_table(self, name: str):
+        return self._db.table(name)
+
+
+def test_cadastrar_bicicletas_em_lote_reporta_erros_por_item():
+    """Testa cadastro em lote - itens válidos gravados, inválidos e duplicados reportados"""
+    from repositories.bicicleta_repository import BicicletaRepository
+
+    db = DatabaseEmMemoria()
+    BicicletaRepository(db).create(NovaBicicleta(marca="Caloi", modelo="X", ano="2023", numero=100))
+    lote = [
+        {"marca": "Caloi", "modelo": "A", "ano": "2024", "numero": 101},
+        {"marca": "Caloi", "modelo": "B", "ano": "2024", "numero": 100},
+        {"marca": "Caloi", "modelo": "C", "ano": "2024"},
+        {"marca": "Caloi", "modelo": "D", "ano": "2024", "numero": 101},
+        {"marca": "Caloi", "modelo": "E", "ano": "2024", "numero": 102, "status": "DISPONIVEL"},
+    ]
+
+    with patch('routers.bicicleta.get_db', return_value=db):
+        response = client.post("/bicicleta/lote", json=lote)
+
+    assert response.status_code == 200
+    resultados = response.json()
+    assert [r["item"]["id"] if r["item"] else None for r in resultados] == [2, None, None, None, 3]
+    assert [r["erro"]["codigo"] if r["erro"] else None for r in resultados] == [
+        None, "NUMERO_DUPLICADO", "DADOS_INVALIDOS", "NUMERO_DUPLICADO", None
+    ]
+    assert resultados[4]["item"]["status"] == "DISPONIVEL"
+    assert len(db.get_table('bicicletas')) == 3
+
+
+def test_cadastrar_bicicletas_em_lote_acima_do_maximo():
+    """Testa que lotes maiores que o permitido são recusados sem tocar no banco"""
+    from utils.lote import LOTE_MAXIMO_ITENS
+
+    lote = [{"marca": "Caloi", "modelo": "A", "ano": "2024", "numero": n} for n in range(1, LOTE_MAXIMO_ITENS + 2)]
+    with patch('routers.bicicleta.get_db') as mock_db:
+        response = client.post("/bicicleta/lote", json=lote)
+
+    assert response.status_code == 422
+    mock_db.assert_not_called()
+
+
+def test_cadastrar_bicicletas_em_lote_grava_numa_insercao():
+    """Testa que o lote reserva os IDs de uma vez e insere numa única escrita"""
+    from repositories.bicicleta_repository import BicicletaRepository
+
+    repo = BicicletaRepository(DatabaseEmMemoria())
+    repo.table.insert = Mock(side_effect=AssertionError("inserção individual"))
+
+    criadas = repo.create_many([
+        NovaBicicleta(marca="Caloi", modelo="X", ano="2023", numero=n) for n in range(1, 1001)
+    ])
+
+    assert [b.id for b in criadas] == list(range(1, 1001))
+    assert len(repo.table) == 1000
+    assert repo.sequencias.proximo('bicicletas') == 1001
@@ -0,0 +1,204 @@
+"""Testes para o storage em memória do banco de dados (MemoriaJSONStorage)."""
+
+import json
+import pytest
+from unittest.mock import patch
+from tinydb import TinyDB, Query
+
+from database.database import MemoriaJSONStorage
+
+
+@pytest.fixture
+def arquivo(tmp_path):
+    """Arquivo JSON com uma bicicleta"""
+    path = tmp_path / "equipamentos.json"
+    path.write_text(json.dumps({"bicicletas": {"1": {"id": 1, "status": "NOVA"}}}), encoding="utf-8")
+    return path
+
+
+def test_leituras_nao_acessam_o_arquivo(arquivo):
+    """Depois de aberto, get/search são servidos da memória"""
+    db = TinyDB(arquivo, storage=MemoriaJSONStorage, intervalo_flush=60)
+    tabela = db.table('bicicletas')
+
+    with patch('json.load') as mock_load:
+        assert tabela.get(Query().id == 1)['status'] == "NOVA"
+        assert len(tabela.search(Query().status == "NOVA")) == 1
+        mock_load.assert_not_called()
+
+    db.close()
+
+
+def test_escritas_sao_agrupadas_num_unico_flush(arquivo):
+    """Várias escritas na mesma janela geram uma única gravação"""
+    db = TinyDB(arquivo, storage=MemoriaJSONStorage, intervalo_flush=60)
+    tabela = db.table('bicicletas')
+
+    with patch('tinydb.storages.JSONStorage.write') as mock_write:
+        for i in range(2, 12):
+            tabela.insert({"id": i, "status": "NOVA"})
+        mock_write.assert_not_called()
+
+        db.storage.flush()
+        mock_write.assert_called_once()
+
+    db.close()
+
+
+def test_close_grava_alteracoes_pendentes(arquivo):
+    """close() persiste o que ainda não foi gravado"""
+    db = TinyDB(arquivo, storage=MemoriaJSONStorage, intervalo_flush=60)
+    db.table('bicicletas').update({"status": "DISPONIVEL"}, Query().id == 1)
+    db.close()
+
+    dados = json.loads(arquivo.read_text(encoding="utf-8"))
+    assert dados["bicicletas"]["1"]["status"] == "DISPONIVEL"
+
+
+def test_flush_agendado_grava_apos_intervalo(arquivo):
+    """Sem close(), o flush acontece sozinho após a janela"""
+    db = TinyDB(arquivo, storage=MemoriaJSONStorage, intervalo_flush=0.01)
+    db.table('bicicletas').insert({"id": 2, "status": "NOVA"})
+
+    timer = db.storage._timer
+    assert timer is not None
+    timer.join()
+
+    dados = json.loads(arquivo.read_text(encoding="utf-8"))
+    assert "2" in dados["bicicletas"]
+    db.close()
+
+
+def test_agrupar_grava_o_bloco_numa_unica_escrita(arquivo):
+    """Dentro de agrupar() não há flush agendado; o bloco é gravado uma vez ao final"""
+    db = TinyDB(arquivo, storage=MemoriaJSONStorage, intervalo_flush=0.01)
+
+    with patch('tinydb.storages.JSONStorage.write') as mock_write:
+        with db.storage.agrupar():
+            for i in range(2, 12):
+                db.table('bicicletas').insert({"id": i, "status": "NOVA"})
+            db.table('trancas').insert({"id": 1, "status": "LIVRE"})
+            assert db.storage._timer is None
+            mock_write.assert_not_called()
+        mock_write.assert_called_once()
+
+    db.close()
+
+
+def test_sequencia_de_ids_persiste(arquivo):
+    """O contador de IDs é ressemeado dos dados e gravado junto com as tabelas"""
+    from database.sequencias import Sequencias
+
+    class Banco:
+        def __init__(self):
+            self.db = TinyDB(arquivo, storage=MemoriaJSONStorage, intervalo_flush=60)
+
+        def get_table(self, name):
+            return self.db.table(name)
+
+    banco = Banco()
+    assert Sequencias(banco).proximo('bicicletas') == 2
+    banco.db.close()
+
+    dados = json.loads(arquivo.read_text(encoding="utf-8"))
+    assert list(dados["_sequencias"].values()) == [{"tabela": "bicicletas", "valor": 2}]
+
+
+def test_sequencia_em_memoria_no_modo_arquivo(arquivo):
+    """No modo arquivo o contador não é gravado: cada inserção reescreve o arquivo uma vez só"""
+    from database.database import UTF8JSONStorage
+    from database.sequencias import Sequencias
+
+    class Banco:
+        def __init__(self):
+            self.db = TinyDB(arquivo, storage=UTF8JSONStorage)
+
+        def get_table(self, name):
+            return self.db.table(name)
+
+    banco = Banco()
+    sequencias = Sequencias(banco)
+    with patch.object(UTF8JSONStorage, "write", autospec=True, side_effect=UTF8JSONStorage.write) as mock_write:
+        banco.get_table('bicicletas').insert({"id": sequencias.proximo('bicicletas')})
+        mock_write.assert_called_once()
+    assert sequencias.proximo('bicicletas') == 3
+    banco.db.close()
+
+    dados = json.loads(arquivo.read_text(encoding="utf-8"))
+    assert "_sequencias" not in dados
+
+
+def test_close_e_truncate_all_mudam_a_geracao(arquivo):
+    """Índices em memória montados antes de close()/truncate_all() deixam de valer"""
+    from database.database import Database
+
+    banco = object.__new__(Database)
+    banco._db = TinyDB(arquivo, storage=MemoriaJSONStorage, intervalo_flush=60)
+    geracao = banco.geracao
+
+    banco.truncate_all()
+    assert banco.geracao == geracao + 1
+
+    banco.close()
+    assert banco.geracao == geracao + 2
+
+
+def test_flush_agendado_nao_grava_alteracao_pela_metade(arquivo):
+    """Com TinyDBTravado o flush espera a leitura-alteração-escrita terminar"""
+    import threading
+    from database.database import TinyDBTravado
+
+    db = TinyDBTravado(arquivo, storage=MemoriaJSONStorage, intervalo_flush=60)
+    storage = db.storage
+    db.table('bicicletas').insert({"id": 2, "status": "NOVA"})
+
+    flush = threading.Thread(target=storage.flush)
+
+    def alterar(doc):
+        doc["status"] = "DISPONIVEL"
+        # O flush começa no meio da alteração e precisa esperar o write()
+        flush.start()
+        flush.join(timeout=0.2)
+        assert flush.is_alive()
+        doc["marca"] = "Caloi"
+
+    db.table('bicicletas').update(alterar, Query().id == 1)
+    flush.join(timeout=5)
+
+    dados = json.loads(arquivo.read_text(encoding="utf-8"))
+    assert dados["bicicletas"]["1"] == {"id": 1, "status": "DISPONIVEL", "marca": "Caloi"}
+    db.close()
+
+
+def test_transacao_desfeita_nao_deixa_escrita_pela_metade(arquivo):
+    """Se o bloco falha no meio, as tabelas, o arquivo e os índices voltam ao estado anterior"""
+    from database.database import Database, TinyDBTravado, transacao
+    from repositories.tranca_repository import TrancaRepository
+
+    banco = object.__new__(Database)
+    banco._db = TinyDBTravado(arquivo, storage=MemoriaJSONStorage, intervalo_flush=60)
+    banco._db.storage.ao_desfazer.append(banco._descartar_caches)
+    banco.get_table('trancas').insert({"id": 1, "numero": 10, "status": "NOVA", "totem": None, "bicicleta": None})
+    banco.flush()
+
+    repo = TrancaRepository(banco)
+    assert repo.relacao.totem_de(1) is None
+    geracao = banco.geracao
+
+    with pytest.raises(RuntimeError):
+        with transacao(banco):
+            repo.integrar_no_totem(7, {1: None})
+            banco.get_table('bicicletas').update({"status": "DISPONIVEL"}, doc_ids=[1])
+            raise RuntimeError("falha no meio do lote")
+
+    assert banco.geracao == geracao + 1
+    assert banco.get_table('trancas').get(doc_id=1)["status"] == "NOVA"
+    assert banco.get_table('bicicletas').get(doc_id=1)["status"] == "NOVA"
+    assert len(banco.get_table('tranca_totem')) == 0
+    assert repo.relacao.totem_de(1) is None
+
+    banco.close()
+    dados = json.loads(arquivo.read_text(encoding="utf-8"))
+    assert dados["trancas"]["1"]["status"] == "NOVA"
+    assert dados["bicicletas"]["1"]["status"] == "NOVA"
+    assert not dados.get("tranca_totem")
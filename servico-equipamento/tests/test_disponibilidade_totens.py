@@ -0,0 +1,106 @@
+"""Testes para os contadores de disponibilidade por totem."""
+
+import pytest
+from tinydb import TinyDB
+from tinydb.storages import MemoryStorage
+
+from database.disponibilidade_totens import DisponibilidadeTotens, disponibilidade_de
+from repositories.bicicleta_repository import BicicletaRepository
+from repositories.tranca_repository import TrancaRepository
+from models.bicicleta_model import NovaBicicleta, StatusBicicleta
+from models.tranca_model import NovaTranca, StatusTranca
+
+
+class DatabaseWrapper:
+    """Wrapper para simular o comportamento da classe Database nos testes"""
+    def __init__(self, tinydb_instance):
+        self._db = tinydb_instance
+
+    def get_table(self, name: str):
+        """Retorna uma tabela específica do banco de dados"""
+        return self._db.table(name)
+
+
+@pytest.fixture
+def db():
+    """Banco em memória com 3 trancas no totem 1 e 2 bicicletas"""
+    db = DatabaseWrapper(TinyDB(storage=MemoryStorage))
+    trancas = TrancaRepository(db)
+    bicicletas = BicicletaRepository(db)
+    for numero in range(1, 4):
+        trancas.create(NovaTranca(numero=numero, localizacao="ZS", anoDeFabricacao="2024", modelo="A"))
+    for numero in range(1, 3):
+        bicicletas.create(NovaBicicleta(marca="Caloi", modelo="X", ano="2024", numero=numero))
+    trancas.integrar_no_totem(1, {1: None, 2: None, 3: None})
+    return db
+
+
+def reconstruido(db):
+    """Contadores calculados do zero, para comparar com os incrementais"""
+    return DisponibilidadeTotens(db).por_totem()
+
+
+def test_contadores_iniciais(db):
+    assert disponibilidade_de(db).por_totem() == {
+        1: {"trancas": 3, "trancasLivres": 3, "bicicletasDisponiveis": 0, "trancasEmReparo": 0, "bicicletasEmReparo": 0}
+    }
+
+
+def test_contadores_acompanham_trancar_destrancar_e_reparo(db):
+    disponibilidade = disponibilidade_de(db)
+    disponibilidade.por_totem()
+    trancas = TrancaRepository(db)
+    bicicletas = BicicletaRepository(db)
+
+    # Trancar: bicicleta 1 entra na tranca 1
+    trancas.associar_bicicleta(1, 1)
+    bicicletas.update_status(1, StatusBicicleta.DISPONIVEL)
+    trancas.update_status(1, StatusTranca.OCUPADA)
+    assert disponibilidade.por_totem()[1]["bicicletasDisponiveis"] == 1
+    assert disponibilidade.por_totem()[1]["trancasLivres"] == 2
+
+    # Reparo solicitado na bicicleta ainda presa
+    bicicletas.update_status(1, StatusBicicleta.REPARO_SOLICITADO)
+    assert disponibilidade.por_totem()[1]["bicicletasDisponiveis"] == 0
+    assert disponibilidade.por_totem()[1]["bicicletasEmReparo"] == 1
+
+    # Tranca 2 vai para reparo e sai do totem
+    trancas.update_status(2, StatusTranca.EM_REPARO)
+    assert disponibilidade.por_totem()[1]["trancasEmReparo"] == 1
+    trancas.desassociar_totem(2)
+    assert disponibilidade.por_totem()[1]["trancas"] == 2
+
+    # Destrancar: bicicleta sai da tranca 1
+    trancas.associar_bicicleta(1, None)
+    trancas.update_status(1, StatusTranca.LIVRE)
+    bicicletas.delete(2)
+    trancas.delete(3)
+
+    assert disponibilidade.por_totem() == reconstruido(db)
+    assert disponibilidade.por_totem()[1] == {
+        "trancas": 1, "trancasLivres": 1, "bicicletasDisponiveis": 0, "trancasEmReparo": 0, "bicicletasEmReparo": 0
+    }
+
+
+def test_gravacao_por_fora_dos_repositorios_reconstroi(db):
+    disponibilidade = disponibilidade_de(db)
+    disponibilidade.por_totem()
+
+    db.get_table('trancas').insert({
+        "id": 4, "numero": 4, "localizacao": "ZS", "anoDeFabricacao": "2024",
+        "modelo": "A", "status": "LIVRE", "bicicleta": None, "totem": 2
+    })
+
+    assert disponibilidade.por_totem()[2]["trancasLivres"] == 1
+
+
+def test_nova_geracao_do_banco_reconstroi_mesmo_com_a_mesma_contagem(db):
+    disponibilidade = disponibilidade_de(db)
+    disponibilidade.por_totem()
+
+    # Restauração que troca o conteúdo sem mudar a quantidade de trancas
+    db.get_table('trancas').update({"status": "EM_REPARO"}, doc_ids=[1])
+    assert disponibilidade.por_totem()[1]["trancasEmReparo"] == 0
+
+    db.geracao = 1
+    assert disponibilidade.por_totem()[1]["trancasEmReparo"] == 1
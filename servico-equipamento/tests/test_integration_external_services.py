@@ -1012,3 +1012,105 @@ class TestAluguelServiceUnit:
             assert sucesso is True
             assert dados["nome"] == "Fulano Beltrano"
             assert dados["status"] == "CONFIRMADO"
+
+
+# ==============================================================================
+# TESTES DO CACHE DE VALIDAÇÃO DE FUNCIONÁRIOS
+# ==============================================================================
+
+class TestCacheValidacaoFuncionario:
+    """
+    Testes do cache LRU+TTL de AluguelService.validar_funcionario.
+    """
+
+    def _servico(self, *respostas):
+        from services.aluguel_service import AluguelService
+        service = AluguelService(base_url="http://test:8001")
+        service.obter_funcionario = Mock(side_effect=list(respostas))
+        return service
+
+    def test_validacao_repetida_usa_cache(self):
+        """Testa que o mesmo funcionário é buscado uma vez só"""
+        service = self._servico((True, {"id": 1, "email": "employee@example.com"}))
+
+        for _ in range(5):
+            assert service.validar_funcionario(1) == (True, "employee@example.com")
+
+        service.obter_funcionario.assert_called_once_with(1)
+        estatisticas = service.cache_funcionarios.estatisticas()
+        assert (estatisticas["acertos"], estatisticas["faltas"]) == (4, 1)
+        assert estatisticas["taxaAcerto"] == 0.8
+
+    def test_funcionario_inexistente_fica_em_cache(self):
+        """Testa cache negativo para funcionário não encontrado"""
+        service = self._servico((False, {"error": "Funcionário não encontrado", "status_code": 422}))
+
+        assert service.validar_funcionario(999) == (False, None)
+        assert service.validar_funcionario(999) == (False, None)
+
+        service.obter_funcionario.assert_called_once_with(999)
+
+    def test_falha_de_comunicacao_nao_fica_em_cache(self):
+        """Testa que timeout/erro de conexão não é guardado"""
+        service = self._servico(
+            (False, {"error": "Timeout ao conectar com serviço de aluguel"}),
+            (True, {"id": 1, "email": "employee@example.com"}),
+        )
+
+        assert service.validar_funcionario(1) == (False, None)
+        assert service.validar_funcionario(1) == (True, "employee@example.com")
+
+    def test_entrada_expira_e_lru_descarta_a_menos_usada(self):
+        """Testa validade (TTL) e limite de tamanho do cache"""
+        from services.aluguel_service import CacheTTL
+
+        agora = [0.0]
+        cache = CacheTTL(tamanho=2, relogio=lambda: agora[0])
+        buscar = Mock(side_effect=lambda: ("valor", 10))
+
+        cache.obter(1, buscar)
+        cache.obter(2, buscar)
+        cache.obter(1, buscar)      # 1 passa a ser a mais recente
+        cache.obter(3, buscar)      # descarta 2
+        assert buscar.call_count == 3
+
+        cache.obter(1, buscar)
+        assert buscar.call_count == 3
+        cache.obter(2, buscar)
+        assert buscar.call_count == 4
+
+        agora[0] = 11.0
+        cache.obter(1, buscar)
+        assert buscar.call_count == 5
+
+    def test_validacoes_simultaneas_fazem_uma_chamada(self):
+        """Testa que chamadas concorrentes pelo mesmo funcionário são agrupadas"""
+        import threading
+        from services.aluguel_service import AluguelService
+
+        liberar = threading.Event()
+        chamadas = []
+
+        def obter_funcionario(id_funcionario):
+            chamadas.append(id_funcionario)
+            liberar.wait(5)
+            return True, {"id": id_funcionario, "email": "employee@example.com"}
+
+        service = AluguelService(base_url="http://test:8001")
+        service.obter_funcionario = obter_funcionario
+
+        resultados = []
+        threads = [
+            threading.Thread(target=lambda: resultados.append(service.validar_funcionario(1)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        while service.cache_funcionarios.estatisticas()["coalescidas"] < 4:
+            threading.Event().wait(0.01)
+        liberar.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert chamadas == [1]
+        assert resultados == [(True, "employee@example.com")] * 5
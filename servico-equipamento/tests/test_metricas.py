@@ -0,0 +1,107 @@
+"""
+Testes do endpoint /metrics (formato texto do Prometheus).
+"""
+
+import re
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from utils.metricas import BUCKETS, Metricas, instalar_metricas
+
+
+def criar_app(ativo=True):
+    app = FastAPI()
+
+    @app.get("/tranca/{id_tranca}")
+    def obter(id_tranca: int):
+        if id_tranca == 0:
+            raise HTTPException(status_code=404, detail="não encontrada")
+        return {"id": id_tranca}
+
+    @app.get("/falha")
+    def falha():
+        raise RuntimeError("erro inesperado")
+
+    instalar_metricas(app, ativo=ativo)
+    return app
+
+
+def valor(texto, serie):
+    """Valor da linha exata ``serie`` no texto exportado"""
+    for linha in texto.splitlines():
+        if linha.startswith(serie + " "):
+            return float(linha.rsplit(" ", 1)[1])
+    return None
+
+
+def test_requisicoes_agrupadas_pelo_template_da_rota():
+    client = TestClient(criar_app(), raise_server_exceptions=False)
+    for i in (1, 2, 3, 0):
+        client.get(f"/tranca/{i}")
+    client.get("/nao/existe")
+    client.get("/falha")
+
+    texto = client.get("/metrics").text
+
+    assert valor(texto, 'http_requests_total{method="GET",route="/tranca/{id_tranca}",status="200"}') == 3
+    assert valor(texto, 'http_requests_total{method="GET",route="/tranca/{id_tranca}",status="404"}') == 1
+    assert valor(texto, 'http_requests_total{method="GET",route="sem_rota",status="404"}') == 1
+    assert valor(texto, 'http_requests_total{method="GET",route="/falha",status="500"}') == 1
+    # Os IDs não viram séries próprias
+    assert "/tranca/1" not in texto
+    assert valor(texto, 'http_request_duration_seconds_count{method="GET",route="/tranca/{id_tranca}",status="200"}') == 3
+    assert valor(texto, "http_requests_in_progress") == 1  # a própria leitura do /metrics
+    assert valor(texto, "threadpool_workers_max") > 0
+    assert valor(texto, "threadpool_tasks_waiting") == 0
+    assert valor(texto, "process_cpu_seconds_total") > 0
+
+
+def test_histograma_acumula_os_buckets():
+    metricas = Metricas()
+    for segundos in (0.001, 0.005, 0.03, 0.03, 20.0):
+        metricas.iniciar()
+        metricas.registrar("POST", "/bicicleta", "201", segundos)
+
+    texto = metricas.exportar()
+    rotulos = 'method="POST",route="/bicicleta",status="201"'
+    buckets = {
+        float(le): int(n) for le, n in
+        re.findall(r'http_request_duration_seconds_bucket\{' + re.escape(rotulos) + r',le="([\d.]+)"\} (\d+)', texto)
+    }
+
+    assert list(buckets) == list(BUCKETS)
+    assert buckets[0.005] == 2  # o limite do bucket é inclusivo
+    assert buckets[0.025] == 2
+    assert buckets[0.05] == 4
+    assert buckets[10.0] == 4
+    assert valor(texto, f'http_request_duration_seconds_bucket{{{rotulos},le="+Inf"}}') == 5
+    assert valor(texto, f"http_request_duration_seconds_sum{{{rotulos}}}") == 20.066
+    assert valor(texto, "http_requests_in_progress") == 0
+
+
+def test_rotulos_sao_escapados():
+    metricas = Metricas()
+    metricas.iniciar()
+    metricas.registrar('GE"T', "/a\\b", "200", 0.01)
+
+    assert 'method="GE\\"T",route="/a\\\\b"' in metricas.exportar()
+
+
+def test_metricas_desligadas():
+    client = TestClient(criar_app(ativo=False))
+    client.get("/tranca/1")
+
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_no_app_do_servico():
+    from main import app
+
+    client = TestClient(app)
+    client.get("/health")
+    resposta = client.get("/metrics")
+
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'route="/health",status="200"' in resposta.text
@@ -0,0 +1,146 @@
+"""
+Testes da paginação por cursor e do streaming NDJSON das listagens.
+"""
+
+import json
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from tinydb import TinyDB
+from tinydb.storages import MemoryStorage
+
+from main import app
+from database.paginacao import CursorInvalido, codificar_cursor, decodificar_cursor, paginar
+
+
+client = TestClient(app)
+
+
+class MemoryDatabase:
+    """Database em memória com a mesma interface get_table da classe Database"""
+    def __init__(self):
+        self._db = TinyDB(storage=MemoryStorage)
+
+    def get_table(self, name: str):
+        return self._db.table(name)
+
+
+@pytest.fixture
+def db():
+    banco = MemoryDatabase()
+    banco.get_table('bicicletas').insert_multiple([
+        {"id": i, "marca": "Caloi", "modelo": "Urbana", "ano": "2023", "numero": i, "status": "DISPONIVEL"}
+        for i in range(1, 6)
+    ])
+    with patch('routers.bicicleta.get_db', return_value=banco):
+        yield banco
+
+
+def test_cursor_e_opaco_e_reversivel():
+    cursor = codificar_cursor(42)
+    assert "42" not in cursor
+    assert decodificar_cursor(cursor) == 42
+
+
+@pytest.mark.parametrize("cursor", ["???", "bm9wZQ", codificar_cursor(-1)])
+def test_cursor_invalido(cursor):
+    with pytest.raises(CursorInvalido):
+        decodificar_cursor(cursor)
+
+
+def test_paginar_ignora_doc_ids_removidos():
+    tabela = TinyDB(storage=MemoryStorage).table('trancas')
+    tabela.insert_multiple([{"id": i} for i in range(1, 7)])
+    tabela.remove(doc_ids=[2, 3])
+
+    pagina, cursor = paginar(tabela, 2, None)
+    assert [d["id"] for d in pagina] == [1, 4]
+
+    pagina, cursor = paginar(tabela, 2, cursor)
+    assert [d["id"] for d in pagina] == [5, 6]
+    assert cursor is None
+
+
+def test_paginar_salta_faixas_removidas_e_ve_escritas_novas():
+    """Cursor depois de uma faixa grande removida, chaves fora de ordem e inserções entre páginas"""
+    from tinydb.table import Document
+
+    tabela = TinyDB(storage=MemoryStorage).table('trancas')
+    tabela.insert_multiple([{"id": i} for i in range(1, 10_001)])
+    tabela.remove(doc_ids=list(range(2, 10_000)))
+    tabela.insert(Document({"id": 0}, doc_id=20_000))
+    tabela.insert(Document({"id": -1}, doc_id=15_000))
+
+    pagina, cursor = paginar(tabela, 2, None)
+    assert [d.doc_id for d in pagina] == [1, 10_000]
+
+    tabela.insert(Document({"id": -2}, doc_id=12_000))
+    pagina, cursor = paginar(tabela, 2, cursor)
+    assert [d.doc_id for d in pagina] == [12_000, 15_000]
+    pagina, cursor = paginar(tabela, 2, cursor)
+    assert [d.doc_id for d in pagina] == [20_000]
+    assert cursor is None
+
+
+def test_listagem_sem_parametros_mantem_formato(db):
+    response = client.get("/bicicleta")
+
+    assert response.status_code == 200
+    assert [b["id"] for b in response.json()] == [1, 2, 3, 4, 5]
+
+
+def test_listagem_paginada_percorre_todas_as_paginas(db):
+    ids, cursor = [], None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/bicicleta", params=params)
+        assert response.status_code == 200
+        corpo = response.json()
+        ids += [b["id"] for b in corpo["itens"]]
+        cursor = corpo["proximoCursor"]
+        if cursor is None:
+            break
+
+    assert ids == [1, 2, 3, 4, 5]
+
+
+def test_listagem_paginada_cursor_invalido(db):
+    response = client.get("/bicicleta", params={"limit": 2, "cursor": "invalido"})
+
+    assert response.status_code == 422
+    assert response.json()["detail"]["codigo"] == "CURSOR_INVALIDO"
+
+
+def test_listagem_ndjson(db):
+    response = client.get("/bicicleta", headers={"Accept": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    linhas = [json.loads(l) for l in response.text.splitlines()]
+    assert [b["id"] for b in linhas] == [1, 2, 3, 4, 5]
+
+
+def test_listagem_ndjson_com_limite_e_cursor(db):
+    response = client.get(
+        "/bicicleta",
+        params={"limit": 2, "cursor": codificar_cursor(1)},
+        headers={"Accept": "application/x-ndjson"}
+    )
+
+    assert [json.loads(l)["id"] for l in response.text.splitlines()] == [2, 3]
+
+
+def test_listagem_de_trancas_paginada_mantem_alias():
+    """A serialização customizada da Tranca (bicicleta_id) vale também na página"""
+    banco = MemoryDatabase()
+    banco.get_table('trancas').insert({
+        "id": 1, "numero": 1, "localizacao": "Rio", "anoDeFabricacao": "2023",
+        "modelo": "X", "status": "OCUPADA", "bicicleta": 7, "totem": None
+    })
+
+    with patch('routers.tranca.get_db', return_value=banco):
+        response = client.get("/tranca", params={"limit": 10})
+
+    assert response.json()["itens"][0]["bicicleta_id"] == 7
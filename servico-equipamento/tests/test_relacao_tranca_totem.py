@@ -0,0 +1,140 @@
+"""Testes para o índice da relação tranca-totem."""
+
+import pytest
+from tinydb import TinyDB
+from tinydb.storages import MemoryStorage
+
+from database.init_data import init_db
+from database.relacao_tranca_totem import RelacaoTrancaTotem, relacao_tranca_totem_de
+from repositories.totem_repository import TotemRepository
+from repositories.tranca_repository import TrancaRepository
+
+
+class DatabaseWrapper:
+    """Wrapper para simular o comportamento da classe Database nos testes"""
+    def __init__(self, tinydb_instance):
+        self._db = tinydb_instance
+
+    def get_table(self, name: str):
+        """Retorna uma tabela específica do banco de dados"""
+        return self._db.table(name)
+
+    def truncate_all(self):
+        self._db.drop_tables()
+
+
+def tranca(tranca_id, totem=None):
+    return {
+        "id": tranca_id, "numero": tranca_id, "localizacao": "ZS", "anoDeFabricacao": "2024",
+        "modelo": "A", "status": "LIVRE", "bicicleta": None, "totem": totem
+    }
+
+
+@pytest.fixture
+def db():
+    """Banco legado com as duas fontes da relação divergindo"""
+    db = DatabaseWrapper(TinyDB(storage=MemoryStorage))
+    db.get_table('totems').insert_multiple([{"id": 1, "localizacao": "ZS"}, {"id": 2, "localizacao": "ZN"}])
+    db.get_table('trancas').insert_multiple([
+        tranca(1, totem=1),   # só pelo campo
+        tranca(2),            # só pela tabela
+        tranca(3, totem=2),   # campo e tabela divergem
+        tranca(4, totem=1),   # linha repetida
+        tranca(5),            # fora de totem
+    ])
+    db.get_table('tranca_totem').insert_multiple([
+        {"idTranca": 2, "idTotem": 1},
+        {"idTranca": 3, "idTotem": 1},
+        {"idTranca": 4, "idTotem": 1},
+        {"idTranca": 4, "idTotem": 1},
+        {"idTranca": 99, "idTotem": 2},  # tranca removida
+    ])
+    return db
+
+
+def relacoes(db):
+    return sorted((r["idTranca"], r["idTotem"]) for r in db.get_table('tranca_totem').all())
+
+
+def test_migracao_reconcilia_as_duas_fontes(db):
+    relacao = RelacaoTrancaTotem(db)
+
+    assert relacao.trancas_de(1) == [1, 2, 4]
+    assert relacao.trancas_de(2) == [3]
+    assert relacao.totem_de(2) == 1
+    assert relacao.totem_de(5) is None
+
+    assert relacoes(db) == [(1, 1), (2, 1), (3, 2), (4, 1)]
+    totens = {t["id"]: t["totem"] for t in db.get_table('trancas').all()}
+    assert totens == {1: 1, 2: 1, 3: 2, 4: 1, 5: None}
+
+
+def test_migracao_nao_grava_em_banco_reconciliado(db):
+    RelacaoTrancaTotem(db).trancas_de(1)
+    antes = (db.get_table('trancas').all(), relacoes(db))
+
+    # Conta as escritas a partir daqui
+    escritas = []
+    tabela = db.get_table('tranca_totem')
+    original = tabela._update_table
+    tabela._update_table = lambda *a: escritas.append(a) or original(*a)
+
+    assert RelacaoTrancaTotem(db).trancas_de(1) == [1, 2, 4]
+    assert escritas == []
+    assert (db.get_table('trancas').all(), relacoes(db)) == antes
+
+
+def test_repositorios_mantem_o_indice(db):
+    trancas = TrancaRepository(db)
+    totens = TotemRepository(db)
+    relacao = relacao_tranca_totem_de(db)
+    assert totens.get_trancas_ids(1) == [1, 2, 4]
+
+    trancas.associar_totem(5, 1)
+    trancas.associar_totem(1, 2)
+    trancas.desassociar_totem(2)
+    trancas.delete(4)
+    trancas.integrar_no_totem(2, {2: None})
+
+    assert totens.get_trancas_ids(1) == [5]
+    assert [t.id for t in trancas.get_by_totem(2)] == [1, 2, 3]
+    assert trancas.get_totem_id(1) == 2
+    assert trancas.get_totem_id(4) is None
+    # O incremental bate com um índice montado do zero
+    assert relacao._totem_da_tranca == {5: 1, 1: 2, 2: 2, 3: 2}
+    assert RelacaoTrancaTotem(db).trancas_de(2) == [1, 2, 3]
+
+
+def test_remover_totem_desassocia_suas_trancas(db):
+    trancas = TrancaRepository(db)
+    totens = TotemRepository(db)
+    assert totens.get_trancas_ids(1) == [1, 2, 4]
+
+    assert totens.delete(1) is True
+
+    assert totens.get_trancas_ids(1) == []
+    assert trancas.get_totem_id(1) is None
+    assert relacoes(db) == [(3, 2)]
+    assert {t["id"] for t in db.get_table('trancas').search(lambda d: d["totem"] is not None)} == {3}
+    assert RelacaoTrancaTotem(db).trancas_de(1) == []
+
+
+def test_indice_e_reconstruido_se_a_tabela_mudar_por_fora(db):
+    relacao = relacao_tranca_totem_de(db)
+    assert relacao.trancas_de(2) == [3]
+
+    db.get_table('tranca_totem').insert({"idTranca": 5, "idTotem": 2})
+
+    assert relacao.trancas_de(2) == [3, 5]
+    assert db.get_table('trancas').get(doc_id=5)["totem"] == 2
+
+
+def test_init_db_descarta_o_indice(db):
+    relacao = relacao_tranca_totem_de(db)
+    relacao.trancas_de(1)
+
+    init_db(db)
+
+    assert relacao.trancas_de(1) == sorted(r["idTranca"] for r in db.get_table('tranca_totem').search(
+        lambda r: r["idTotem"] == 1
+    ))
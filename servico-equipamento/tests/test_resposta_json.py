@@ -0,0 +1,58 @@
+"""
+Testes da resposta JSON rápida: o formato na rede deve ser idêntico ao do JSONResponse.
+"""
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from tinydb import TinyDB
+from tinydb.storages import MemoryStorage
+
+from routers.tranca import router as tranca_router
+from utils.resposta_json import RespostaJSONRapida, classe_resposta_json
+
+
+class MemoryDatabase:
+    """Database em memória com a mesma interface get_table da classe Database"""
+    def __init__(self):
+        self._db = TinyDB(storage=MemoryStorage)
+
+    def get_table(self, name: str):
+        return self._db.table(name)
+
+
+def _corpo(classe, rota, banco):
+    app = FastAPI(default_response_class=classe)
+    app.include_router(tranca_router)
+    with patch('routers.tranca.get_db', return_value=banco):
+        return TestClient(app).get(rota)
+
+
+def test_listagem_de_trancas_tem_os_mesmos_bytes():
+    banco = MemoryDatabase()
+    banco.get_table('trancas').insert_multiple([
+        {"id": 1, "numero": 1, "localizacao": "Niterói", "anoDeFabricacao": "2023",
+         "modelo": "X", "status": "OCUPADA", "bicicleta": 7, "totem": None},
+        {"id": 2, "numero": 2, "localizacao": "São Gonçalo", "anoDeFabricacao": "2024",
+         "modelo": "Y", "status": "LIVRE", "bicicleta": None, "totem": 3},
+    ])
+
+    padrao = _corpo(JSONResponse, "/tranca", banco)
+    rapido = _corpo(RespostaJSONRapida, "/tranca", banco)
+
+    assert rapido.headers["content-type"] == padrao.headers["content-type"]
+    assert rapido.content == padrao.content
+    assert rapido.json()[0]["bicicleta_id"] == 7
+
+
+def test_erros_tem_os_mesmos_bytes():
+    banco = MemoryDatabase()
+
+    assert _corpo(RespostaJSONRapida, "/tranca/99", banco).content == _corpo(JSONResponse, "/tranca/99", banco).content
+
+
+def test_modo_padrao_nao_altera_a_aplicacao():
+    assert classe_resposta_json(rapido=True) is RespostaJSONRapida
+    assert FastAPI(default_response_class=classe_resposta_json(rapido=False)).router.default_response_class == \
+        FastAPI().router.default_response_class
@@ -428,7 +428,7 @@ def test_listar_trancas_do_totem_sucesso(totem_exemplo, tranca_exemplo):
         
         mock_totem_instance.get_by_id.return_value = totem_exemplo
         mock_totem_instance.get_trancas_ids.return_value = [1]
-        mock_tranca_instance.get_by_id.return_value = tranca_exemplo
+        mock_tranca_instance.get_many.return_value = [tranca_exemplo]
         
         response = client.get("/totem/1/trancas")
         
@@ -458,7 +458,7 @@ def test_listar_trancas_do_totem_multiplas_trancas(totem_exemplo):
             for i in [1, 2, 3]
         ]
         
-        mock_tranca_instance.get_by_id.side_effect = trancas
+        mock_tranca_instance.get_many.return_value = trancas
         
         response = client.get("/totem/1/trancas")
         
@@ -479,6 +479,7 @@ def test_listar_trancas_do_totem_sem_trancas(totem_exemplo):
         
         mock_totem_instance.get_by_id.return_value = totem_exemplo
         mock_totem_instance.get_trancas_ids.return_value = []
+        mock_tranca_instance.get_many.return_value = []
         
         response = client.get("/totem/1/trancas")
         
@@ -543,8 +544,8 @@ def test_listar_bicicletas_do_totem_sucesso(totem_exemplo, tranca_com_bicicleta,
         
         mock_totem_instance.get_by_id.return_value = totem_exemplo
         mock_totem_instance.get_trancas_ids.return_value = [2]
-        mock_tranca_instance.get_by_id.return_value = tranca_com_bicicleta
-        mock_bici_instance.get_by_id.return_value = bicicleta_exemplo
+        mock_tranca_instance.get_many.return_value = [tranca_com_bicicleta]
+        mock_bici_instance.get_many.return_value = [bicicleta_exemplo]
         
         response = client.get("/totem/1/bicicletas")
         
@@ -559,16 +560,19 @@ def test_listar_bicicletas_do_totem_sem_bicicletas(totem_exemplo, tranca_exemplo
     with patch('routers.totem.get_db'), \
          patch('routers.totem.TotemRepository') as mock_totem_repo, \
          patch('routers.totem.TrancaRepository') as mock_tranca_repo, \
-         patch('routers.totem.BicicletaRepository'):
+         patch('routers.totem.BicicletaRepository') as mock_bici_repo:
         
         mock_totem_instance = Mock()
         mock_totem_repo.return_value = mock_totem_instance
         mock_tranca_instance = Mock()
         mock_tranca_repo.return_value = mock_tranca_instance
+        mock_bici_instance = Mock()
+        mock_bici_repo.return_value = mock_bici_instance
         
         mock_totem_instance.get_by_id.return_value = totem_exemplo
         mock_totem_instance.get_trancas_ids.return_value = [1]
-        mock_tranca_instance.get_by_id.return_value = tranca_exemplo  # Sem bicicleta
+        mock_tranca_instance.get_many.return_value = [tranca_exemplo]  # Sem bicicleta
+        mock_bici_instance.get_many.return_value = []
         
         response = client.get("/totem/1/bicicletas")
         
@@ -608,13 +612,16 @@ def test_listar_bicicletas_do_totem_multiplas_bicicletas(totem_exemplo):
             Bicicleta(id=20, marca="Trek", modelo="Y", ano="2023", numero=200, status=StatusBicicleta.DISPONIVEL),
         ]
         
-        mock_tranca_instance.get_by_id.side_effect = trancas
-        mock_bici_instance.get_by_id.side_effect = bicicletas
+        mock_tranca_instance.get_many.return_value = trancas
+        mock_bici_instance.get_many.return_value = bicicletas
         
         response = client.get("/totem/1/bicicletas")
         
         assert response.status_code == 200
         assert len(response.json()) == 2
+        # Uma consulta para as trancas e uma para as bicicletas
+        mock_tranca_instance.get_many.assert_called_once_with([1, 2, 3])
+        mock_bici_instance.get_many.assert_called_once_with([10, 20])
 
 
 def test_listar_bicicletas_totem_nao_encontrado():
@@ -674,8 +681,8 @@ def test_listar_bicicletas_sem_duplicatas(totem_exemplo):
         bicicleta = Bicicleta(id=10, marca="Caloi", modelo="X", ano="2023",
                              numero=100, status=StatusBicicleta.DISPONIVEL)
         
-        mock_tranca_instance.get_by_id.side_effect = [tranca_1, tranca_2]
-        mock_bici_instance.get_by_id.return_value = bicicleta
+        mock_tranca_instance.get_many.return_value = [tranca_1, tranca_2]
+        mock_bici_instance.get_many.return_value = [bicicleta]
         
         response = client.get("/totem/1/bicicletas")
         
@@ -683,6 +690,7 @@ def test_listar_bicicletas_sem_duplicatas(totem_exemplo):
         assert response.status_code == 200
         assert len(response.json()) == 1
         assert response.json()[0]["id"] == 10
+        mock_bici_instance.get_many.assert_called_once_with([10])
 
 
 def test_listar_bicicletas_totem_sem_trancas(totem_exemplo):
@@ -788,3 +796,169 @@ def test_editar_totem_campos_especiais():
         assert response.status_code == 200
         assert "Praça XV" in response.json()["localizacao"]
         assert "São João" in response.json()["descricao"]
+
+
+# TESTES POST /totem/{id}/integrarNaRede (lote)
+
+class DatabaseEmMemoria:
+    """Database em memória com a mesma interface get_table da classe Database"""
+    def __init__(self):
+        from tinydb import TinyDB
+        from tinydb.storages import MemoryStorage
+        self._db = TinyDB(storage=MemoryStorage)
+
+    def get_table(self, name: str):
+        return self._db.table(name)
+
+
+@pytest.fixture
+def totem_novo():
+    """Totem com 3 trancas NOVAS, 2 bicicletas NOVAS e 1 bicicleta DISPONIVEL"""
+    db = DatabaseEmMemoria()
+    db.get_table('totems').insert({"id": 1, "localizacao": "ZS", "descricao": "Novo"})
+    for i in range(1, 4):
+        db.get_table('trancas').insert({
+            "id": i, "numero": i, "localizacao": "ZS", "anoDeFabricacao": "2024",
+            "modelo": "A", "status": "NOVA", "bicicleta": None, "totem": None
+        })
+    for i, status_bicicleta in enumerate(["NOVA", "NOVA", "DISPONIVEL"], start=1):
+        db.get_table('bicicletas').insert({
+            "id": i, "marca": "Caloi", "modelo": "X", "ano": "2024", "numero": 100 + i, "status": status_bicicleta
+        })
+    return db
+
+
+def test_integrar_totem_em_lote(totem_novo):
+    """Testa integração em lote - uma validação de funcionário, um email, erros por par"""
+    with patch('routers.totem.get_db', return_value=totem_novo), \
+         patch('routers.totem.aluguel_service') as mock_aluguel, \
+         patch('routers.totem.email_service') as mock_email:
+        mock_aluguel.validar_funcionario.return_value = (True, "employee@example.com")
+        mock_email.notificar_integracao_totem.return_value = (True, {})
+
+        response = client.post("/totem/1/integrarNaRede", json={
+            "idFuncionario": 7,
+            "itens": [
+                {"idTranca": 1, "idBicicleta": 1},
+                {"idTranca": 2},
+                {"idTranca": 3, "idBicicleta": 3},
+                {"idTranca": 1, "idBicicleta": 2},
+            ]
+        })
+
+    assert response.status_code == 200
+    corpo = response.json()
+    assert corpo["integrados"] == 2
+    assert corpo["emailEnviado"] is True
+    assert [r["integrado"] for r in corpo["resultados"]] == [True, True, False, False]
+    assert corpo["resultados"][2]["erro"]["codigo"] == "STATUS_BICICLETA_INVALIDO"
+    assert corpo["resultados"][3]["erro"]["codigo"] == "TRANCA_REPETIDA"
+
+    mock_aluguel.validar_funcionario.assert_called_once_with(7)
+    mock_email.notificar_integracao_totem.assert_called_once()
+    assert mock_email.notificar_integracao_totem.call_args.kwargs["pares"] == [(1, 1), (2, None)]
+
+    trancas = {t["id"]: t for t in totem_novo.get_table('trancas').all()}
+    assert (trancas[1]["status"], trancas[1]["bicicleta"], trancas[1]["totem"]) == ("OCUPADA", 1, 1)
+    assert (trancas[2]["status"], trancas[2]["bicicleta"], trancas[2]["totem"]) == ("LIVRE", None, 1)
+    assert trancas[3]["status"] == "NOVA"
+    bicicletas = {b["id"]: b["status"] for b in totem_novo.get_table('bicicletas').all()}
+    assert bicicletas == {1: "DISPONIVEL", 2: "NOVA", 3: "DISPONIVEL"}
+    assert sorted(r["idTranca"] for r in totem_novo.get_table('tranca_totem').all()) == [1, 2]
+    acoes = [
+        (a["tipo_acao"], a["id_equipamento"], a["status_destino"]) for a in totem_novo.get_table('auditorias').all()
+    ]
+    assert acoes == [
+        ("INTEGRAR_TRANCA", 1, "OCUPADA"), ("INTEGRAR_BICICLETA", 1, "DISPONIVEL"), ("INTEGRAR_TRANCA", 2, "LIVRE")
+    ]
+
+
+def test_integrar_totem_funcionario_invalido(totem_novo):
+    """Testa que o lote é recusado inteiro se o funcionário não existe"""
+    with patch('routers.totem.get_db', return_value=totem_novo), \
+         patch('routers.totem.aluguel_service') as mock_aluguel, \
+         patch('routers.totem.email_service') as mock_email:
+        mock_aluguel.validar_funcionario.return_value = (False, None)
+
+        response = client.post("/totem/1/integrarNaRede", json={"idFuncionario": 999, "itens": [{"idTranca": 1}]})
+
+    assert response.status_code == 422
+    assert "FUNCIONARIO_NAO_ENCONTRADO" in str(response.json())
+    mock_email.notificar_integracao_totem.assert_not_called()
+    assert totem_novo.get_table('trancas').get(doc_id=1)["status"] == "NOVA"
+
+
+def test_integrar_totem_lote_acima_do_maximo(totem_novo):
+    """Testa que lotes com mais pares que o permitido são recusados antes de qualquer consulta"""
+    from models.totem_model import INTEGRACAO_MAXIMO_ITENS
+
+    itens = [{"idTranca": i} for i in range(1, INTEGRACAO_MAXIMO_ITENS + 2)]
+    with patch('routers.totem.get_db', return_value=totem_novo), \
+         patch('routers.totem.aluguel_service') as mock_aluguel:
+        response = client.post("/totem/1/integrarNaRede", json={"idFuncionario": 7, "itens": itens})
+
+    assert response.status_code == 422
+    mock_aluguel.validar_funcionario.assert_not_called()
+
+
+def test_integrar_totem_nao_encontrado(totem_novo):
+    """Testa integração em totem inexistente"""
+    with patch('routers.totem.get_db', return_value=totem_novo):
+        response = client.post("/totem/99/integrarNaRede", json={"idFuncionario": 7, "itens": [{"idTranca": 1}]})
+
+    assert response.status_code == 404
+
+
+def test_disponibilidade_dos_totens(totem_novo):
+    """Testa GET /totem/disponibilidade - inclusive totens sem trancas"""
+    totem_novo.get_table('totems').insert({"id": 2, "localizacao": "ZN", "descricao": "Vazio"})
+
+    with patch('routers.totem.get_db', return_value=totem_novo), \
+         patch('routers.totem.aluguel_service') as mock_aluguel, \
+         patch('routers.totem.email_service') as mock_email:
+        mock_aluguel.validar_funcionario.return_value = (True, "employee@example.com")
+        mock_email.notificar_integracao_totem.return_value = (True, {})
+        client.post("/totem/1/integrarNaRede", json={
+            "idFuncionario": 7,
+            "itens": [{"idTranca": 1, "idBicicleta": 1}, {"idTranca": 2}]
+        })
+
+        response = client.get("/totem/disponibilidade")
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"idTotem": 1, "localizacao": "ZS", "trancas": 2, "trancasLivres": 1,
+         "bicicletasDisponiveis": 1, "trancasEmReparo": 0, "bicicletasEmReparo": 0},
+        {"idTotem": 2, "localizacao": "ZN", "trancas": 0, "trancasLivres": 0,
+         "bicicletasDisponiveis": 0, "trancasEmReparo": 0, "bicicletasEmReparo": 0},
+    ]
+
+
+def test_get_many_preserva_ordem_e_ignora_inexistentes(totem_novo):
+    """Testa get_many dos repositórios - ordem dos IDs, repetidos e inexistentes"""
+    from repositories.tranca_repository import TrancaRepository
+    from repositories.bicicleta_repository import BicicletaRepository
+
+    trancas = TrancaRepository(totem_novo).get_many([3, 99, 1, 3])
+    assert [t.id for t in trancas] == [3, 1]
+    assert [b.id for b in BicicletaRepository(totem_novo).get_many(iter([2, 1]))] == [2, 1]
+    assert TrancaRepository(totem_novo).get_many([]) == []
+
+
+def test_listar_trancas_e_bicicletas_do_totem_integrado(totem_novo):
+    """Testa as listagens do totem com os repositórios reais depois de uma integração"""
+    with patch('routers.totem.get_db', return_value=totem_novo), \
+         patch('routers.totem.aluguel_service') as mock_aluguel, \
+         patch('routers.totem.email_service') as mock_email:
+        mock_aluguel.validar_funcionario.return_value = (True, "employee@example.com")
+        mock_email.notificar_integracao_totem.return_value = (True, {})
+        client.post("/totem/1/integrarNaRede", json={
+            "idFuncionario": 7,
+            "itens": [{"idTranca": 1, "idBicicleta": 2}, {"idTranca": 2}, {"idTranca": 3, "idBicicleta": 1}]
+        })
+
+        trancas = client.get("/totem/1/trancas")
+        bicicletas = client.get("/totem/1/bicicletas")
+
+    assert [t["id"] for t in trancas.json()] == [1, 2, 3]
+    assert [b["id"] for b in bicicletas.json()] == [2, 1]
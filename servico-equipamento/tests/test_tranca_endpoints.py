@@ -1269,3 +1269,52 @@ def test_retirar_case_insensitive_status(tranca_exemplo, totem_exemplo):
         response = client.post("/tranca/retirarDaRede", json=request_data)
         
         assert response.status_code == 200
+
+
+# ==================== TESTES POST /tranca/lote ====================
+
+def test_cadastrar_trancas_em_lote():
+    """Testa cadastro de trancas em lote com erro por item"""
+    from tinydb import TinyDB
+    from tinydb.storages import MemoryStorage
+
+    class DatabaseEmMemoria:
+        def __init__(self):
+            self._db = TinyDB(storage=MemoryStorage)
+
+        def get_table(self, name: str):
+            return self._db.table(name)
+
+    db = DatabaseEmMemoria()
+    lote = [
+        {"numero": 1, "localizacao": "ZS", "anoDeFabricacao": "2024", "modelo": "A"},
+        {"numero": -1, "localizacao": "ZS", "anoDeFabricacao": "2024", "modelo": "A"},
+        {"numero": 2, "localizacao": "ZS", "anoDeFabricacao": "2024", "modelo": "A"},
+    ]
+
+    with patch('routers.tranca.get_db', return_value=db):
+        response = client.post("/tranca/lote", json=lote)
+
+    assert response.status_code == 200
+    resultados = response.json()
+    assert resultados[0]["item"]["id"] == 1
+    assert resultados[0]["item"]["totem"] is None
+    assert resultados[1]["erro"]["codigo"] == "DADOS_INVALIDOS"
+    assert "numero" in resultados[1]["erro"]["mensagem"]
+    assert resultados[2]["item"]["id"] == 2
+    assert len(db.get_table('trancas')) == 2
+
+
+def test_cadastrar_trancas_em_lote_acima_do_maximo():
+    """Testa que lotes maiores que o permitido são recusados sem tocar no banco"""
+    from utils.lote import LOTE_MAXIMO_ITENS
+
+    lote = [
+        {"numero": n, "localizacao": "ZS", "anoDeFabricacao": "2024", "modelo": "A"}
+        for n in range(1, LOTE_MAXIMO_ITENS + 2)
+    ]
+    with patch('routers.tranca.get_db') as mock_db:
+        response = client.post("/tranca/lote", json=lote)
+
+    assert response.status_code == 422
+    mock_db.assert_not_called()
@@ -0,0 +1,85 @@
+"""
+Cadastro em lote de equipamentos.
+
+Cada item do lote é validado isoladamente: um item inválido ou com número
+repetido vira um erro na sua posição da resposta e não impede o cadastro dos
+demais. Os itens válidos são gravados juntos pelo ``create_many`` do
+repositório (IDs reservados de uma vez e uma única inserção).
+
+Lotes com mais de ``LOTE_MAXIMO_ITENS`` itens são recusados com 422 antes de
+qualquer validação.
+"""
+
+from typing import Any, Callable, Dict, Generic, List, Optional, Set, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, Field, ValidationError
+
+from models.erro_model import Erro
+
+# Itens aceitos por requisição de cadastro em lote
+LOTE_MAXIMO_ITENS = 100
+
+T = TypeVar('T')
+M = TypeVar('M', bound=BaseModel)
+
+
+class ResultadoLote(BaseModel, Generic[T]):
+    """Resultado de um item do lote: o equipamento cadastrado ou o erro"""
+    item: Optional[T] = Field(None, description="Equipamento cadastrado")
+    erro: Optional[Erro] = Field(None, description="Motivo de o item não ter sido cadastrado")
+
+
+def _mensagem(erro: Exception) -> str:
+    if isinstance(erro, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(p) for p in e['loc']) or 'item'}: {e['msg']}" for e in erro.errors()
+        )
+    return str(erro)
+
+
+def cadastrar_em_lote(
+    payloads: List[Any],
+    modelo: Type[M],
+    numeros_existentes: Set[int],
+    criar_muitos: Callable[[List[M]], List[T]],
+    entidade: str,
+) -> List[ResultadoLote[T]]:
+    """
+    Valida os itens, descarta números já usados e cadastra o restante.
+
+    Args:
+        payloads: Itens recebidos, na ordem do lote
+        modelo: Modelo de criação (NovaBicicleta, NovaTranca)
+        numeros_existentes: Números já cadastrados na tabela
+        criar_muitos: ``create_many`` do repositório
+        entidade: Nome usado nas mensagens de erro (ex: "bicicleta")
+
+    Returns:
+        Um resultado por item, na ordem recebida
+    """
+    resultados: Dict[int, ResultadoLote[T]] = {}
+    validos: List[Tuple[int, M]] = []
+    numeros = set(numeros_existentes)
+
+    for indice, payload in enumerate(payloads):
+        try:
+            novo = modelo.model_validate(payload)
+        except (ValidationError, TypeError, ValueError) as e:
+            resultados[indice] = ResultadoLote(erro=Erro(codigo="DADOS_INVALIDOS", mensagem=_mensagem(e)))
+            continue
+
+        if novo.numero in numeros:
+            resultados[indice] = ResultadoLote(erro=Erro(
+                codigo="NUMERO_DUPLICADO",
+                mensagem=f"Já existe uma {entidade} com o número {novo.numero}"
+            ))
+            continue
+
+        numeros.add(novo.numero)
+        validos.append((indice, novo))
+
+    criados = criar_muitos([novo for _, novo in validos]) if validos else []
+    for (indice, _), criado in zip(validos, criados):
+        resultados[indice] = ResultadoLote(item=criado)
+
+    return [resultados[indice] for indice in range(len(payloads))]
@@ -0,0 +1,76 @@
+"""
+Listagens com paginação por cursor e streaming NDJSON opcionais.
+
+Sem parâmetros, as rotas de listagem continuam devolvendo a lista completa.
+Com ``limit``/``cursor`` devolvem uma ``Pagina``; com o header
+``Accept: application/x-ndjson`` devolvem um item por linha, serializado sob
+demanda a partir de um gerador.
+"""
+
+from typing import Callable, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from database.paginacao import CursorInvalido
+
+T = TypeVar('T')
+
+LIMITE_MAXIMO = 1000
+MEDIA_TYPE_NDJSON = "application/x-ndjson"
+
+
+class Pagina(BaseModel, Generic[T]):
+    """Página de uma listagem paginada por cursor"""
+    itens: List[T] = Field(..., description="Itens da página")
+    proximoCursor: Optional[str] = Field(None, description="Cursor da próxima página (null na última)")
+
+
+def quer_ndjson(request: Request) -> bool:
+    """Indica se o cliente pediu a listagem em streaming NDJSON"""
+    return MEDIA_TYPE_NDJSON in request.headers.get("accept", "")
+
+
+def resposta_ndjson(modelos: Iterator[BaseModel]) -> StreamingResponse:
+    """Serializa os modelos sob demanda, um objeto JSON por linha"""
+    return StreamingResponse(
+        (modelo.model_dump_json() + "\n" for modelo in modelos),
+        media_type=MEDIA_TYPE_NDJSON
+    )
+
+
+def listar(
+    request: Request,
+    limit: Optional[int],
+    cursor: Optional[str],
+    listar_tudo: Callable[[], list],
+    listar_pagina: Callable[[int, Optional[str]], Tuple[list, Optional[str]]],
+    iterar: Callable[[Optional[str]], Iterator[BaseModel]],
+):
+    """
+    Resolve o modo da listagem a partir da requisição.
+
+    Raises:
+        HTTPException 422: Se o cursor for inválido
+    """
+    try:
+        if quer_ndjson(request):
+            itens = iterar(cursor)
+            if limit is not None:
+                itens = (item for _, item in zip(range(limit), itens))
+            return resposta_ndjson(itens)
+
+        if limit is None and cursor is None:
+            return listar_tudo()
+
+        itens, proximo = listar_pagina(limit or LIMITE_MAXIMO, cursor)
+        return Pagina(itens=itens, proximoCursor=proximo)
+    except CursorInvalido:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={
+                "codigo": "CURSOR_INVALIDO",
+                "mensagem": "Cursor de paginação inválido"
+            }
+        )
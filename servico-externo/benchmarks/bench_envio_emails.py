@@ -0,0 +1,122 @@
+"""
+Vazão do envio de e-mails contra um sink SMTP local (benchmarks/smtp_sink.py).
+
+- por_conexao: como era antes, uma conexão + login + QUIT por mensagem
+- pool: EmailService.enviar_email com as sessões do pool reaproveitadas
+- lote: EmailService.enviar_emails, ``--lote`` mensagens por sessão
+
+Os modos por mensagem rodam com ``--concorrencia`` threads, como requisições
+simultâneas ao /enviarEmail. ``--atraso-conexao`` simula o handshake TCP/TLS
+de uma conexão nova e ``--atraso-resposta`` a ida e volta de cada comando SMTP.
+
+Uso (a partir de servico-externo):
+    python benchmarks/bench_envio_emails.py --mensagens 400 --concorrencia 4 --atraso-conexao 0.05 --atraso-resposta 0.005
+"""
+
+import argparse
+import json
+import os
+import smtplib
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks import smtp_sink
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def configurar(porta: int, tamanho_pool: int):
+    os.environ.update({
+        "SMTP_SERVER": "127.0.0.1",
+        "SMTP_PORT": str(porta),
+        "SMTP_USERNAME": "bench",
+        "SMTP_PASSWORD": "bench",
+        "SMTP_USE_TLS": "false",
+    })
+    from services import email_service
+    email_service.SMTP_POOL_TAMANHO = tamanho_pool
+    return email_service.EmailService()
+
+
+def enviar_por_conexao(servico):
+    """O envio original: uma sessão SMTP completa para cada mensagem"""
+    def enviar(destinatario, assunto, corpo):
+        msg = servico._montar_mensagem(destinatario, assunto, corpo)
+        with smtplib.SMTP(servico.smtp_server, servico.smtp_port) as server:
+            server.login(servico.smtp_username, servico.smtp_password)
+            server.send_message(msg)
+        return True, None
+    return enviar
+
+
+def medir_por_mensagem(enviar, mensagens, concorrencia):
+    tempos = []
+
+    def uma(i):
+        inicio = time.perf_counter()
+        sucesso, _ = enviar(f"c{i}@exemplo.com", "Recibo", f"Mensagem {i}")
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        assert sucesso
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        list(executor.map(uma, range(mensagens)))
+    duracao = time.perf_counter() - inicio
+    return {
+        "mensagens_por_s": round(mensagens / duracao, 1),
+        "p50_ms": round(statistics.median(tempos), 2),
+        "p99_ms": round(percentil(tempos, 99), 2),
+    }
+
+
+def medir_lote(servico, mensagens, lote):
+    emails = [(f"c{i}@exemplo.com", "Recibo", f"Mensagem {i}", None) for i in range(mensagens)]
+    inicio = time.perf_counter()
+    for i in range(0, mensagens, lote):
+        assert all(sucesso for sucesso, _ in servico.enviar_emails(emails[i:i + lote]))
+    duracao = time.perf_counter() - inicio
+    return {"mensagens_por_s": round(mensagens / duracao, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mensagens", type=int, default=400)
+    parser.add_argument("--concorrencia", type=int, default=4)
+    parser.add_argument("--lote", type=int, default=50)
+    parser.add_argument("--atraso-conexao", type=float, default=0.05)
+    parser.add_argument("--atraso-resposta", type=float, default=0.005)
+    args = parser.parse_args()
+
+    sink, porta = smtp_sink.iniciar(args.atraso_conexao, args.atraso_resposta)
+    try:
+        servico = configurar(porta, args.concorrencia)
+        resultados = {
+            "por_conexao": medir_por_mensagem(enviar_por_conexao(servico), args.mensagens, args.concorrencia),
+            "pool": medir_por_mensagem(servico.enviar_email, args.mensagens, args.concorrencia),
+            "lote": medir_lote(servico, args.mensagens, args.lote),
+        }
+        servico.fechar()
+        recebidas = sink.recebidas
+    finally:
+        sink.shutdown()
+
+    print(json.dumps({
+        "mensagens": args.mensagens,
+        "concorrencia": args.concorrencia,
+        "lote": args.lote,
+        "atraso_conexao_s": args.atraso_conexao,
+        "atraso_resposta_s": args.atraso_resposta,
+        "recebidas_pelo_sink": recebidas,
+        "resultados": resultados
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Micro-benchmark dos repositórios do servico-externo com o banco em escala.
+
+Para cada tamanho em ``--linhas``, cada grupo (cobrancas, emails,
+validacoes_cartao) recebe um banco novo num diretório temporário, com o
+backend configurado do serviço (DB_BACKEND, ou ``--backend``: arquivo JSON
+do TinyDB ou SQLite), semeado com dados sintéticos fora do tempo medido. Nas
+cobranças, 1% fica PENDENTE, como uma fila a processar.
+
+Cada método de repositório é chamado ``--repeticoes`` vezes com IDs
+sorteados (``--semente``); o relatório traz mediana, p90 e máximo em ms.
+Nos métodos que gravam também sai a amplificação de escrita: bytes que o
+processo passou a write() (``wchar`` de /proc/self/io, só no Linux) por
+chamada e, nas criações, a razão entre isso e o tamanho do documento em
+JSON.
+
+Resultado em JSON (stdout ou ``--saida``), para comparar execuções.
+
+Uso (a partir de servico-externo):
+    python benchmarks/bench_repositorios.py --linhas 10000 100000 1000000 --backend sqlite --saida repositorios.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tinydb import TinyDB
+
+from database.database import DB_BACKEND, UTF8JSONStorage
+from database.indice_status import indice_status_de
+from database.sqlite_backend import SQLiteDatabase
+from models.cartao_model import ValidarCartaoRequest
+from models.cobranca_model import NovaCobranca, StatusCobranca
+from models.email_model import NovoEmail
+from repositories.cartao_repository import CartaoRepository
+from repositories.cobranca_repository import CobrancaRepository
+from repositories.email_repository import EmailRepository
+
+AGORA = "2025-01-01T12:00:00+00:00"
+BACKENDS = ("tinydb", "sqlite")
+
+
+class BancoTemporario:
+    """Banco num arquivo próprio com a mesma interface get_table da classe Database"""
+
+    def __init__(self, diretorio: Path, backend: str):
+        if backend == "sqlite":
+            self.db = SQLiteDatabase(diretorio / "externos.sqlite3")
+        else:
+            self.db = None
+            self.path = diretorio / "externos.json"
+        self.backend = backend
+
+    def semear(self, tabelas: Dict[str, Callable[[int], dict]], linhas: int):
+        """Grava os documentos sintéticos sem passar pelos repositórios"""
+        if self.backend == "sqlite":
+            for nome, gerar in tabelas.items():
+                self.db.table(nome)
+                with self.db.transacao() as conn:
+                    conn.executemany(
+                        f'INSERT INTO "{nome}" (doc_id, data) VALUES (?, ?)',
+                        ((i, json.dumps(gerar(i))) for i in range(1, linhas + 1))
+                    )
+            return
+
+        # Arquivo do TinyDB escrito documento a documento, sem montar o banco em memória
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("{")
+            for n, (nome, gerar) in enumerate(tabelas.items()):
+                f.write(("," if n else "") + json.dumps(nome) + ": {")
+                f.write(",".join(f'"{i}": {json.dumps(gerar(i))}' for i in range(1, linhas + 1)))
+                f.write("}")
+            f.write("}")
+        self.db = TinyDB(self.path, indent=4, ensure_ascii=False, storage=UTF8JSONStorage)
+
+    def get_table(self, name: str):
+        return self.db.table(name)
+
+    def close(self):
+        self.db.close()
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def bytes_escritos() -> Optional[int]:
+    """Total de bytes que o processo já passou a write() (None fora do Linux)"""
+    try:
+        with open("/proc/self/io") as f:
+            for linha in f:
+                if linha.startswith("wchar:"):
+                    return int(linha.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def medir(funcao: Callable[[int], object], repeticoes: int, escrita: bool = False) -> dict:
+    """Chama ``funcao(i)`` para i em 0..repeticoes-1 e resume os tempos"""
+    tempos = []
+    antes = bytes_escritos()
+    retorno = None
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        retorno = funcao(i)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    depois = bytes_escritos()
+
+    resultado = {
+        "mediana_ms": round(statistics.median(tempos), 3),
+        "p90_ms": round(percentil(tempos, 90), 3),
+        "max_ms": round(max(tempos), 3),
+    }
+    if escrita and antes is not None:
+        por_chamada = (depois - antes) / repeticoes
+        resultado["bytes_escritos_por_chamada"] = round(por_chamada)
+        if hasattr(retorno, "model_dump_json"):
+            logico = len(retorno.model_dump_json())
+            resultado["bytes_documento"] = logico
+            resultado["amplificacao"] = round(por_chamada / logico, 1)
+    return resultado
+
+
+# ----------------------------------------------------------------------
+# Dados sintéticos
+# ----------------------------------------------------------------------
+
+def cobranca(i: int) -> dict:
+    pendente = i % 100 == 0
+    return {
+        "id": i, "ciclista": i % 1000 + 1, "valor": 10.0,
+        "status": StatusCobranca.PENDENTE.value if pendente else StatusCobranca.PAGA.value,
+        "horaSolicitacao": AGORA, "horaFinalizacao": None if pendente else AGORA,
+    }
+
+
+def email(i: int) -> dict:
+    return {
+        "id": i, "destinatario": f"ciclista{i}@exemplo.com", "assunto": "Recibo",
+        "corpo": f"Aluguel {i} registrado", "enviado": True, "data_envio": AGORA,
+    }
+
+
+def validacao(i: int) -> dict:
+    return {
+        "id": i, "numeroCartao": "4111********1111", "nomePortador": f"Ciclista {i}", "validade": "12/35",
+        "cvv": "123", "valido": True, "dataValidacao": AGORA, "mensagem": "Cartão válido",
+    }
+
+
+# ----------------------------------------------------------------------
+# Grupos de tabelas
+# ----------------------------------------------------------------------
+
+def medir_cobrancas(banco: BancoTemporario, linhas: int, ids: list, repeticoes: int) -> dict:
+    indice_status_de(banco, 'cobrancas', StatusCobranca.PENDENTE.value).ids(StatusCobranca.PENDENTE.value)
+    cobrancas = CobrancaRepository(banco)
+    varreduras = max(1, repeticoes // 10)
+
+    return {
+        "cobranca.create": medir(
+            lambda i: cobrancas.create(NovaCobranca(ciclista=ids[i], valor=10.0, status=StatusCobranca.PENDENTE.value)),
+            repeticoes, escrita=True
+        ),
+        "cobranca.get_by_id": medir(lambda i: cobrancas.get_by_id(ids[i]), repeticoes),
+        "cobranca.update_status": medir(
+            lambda i: cobrancas.update_status(ids[i], StatusCobranca.PAGA), repeticoes, escrita=True
+        ),
+        "cobranca.ids_pendentes": medir(lambda i: cobrancas.ids_pendentes(), repeticoes),
+        "cobranca.processar_pendentes": medir(lambda i: cobrancas.processar_pendentes(), 1, escrita=True),
+        "cobranca.get_all": medir(lambda i: cobrancas.get_all(), varreduras),
+    }
+
+
+def medir_emails(banco: BancoTemporario, linhas: int, ids: list, repeticoes: int) -> dict:
+    emails = EmailRepository(banco)
+    criados = []
+    varreduras = max(1, repeticoes // 10)
+
+    def novo(i):
+        return NovoEmail(destinatario=f"novo{i}@exemplo.com", assunto="Recibo", corpo=f"Mensagem {i}")
+
+    def criar_varios(i):
+        criados.append(emails.create_many([novo(i * 10 + n) for n in range(10)]))
+        return criados[-1][0]
+
+    return {
+        "email.create": medir(lambda i: emails.create(novo(i)), repeticoes, escrita=True),
+        "email.create_many(10)": medir(criar_varios, repeticoes, escrita=True),
+        "email.get_by_id": medir(lambda i: emails.get_by_id(ids[i]), repeticoes),
+        "email.marcar_como_enviado": medir(lambda i: emails.marcar_como_enviado(ids[i]), repeticoes, escrita=True),
+        "email.marcar_como_enviados(10)": medir(lambda i: emails.marcar_como_enviados(criados[i]), repeticoes, escrita=True),
+        "email.get_all": medir(lambda i: emails.get_all(), varreduras),
+    }
+
+
+def medir_validacoes(banco: BancoTemporario, linhas: int, ids: list, repeticoes: int) -> dict:
+    cartoes = CartaoRepository(banco)
+    pedido = ValidarCartaoRequest(numero_cartao="4111111111111111", nome_portador="Ciclista", validade="12/35", cvv="123")
+
+    return {
+        "cartao.create": medir(lambda i: cartoes.create(pedido, True, "Cartão válido"), repeticoes, escrita=True),
+        "cartao.get_by_id": medir(lambda i: cartoes.get_by_id(ids[i]), repeticoes),
+        "cartao.get_all": medir(lambda i: cartoes.get_all(), max(1, repeticoes // 10)),
+    }
+
+
+GRUPOS = {
+    "cobrancas": ({"cobrancas": cobranca}, medir_cobrancas),
+    "emails": ({"emails": email}, medir_emails),
+    "validacoes_cartao": ({"validacoes_cartao": validacao}, medir_validacoes),
+}
+
+
+def medir_grupo(nome: str, linhas: int, backend: str, repeticoes: int, semente: int) -> dict:
+    tabelas, medir_metodos = GRUPOS[nome]
+    rng = random.Random(semente)
+    ids = [rng.randint(1, linhas) for _ in range(repeticoes)]
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        banco = BancoTemporario(Path(diretorio), backend)
+        try:
+            inicio = time.perf_counter()
+            banco.semear(tabelas, linhas)
+            # No SQLite os dados recém-gravados ainda estão no arquivo -wal
+            tamanho = sum(arquivo.stat().st_size for arquivo in Path(diretorio).iterdir())
+            carga = time.perf_counter() - inicio
+            metodos = medir_metodos(banco, linhas, ids, repeticoes)
+            return {"banco_bytes": tamanho, "carga_s": round(carga, 2), "metodos": metodos}
+        finally:
+            banco.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--grupos", nargs="+", choices=list(GRUPOS), default=list(GRUPOS))
+    parser.add_argument("--backend", choices=BACKENDS, default=DB_BACKEND if DB_BACKEND in BACKENDS else "tinydb")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="Arquivo JSON de saída (padrão: stdout)")
+    args = parser.parse_args()
+
+    resultado = {"servico": "externo", "backend": args.backend, "repeticoes": args.repeticoes, "escalas": {}}
+    for linhas in args.linhas:
+        resultado["escalas"][str(linhas)] = {
+            grupo: medir_grupo(grupo, linhas, args.backend, args.repeticoes, args.semente) for grupo in args.grupos
+        }
+        print(f"{linhas} linhas: ok", file=sys.stderr)
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        Path(args.saida).write_text(texto, encoding="utf-8")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Servidor SMTP local que aceita e descarta as mensagens (sink), para medir o
+envio de e-mails sem depender de um provedor real.
+
+Roda em outro processo, sobre asyncio. Fala o suficiente do protocolo para o
+smtplib: EHLO/HELO, AUTH PLAIN/LOGIN (aceita qualquer credencial), MAIL,
+RCPT, DATA, RSET, NOOP e QUIT. Não oferece STARTTLS; use SMTP_USE_TLS=false.
+
+Opções para aproximar o custo de um servidor remoto:
+- atraso_conexao: segundos gastos ao aceitar cada conexão nova (handshake
+  TCP/TLS)
+- atraso_resposta: segundos antes de cada resposta (ida e volta na rede)
+"""
+
+import asyncio
+import multiprocessing
+from typing import Tuple
+
+
+async def _atender(reader, writer, atraso_conexao: float, atraso_resposta: float, contador):
+    async def responder(linha: str):
+        await asyncio.sleep(atraso_resposta)
+        writer.write(f"{linha}\r\n".encode())
+        await writer.drain()
+
+    await asyncio.sleep(atraso_conexao)
+    await responder("220 sink ESMTP")
+    try:
+        while True:
+            linha = await reader.readline()
+            if not linha:
+                break
+            comando = linha.decode(errors="replace").strip()
+            verbo = comando.split(" ", 1)[0].upper()
+
+            if verbo == "EHLO":
+                writer.write(b"250-sink\r\n250-AUTH PLAIN LOGIN\r\n")
+                await responder("250 8BITMIME")
+            elif verbo == "AUTH":
+                partes = comando.split()
+                if partes[1].upper() == "LOGIN":
+                    # Pede usuário (se não veio no comando) e senha
+                    for _ in range(2 if len(partes) == 2 else 1):
+                        await responder("334 VXNlcm5hbWU6")
+                        await reader.readline()
+                await responder("235 2.7.0 Authentication successful")
+            elif verbo == "DATA":
+                await responder("354 End data with <CR><LF>.<CR><LF>")
+                while (await reader.readline()) not in (b".\r\n", b""):
+                    pass
+                with contador.get_lock():
+                    contador.value += 1
+                await responder("250 2.0.0 Ok: queued")
+            elif verbo == "QUIT":
+                await responder("221 2.0.0 Bye")
+                break
+            else:
+                # HELO, MAIL, RCPT, RSET, NOOP
+                await responder("250 2.0.0 Ok")
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+def _servir(atraso_conexao: float, atraso_resposta: float, portas, contador):
+    async def principal():
+        servidor = await asyncio.start_server(
+            lambda r, w: _atender(r, w, atraso_conexao, atraso_resposta, contador),
+            "127.0.0.1", 0, backlog=1024
+        )
+        portas.put(servidor.sockets[0].getsockname()[1])
+        await servidor.serve_forever()
+
+    asyncio.run(principal())
+
+
+class SinkSMTP:
+    """Sink SMTP rodando em outro processo; ``recebidas`` conta as mensagens aceitas"""
+
+    def __init__(self, atraso_conexao: float, atraso_resposta: float):
+        portas = multiprocessing.Queue()
+        self._contador = multiprocessing.Value("i", 0)
+        self._processo = multiprocessing.Process(
+            target=_servir, args=(atraso_conexao, atraso_resposta, portas, self._contador), daemon=True
+        )
+        self._processo.start()
+        self.porta = portas.get(timeout=10)
+
+    @property
+    def recebidas(self) -> int:
+        return self._contador.value
+
+    def shutdown(self):
+        self._processo.terminate()
+        self._processo.join()
+
+
+def iniciar(atraso_conexao: float = 0.0, atraso_resposta: float = 0.0) -> Tuple[SinkSMTP, int]:
+    """Sobe o sink numa porta livre em segundo plano e retorna (sink, porta)"""
+    sink = SinkSMTP(atraso_conexao, atraso_resposta)
+    return sink, sink.porta
@@ -8,18 +8,41 @@ from tinydb.storages import JSONStorage
 from pathlib import Path
 import os
 import json
+import threading
+
+from database.sqlite_backend import SQLiteDatabase
 
 
 # Define o caminho do banco de dados
 DB_DIR = Path(__file__).parent
 DB_FILE = DB_DIR / "externos.json"
+DB_SQLITE_FILE = DB_DIR / "externos.sqlite3"
+
+# Backend de armazenamento: "tinydb" (arquivo JSON) ou "sqlite"
+DB_BACKEND = os.getenv("DB_BACKEND", "tinydb").lower()
 
 
 class UTF8JSONStorage(JSONStorage):
-    """Storage personalizado que força UTF-8 encoding"""
+    """
+    Storage personalizado que força UTF-8 encoding.
+
+    As rotas síncronas rodam em threads diferentes e o JSONStorage usa um único
+    handle de arquivo (seek + read/write), então leituras e escritas são
+    serializadas por um lock para que uma leitura nunca veja o arquivo no meio
+    de uma gravação.
+    """
     
     def __init__(self, path, create_dirs=False, encoding='utf-8', access_mode='r+', **kwargs):
         super().__init__(path, create_dirs=create_dirs, encoding=encoding, access_mode=access_mode, **kwargs)
+        self._lock = threading.RLock()
+
+    def read(self):
+        with self._lock:
+            return super().read()
+
+    def write(self, data):
+        with self._lock:
+            super().write(data)
 
 
 class Database:
@@ -27,6 +50,9 @@ class Database:
     
     _instance = None
     _db = None
+    # Incrementada sempre que o conteúdo pode ter sido trocado (close, reset,
+    # truncate_all); índices em memória comparam com a geração em que foram montados
+    geracao = 0
     
     def __new__(cls):
         if cls._instance is None:
@@ -39,40 +65,56 @@ class Database:
             # Cria o diretório se não existir
             DB_DIR.mkdir(exist_ok=True)
             
-            # Inicializa o banco de dados com storage UTF-8
-            self._db = TinyDB(
-                DB_FILE,
-                indent=4,
-                ensure_ascii=False,
-                storage=UTF8JSONStorage
-            )
+            if DB_BACKEND == "sqlite":
+                # Uma tabela SQLite (modo WAL, com índices) por tabela do TinyDB
+                self._db = SQLiteDatabase(DB_SQLITE_FILE)
+            else:
+                # Inicializa o banco de dados com storage UTF-8
+                self._db = TinyDB(
+                    DB_FILE,
+                    indent=4,
+                    ensure_ascii=False,
+                    storage=UTF8JSONStorage
+                )
     
     @property
-    def db(self) -> TinyDB:
+    def db(self):
         """Retorna a instância do banco de dados"""
         return self._db
     
     def get_table(self, name: str):
         """Retorna uma tabela específica do banco de dados"""
+        if self._db is None:
+            self.__init__()
         return self._db.table(name)
     
     def close(self):
         """Fecha a conexão com o banco de dados"""
-        if self._db:
+        if self._db is not None:
             self._db.close()
+            self._db = None
+            self._descartar_caches()
     
     def truncate_all(self):
         """Remove todos os dados de todas as tabelas"""
         self._db.truncate()
         for table in ['emails', 'cobrancas', 'validacoes_cartao']:
             self._db.table(table).truncate()
+        self._descartar_caches()
     
     def reset(self):
         """Reseta o banco de dados completamente"""
         self.close()
-        if DB_FILE.exists():
-            os.remove(DB_FILE)
+        arquivo = DB_SQLITE_FILE if DB_BACKEND == "sqlite" else DB_FILE
+        if arquivo.exists():
+            os.remove(arquivo)
         self.__init__()
+    
+    def _descartar_caches(self):
+        """Faz o estado derivado do banco guardado em memória ser relido do storage"""
+        from database.sequencias import sequencias_de
+        self.geracao += 1
+        sequencias_de(self).descartar()
 
 
 # Singleton global do banco de dados
@@ -0,0 +1,102 @@
+"""
+Índice em memória ``status -> doc_ids`` de uma tabela.
+
+Serve para achar as cobranças PENDENTE sem ler o histórico de cobranças
+pagas: o processamento da fila busca só os doc_ids indicados pelo índice.
+
+O índice é montado na primeira consulta e atualizado pelo repositório a cada
+inserção e mudança de status. Restaurações e resets passam por
+``Database.truncate_all()``/``reset()``/``close()``, que incrementam
+``Database.geracao`` e fazem o índice ser reconstruído. Gravações diretas na
+tabela só são percebidas se mudarem a contagem de documentos; ainda assim quem
+usa o índice confere o status dos documentos lidos, então uma entrada
+desatualizada nunca leva a processar a cobrança errada.
+"""
+
+import threading
+import weakref
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from database.database import Database
+
+
+class IndiceStatus:
+    """doc_ids agrupados pelo valor do campo ``status`` de uma tabela"""
+
+    def __init__(self, db: Database, tabela: str, padrao: str):
+        self._db = db
+        self._nome = tabela
+        # Documentos antigos sem o campo contam com este status
+        self._padrao = padrao
+        self._lock = threading.Lock()
+        self._por_status: Dict[str, Set[int]] = {}
+        self._status: Dict[int, str] = {}
+        self._total: Optional[int] = None
+        self._geracao: Optional[int] = None
+
+    @property
+    def _tabela(self):
+        return self._db.get_table(self._nome)
+
+    def ids(self, status: str) -> List[int]:
+        """doc_ids com o status informado, em ordem de inserção"""
+        with self._lock:
+            if (
+                self._total is None
+                or self._geracao != getattr(self._db, 'geracao', 0)
+                or self._total != len(self._tabela)
+            ):
+                self._reconstruir()
+            return sorted(self._por_status.get(status, ()))
+
+    def registrar(self, doc_id: int, status: Optional[str]):
+        """Inclui um documento recém-inserido"""
+        with self._lock:
+            if self._total is None:
+                return
+            self._mover(doc_id, status or self._padrao)
+            self._total += 1
+
+    def mover(self, doc_ids: Iterable[int], status: str):
+        """Atualiza o status de documentos já indexados"""
+        with self._lock:
+            if self._total is None:
+                return
+            for doc_id in doc_ids:
+                self._mover(doc_id, status)
+
+    def descartar(self):
+        """Força a reconstrução na próxima consulta"""
+        with self._lock:
+            self._total = None
+
+    def _mover(self, doc_id: int, status: str):
+        anterior = self._status.get(doc_id)
+        if anterior is not None:
+            self._por_status[anterior].discard(doc_id)
+        self._por_status.setdefault(status, set()).add(doc_id)
+        self._status[doc_id] = status
+
+    def _reconstruir(self):
+        self._geracao = getattr(self._db, 'geracao', 0)
+        self._por_status = {}
+        self._status = {}
+        total = 0
+        for doc in self._tabela.all():
+            self._mover(doc.doc_id, doc.get('status') or self._padrao)
+            total += 1
+        self._total = total
+
+
+_registro: "weakref.WeakKeyDictionary[Database, Dict[Tuple[str, str], IndiceStatus]]" = weakref.WeakKeyDictionary()
+_registro_lock = threading.Lock()
+
+
+def indice_status_de(db: Database, tabela: str, padrao: str) -> IndiceStatus:
+    """Retorna o índice de status da tabela (uma instância por banco, compartilhada entre repositórios)"""
+    with _registro_lock:
+        indices = _registro.setdefault(db, {})
+        chave = (tabela, padrao)
+        if chave not in indices:
+            indices[chave] = IndiceStatus(db, tabela, padrao)
+        return indices[chave]
@@ -2,6 +2,7 @@
 Arquivo para inicializar o banco de dados com dados de exemplo.
 """
 
+from database.indice_status import indice_status_de
 from models.cobranca_model import StatusCobranca
 
 
@@ -110,6 +111,7 @@ def init_db(db_instance):
     # Insere cobranças
     for cobranca in COBRANCAS_INICIAIS:
         cobrancas_table.insert(cobranca)
+    indice_status_de(db_instance, 'cobrancas', StatusCobranca.PENDENTE.value).descartar()
     
     # Insere validações
     for validacao in VALIDACOES_CARTAO_INICIAIS:
@@ -0,0 +1,283 @@
+"""
+Backend SQLite com a mesma interface de tabela usada do TinyDB.
+
+Cada tabela vira uma tabela SQLite com o documento serializado em JSON e
+índices sobre os campos consultados pelos repositórios. As consultas continuam
+sendo feitas com ``tinydb.Query``: igualdades sobre campos indexados são
+traduzidas para SQL e o restante da condição é verificado em Python sobre os
+candidatos, então qualquer Query continua funcionando (no pior caso, com
+varredura completa).
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from tinydb.table import Document
+
+
+# Campos indexados por tabela (além do doc_id, que é a chave primária)
+INDICES: Dict[str, Tuple[str, ...]] = {
+    'emails': ('id',),
+    'cobrancas': ('id', 'status', 'ciclista'),
+    'validacoes_cartao': ('id',),
+}
+
+_TIPOS_INDEXAVEIS = (str, int, float, bool)
+
+
+class SQLiteTable:
+    """Tabela SQLite com a API de ``tinydb.table.Table`` usada pelos repositórios"""
+
+    def __init__(self, database: 'SQLiteDatabase', name: str):
+        self._database = database
+        self.name = name
+        self._sql_nome = '"' + name.replace('"', '""') + '"'
+        self._indices = INDICES.get(name, ())
+        self._criar()
+
+    # ------------------------------------------------------------------
+    # Esquema e tradução de consultas
+    # ------------------------------------------------------------------
+
+    def _criar(self):
+        with self._database.transacao() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._sql_nome} ("
+                "doc_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "data TEXT NOT NULL)"
+            )
+            for campo in self._indices:
+                conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "idx_{self.name}_{campo}" '
+                    f"ON {self._sql_nome} (json_extract(data, '$.{campo}'))"
+                )
+
+    def _filtro_sql(self, cond) -> Tuple[str, list]:
+        """
+        Extrai da Query as igualdades sobre campos indexados.
+
+        Retorna a cláusula WHERE (ou string vazia) e os parâmetros. A condição
+        completa ainda é reavaliada em Python sobre as linhas retornadas.
+        """
+        hashval = getattr(cond, '_hash', None)
+        if hashval is None:
+            return "", []
+
+        termos = [hashval]
+        if hashval[0] == 'and':
+            termos = list(hashval[1])
+
+        clausulas, params = [], []
+        for termo in termos:
+            if (
+                isinstance(termo, tuple) and len(termo) == 3 and termo[0] == '=='
+                and len(termo[1]) == 1 and termo[1][0] in self._indices
+                and isinstance(termo[2], _TIPOS_INDEXAVEIS)
+            ):
+                clausulas.append(f"json_extract(data, '$.{termo[1][0]}') = ?")
+                params.append(termo[2])
+
+        if not clausulas:
+            return "", []
+        return " WHERE " + " AND ".join(clausulas), params
+
+    def _linhas(self, cond=None, doc_ids: Optional[Iterable[int]] = None) -> List[Document]:
+        if doc_ids is not None:
+            ids = list(doc_ids)
+            if not ids:
+                return []
+            marcadores = ", ".join("?" for _ in ids)
+            sql, params = f" WHERE doc_id IN ({marcadores})", ids
+        else:
+            sql, params = self._filtro_sql(cond)
+
+        with self._database.transacao() as conn:
+            linhas = conn.execute(
+                f"SELECT doc_id, data FROM {self._sql_nome}{sql} ORDER BY doc_id", params
+            ).fetchall()
+
+        docs = [Document(json.loads(data), doc_id) for doc_id, data in linhas]
+        if cond is not None:
+            docs = [d for d in docs if cond(d)]
+        return docs
+
+    # ------------------------------------------------------------------
+    # API compatível com tinydb.table.Table
+    # ------------------------------------------------------------------
+
+    def insert(self, document: Mapping) -> int:
+        with self._database.transacao() as conn:
+            cursor = conn.execute(
+                f"INSERT INTO {self._sql_nome} (data) VALUES (?)",
+                (json.dumps(dict(document), ensure_ascii=False),)
+            )
+            return cursor.lastrowid
+
+    def insert_multiple(self, documents: Iterable[Mapping]) -> List[int]:
+        linhas = [(json.dumps(dict(doc), ensure_ascii=False),) for doc in documents]
+        if not linhas:
+            return []
+        with self._database.transacao() as conn:
+            conn.executemany(f"INSERT INTO {self._sql_nome} (data) VALUES (?)", linhas)
+            # Sob o lock e numa só transação os doc_ids do lote são consecutivos
+            ultimo = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        return list(range(ultimo - len(linhas) + 1, ultimo + 1))
+
+    def all(self) -> List[Document]:
+        return self._linhas()
+
+    def search(self, cond) -> List[Document]:
+        return self._linhas(cond)
+
+    def get(self, cond=None, doc_id: Optional[int] = None, doc_ids: Optional[List[int]] = None):
+        if doc_id is not None:
+            docs = self._linhas(doc_ids=[doc_id])
+            return docs[0] if docs else None
+        if doc_ids is not None:
+            return self._linhas(doc_ids=doc_ids)
+        if cond is None:
+            raise RuntimeError('You have to pass either cond or doc_id or doc_ids')
+
+        docs = self._linhas(cond)
+        return docs[0] if docs else None
+
+    def contains(self, cond=None, doc_id: Optional[int] = None) -> bool:
+        return self.get(cond, doc_id=doc_id) is not None
+
+    def count(self, cond) -> int:
+        return len(self._linhas(cond))
+
+    def update(
+        self,
+        fields: Union[Mapping, Callable[[Mapping], None]],
+        cond=None,
+        doc_ids: Optional[Iterable[int]] = None,
+    ) -> List[int]:
+        """
+        Atualiza os documentos numa única transação: a leitura, a alteração e
+        a escrita acontecem sem que outra escrita se intercale.
+
+        Como no TinyDB 4.9, doc_ids inexistentes são ignorados e não entram no
+        retorno (até o 4.8 o TinyDB levantava ``KeyError`` sem gravar nada).
+        """
+        with self._database.transacao() as conn:
+            docs = self._linhas(cond, doc_ids)
+
+            atualizados = []
+            for doc in docs:
+                if callable(fields):
+                    fields(doc)
+                else:
+                    doc.update(fields)
+                atualizados.append((json.dumps(dict(doc), ensure_ascii=False), doc.doc_id))
+
+            if atualizados:
+                conn.executemany(f"UPDATE {self._sql_nome} SET data = ? WHERE doc_id = ?", atualizados)
+
+        return [doc_id for _, doc_id in atualizados]
+
+    def remove(self, cond=None, doc_ids: Optional[Iterable[int]] = None) -> List[int]:
+        if cond is None and doc_ids is None:
+            raise RuntimeError('Use truncate() to remove all documents')
+
+        ids = [doc.doc_id for doc in self._linhas(cond, doc_ids)]
+        if ids:
+            with self._database.transacao() as conn:
+                conn.executemany(f"DELETE FROM {self._sql_nome} WHERE doc_id = ?", [(i,) for i in ids])
+        return ids
+
+    def truncate(self) -> None:
+        with self._database.transacao() as conn:
+            conn.execute(f"DELETE FROM {self._sql_nome}")
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", (self.name,))
+
+    def __len__(self) -> int:
+        with self._database.transacao() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {self._sql_nome}").fetchone()[0]
+
+    def __iter__(self):
+        return iter(self.all())
+
+
+class SQLiteDatabase:
+    """Banco SQLite em modo WAL que entrega tabelas compatíveis com o TinyDB"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Transações abertas pela thread que está com o lock
+        self._profundidade = 0
+        self._tabelas: Dict[str, SQLiteTable] = {}
+
+    def transacao(self):
+        """
+        Context manager que serializa o acesso à conexão e faz commit/rollback.
+
+        Pode ser aninhado: o nível mais externo abre a transação e os internos
+        viram savepoints, desfeitos sozinhos se o bloco interno falhar.
+        """
+        return _Transacao(self)
+
+    def table(self, name: str) -> SQLiteTable:
+        if name not in self._tabelas:
+            self._tabelas[name] = SQLiteTable(self, name)
+        return self._tabelas[name]
+
+    def tables(self) -> set:
+        with self.transacao() as conn:
+            linhas = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+            ).fetchall()
+        return {nome for (nome,) in linhas}
+
+    def truncate(self) -> None:
+        """Remove os documentos de todas as tabelas"""
+        for nome in self.tables():
+            self.table(nome).truncate()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class _Transacao:
+    def __init__(self, database: SQLiteDatabase):
+        self._database = database
+        self._savepoint: Optional[str] = None
+
+    def __enter__(self) -> sqlite3.Connection:
+        database = self._database
+        database._lock.acquire()
+        try:
+            if database._profundidade:
+                self._savepoint = f"sp{database._profundidade}"
+                database._conn.execute(f"SAVEPOINT {self._savepoint}")
+            else:
+                database._conn.execute("BEGIN")
+        except BaseException:
+            database._lock.release()
+            raise
+        database._profundidade += 1
+        return database._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        database = self._database
+        try:
+            if self._savepoint is not None:
+                if exc_type is not None:
+                    database._conn.execute(f"ROLLBACK TO {self._savepoint}")
+                database._conn.execute(f"RELEASE {self._savepoint}")
+            elif exc_type is None:
+                database._conn.execute("COMMIT")
+            else:
+                database._conn.execute("ROLLBACK")
+        finally:
+            database._profundidade -= 1
+            database._lock.release()
+        return False
@@ -7,6 +7,9 @@ from routers.cobranca import contrato_router as cobranca_contrato_router
 from routers.cartao import contrato_router as cartao_contrato_router
 from database.database import get_db
 from database.init_data import init_db
+from services.email_service import email_service
+from utils.resposta_json import classe_resposta_json
+from utils.metricas import instalar_metricas
 
 # Carrega variáveis de ambiente do arquivo .env
 load_dotenv()
@@ -16,8 +19,13 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    # JSON_RAPIDO=1 serializa as respostas pelo pydantic-core (mesmo formato)
+    default_response_class=classe_resposta_json(),
 )
 
+# GET /metrics no formato do Prometheus (METRICAS=0 desliga)
+instalar_metricas(app)
+
 # Inicializa o banco de dados na primeira execução
 @app.on_event("startup")
 def startup_event():
@@ -29,6 +37,12 @@ def startup_event():
         init_db(db)
         print("✓ Banco de dados inicializado com dados padrão")
 
+# Encerra as sessões SMTP mantidas no pool
+@app.on_event("shutdown")
+def shutdown_event():
+    """Fecha as conexões com o servidor SMTP"""
+    email_service.fechar()
+
 # Registra o endpoint de status
 app.include_router(status_router)
 # Registra o endpoint de admin
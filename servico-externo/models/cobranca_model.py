@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, model_serializer
-from typing import Optional, Any
+from typing import List, Optional, Any
 from enum import Enum
 
 
@@ -58,3 +58,32 @@ class ProcessarPagamentoRequest(BaseModel):
     class Config:
         populate_by_name = True
 
+
+
+class StatusProcessamento(str, Enum):
+    """Situação de um processamento da fila de cobranças em segundo plano"""
+    EXECUTANDO = "EXECUTANDO"
+    CONCLUIDO = "CONCLUIDO"
+    ERRO = "ERRO"
+
+
+class ProcessamentoFila(BaseModel):
+    """Progresso de um processamento da fila de cobranças em segundo plano"""
+    id: str = Field(..., description="ID do processamento")
+    status: StatusProcessamento = Field(..., description="Situação do processamento")
+    total: int = Field(..., description="Cobranças pendentes encontradas na fila")
+    processadas: int = Field(..., description="Cobranças pagas até agora")
+    falhas: int = Field(..., description="Cobranças de blocos que não puderam ser gravados")
+    restantes: int = Field(..., description="Cobranças ainda não processadas")
+    iniciadoEm: str = Field(..., description="Início do processamento (ISO format)")
+    finalizadoEm: Optional[str] = Field(None, description="Fim do processamento (ISO format)")
+    erro: Optional[str] = Field(None, description="Último erro ocorrido")
+
+
+class PaginaCobrancas(BaseModel):
+    """Página das cobranças pagas por um processamento da fila"""
+    pagina: int = Field(..., description="Número da página (a partir de 1)")
+    tamanho: int = Field(..., description="Itens por página")
+    total: int = Field(..., description="Cobranças pagas disponíveis até agora")
+    itens: List[Cobranca] = Field(..., description="Cobranças desta página")
+    proximaPagina: Optional[int] = Field(None, description="Próxima página, se já houver itens nela")
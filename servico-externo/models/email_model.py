@@ -2,12 +2,17 @@ from pydantic import BaseModel, Field, EmailStr
 from typing import Optional
 from datetime import datetime
 
+from models.erro_model import Erro
+
 
 class NovoEmail(BaseModel):
     """Modelo para criar um novo e-mail"""
     destinatario: EmailStr = Field(..., description="E-mail do destinatário")
     assunto: str = Field(..., description="Assunto do e-mail")
     corpo: str = Field(..., description="Corpo/conteúdo do e-mail")
+    chave: Optional[str] = Field(
+        None, description="Chave de idempotência: um reenvio com a mesma chave não gera outro e-mail"
+    )
 
 
 class Email(NovoEmail):
@@ -28,3 +33,8 @@ class Email(NovoEmail):
             }
         }
 
+
+class ResultadoEnvioEmail(BaseModel):
+    """Resultado de um item do envio em lote: o e-mail registrado ou o erro"""
+    email: Optional[Email] = Field(None, description="E-mail registrado (enviado ou não)")
+    erro: Optional[Erro] = Field(None, description="Motivo da falha, se houver")
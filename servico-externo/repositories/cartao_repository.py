@@ -6,6 +6,7 @@ from typing import List, Optional
 from tinydb import Query
 from datetime import datetime, timezone
 from database.database import Database
+from database.sequencias import sequencias_de
 from models.cartao_model import ValidacaoCartao, ValidarCartaoRequest
 
 
@@ -15,13 +16,13 @@ class CartaoRepository:
     def __init__(self, db: Database):
         self.db = db
         self.table = db.get_table('validacoes_cartao')
+        self.sequencias = sequencias_de(db)
         self.query = Query()
     
     def create(self, request: ValidarCartaoRequest, valido: bool, mensagem: str) -> ValidacaoCartao:
         """Cria uma nova validação de cartão"""
-        # Gera um novo ID
-        all_validacoes = self.table.all()
-        new_id = max([v['id'] for v in all_validacoes], default=0) + 1
+        # Reserva o próximo ID da sequência da tabela
+        new_id = self.sequencias.proximo('validacoes_cartao')
         
         # Mascara o número do cartão (mostra apenas os 4 primeiros e últimos dígitos)
         numero_cartao = request.numero_cartao
@@ -2,12 +2,18 @@
 Repositório para operações CRUD de Cobranças no banco de dados.
 """
 
+import os
 from typing import List, Optional
 from tinydb import Query
 from datetime import datetime, timezone
 from database.database import Database
+from database.indice_status import indice_status_de
+from database.sequencias import sequencias_de
 from models.cobranca_model import Cobranca, NovaCobranca, StatusCobranca
 
+# Cobranças pagas por escrita ao processar a fila (filas enormes viram várias escritas)
+COBRANCAS_LOTE_PROCESSAMENTO = int(os.getenv("COBRANCAS_LOTE_PROCESSAMENTO", "500"))
+
 
 class CobrancaRepository:
     """Repositório para gerenciar operações de cobranças no banco de dados"""
@@ -15,13 +21,15 @@ class CobrancaRepository:
     def __init__(self, db: Database):
         self.db = db
         self.table = db.get_table('cobrancas')
+        self.sequencias = sequencias_de(db)
+        # Cobranças sem status gravado são tratadas como PENDENTE
+        self.indice_status = indice_status_de(db, 'cobrancas', StatusCobranca.PENDENTE.value)
         self.query = Query()
 
     def create(self, cobranca: NovaCobranca) -> Cobranca:
         """Cria uma nova cobrança - compatível com Postman e servico-aluguel"""
-        # Gera um novo ID
-        all_cobrancas = self.table.all()
-        new_id = max([c['id'] for c in all_cobrancas], default=0) + 1
+        # Reserva o próximo ID da sequência da tabela
+        new_id = self.sequencias.proximo('cobrancas')
 
         agora = datetime.now(timezone.utc).isoformat()
 
@@ -45,40 +53,20 @@ class CobrancaRepository:
             'horaFinalizacao': hora_finalizacao
         }
 
-        self.table.insert(cobranca_data)
+        doc_id = self.table.insert(cobranca_data)
+        self.indice_status.registrar(doc_id, status)
         return Cobranca(**cobranca_data)
     
     def get_by_id(self, cobranca_id: int) -> Optional[Cobranca]:
         """Busca uma cobrança por ID"""
         result = self.table.get(self.query.id == cobranca_id)
         if result:
-            # Garante que todos os campos necessários existem
-            cobranca_data = {
-                'id': result.get('id'),
-                'ciclista': result.get('ciclista') or result.get('id_ciclista'),
-                'valor': result.get('valor'),
-                'status': result.get('status', 'PENDENTE'),
-                'horaSolicitacao': result.get('horaSolicitacao') or result.get('dataCriacao') or datetime.now(timezone.utc).isoformat(),
-                'horaFinalizacao': result.get('horaFinalizacao') or result.get('dataPagamento')
-            }
-            return Cobranca(**cobranca_data)
+            return self._normalizar(result)
         return None
 
     def get_all(self) -> List[Cobranca]:
         """Retorna todas as cobranças"""
-        results = self.table.all()
-        cobrancas = []
-        for r in results:
-            cobranca_data = {
-                'id': r.get('id'),
-                'ciclista': r.get('ciclista') or r.get('id_ciclista'),
-                'valor': r.get('valor'),
-                'status': r.get('status', 'PENDENTE'),
-                'horaSolicitacao': r.get('horaSolicitacao') or r.get('dataCriacao') or datetime.now(timezone.utc).isoformat(),
-                'horaFinalizacao': r.get('horaFinalizacao') or r.get('dataPagamento')
-            }
-            cobrancas.append(Cobranca(**cobranca_data))
-        return cobrancas
+        return [self._normalizar(r) for r in self.table.all()]
 
     def update_status(self, cobranca_id: int, status: StatusCobranca, hora_finalizacao: Optional[str] = None) -> Optional[Cobranca]:
         """Atualiza o status de uma cobrança"""
@@ -92,6 +80,82 @@ class CobrancaRepository:
         elif status == StatusCobranca.PAGA and not hora_finalizacao:
             update_data['horaFinalizacao'] = datetime.now(timezone.utc).isoformat()
 
-        self.table.update(update_data, self.query.id == cobranca_id)
+        doc_ids = self.table.update(update_data, self.query.id == cobranca_id)
+        self.indice_status.mover(doc_ids, status.value)
         return self.get_by_id(cobranca_id)
 
+    def processar_pendentes(self, tamanho_lote: Optional[int] = None) -> List[Cobranca]:
+        """
+        Marca como PAGA todas as cobranças PENDENTE.
+
+        As pendentes vêm do índice de status, sem ler as cobranças já pagas.
+        Cada bloco de até ``tamanho_lote`` cobranças é gravado numa única
+        escrita.
+
+        Returns:
+            Cobranças processadas, na ordem em que entraram na fila
+        """
+        tamanho_lote = tamanho_lote or COBRANCAS_LOTE_PROCESSAMENTO
+        pendentes = self.ids_pendentes()
+        processadas: List[Cobranca] = []
+
+        for inicio in range(0, len(pendentes), tamanho_lote):
+            processadas.extend(self.pagar_pendentes(pendentes[inicio:inicio + tamanho_lote]))
+
+        return processadas
+
+    def ids_pendentes(self) -> List[int]:
+        """doc_ids das cobranças PENDENTE, na ordem em que entraram na fila"""
+        return self.indice_status.ids(StatusCobranca.PENDENTE.value)
+
+    def pagar_pendentes(self, doc_ids: List[int]) -> List[Cobranca]:
+        """
+        Marca como PAGA, numa única escrita, as cobranças informadas.
+
+        Cobranças que deixaram de estar pendentes ou foram removidas entre a
+        consulta ao índice e a escrita não são alteradas nem devolvidas.
+        """
+        agora = datetime.now(timezone.utc).isoformat()
+        pagas = []
+
+        def pagar(doc):
+            if (doc.get('status') or StatusCobranca.PENDENTE.value) != StatusCobranca.PENDENTE.value:
+                return
+            doc['status'] = StatusCobranca.PAGA.value
+            doc['horaFinalizacao'] = agora
+            pagas.append(dict(doc))
+
+        existentes = doc_ids
+        while existentes:
+            # Até o TinyDB 4.8, update(doc_ids=...) levanta KeyError (sem gravar
+            # nada) se algum doc_id não existe mais; filtra os que restam e tenta
+            # de novo. No 4.9 e no backend SQLite os ausentes são só ignorados
+            encontrados = {doc.doc_id for doc in self.table.get(doc_ids=existentes)}
+            existentes = [doc_id for doc_id in existentes if doc_id in encontrados]
+            pagas.clear()
+            try:
+                self.table.update(pagar, doc_ids=existentes)
+                break
+            except KeyError:
+                continue
+
+        if len(pagas) == len(doc_ids):
+            self.indice_status.mover(doc_ids, StatusCobranca.PAGA.value)
+        else:
+            # Alguma cobrança mudou por fora do repositório: o índice estava desatualizado
+            self.indice_status.descartar()
+        return [self._normalizar(doc) for doc in pagas]
+
+    @staticmethod
+    def _normalizar(result) -> Cobranca:
+        """Monta a Cobranca a partir do documento, aceitando os nomes de campo antigos"""
+        # Garante que todos os campos necessários existem
+        cobranca_data = {
+            'id': result.get('id'),
+            'ciclista': result.get('ciclista') or result.get('id_ciclista'),
+            'valor': result.get('valor'),
+            'status': result.get('status', 'PENDENTE'),
+            'horaSolicitacao': result.get('horaSolicitacao') or result.get('dataCriacao') or datetime.now(timezone.utc).isoformat(),
+            'horaFinalizacao': result.get('horaFinalizacao') or result.get('dataPagamento')
+        }
+        return Cobranca(**cobranca_data)
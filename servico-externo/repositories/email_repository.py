@@ -2,10 +2,11 @@
 Repositório para operações CRUD de E-mails no banco de dados.
 """
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 from tinydb import Query
 from datetime import datetime, timezone
 from database.database import Database
+from database.sequencias import sequencias_de
 from models.email_model import Email, NovoEmail
 
 
@@ -15,13 +16,13 @@ class EmailRepository:
     def __init__(self, db: Database):
         self.db = db
         self.table = db.get_table('emails')
+        self.sequencias = sequencias_de(db)
         self.query = Query()
     
     def create(self, email: NovoEmail) -> Email:
         """Cria um novo e-mail"""
-        # Gera um novo ID
-        all_emails = self.table.all()
-        new_id = max([e['id'] for e in all_emails], default=0) + 1
+        # Reserva o próximo ID da sequência da tabela
+        new_id = self.sequencias.proximo('emails')
         
         email_data = email.model_dump()
         email_data['id'] = new_id
@@ -36,6 +37,12 @@ class EmailRepository:
         result = self.table.get(self.query.id == email_id)
         return Email(**result) if result else None
     
+    def get_by_chaves(self, chaves: List[str]) -> Dict[str, Email]:
+        """E-mails já registrados com as chaves de idempotência informadas (chave -> e-mail)"""
+        if not chaves:
+            return {}
+        return {r['chave']: Email(**r) for r in self.table.search(self.query.chave.one_of(chaves))}
+    
     def get_all(self) -> List[Email]:
         """Retorna todos os e-mails"""
         results = self.table.all()
@@ -55,3 +62,27 @@ class EmailRepository:
         
         return self.get_by_id(email_id)
 
+    def create_many(self, emails: List[NovoEmail]) -> List[Email]:
+        """Cria vários e-mails numa única escrita, com IDs reservados de uma vez"""
+        if not emails:
+            return []
+        primeiro_id = self.sequencias.proximo('emails', quantidade=len(emails))
+
+        registros = [
+            {**email.model_dump(), 'id': primeiro_id + i, 'enviado': False, 'data_envio': None}
+            for i, email in enumerate(emails)
+        ]
+        self.table.insert_multiple(registros)
+        return [Email(**r) for r in registros]
+
+    def marcar_como_enviados(self, emails: List[Email]) -> List[Email]:
+        """Marca vários e-mails como enviados numa única escrita"""
+        if not emails:
+            return []
+        data_envio = datetime.now(timezone.utc).isoformat()
+        self.table.update({
+            'enviado': True,
+            'data_envio': data_envio
+        }, self.query.id.one_of([email.id for email in emails]))
+
+        return [email.model_copy(update={'enviado': True, 'data_envio': data_envio}) for email in emails]
@@ -4,12 +4,19 @@ Implementa os endpoints da API de serviços externos para processamento e consul
 """
 
 from typing import List
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import JSONResponse
 from datetime import datetime, timezone
 
 from database.database import get_db
 from repositories.cobranca_repository import CobrancaRepository
-from models.cobranca_model import Cobranca, NovaCobranca, StatusCobranca
+from models.cobranca_model import Cobranca, NovaCobranca, PaginaCobrancas, ProcessamentoFila, StatusCobranca
+from services.fila_cobranca_service import (
+    ProcessamentoEmAndamento,
+    iniciar_processamento,
+    obter_processamento,
+    processar_fila,
+)
 
 
 # Router apenas com as rotas do contrato externo
@@ -90,26 +97,84 @@ def incluir_cobranca_na_fila(cobranca: NovaCobranca):
     summary="Processa todas as cobranças atrasadas colocadas em fila previamente.",
     response_model=List[Cobranca],
     status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_202_ACCEPTED: {
+            "model": ProcessamentoFila,
+            "description": "Processamento iniciado em segundo plano (emSegundoPlano=true)",
+        },
+        status.HTTP_409_CONFLICT: {
+            "description": "Já existe um processamento da fila em andamento",
+        },
+    },
 )
-def processar_cobrancas_em_fila():
+def processar_cobrancas_em_fila(emSegundoPlano: bool = False):
     """
     Processa todas as cobranças pendentes, marcando-as como PAGA.
     Simula o processamento de pagamentos em fila.
+
+    Com ``emSegundoPlano=true`` o processamento roda numa thread: a resposta
+    (202) traz o ID para acompanhar o progresso e buscar as cobranças pagas.
+    Se já houver um processamento em andamento a resposta é 409.
     """
     db = get_db()
-    cobranca_repo = CobrancaRepository(db)
-
-    todas = cobranca_repo.get_all()
-    processadas: List[Cobranca] = []
 
-    for cobranca in todas:
-        # Processa cobranças PENDENTE, marcando como PAGA
-        if cobranca.status == StatusCobranca.PENDENTE.value:
-            atualizada = cobranca_repo.update_status(
-                cobranca.id, StatusCobranca.PAGA
+    try:
+        if emSegundoPlano:
+            processamento = iniciar_processamento(db)
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content=processamento.progresso().model_dump(mode="json"),
             )
-            if atualizada:
-                processadas.append(atualizada)
 
-    return processadas
+        # Só as pendentes são lidas (índice de status) e gravadas em blocos
+        return processar_fila(db)
+    except ProcessamentoEmAndamento:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "codigo": "PROCESSAMENTO_EM_ANDAMENTO",
+                "mensagem": "Processamento em andamento",
+            },
+        )
+
 
+def _buscar_processamento(idProcessamento: str):
+    processamento = obter_processamento(idProcessamento)
+    if not processamento:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "codigo": "PROCESSAMENTO_NAO_ENCONTRADO",
+                "mensagem": f"Processamento com ID {idProcessamento} não encontrado",
+            },
+        )
+    return processamento
+
+
+@contrato_router.get(
+    "/processaCobrancasEmFila/{idProcessamento}",
+    summary="Progresso de um processamento da fila em segundo plano",
+    response_model=ProcessamentoFila,
+)
+def obter_progresso_processamento(idProcessamento: str):
+    """
+    Retorna quantas cobranças já foram pagas, quantas falharam e quantas faltam.
+    """
+    return _buscar_processamento(idProcessamento).progresso()
+
+
+@contrato_router.get(
+    "/processaCobrancasEmFila/{idProcessamento}/cobrancas",
+    summary="Cobranças pagas por um processamento da fila, em páginas",
+    response_model=PaginaCobrancas,
+)
+def listar_cobrancas_processadas(
+    idProcessamento: str,
+    pagina: int = Query(1, ge=1),
+    tamanho: int = Query(100, ge=1, le=1000),
+):
+    """
+    Lista as cobranças pagas pelo processamento, na ordem da fila. As páginas
+    podem ser lidas enquanto o processamento ainda está em andamento.
+    """
+    return _buscar_processamento(idProcessamento).pagina(pagina, tamanho)
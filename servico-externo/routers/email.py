@@ -3,13 +3,15 @@ Router para operações com e-mails.
 Implementa os endpoints da API de serviços externos para notificações por e-mail.
 """
 
-from typing import Any, Dict
+import os
+from typing import Any, Dict, List
 
 from fastapi import APIRouter, HTTPException, status, Body
 
 from database.database import get_db
 from repositories.email_repository import EmailRepository
-from models.email_model import Email, NovoEmail
+from models.email_model import Email, NovoEmail, ResultadoEnvioEmail
+from models.erro_model import Erro
 from services.email_service import email_service
 from typing import Union
 
@@ -17,6 +19,26 @@ from typing import Union
 # Router apenas com as rotas do contrato externo
 contrato_router = APIRouter(tags=["Externo"])
 
+# Máximo de e-mails aceitos por chamada ao /enviarEmails (a outbox do
+# servico-aluguel envia lotes de até OUTBOX_LOTE = 50)
+EMAILS_LOTE_MAXIMO = int(os.getenv("EMAILS_LOTE_MAXIMO", "100"))
+
+
+def _normalizar(payload: Union[NovoEmail, Dict[str, Any]]) -> NovoEmail:
+    """Aceita o formato antigo (destinatario/corpo) e o novo (email/mensagem)"""
+    if isinstance(payload, NovoEmail):
+        return payload
+    if isinstance(payload, dict):
+        if "destinatario" in payload or "corpo" in payload:
+            return NovoEmail(**payload)
+        return NovoEmail(
+            destinatario=payload.get("email"),
+            assunto=payload.get("assunto"),
+            corpo=payload.get("mensagem"),
+            chave=payload.get("chave"),
+        )
+    raise ValueError("Payload inválido")
+
 
 @contrato_router.post(
     "/enviarEmail",
@@ -36,19 +58,7 @@ def enviar_email_contrato(
     """
     # Normaliza o payload para o modelo NovoEmail esperado internamente
     try:
-        if isinstance(payload, NovoEmail):
-            email_model = payload
-        elif isinstance(payload, dict):
-            if "destinatario" in payload or "corpo" in payload:
-                email_model = NovoEmail(**payload)
-            else:
-                email_model = NovoEmail(
-                    destinatario=payload.get("email"),
-                    assunto=payload.get("assunto"),
-                    corpo=payload.get("mensagem"),
-                )
-        else:
-            raise ValueError("Payload inválido")
+        email_model = _normalizar(payload)
 
         db = get_db()
         email_repo = EmailRepository(db)
@@ -92,3 +102,84 @@ def enviar_email_contrato(
             ],
         )
 
+
+@contrato_router.post(
+    "/enviarEmails",
+    summary="Notificar vários destinatários via email",
+    response_model=List[ResultadoEnvioEmail],
+    status_code=status.HTTP_200_OK,
+)
+def enviar_emails_contrato(
+    payload: List[Dict[str, Any]] = Body(...)
+    ):
+    """
+    Envio em lote: todos os e-mails válidos saem pela mesma sessão SMTP e são
+    registrados no banco com uma escrita para criar e outra para marcar os
+    enviados.
+
+    Cada item aceita os mesmos formatos do /enviarEmail. A resposta traz um
+    resultado por item, na ordem recebida: o e-mail registrado (com
+    ``enviado`` indicando o sucesso) ou o erro de validação/envio.
+
+    Um item com ``chave`` já registrada não gera outro e-mail: se o anterior
+    foi enviado ele é devolvido sem reenvio, senão o mesmo registro é enviado
+    de novo. Assim o cliente pode repetir um lote que falhou (timeout, por
+    exemplo) sem duplicar os e-mails que já saíram.
+
+    Lotes com mais de ``EMAILS_LOTE_MAXIMO`` itens são recusados com 422.
+    """
+    if len(payload) > EMAILS_LOTE_MAXIMO:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[
+                {
+                    "codigo": "DADOS_INVALIDOS",
+                    "mensagem": f"O lote deve ter no máximo {EMAILS_LOTE_MAXIMO} e-mails",
+                }
+            ],
+        )
+
+    resultados: List[ResultadoEnvioEmail] = [None] * len(payload)
+    validos = []
+    for indice, item in enumerate(payload):
+        try:
+            validos.append((indice, _normalizar(item)))
+        except Exception as e:
+            resultados[indice] = ResultadoEnvioEmail(
+                erro=Erro(codigo="DADOS_INVALIDOS", mensagem=str(e))
+            )
+
+    email_repo = EmailRepository(get_db())
+    existentes = email_repo.get_by_chaves([email.chave for _, email in validos if email.chave])
+    criados = iter(email_repo.create_many([email for _, email in validos if email.chave not in existentes]))
+    registrados = [existentes.get(email.chave) or next(criados) for _, email in validos]
+
+    a_enviar = list({email.id: email for email in registrados if not email.enviado}.values())
+    envios = dict(zip(
+        (email.id for email in a_enviar),
+        email_service.enviar_emails([
+            (email.destinatario, email.assunto, email.corpo, None) for email in a_enviar
+        ])
+    ))
+    enviados = email_repo.marcar_como_enviados([
+        email for email in a_enviar if envios[email.id][0]
+    ])
+    enviados_por_id = {email.id: email for email in enviados}
+
+    for (indice, _), email in zip(validos, registrados):
+        if email.enviado:
+            resultados[indice] = ResultadoEnvioEmail(email=email)
+            continue
+        sucesso, erro = envios[email.id]
+        if sucesso:
+            resultados[indice] = ResultadoEnvioEmail(email=enviados_por_id[email.id])
+        else:
+            resultados[indice] = ResultadoEnvioEmail(
+                email=email,
+                erro=Erro(
+                    codigo="ERRO_ENVIO_EMAIL",
+                    mensagem=f"Erro ao enviar e-mail: {erro or 'Erro desconhecido'}"
+                )
+            )
+
+    return resultados
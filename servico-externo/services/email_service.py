@@ -1,18 +1,36 @@
 """
 Serviço para envio de e-mails via SMTP.
+
+As sessões SMTP (conexão + STARTTLS + login) ficam num pool e são
+reaproveitadas entre envios; um lote de mensagens sai por uma única sessão.
 """
 
 import smtplib
 import os
+from email.message import Message
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional, Tuple
+from typing import List, Optional, Sequence, Tuple
 from datetime import datetime, timezone
 
+from services.smtp_pool import PoolSMTP, sessao_quebrada
+
+# Sessões SMTP mantidas abertas (e máximo de envios simultâneos)
+SMTP_POOL_TAMANHO = int(os.getenv("SMTP_POOL_TAMANHO", "4"))
+
+# Segundos de ociosidade após os quais a sessão é testada com NOOP antes do uso
+SMTP_POOL_VERIFICAR_APOS = float(os.getenv("SMTP_POOL_VERIFICAR_APOS", "30"))
+
+# Timeout das operações de socket com o servidor SMTP
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+
+# (destinatário, assunto, corpo, corpo_html)
+EmailParaEnvio = Tuple[str, str, str, Optional[str]]
+
 
 class EmailService:
     """Serviço para envio de e-mails via SMTP"""
-    
+
     def __init__(self):
         # Configurações SMTP via variáveis de ambiente
         self.smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
@@ -21,14 +39,16 @@ class EmailService:
         self.smtp_password = os.getenv("SMTP_PASSWORD", "")
         self.smtp_from_email = os.getenv("SMTP_FROM_EMAIL", self.smtp_username)
         self.smtp_use_tls = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
-        
+
         # Se não houver credenciais configuradas, usa modo de simulação
         self.simulacao = not (self.smtp_username and self.smtp_password)
-        
+
         if self.simulacao:
             print("⚠️  Modo de simulação ativado: credenciais SMTP não configuradas")
             print("   Configure as variáveis de ambiente: SMTP_USERNAME, SMTP_PASSWORD")
-    
+
+        self.pool = PoolSMTP(self._abrir_sessao, SMTP_POOL_TAMANHO, SMTP_POOL_VERIFICAR_APOS)
+
     def enviar_email(
         self,
         destinatario: str,
@@ -38,66 +58,123 @@ class EmailService:
     ) -> Tuple[bool, Optional[str]]:
         """
         Envia um e-mail via SMTP.
-        
+
         Args:
             destinatario: E-mail do destinatário
             assunto: Assunto do e-mail
             corpo: Corpo do e-mail em texto plano
             corpo_html: Corpo do e-mail em HTML (opcional)
-            
+
         Returns:
             Tupla (sucesso, mensagem_erro)
         """
+        return self.enviar_emails([(destinatario, assunto, corpo, corpo_html)])[0]
+
+    def enviar_emails(self, emails: Sequence[EmailParaEnvio]) -> List[Tuple[bool, Optional[str]]]:
+        """
+        Envia vários e-mails pela mesma sessão SMTP.
+
+        Uma falha em uma mensagem (ex.: destinatário recusado) não interrompe
+        as demais. Se a sessão cair no meio do lote, as mensagens restantes
+        seguem por uma sessão nova (uma única vez).
+
+        Args:
+            emails: Tuplas (destinatario, assunto, corpo, corpo_html)
+
+        Returns:
+            Lista (sucesso, mensagem_erro), na ordem dos e-mails
+        """
         # Se estiver em modo de simulação, apenas retorna sucesso
         if self.simulacao:
-            print(f"📧 [SIMULAÇÃO] E-mail para {destinatario}: {assunto}")
-            return True, None
-        
+            for destinatario, assunto, _, _ in emails:
+                print(f"📧 [SIMULAÇÃO] E-mail para {destinatario}: {assunto}")
+            return [(True, None)] * len(emails)
+
+        resultados: List[Optional[Tuple[bool, Optional[str]]]] = [None] * len(emails)
         try:
-            # Cria a mensagem
-            if corpo_html:
-                msg = MIMEMultipart('alternative')
-                msg.attach(MIMEText(corpo, 'plain'))
-                msg.attach(MIMEText(corpo_html, 'html'))
-            else:
-                msg = MIMEText(corpo, 'plain')
-            
-            msg['Subject'] = assunto
-            msg['From'] = self.smtp_from_email
-            msg['To'] = destinatario
-            
-            # Conecta ao servidor SMTP e envia
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                if self.smtp_use_tls:
-                    server.starttls()
-                
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(msg)
-            
-            print(f"✓ E-mail enviado com sucesso para {destinatario}")
-            return True, None
-            
-        except smtplib.SMTPAuthenticationError as e:
-            erro_msg = f"Erro de autenticação SMTP: {str(e)}"
-            print(f"✗ {erro_msg}")
-            return False, erro_msg
-            
-        except smtplib.SMTPRecipientsRefused as e:
-            erro_msg = f"Destinatário recusado: {str(e)}"
+            mensagens = [self._montar_mensagem(*email) for email in emails]
+        except Exception as e:
+            erro_msg = self._descrever_erro(e)
             print(f"✗ {erro_msg}")
-            return False, erro_msg
-            
-        except smtplib.SMTPServerDisconnected as e:
-            erro_msg = f"Servidor SMTP desconectado: {str(e)}"
+            return [(False, erro_msg)] * len(emails)
+
+        proximo = 0
+        ultimo_erro: Optional[BaseException] = None
+        for _ in range(2):
+            try:
+                with self.pool.sessao() as sessao:
+                    while proximo < len(mensagens):
+                        resultados[proximo] = self._enviar_na_sessao(sessao, mensagens[proximo])
+                        proximo += 1
+                break
+            except Exception as e:
+                # Sessão quebrada ou impossível de abrir: tenta de novo com outra
+                ultimo_erro = e
+
+        for i in range(proximo, len(emails)):
+            erro_msg = self._descrever_erro(ultimo_erro)
             print(f"✗ {erro_msg}")
-            return False, erro_msg
-            
+            resultados[i] = (False, erro_msg)
+        return resultados
+
+    def fechar(self):
+        """Encerra as sessões SMTP abertas (chamado no shutdown da aplicação)"""
+        self.pool.fechar()
+
+    def _abrir_sessao(self) -> smtplib.SMTP:
+        """Conecta ao servidor SMTP e autentica"""
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=SMTP_TIMEOUT)
+        try:
+            if self.smtp_use_tls:
+                server.starttls()
+            server.login(self.smtp_username, self.smtp_password)
+        except BaseException:
+            server.close()
+            raise
+        return server
+
+    def _montar_mensagem(
+        self,
+        destinatario: str,
+        assunto: str,
+        corpo: str,
+        corpo_html: Optional[str] = None
+    ) -> Message:
+        if corpo_html:
+            msg = MIMEMultipart('alternative')
+            msg.attach(MIMEText(corpo, 'plain'))
+            msg.attach(MIMEText(corpo_html, 'html'))
+        else:
+            msg = MIMEText(corpo, 'plain')
+
+        msg['Subject'] = assunto
+        msg['From'] = self.smtp_from_email
+        msg['To'] = destinatario
+        return msg
+
+    def _enviar_na_sessao(self, sessao: smtplib.SMTP, msg: Message) -> Tuple[bool, Optional[str]]:
+        try:
+            sessao.send_message(msg)
         except Exception as e:
-            erro_msg = f"Erro ao enviar e-mail: {str(e)}"
+            if sessao_quebrada(e):
+                raise
+            erro_msg = self._descrever_erro(e)
             print(f"✗ {erro_msg}")
             return False, erro_msg
 
+        print(f"✓ E-mail enviado com sucesso para {msg['To']}")
+        return True, None
+
+    @staticmethod
+    def _descrever_erro(erro: BaseException) -> str:
+        if isinstance(erro, smtplib.SMTPAuthenticationError):
+            return f"Erro de autenticação SMTP: {str(erro)}"
+        if isinstance(erro, smtplib.SMTPRecipientsRefused):
+            return f"Destinatário recusado: {str(erro)}"
+        if isinstance(erro, smtplib.SMTPServerDisconnected):
+            return f"Servidor SMTP desconectado: {str(erro)}"
+        return f"Erro ao enviar e-mail: {str(erro)}"
+
 
 # Instância global do serviço de e-mail
 email_service = EmailService()
-
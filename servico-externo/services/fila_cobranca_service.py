@@ -0,0 +1,182 @@
+"""
+Processamento da fila de cobranças.
+
+O ``POST /processaCobrancasEmFila`` síncrono paga a fila inteira dentro da
+requisição. Com filas grandes isso passa do timeout do cliente, então o
+processamento também pode rodar numa thread em segundo plano: a requisição
+devolve o ID do processamento na hora, o progresso (processadas, falhas,
+restantes) é consultado pelo ID e as cobranças pagas ficam disponíveis em
+páginas à medida que cada bloco é gravado.
+
+Um único processamento da fila roda por vez (síncrono ou em segundo plano),
+para que dois não disputem as mesmas cobranças pendentes. Um pedido que chega
+com outro em andamento é recusado na hora, sem prender uma thread esperando.
+"""
+
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from database.database import Database
+from models.cobranca_model import Cobranca, PaginaCobrancas, ProcessamentoFila, StatusProcessamento
+from repositories.cobranca_repository import CobrancaRepository, COBRANCAS_LOTE_PROCESSAMENTO
+
+# Processamentos encerrados guardados para consulta (os mais antigos são descartados)
+PROCESSAMENTOS_RETIDOS = int(os.getenv("PROCESSAMENTOS_RETIDOS", "50"))
+
+# Serializa os processamentos da fila; quem chega com outro rodando recebe
+# ProcessamentoEmAndamento em vez de esperar
+_fila_lock = threading.Lock()
+
+
+class ProcessamentoEmAndamento(Exception):
+    """Já existe um processamento da fila rodando"""
+
+
+class Processamento:
+    """Um processamento da fila em segundo plano e seus resultados"""
+
+    def __init__(self, db: Database, tamanho_lote: int):
+        self.id = uuid.uuid4().hex
+        self._db = db
+        self._tamanho_lote = tamanho_lote
+        self._lock = threading.Lock()
+        self._status = StatusProcessamento.EXECUTANDO
+        self._total = 0
+        self._falhas = 0
+        self._restantes = 0
+        self._erro: Optional[str] = None
+        self._iniciado_em = datetime.now(timezone.utc).isoformat()
+        self._finalizado_em: Optional[str] = None
+        self._resultados: List[Cobranca] = []
+        self._thread = threading.Thread(target=self._executar, name=f"fila-cobrancas-{self.id}", daemon=True)
+
+    @property
+    def encerrado(self) -> bool:
+        return self._status != StatusProcessamento.EXECUTANDO
+
+    def iniciar(self):
+        self._thread.start()
+
+    def aguardar(self, timeout: Optional[float] = None):
+        self._thread.join(timeout)
+
+    def progresso(self) -> ProcessamentoFila:
+        with self._lock:
+            return ProcessamentoFila(
+                id=self.id,
+                status=self._status,
+                total=self._total,
+                processadas=len(self._resultados),
+                falhas=self._falhas,
+                restantes=self._restantes,
+                iniciadoEm=self._iniciado_em,
+                finalizadoEm=self._finalizado_em,
+                erro=self._erro,
+            )
+
+    def pagina(self, pagina: int, tamanho: int) -> PaginaCobrancas:
+        """Cobranças pagas até agora, da posição (pagina - 1) * tamanho em diante"""
+        inicio = (pagina - 1) * tamanho
+        with self._lock:
+            total = len(self._resultados)
+            itens = self._resultados[inicio:inicio + tamanho]
+        return PaginaCobrancas(
+            pagina=pagina,
+            tamanho=tamanho,
+            total=total,
+            itens=itens,
+            proximaPagina=pagina + 1 if inicio + tamanho < total else None,
+        )
+
+    def _executar(self):
+        # O _fila_lock foi tomado por iniciar_processamento e é liberado aqui,
+        # só depois do status final: quem entra em seguida já vê este encerrado
+        status = StatusProcessamento.ERRO
+        try:
+            repo = CobrancaRepository(self._db)
+            pendentes = repo.ids_pendentes()
+            with self._lock:
+                self._total = self._restantes = len(pendentes)
+
+            for inicio in range(0, len(pendentes), self._tamanho_lote):
+                bloco = pendentes[inicio:inicio + self._tamanho_lote]
+                try:
+                    pagas = repo.pagar_pendentes(bloco)
+                except Exception as e:
+                    with self._lock:
+                        self._falhas += len(bloco)
+                        self._restantes -= len(bloco)
+                        self._erro = str(e)
+                    continue
+
+                with self._lock:
+                    self._resultados.extend(pagas)
+                    self._restantes -= len(bloco)
+                    # Cobranças pagas por fora desde a consulta não entram na conta
+                    self._total -= len(bloco) - len(pagas)
+
+            status = StatusProcessamento.CONCLUIDO
+        except Exception as e:
+            with self._lock:
+                self._erro = str(e)
+            status = StatusProcessamento.ERRO
+        finally:
+            with self._lock:
+                self._status = status
+                self._finalizado_em = datetime.now(timezone.utc).isoformat()
+            _fila_lock.release()
+
+
+_processamentos: "OrderedDict[str, Processamento]" = OrderedDict()
+_registro_lock = threading.Lock()
+
+
+def processar_fila(db: Database) -> List[Cobranca]:
+    """
+    Paga a fila inteira e devolve as cobranças processadas (modo síncrono).
+
+    Raises:
+        ProcessamentoEmAndamento: se outro processamento da fila estiver rodando
+    """
+    if not _fila_lock.acquire(blocking=False):
+        raise ProcessamentoEmAndamento()
+    try:
+        return CobrancaRepository(db).processar_pendentes()
+    finally:
+        _fila_lock.release()
+
+
+def iniciar_processamento(db: Database, tamanho_lote: Optional[int] = None) -> Processamento:
+    """
+    Dispara o processamento da fila numa thread e retorna logo em seguida.
+
+    Raises:
+        ProcessamentoEmAndamento: se outro processamento da fila estiver rodando
+    """
+    if not _fila_lock.acquire(blocking=False):
+        raise ProcessamentoEmAndamento()
+    try:
+        processamento = Processamento(db, tamanho_lote or COBRANCAS_LOTE_PROCESSAMENTO)
+        with _registro_lock:
+            _processamentos[processamento.id] = processamento
+            _descartar_antigos()
+        processamento.iniciar()
+    except BaseException:
+        _fila_lock.release()
+        raise
+    return processamento
+
+
+def obter_processamento(id_processamento: str) -> Optional[Processamento]:
+    with _registro_lock:
+        return _processamentos.get(id_processamento)
+
+
+def _descartar_antigos():
+    encerrados = [p.id for p in _processamentos.values() if p.encerrado]
+    for id_processamento in encerrados[:max(0, len(encerrados) - PROCESSAMENTOS_RETIDOS)]:
+        del _processamentos[id_processamento]
@@ -0,0 +1,110 @@
+"""
+Pool de sessões SMTP autenticadas.
+
+Abrir uma sessão custa a conexão TCP, EHLO, STARTTLS (handshake TLS) e AUTH,
+várias idas e voltas ao servidor antes da primeira mensagem. O pool mantém
+até ``tamanho`` sessões já autenticadas e as reaproveita entre envios.
+
+Antes de reutilizar uma sessão que ficou ociosa por mais de ``verificar_apos``
+segundos, um NOOP confirma que o servidor não a encerrou. Sessões que falham
+nessa verificação ou durante um envio (desconexão, erro de socket, código 421)
+são descartadas; a próxima requisição abre uma nova.
+"""
+
+import smtplib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Iterator, Tuple
+
+
+def sessao_quebrada(erro: BaseException) -> bool:
+    """Indica se o erro deixou a sessão SMTP inutilizável"""
+    if isinstance(erro, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(erro, smtplib.SMTPResponseException):
+        # 421: o servidor está encerrando o canal
+        return erro.smtp_code == 421
+    # SMTPException herda de OSError; aqui só entram erros de socket/TLS
+    return isinstance(erro, OSError) and not isinstance(erro, smtplib.SMTPException)
+
+
+class PoolSMTP:
+    """Sessões SMTP reaproveitadas, limitadas a ``tamanho`` em uso ao mesmo tempo"""
+
+    def __init__(self, abrir: Callable[[], smtplib.SMTP], tamanho: int = 4, verificar_apos: float = 30.0):
+        self._abrir = abrir
+        self._verificar_apos = verificar_apos
+        self._vagas = threading.BoundedSemaphore(tamanho)
+        self._lock = threading.Lock()
+        # (sessão, momento em que foi devolvida)
+        self._livres: Deque[Tuple[smtplib.SMTP, float]] = deque()
+
+    @contextmanager
+    def sessao(self) -> Iterator[smtplib.SMTP]:
+        """
+        Empresta uma sessão autenticada pelo tempo do bloco.
+
+        Se o bloco lançar um erro que quebra a sessão, ela é descartada em vez
+        de voltar ao pool; o erro é repassado ao chamador.
+        """
+        self._vagas.acquire()
+        try:
+            sessao = self._obter()
+            try:
+                yield sessao
+            except BaseException as erro:
+                if sessao_quebrada(erro):
+                    self._encerrar(sessao)
+                else:
+                    self._devolver(sessao)
+                raise
+            else:
+                self._devolver(sessao)
+        finally:
+            self._vagas.release()
+
+    def fechar(self):
+        """Encerra (QUIT) todas as sessões ociosas"""
+        with self._lock:
+            livres, self._livres = list(self._livres), deque()
+        for sessao, _ in livres:
+            self._encerrar(sessao)
+
+    @property
+    def ociosas(self) -> int:
+        return len(self._livres)
+
+    def _obter(self) -> smtplib.SMTP:
+        while True:
+            with self._lock:
+                if not self._livres:
+                    break
+                # A mais recente primeiro: menos chance de o servidor tê-la derrubado
+                sessao, devolvida_em = self._livres.pop()
+
+            if time.monotonic() - devolvida_em < self._verificar_apos or self._viva(sessao):
+                return sessao
+            self._encerrar(sessao)
+
+        return self._abrir()
+
+    def _devolver(self, sessao: smtplib.SMTP):
+        with self._lock:
+            self._livres.append((sessao, time.monotonic()))
+
+    @staticmethod
+    def _viva(sessao: smtplib.SMTP) -> bool:
+        try:
+            codigo, _ = sessao.noop()
+            return codigo == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @staticmethod
+    def _encerrar(sessao: smtplib.SMTP):
+        try:
+            sessao.quit()
+        except (smtplib.SMTPException, OSError):
+            sessao.close()
@@ -3,17 +3,32 @@ Testes unitários para os endpoints de cobranças.
 Cobre todos os cenários de sucesso e erro dos endpoints.
 """
 
+import threading
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import Mock, patch, MagicMock
 
+from tinydb import TinyDB
+from tinydb.storages import MemoryStorage
+
 from main import app
 from models.cobranca_model import Cobranca, NovaCobranca, StatusCobranca, ProcessarPagamentoRequest
+from repositories.cobranca_repository import CobrancaRepository
+from services.fila_cobranca_service import iniciar_processamento, obter_processamento
 
 
 client = TestClient(app)
 
 
+class MemoryDatabase:
+    """Database em memória com a mesma interface get_table da classe Database"""
+    def __init__(self):
+        self._db = TinyDB(storage=MemoryStorage)
+
+    def get_table(self, name: str):
+        return self._db.table(name)
+
+
 # ==================== FIXTURES ====================
 
 @pytest.fixture
@@ -157,3 +172,160 @@ def test_criar_cobranca_exception_generica(nova_cobranca_valida):
         assert response.status_code == 422
         assert "DADOS_INVALIDOS" in str(response.json())
 
+
+
+# ==================== TESTES POST /processaCobrancasEmFila ====================
+
+def test_processar_cobrancas_em_fila(cobranca_paga):
+    """Testa processamento síncrono da fila - devolve as cobranças pagas"""
+    with patch('routers.cobranca.get_db'), \
+         patch('routers.cobranca.processar_fila') as mock_processar:
+
+        mock_processar.return_value = [cobranca_paga]
+
+        response = client.post("/processaCobrancasEmFila")
+
+        assert response.status_code == 200
+        assert [c["status"] for c in response.json()] == ["PAGA"]
+        mock_processar.assert_called_once()
+
+
+@pytest.fixture
+def fila_em_memoria():
+    """Banco em memória com 5 cobranças pendentes e 2 pagas"""
+    db = MemoryDatabase()
+    repo = CobrancaRepository(db)
+    for status_cobranca in ["PENDENTE"] * 5 + ["PAGA"] * 2:
+        repo.create(NovaCobranca(ciclista=1, valor=10.0, status=status_cobranca))
+    with patch('routers.cobranca.get_db', return_value=db):
+        yield db
+
+
+def test_processar_cobrancas_em_segundo_plano(fila_em_memoria):
+    """Testa processamento em segundo plano - progresso e resultados em páginas"""
+    response = client.post("/processaCobrancasEmFila", params={"emSegundoPlano": True})
+
+    assert response.status_code == 202
+    id_processamento = response.json()["id"]
+    obter_processamento(id_processamento).aguardar(5)
+
+    progresso = client.get(f"/processaCobrancasEmFila/{id_processamento}").json()
+    assert progresso["status"] == "CONCLUIDO"
+    assert (progresso["total"], progresso["processadas"], progresso["falhas"], progresso["restantes"]) == (5, 5, 0, 0)
+
+    pagina = client.get(
+        f"/processaCobrancasEmFila/{id_processamento}/cobrancas", params={"pagina": 2, "tamanho": 2}
+    ).json()
+    assert [c["id"] for c in pagina["itens"]] == [3, 4]
+    assert pagina["total"] == 5
+    assert pagina["proximaPagina"] == 3
+
+    ultima = client.get(
+        f"/processaCobrancasEmFila/{id_processamento}/cobrancas", params={"pagina": 3, "tamanho": 2}
+    ).json()
+    assert [c["id"] for c in ultima["itens"]] == [5]
+    assert ultima["proximaPagina"] is None
+
+
+def test_processar_em_segundo_plano_conta_blocos_com_falha(fila_em_memoria):
+    """Testa que um bloco que falha na gravação entra nas falhas e os demais seguem"""
+    pagar = CobrancaRepository.pagar_pendentes
+    chamadas = []
+
+    def pagar_falhando_no_primeiro(repo, doc_ids):
+        chamadas.append(doc_ids)
+        if len(chamadas) == 1:
+            raise IOError("disco cheio")
+        return pagar(repo, doc_ids)
+
+    with patch.object(CobrancaRepository, 'pagar_pendentes', pagar_falhando_no_primeiro):
+        processamento = iniciar_processamento(fila_em_memoria, tamanho_lote=2)
+        processamento.aguardar(5)
+
+    progresso = processamento.progresso()
+    assert progresso.status == "CONCLUIDO"
+    assert (progresso.processadas, progresso.falhas, progresso.restantes) == (3, 2, 0)
+    assert progresso.erro == "disco cheio"
+
+
+def test_processar_com_outro_em_andamento_responde_409(fila_em_memoria):
+    """Testa que um segundo processamento é recusado na hora em vez de esperar"""
+    from services.fila_cobranca_service import _fila_lock
+
+    with _fila_lock:
+        sincrono = client.post("/processaCobrancasEmFila")
+        em_segundo_plano = client.post("/processaCobrancasEmFila?emSegundoPlano=true")
+
+    for response in (sincrono, em_segundo_plano):
+        assert response.status_code == 409
+        assert response.json()["detail"]["codigo"] == "PROCESSAMENTO_EM_ANDAMENTO"
+    assert len(CobrancaRepository(fila_em_memoria).ids_pendentes()) == 5
+
+    # Terminado o anterior, um novo processamento é aceito
+    response = client.post("/processaCobrancasEmFila")
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+
+
+def test_processamento_em_segundo_plano_libera_a_fila_ao_terminar(fila_em_memoria):
+    """Testa que o processamento em segundo plano segura a fila só enquanto roda"""
+    from services.fila_cobranca_service import ProcessamentoEmAndamento, processar_fila
+
+    liberar = threading.Event()
+    pagar = CobrancaRepository.pagar_pendentes
+
+    def pagar_devagar(repo, doc_ids):
+        liberar.wait(5)
+        return pagar(repo, doc_ids)
+
+    with patch.object(CobrancaRepository, 'pagar_pendentes', pagar_devagar):
+        processamento = iniciar_processamento(fila_em_memoria)
+        with pytest.raises(ProcessamentoEmAndamento):
+            processar_fila(fila_em_memoria)
+        liberar.set()
+        processamento.aguardar(5)
+
+    assert processamento.progresso().status == "CONCLUIDO"
+    assert processar_fila(fila_em_memoria) == []
+
+
+def test_processamento_encerrado_antes_de_liberar_a_fila(fila_em_memoria):
+    """Testa que quem pega a fila em seguida já vê o processamento anterior encerrado"""
+    import services.fila_cobranca_service as fila
+
+    vistos = []
+
+    class LockEspiao:
+        def __init__(self):
+            self._lock = threading.Lock()
+
+        def acquire(self, *args, **kwargs):
+            return self._lock.acquire(*args, **kwargs)
+
+        def release(self):
+            # A thread pode terminar antes de iniciar_processamento retornar
+            ultimo = next(reversed(fila._processamentos.values()))
+            vistos.append(ultimo.progresso())
+            self._lock.release()
+
+        __enter__ = acquire
+
+        def __exit__(self, *exc):
+            self.release()
+
+    with patch.object(fila, '_fila_lock', LockEspiao()):
+        processamento = iniciar_processamento(fila_em_memoria)
+        processamento.aguardar(5)
+
+    assert [(p.status, p.finalizadoEm is not None) for p in vistos] == [("CONCLUIDO", True)]
+
+
+def test_processamento_nao_encontrado():
+    """Testa consulta de processamento inexistente"""
+    response = client.get("/processaCobrancasEmFila/inexistente")
+
+    assert response.status_code == 404
+    assert "PROCESSAMENTO_NAO_ENCONTRADO" in str(response.json())
+
+    response = client.get("/processaCobrancasEmFila/inexistente/cobrancas")
+    assert response.status_code == 404
@@ -179,3 +179,108 @@ def test_enviar_email_exception_generica(novo_email_valido):
         assert response.status_code == 422
         assert "DADOS_INVALIDOS" in str(response.json())
 
+
+
+# ==================== TESTES POST /enviarEmails ====================
+
+class MemoryDatabase:
+    """Database em memória com a mesma interface get_table da classe Database"""
+    def __init__(self):
+        from tinydb import TinyDB
+        from tinydb.storages import MemoryStorage
+        self._db = TinyDB(storage=MemoryStorage)
+
+    def get_table(self, name: str):
+        return self._db.table(name)
+
+
+def test_enviar_emails_lote_resultado_por_item():
+    """Testa envio em lote: um resultado por item, na ordem, com falhas isoladas"""
+    banco = MemoryDatabase()
+    lote = [
+        {"destinatario": "a@example.com", "assunto": "A", "corpo": "Corpo A"},
+        {"destinatario": "invalido", "assunto": "B", "corpo": "Corpo B"},
+        {"email": "c@example.com", "assunto": "C", "mensagem": "Corpo C"},
+    ]
+
+    with patch('routers.email.get_db', return_value=banco), \
+         patch('routers.email.email_service') as mock_service:
+        mock_service.enviar_emails.return_value = [(True, None), (False, "Destinatário recusado")]
+
+        response = client.post("/enviarEmails", json=lote)
+
+    assert response.status_code == 200
+    corpo = response.json()
+    assert len(corpo) == 3
+    assert corpo[0]["email"]["enviado"] is True
+    assert corpo[0]["erro"] is None
+    assert corpo[1]["email"] is None
+    assert corpo[1]["erro"]["codigo"] == "DADOS_INVALIDOS"
+    assert corpo[2]["email"]["destinatario"] == "c@example.com"
+    assert corpo[2]["email"]["enviado"] is False
+    assert corpo[2]["erro"]["codigo"] == "ERRO_ENVIO_EMAIL"
+
+    # Os dois válidos saem numa única chamada (uma sessão SMTP)
+    mock_service.enviar_emails.assert_called_once_with([
+        ("a@example.com", "A", "Corpo A", None),
+        ("c@example.com", "C", "Corpo C", None),
+    ])
+    assert len(banco.get_table('emails')) == 2
+
+
+def test_enviar_emails_lote_repetido_com_chave_nao_duplica():
+    """Testa que repetir um lote com as mesmas chaves só reenvia o que não saiu"""
+    banco = MemoryDatabase()
+    lote = [
+        {"email": "a@example.com", "assunto": "A", "mensagem": "Corpo A", "chave": "outbox-1"},
+        {"email": "b@example.com", "assunto": "B", "mensagem": "Corpo B", "chave": "outbox-2"},
+    ]
+
+    with patch('routers.email.get_db', return_value=banco), \
+         patch('routers.email.email_service') as mock_service:
+        mock_service.enviar_emails.return_value = [(True, None), (False, "Timeout")]
+        client.post("/enviarEmails", json=lote)
+
+        mock_service.enviar_emails.reset_mock()
+        mock_service.enviar_emails.return_value = [(True, None)]
+        response = client.post("/enviarEmails", json=lote)
+
+    assert response.status_code == 200
+    corpo = response.json()
+    assert [item["email"]["enviado"] for item in corpo] == [True, True]
+    assert [item["email"]["id"] for item in corpo] == [1, 2]
+    mock_service.enviar_emails.assert_called_once_with([("b@example.com", "B", "Corpo B", None)])
+    assert len(banco.get_table('emails')) == 2
+
+
+def test_enviar_emails_lote_vazio():
+    """Testa envio em lote sem itens"""
+    with patch('routers.email.get_db', return_value=MemoryDatabase()), \
+         patch('routers.email.email_service') as mock_service:
+        mock_service.enviar_emails.return_value = []
+
+        response = client.post("/enviarEmails", json=[])
+
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_enviar_emails_lote_acima_do_maximo():
+    """Testa que lotes maiores que EMAILS_LOTE_MAXIMO são recusados sem tocar no banco"""
+    lote = [{"email": f"u{i}@example.com", "assunto": "A", "mensagem": "M"} for i in range(3)]
+    with patch('routers.email.EMAILS_LOTE_MAXIMO', 2), \
+         patch('routers.email.get_db') as mock_get_db, \
+         patch('routers.email.email_service') as mock_service:
+        response = client.post("/enviarEmails", json=lote)
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["codigo"] == "DADOS_INVALIDOS"
+    mock_get_db.assert_not_called()
+    mock_service.enviar_emails.assert_not_called()
+
+
+def test_enviar_emails_lote_maximo_comporta_lote_da_outbox():
+    """O padrão aceita pelo menos os lotes de 50 da outbox do servico-aluguel"""
+    from routers.email import EMAILS_LOTE_MAXIMO
+
+    assert EMAILS_LOTE_MAXIMO >= 50
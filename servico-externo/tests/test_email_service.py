@@ -0,0 +1,117 @@
+"""
+Testes do EmailService com pool de sessões SMTP.
+As sessões são simuladas; nenhum servidor SMTP é contatado.
+"""
+
+import smtplib
+import pytest
+from unittest.mock import MagicMock
+
+from services.email_service import EmailService
+from services.smtp_pool import PoolSMTP, sessao_quebrada
+
+
+@pytest.fixture
+def servico(monkeypatch):
+    monkeypatch.setenv("SMTP_USERNAME", "usuario")
+    monkeypatch.setenv("SMTP_PASSWORD", "senha")
+    servico = EmailService()
+    servico.sessoes = []
+
+    def abrir():
+        sessao = MagicMock()
+        sessao.noop.return_value = (250, b"Ok")
+        servico.sessoes.append(sessao)
+        return sessao
+
+    servico.pool = PoolSMTP(abrir, tamanho=2, verificar_apos=30)
+    return servico
+
+
+def test_sessao_reaproveitada_entre_envios(servico):
+    assert servico.enviar_email("a@example.com", "A", "Corpo") == (True, None)
+    assert servico.enviar_email("b@example.com", "B", "Corpo") == (True, None)
+
+    assert len(servico.sessoes) == 1
+    assert servico.sessoes[0].send_message.call_count == 2
+
+
+def test_sessao_ociosa_e_verificada_com_noop(servico):
+    servico.pool._verificar_apos = 0
+    servico.enviar_email("a@example.com", "A", "Corpo")
+    servico.sessoes[0].noop.side_effect = smtplib.SMTPServerDisconnected("fechada")
+
+    assert servico.enviar_email("b@example.com", "B", "Corpo") == (True, None)
+
+    assert len(servico.sessoes) == 2
+    servico.sessoes[1].send_message.assert_called_once()
+
+
+def test_desconexao_reabre_sessao_e_reenvia(servico):
+    servico.enviar_email("a@example.com", "A", "Corpo")
+    servico.sessoes[0].send_message.side_effect = smtplib.SMTPServerDisconnected("caiu")
+
+    assert servico.enviar_email("b@example.com", "B", "Corpo") == (True, None)
+
+    assert len(servico.sessoes) == 2
+    assert servico.pool.ociosas == 1
+
+
+def test_lote_usa_uma_sessao_e_isola_destinatario_recusado(servico):
+    servico.enviar_email("a@example.com", "A", "Corpo")
+
+    def enviar(msg):
+        if msg["To"] == "recusado@example.com":
+            raise smtplib.SMTPRecipientsRefused({"recusado@example.com": (550, b"no")})
+    servico.sessoes[0].send_message.side_effect = enviar
+
+    resultados = servico.enviar_emails([
+        ("a@example.com", "A", "Corpo", None),
+        ("recusado@example.com", "B", "Corpo", None),
+        ("c@example.com", "C", "Corpo", "<p>Corpo</p>"),
+    ])
+
+    assert resultados[0] == (True, None)
+    assert resultados[1][0] is False
+    assert "Destinatário recusado" in resultados[1][1]
+    assert resultados[2] == (True, None)
+    assert len(servico.sessoes) == 1
+
+
+def test_falha_ao_abrir_sessao_reporta_erro_em_todos(servico):
+    servico.pool._abrir = MagicMock(side_effect=smtplib.SMTPAuthenticationError(535, b"negado"))
+
+    resultados = servico.enviar_emails([("a@example.com", "A", "Corpo", None)] * 2)
+
+    assert all(not sucesso and "Erro de autenticação SMTP" in erro for sucesso, erro in resultados)
+    assert servico.pool._abrir.call_count == 2
+
+
+def test_fechar_encerra_sessoes(servico):
+    servico.enviar_email("a@example.com", "A", "Corpo")
+
+    servico.fechar()
+
+    servico.sessoes[0].quit.assert_called_once()
+    assert servico.pool.ociosas == 0
+
+
+def test_modo_simulacao_nao_abre_sessao(monkeypatch):
+    monkeypatch.delenv("SMTP_USERNAME", raising=False)
+    monkeypatch.delenv("SMTP_PASSWORD", raising=False)
+    servico = EmailService()
+    servico.pool._abrir = MagicMock()
+
+    assert servico.enviar_emails([("a@example.com", "A", "Corpo", None)] * 3) == [(True, None)] * 3
+    servico.pool._abrir.assert_not_called()
+
+
+@pytest.mark.parametrize("erro, quebrada", [
+    (smtplib.SMTPServerDisconnected("x"), True),
+    (smtplib.SMTPResponseException(421, b"bye"), True),
+    (ConnectionResetError(), True),
+    (smtplib.SMTPRecipientsRefused({}), False),
+    (smtplib.SMTPDataError(554, b"rejeitada"), False),
+])
+def test_sessao_quebrada(erro, quebrada):
+    assert sessao_quebrada(erro) is quebrada
@@ -6,6 +6,8 @@ Testa diretamente os métodos dos repositórios para aumentar a cobertura.
 import pytest
 from unittest.mock import Mock, MagicMock, patch
 from datetime import datetime, timezone
+from tinydb import TinyDB
+from tinydb.storages import MemoryStorage
 
 from repositories.cartao_repository import CartaoRepository
 from repositories.cobranca_repository import CobrancaRepository
@@ -15,16 +17,25 @@ from models.cobranca_model import NovaCobranca, StatusCobranca
 from models.email_model import NovoEmail
 
 
+class MemoryDatabase:
+    """Database em memória com a mesma interface get_table da classe Database"""
+    def __init__(self):
+        self._db = TinyDB(storage=MemoryStorage)
+
+    def get_table(self, name: str):
+        return self._db.table(name)
+
+
+@pytest.fixture
+def memory_db():
+    return MemoryDatabase()
+
+
 # ==================== TESTES CartaoRepository ====================
 
-def test_cartao_repository_create_com_numero_curto():
+def test_cartao_repository_create_com_numero_curto(memory_db):
     """Testa criação de validação com número de cartão curto (<= 8 dígitos)"""
-    mock_db = MagicMock()
-    mock_table = MagicMock()
-    mock_db.get_table.return_value = mock_table
-    mock_table.all.return_value = []
-    
-    repo = CartaoRepository(mock_db)
+    repo = CartaoRepository(memory_db)
     
     # Usa um número válido para passar pela validação do Pydantic
     # Mas testa a lógica de mascaramento diretamente
@@ -35,14 +46,11 @@ def test_cartao_repository_create_com_numero_curto():
         cvv="123"
     )
     
-    # Mock do insert
-    mock_table.insert = Mock()
-    
     result = repo.create(request, False, "Cartão inválido")
     
     # Verifica que foi criado
     assert result is not None
-    mock_table.insert.assert_called_once()
+    assert len(memory_db.get_table('validacoes_cartao')) == 1
     
     # Testa mascaramento de número curto diretamente no código
     # Criando um mock request com número curto para testar a lógica
@@ -104,15 +112,9 @@ def test_cartao_repository_get_all():
 
 # ==================== TESTES CobrancaRepository ====================
 
-def test_cobranca_repository_create():
+def test_cobranca_repository_create(memory_db):
     """Testa criação de cobrança"""
-    mock_db = MagicMock()
-    mock_table = MagicMock()
-    mock_db.get_table.return_value = mock_table
-    mock_table.all.return_value = []
-    mock_table.insert = Mock()
-
-    repo = CobrancaRepository(mock_db)
+    repo = CobrancaRepository(memory_db)
 
     nova_cobranca = NovaCobranca(
         ciclista=1,
@@ -123,7 +125,7 @@ def test_cobranca_repository_create():
 
     assert result.id == 1
     assert result.status == "PAGA"  # Repositório usa PAGA como padrão
-    mock_table.insert.assert_called_once()
+    assert len(memory_db.get_table('cobrancas')) == 1
 
 
 def test_cobranca_repository_get_by_id_not_found():
@@ -187,17 +189,108 @@ def test_cobranca_repository_update_status_nao_encontrada():
     assert result is None
 
 
+def criar_cobrancas(repo, status_list):
+    return [repo.create(NovaCobranca(ciclista=1, valor=10.0, status=s)) for s in status_list]
+
+
+def test_cobranca_repository_processar_pendentes(memory_db):
+    """Testa que só as cobranças pendentes são pagas, na ordem da fila"""
+    repo = CobrancaRepository(memory_db)
+    criar_cobrancas(repo, ["PENDENTE", "PAGA", "PENDENTE", "FALHA"])
+
+    processadas = repo.processar_pendentes()
+
+    assert [c.id for c in processadas] == [1, 3]
+    assert all(c.status == "PAGA" and c.horaFinalizacao for c in processadas)
+    assert repo.get_by_id(4).status == "FALHA"
+    assert repo.processar_pendentes() == []
+
+
+def test_cobranca_repository_processar_pendentes_em_blocos(memory_db):
+    """Testa que cada bloco da fila é gravado numa única escrita"""
+    repo = CobrancaRepository(memory_db)
+    criar_cobrancas(repo, ["PENDENTE"] * 5 + ["PAGA"] * 3)
+    repo.indice_status.ids("PENDENTE")
+
+    escritas = []
+    update = repo.table.update
+    repo.table.update = lambda *args, **kwargs: escritas.append(kwargs["doc_ids"]) or update(*args, **kwargs)
+
+    processadas = repo.processar_pendentes(tamanho_lote=2)
+
+    assert len(processadas) == 5
+    assert escritas == [[1, 2], [3, 4], [5]]
+
+
+def test_cobranca_repository_indice_acompanha_alteracoes_externas(memory_db):
+    """Testa que o índice de status é refeito quando a tabela muda por fora do repositório"""
+    repo = CobrancaRepository(memory_db)
+    criar_cobrancas(repo, ["PENDENTE", "PENDENTE"])
+    assert repo.indice_status.ids("PENDENTE") == [1, 2]
+
+    # Inserção direta (sem status = PENDENTE) e pagamento por fora do repositório
+    memory_db.get_table('cobrancas').insert({'id': 3, 'ciclista': 2, 'valor': 5.0})
+    memory_db.get_table('cobrancas').update({'status': 'PAGA'}, doc_ids=[1])
+
+    processadas = repo.processar_pendentes()
+
+    assert [c.id for c in processadas] == [2, 3]
+    assert repo.indice_status.ids("PENDENTE") == []
+
+
+def test_cobranca_repository_pagar_pendentes_ignora_cobrancas_removidas(memory_db):
+    """Testa que uma cobrança removida depois da consulta ao índice não falha o bloco"""
+    repo = CobrancaRepository(memory_db)
+    criar_cobrancas(repo, ["PENDENTE", "PENDENTE", "PENDENTE"])
+    pendentes = repo.ids_pendentes()
+    memory_db.get_table('cobrancas').remove(doc_ids=[1])
+
+    # A cobrança 3 some entre a filtragem e a escrita: a escrita é refeita sem ela
+    get = repo.table.get
+
+    def get_e_remove(*args, **kwargs):
+        docs = get(*args, **kwargs)
+        if get(doc_id=3) is not None:
+            memory_db.get_table('cobrancas').remove(doc_ids=[3])
+        return docs
+
+    repo.table.get = get_e_remove
+    pagas = repo.pagar_pendentes(pendentes)
+
+    assert [c.id for c in pagas] == [2]
+    assert repo.get_by_id(2).status == "PAGA"
+    assert repo.ids_pendentes() == []
+
+
+def test_cobranca_repository_indice_refeito_em_nova_geracao_do_banco(memory_db):
+    """Testa que o índice é refeito após reset/restauração mesmo sem mudar a contagem"""
+    repo = CobrancaRepository(memory_db)
+    criar_cobrancas(repo, ["PENDENTE", "PENDENTE"])
+    assert repo.indice_status.ids("PENDENTE") == [1, 2]
+
+    memory_db.get_table('cobrancas').update({'status': 'PAGA'}, doc_ids=[1])
+    memory_db.geracao = 1
+
+    assert repo.indice_status.ids("PENDENTE") == [2]
+
+
+def test_cobranca_repository_update_status_atualiza_indice(memory_db):
+    """Testa que update_status tira a cobrança da fila de pendentes"""
+    repo = CobrancaRepository(memory_db)
+    criar_cobrancas(repo, ["PENDENTE", "PENDENTE"])
+    repo.indice_status.ids("PENDENTE")
+
+    repo.update_status(1, StatusCobranca.PAGA)
+
+    assert repo.indice_status.ids("PENDENTE") == [2]
+    assert [c.id for c in repo.processar_pendentes()] == [2]
+
+
 # ==================== TESTES EmailRepository ====================
 
-def test_email_repository_create():
+def test_email_repository_create(memory_db):
     """Testa criação de e-mail"""
-    mock_db = MagicMock()
-    mock_table = MagicMock()
-    mock_db.get_table.return_value = mock_table
-    mock_table.all.return_value = []
-    mock_table.insert = Mock()
-    
-    repo = EmailRepository(mock_db)
+    repo = EmailRepository(memory_db)
     
     novo_email = NovoEmail(
         destinatario="teste@example.com",
@@ -210,7 +303,7 @@ def test_email_repository_create():
     assert result.id == 1
     assert result.enviado is False
     assert result.data_envio is None
-    mock_table.insert.assert_called_once()
+    assert len(memory_db.get_table('emails')) == 1
 
 
 def test_email_repository_get_by_id_not_found():
@@ -242,3 +335,55 @@ def test_email_repository_marcar_como_enviado_nao_existe():
     
     assert result is None
 
+
+
+def test_email_repository_create_many_e_marcar_como_enviados(memory_db):
+    """Testa criação e marcação em lote (IDs consecutivos, só os enviados mudam)"""
+    repo = EmailRepository(memory_db)
+    repo.create(NovoEmail(destinatario="antes@example.com", assunto="A", corpo="A"))
+
+    criados = repo.create_many([
+        NovoEmail(destinatario=f"c{i}@example.com", assunto="Lote", corpo=f"Corpo {i}")
+        for i in range(3)
+    ])
+    enviados = repo.marcar_como_enviados([criados[0], criados[2]])
+
+    assert [e.id for e in criados] == [2, 3, 4]
+    assert [e.id for e in enviados] == [2, 4]
+    assert all(e.enviado and e.data_envio for e in enviados)
+    assert repo.get_by_id(3).enviado is False
+    assert repo.get_by_id(4).enviado is True
+    assert repo.create_many([]) == []
+
+
+# ==================== TESTES UTF8JSONStorage ====================
+
+def test_storage_json_suporta_leituras_e_escritas_concorrentes(tmp_path):
+    """Leituras em paralelo com escritas nunca veem o arquivo pela metade"""
+    import threading
+    from tinydb import TinyDB
+    from database.database import UTF8JSONStorage
+
+    db = TinyDB(tmp_path / "db.json", storage=UTF8JSONStorage)
+    tabela = db.table("cobrancas")
+    tabela.insert_multiple({"id": i, "descricao": "x" * 50} for i in range(200))
+    erros = []
+
+    def trabalhar(n):
+        try:
+            for i in range(30):
+                if n % 2:
+                    tabela.update({"descricao": "y" * (i % 7 * 10)}, doc_ids=[n * 5 + 1])
+                else:
+                    assert len(tabela.all()) == 200
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=trabalhar, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    db.close()
+
+    assert erros == []
@@ -0,0 +1,178 @@
+"""
+Testes do backend SQLite.
+Garante que os repositórios funcionam sem alteração sobre as tabelas SQLite.
+"""
+
+import pytest
+from tinydb import Query
+
+from database.sqlite_backend import SQLiteDatabase
+from repositories.cartao_repository import CartaoRepository
+from repositories.cobranca_repository import CobrancaRepository
+from repositories.email_repository import EmailRepository
+from models.cartao_model import ValidarCartaoRequest
+from models.cobranca_model import NovaCobranca, StatusCobranca
+from models.email_model import NovoEmail
+
+
+class DatabaseWrapper:
+    """Wrapper para simular a classe Database usando o backend SQLite"""
+    def __init__(self, sqlite_db):
+        self._db = sqlite_db
+
+    def get_table(self, name: str):
+        return self._db.table(name)
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    db = SQLiteDatabase(tmp_path / "externos.sqlite3")
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def db(sqlite_db):
+    return DatabaseWrapper(sqlite_db)
+
+
+def test_modo_wal_ativado(sqlite_db):
+    """O banco é aberto em modo WAL"""
+    with sqlite_db.transacao() as conn:
+        modo = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    assert modo == "wal"
+
+
+def test_indices_criados(sqlite_db):
+    """Campos consultados pelos repositórios têm índice"""
+    sqlite_db.table('cobrancas')
+    with sqlite_db.transacao() as conn:
+        indices = {nome for (nome,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'cobrancas'"
+        )}
+    assert {"idx_cobrancas_id", "idx_cobrancas_status", "idx_cobrancas_ciclista"} <= indices
+
+
+def test_consulta_indexada_usa_indice(sqlite_db):
+    """Igualdade em campo indexado é resolvida pelo índice do SQLite"""
+    tabela = sqlite_db.table('cobrancas')
+    sql, params = tabela._filtro_sql((Query().status == "PENDENTE") & (Query().valor > 10))
+
+    with sqlite_db.transacao() as conn:
+        plano = " ".join(row[-1] for row in conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT doc_id, data FROM cobrancas{sql}", params
+        ))
+    assert "idx_cobrancas_status" in plano
+
+
+def test_api_de_tabela(sqlite_db):
+    """insert/get/search/update/remove/all se comportam como no TinyDB"""
+    tabela = sqlite_db.table('emails')
+    doc_id = tabela.insert({"id": 1, "assunto": "A", "enviado": False})
+    tabela.insert({"id": 2, "assunto": "B", "enviado": False})
+
+    assert tabela.get(Query().id == 1)["assunto"] == "A"
+    assert tabela.get(doc_id=doc_id).doc_id == doc_id
+    assert len(tabela.search(Query().enviado == False)) == 2
+
+    assert tabela.update({"enviado": True}, Query().id == 2) == [2]
+    assert tabela.get(Query().id == 2)["enviado"] is True
+
+    assert tabela.remove(Query().id == 1) == [1]
+    assert [d["id"] for d in tabela.all()] == [2]
+    assert len(tabela) == 1
+
+    tabela.truncate()
+    assert tabela.all() == []
+
+
+def test_insert_multiple_devolve_doc_ids_do_lote(sqlite_db):
+    """O lote é inserido numa só transação e os doc_ids voltam na ordem"""
+    tabela = sqlite_db.table('emails')
+    tabela.insert({"id": 1})
+
+    assert tabela.insert_multiple({"id": i} for i in range(2, 5)) == [2, 3, 4]
+    assert tabela.insert_multiple([]) == []
+    assert [d.doc_id for d in tabela.all()] == [1, 2, 3, 4]
+
+
+def test_update_ignora_doc_id_inexistente(sqlite_db):
+    """Como no TinyDB, doc_ids que não existem são ignorados e ficam fora do retorno"""
+    tabela = sqlite_db.table('emails')
+    doc_id = tabela.insert({"id": 1, "enviado": False})
+
+    assert tabela.update({"enviado": True}, doc_ids=[doc_id, 99]) == [doc_id]
+    assert tabela.get(doc_id=doc_id)["enviado"] is True
+
+
+def test_transacao_aninhada_desfaz_so_o_bloco_interno(sqlite_db):
+    """Os níveis internos de transacao() viram savepoints"""
+    tabela = sqlite_db.table('emails')
+
+    with sqlite_db.transacao():
+        tabela.insert({"id": 1})
+        with pytest.raises(RuntimeError):
+            with sqlite_db.transacao():
+                tabela.insert({"id": 2})
+                raise RuntimeError("falha no bloco interno")
+        tabela.update({"enviado": True}, Query().id == 1)
+
+    assert [(d["id"], d.get("enviado")) for d in tabela.all()] == [(1, True)]
+
+
+def test_consulta_nao_indexada_faz_varredura(sqlite_db):
+    """Condições sem índice continuam funcionando"""
+    tabela = sqlite_db.table('emails')
+    tabela.insert({"id": 1, "destinatario": "a@example.com"})
+    tabela.insert({"id": 2, "destinatario": "b@example.com"})
+
+    resultado = tabela.search(Query().destinatario.matches(r"b@.*"))
+    assert [d["id"] for d in resultado] == [2]
+
+
+def test_email_repository_sobre_sqlite(db):
+    repo = EmailRepository(db)
+    email = repo.create(NovoEmail(destinatario="a@example.com", assunto="Oi", corpo="Teste"))
+
+    enviado = repo.marcar_como_enviado(email.id)
+
+    assert enviado.enviado is True
+    assert len(repo.get_all()) == 1
+
+
+def test_cobranca_repository_sobre_sqlite(db):
+    repo = CobrancaRepository(db)
+    cobranca = repo.create(NovaCobranca(ciclista=1, valor=10.0, status="PENDENTE"))
+
+    atualizada = repo.update_status(cobranca.id, StatusCobranca.PAGA)
+
+    assert atualizada.status == "PAGA"
+    assert atualizada.horaFinalizacao is not None
+
+
+def test_cartao_repository_sobre_sqlite(db):
+    repo = CartaoRepository(db)
+    validacao = repo.create(
+        ValidarCartaoRequest(
+            numero_cartao="4111111111111111",
+            nome_portador="João Silva",
+            validade="12/30",
+            cvv="123"
+        ),
+        True,
+        "Cartão válido"
+    )
+
+    assert repo.get_by_id(validacao.id).nome_portador == "João Silva"
+
+
+def test_sequencias_sobre_sqlite(db):
+    """Sequências de IDs persistem e são ressemeadas também no SQLite"""
+    from database.sequencias import sequencias_de
+
+    db.get_table('emails').insert({"id": 5})
+    sequencias = sequencias_de(db)
+
+    assert sequencias.proximo('emails') == 6
+    assert sequencias.proximo('emails') == 7
+    assert db.get_table('_sequencias').all()[0]["valor"] == 7
@@ -22,3 +22,10 @@ def test_status_endpoint_ok():
     assert "timestamp" in body and isinstance(body["timestamp"], str)
 
 
+def test_metrics_endpoint():
+    client.get("/status")
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{method="GET",route="/status",status="200"}' in r.text
+    assert "process_resident_memory_bytes" in r.text
@@ -0,0 +1,38 @@
+"""
+Serialização JSON rápida das respostas.
+
+Por padrão o FastAPI converte a saída dos endpoints para tipos básicos do
+Python e depois chama ``json.dumps``. Com ``JSON_RAPIDO=1`` a aplicação passa
+a usar ``RespostaJSONRapida``, que gera os bytes direto no núcleo em Rust do
+Pydantic (``pydantic_core.to_json``), respeitando os serializadores dos
+modelos (como o alias ``bicicleta_id`` da Tranca).
+
+O formato na rede é o mesmo do ``JSONResponse``: JSON compacto em UTF-8,
+sem escapar caracteres não ASCII.
+"""
+
+import os
+from typing import Any
+
+from fastapi.datastructures import Default
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+JSON_RAPIDO = os.getenv("JSON_RAPIDO", "0").lower() in ("1", "true", "sim")
+
+
+class RespostaJSONRapida(JSONResponse):
+    """JSONResponse serializado pelo pydantic-core"""
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def classe_resposta_json(rapido: bool = JSON_RAPIDO):
+    """
+    Classe de resposta padrão da aplicação.
+
+    Sem o modo rápido devolve o mesmo marcador padrão do FastAPI, então o
+    comportamento (inclusive otimizações internas da versão instalada) não muda.
+    """
+    return RespostaJSONRapida if rapido else Default(JSONResponse)